@@ -51,8 +51,7 @@ def setup_package():
           scripts=['scripts/actinia-user',
                    'scripts/actinia-bench',
                    'scripts/actinia-algebra',
-                   'scripts/rq_custom_worker',
-                   'scripts/rq_starter',
+                   'scripts/actinia-worker',
                    'scripts/webhook-server',
                    'scripts/actinia-server'])
 
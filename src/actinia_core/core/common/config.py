@@ -121,9 +121,44 @@ class Configuration(object):
         self.PROCESS_TIME_LIMT = 600
         # Maximum number of processes in a process chain
         self.PROCESS_NUM_LIMIT = 1000
-        # The number of queues that process jobs
+        # Default maximum number of independent processes of a process chain
+        # that run concurrently, 1 runs all processes sequentially. Concurrent
+        # execution is enabled per user with a larger process parallel limit.
+        self.PROCESS_PARALLEL_LIMIT = 1
+        # The number of processes that run jobs concurrently, in case of the
+        # redis job queue this is the limit of each worker node
         self.NUMBER_OF_WORKERS = 3
 
+        """
+        QUEUE
+        """
+        # The type of the job queue: "local" runs all jobs on the host of
+        # the REST server, "redis" enqueues the jobs in a redis stream that is
+        # consumed by actinia-worker processes on any number of nodes
+        self.QUEUE_TYPE = "local"
+        # The scheduling policy of the process queue: "fifo", "round_robin"
+        # or "fair_share"
+        self.QUEUE_SCHEDULING_POLICY = "fair_share"
+        # Start interactive processes (GET requests and Sync* resources)
+        # before batch processes
+        self.QUEUE_INTERACTIVE_PRIORITY = True
+        # The fair share weights of the user roles
+        self.QUEUE_FAIR_SHARE_WEIGHTS = {"superadmin": 1, "admin": 1,
+                                         "user": 1, "guest": 1}
+        # The minimum time in seconds between two commits of the queue wait
+        # time statistics to the redis server
+        self.QUEUE_STATISTICS_INTERVAL = 5
+        # Run the jobs in pre-forked worker processes that are reused for
+        # many jobs, instead of starting a new process for each job
+        self.QUEUE_WORKER_POOL = True
+        # The number of jobs after that a pooled worker process is replaced,
+        # 0 means no limit
+        self.QUEUE_WORKER_MAX_JOBS = 100
+        # The maximum resident set size in MB of a pooled worker process,
+        # the worker is replaced after the job that exceeded it, 0 means
+        # no limit
+        self.QUEUE_WORKER_MAX_MEMORY = 1024
+
         """
         API SETTINGS
         """
@@ -140,6 +175,13 @@ class Configuration(object):
         self.FORCE_HTTPS_URLS = False
         # PLUGINS: e.g. ["actinia_satellite_plugin", "actinia_statistic_plugin"]
         self.PLUGINS = []
+        # CREDENTIAL_CACHE_TTL: The time in seconds a successful user name and
+        # password verification is cached in each server process, 0 disables
+        # the cache. Changes of other server processes take effect after
+        # this time.
+        self.CREDENTIAL_CACHE_TTL = 60
+        # CREDENTIAL_CACHE_SIZE: The maximum number of cached verifications
+        self.CREDENTIAL_CACHE_SIZE = 1024
 
         """
         REDIS
@@ -153,15 +195,32 @@ class Configuration(object):
         # Default expire time is 10 days for resource logs, that are used for
         # calculating the price of resource usage
         self.REDIS_RESOURCE_EXPIRE_TIME = 864000
+        # If True the final state of a resource is pushed via Redis pub/sub
+        # to the synchronous requests that wait for it, otherwise they poll
+        self.REDIS_RESOURCE_NOTIFICATIONS = True
+        # The time in seconds after that a waiting request reads the resource
+        # again if no notification arrived
+        self.REDIS_RESOURCE_NOTIFICATION_TIMEOUT = 5
+        # The serialization format of the resource entries: "json" or "msgpack"
+        self.REDIS_RESOURCE_ENCODING = "json"
+        # The compression of large resource entries: None or "zstd"
+        self.REDIS_RESOURCE_COMPRESSION = None
+        # The maximum number of intermediate status updates per second that
+        # a running job commits to the resource database, 0 for no limit
+        self.REDIS_RESOURCE_UPDATE_MAX_RATE = 2.0
         # The hostname of the redis work queue server
         self.REDIS_QUEUE_SERVER_URL = "127.0.0.1"
         # The port of the redis work queue server
         self.REDIS_QUEUE_SERVER_PORT = 6379
-        # This is the time the rq:job will be stored in the redis
-        self.REDIS_QUEUE_JOB_TTL = 0
-        # The base name of the redis worker queue, it will be extended by a
-        # numerical suffix that represents the worker id/number database to
-        # re-queue it, usually this is not necessary
+        # The password of the redis work queue server
+        self.REDIS_QUEUE_SERVER_PW = None
+        # The time in seconds after that a job of a worker that stopped
+        # sending heartbeats is reclaimed by another worker
+        self.REDIS_QUEUE_VISIBILITY_TIMEOUT = 60
+        # The maximum number of times a job is delivered to workers, before it
+        # is moved to the dead letter stream
+        self.REDIS_QUEUE_MAX_DELIVERIES = 3
+        # The name of the redis stream that is used as job queue
         self.WORKER_QUEUE_NAME = "job_queue"
         # The base name of the redis worker queue logfile, it will be extended
         # by a numerical suffix that represents the worker id/number
@@ -179,6 +238,45 @@ class Configuration(object):
         self.DOWNLOAD_CACHE_QUOTA = 100
         # If True the interim results (temporary mapset) are saved
         self.SAVE_INTERIM_RESULTS = False
+        # The tracking of the mapset size after each module of a process chain:
+        # "inotify" to rescan only changed directories if inotify is available,
+        # "walk" to walk the whole mapset after each module or "off"
+        self.MAPSET_SIZE_TRACKING = "inotify"
+        # If True the read-only metadata endpoints (raster and vector info,
+        # map layer, mapset and STRDS lists, STRDS info) read the mapset
+        # files directly instead of running a GRASS GIS module
+        self.METADATA_FAST_PATH = True
+        # The maximum number of cached metadata entries of the fast path
+        self.METADATA_CACHE_SIZE = 1024
+        # If True the layout of the temporary databases of jobs is cached and
+        # temporary mapsets are created without running GRASS GIS modules
+        self.TEMP_DATABASE_SKELETONS = True
+        # The number of threads that copy or link the files of mapsets
+        # that are moved to or merged into the user database
+        self.MAPSET_TRANSFER_THREADS = 4
+        # The number of bytes of the beginning and the end of the stdout and
+        # stderr output of a process, that are stored in the process log.
+        # Larger outputs are spilled to files and exported as resources
+        self.PROCESS_LOG_HEAD_SIZE = 524288
+        self.PROCESS_LOG_TAIL_SIZE = 524288
+        # The directory of the cache of rendered PNG images, an empty string
+        # disables the cache
+        self.RENDER_CACHE = "%s/actinia/workspace/render_cache" % home
+        # The maximum size of the cache of rendered PNG images in Megabyte
+        self.RENDER_CACHE_SIZE = 512
+        # The maximum number of tiles of a tile seeding job
+        self.TILE_SEED_LIMIT = 10000
+        # If True the raster, RGB and shade images are rendered directly from
+        # the raster files, if their format is supported, instead of running
+        # d.rast, d.rgb or d.shade
+        self.RENDER_NATIVE = True
+        # The maximum number of pixels of images that are rendered directly in
+        # the server process, a pixel requires about 50 bytes of memory while
+        # rendering. Larger images are rendered by a job.
+        self.RENDER_NATIVE_PIXEL_LIMIT = 2 * 1000 * 1000
+        # The maximum number of frames of a STRDS animation, larger STRDS are
+        # sampled
+        self.RENDER_FRAME_LIMIT = 1000
 
         """
         LOGGING
@@ -263,8 +361,25 @@ class Configuration(object):
         config.set('LIMITS', 'MAX_CELL_LIMIT', str(self.MAX_CELL_LIMIT))
         config.set('LIMITS', 'PROCESS_TIME_LIMT', str(self.PROCESS_TIME_LIMT))
         config.set('LIMITS', 'PROCESS_NUM_LIMIT', str(self.PROCESS_NUM_LIMIT))
+        config.set('LIMITS', 'PROCESS_PARALLEL_LIMIT',
+                   str(self.PROCESS_PARALLEL_LIMIT))
         config.set('LIMITS', 'NUMBER_OF_WORKERS', str(self.NUMBER_OF_WORKERS))
 
+        config.add_section('QUEUE')
+        config.set('QUEUE', 'QUEUE_TYPE', self.QUEUE_TYPE)
+        config.set('QUEUE', 'QUEUE_SCHEDULING_POLICY', self.QUEUE_SCHEDULING_POLICY)
+        config.set('QUEUE', 'QUEUE_INTERACTIVE_PRIORITY',
+                   str(self.QUEUE_INTERACTIVE_PRIORITY))
+        config.set('QUEUE', 'QUEUE_FAIR_SHARE_WEIGHTS',
+                   str(self.QUEUE_FAIR_SHARE_WEIGHTS))
+        config.set('QUEUE', 'QUEUE_STATISTICS_INTERVAL',
+                   str(self.QUEUE_STATISTICS_INTERVAL))
+        config.set('QUEUE', 'QUEUE_WORKER_POOL', str(self.QUEUE_WORKER_POOL))
+        config.set('QUEUE', 'QUEUE_WORKER_MAX_JOBS',
+                   str(self.QUEUE_WORKER_MAX_JOBS))
+        config.set('QUEUE', 'QUEUE_WORKER_MAX_MEMORY',
+                   str(self.QUEUE_WORKER_MAX_MEMORY))
+
         config.add_section('API')
         config.set('API', 'CHECK_CREDENTIALS', str(self.CHECK_CREDENTIALS))
         config.set('API', 'CHECK_LIMITS', str(self.CHECK_LIMITS))
@@ -272,6 +387,8 @@ class Configuration(object):
         config.set('API', 'LOGIN_REQUIRED', str(self.LOGIN_REQUIRED))
         config.set('API', 'FORCE_HTTPS_URLS', str(self.FORCE_HTTPS_URLS))
         config.set('API', 'PLUGINS', str(self.PLUGINS))
+        config.set('API', 'CREDENTIAL_CACHE_TTL', str(self.CREDENTIAL_CACHE_TTL))
+        config.set('API', 'CREDENTIAL_CACHE_SIZE', str(self.CREDENTIAL_CACHE_SIZE))
 
         config.add_section('REDIS')
         config.set('REDIS', 'REDIS_SERVER_URL', self.REDIS_SERVER_URL)
@@ -279,10 +396,25 @@ class Configuration(object):
         config.set('REDIS', 'REDIS_SERVER_PW', str(self.REDIS_SERVER_PW))
         config.set('REDIS', 'REDIS_RESOURCE_EXPIRE_TIME',
                    str(self.REDIS_RESOURCE_EXPIRE_TIME))
+        config.set('REDIS', 'REDIS_RESOURCE_NOTIFICATIONS',
+                   str(self.REDIS_RESOURCE_NOTIFICATIONS))
+        config.set('REDIS', 'REDIS_RESOURCE_NOTIFICATION_TIMEOUT',
+                   str(self.REDIS_RESOURCE_NOTIFICATION_TIMEOUT))
+        config.set('REDIS', 'REDIS_RESOURCE_ENCODING',
+                   self.REDIS_RESOURCE_ENCODING)
+        config.set('REDIS', 'REDIS_RESOURCE_COMPRESSION',
+                   str(self.REDIS_RESOURCE_COMPRESSION))
+        config.set('REDIS', 'REDIS_RESOURCE_UPDATE_MAX_RATE',
+                   str(self.REDIS_RESOURCE_UPDATE_MAX_RATE))
         config.set('REDIS', 'REDIS_QUEUE_SERVER_URL', self.REDIS_QUEUE_SERVER_URL)
         config.set('REDIS', 'REDIS_QUEUE_SERVER_PORT',
                    str(self.REDIS_QUEUE_SERVER_PORT))
-        config.set('REDIS', 'REDIS_QUEUE_JOB_TTL', str(self.REDIS_QUEUE_JOB_TTL))
+        config.set('REDIS', 'REDIS_QUEUE_SERVER_PW',
+                   str(self.REDIS_QUEUE_SERVER_PW))
+        config.set('REDIS', 'REDIS_QUEUE_VISIBILITY_TIMEOUT',
+                   str(self.REDIS_QUEUE_VISIBILITY_TIMEOUT))
+        config.set('REDIS', 'REDIS_QUEUE_MAX_DELIVERIES',
+                   str(self.REDIS_QUEUE_MAX_DELIVERIES))
         config.set('REDIS', 'WORKER_QUEUE_NAME', str(self.WORKER_QUEUE_NAME))
         config.set('REDIS', 'WORKER_LOGFILE', str(self.WORKER_LOGFILE))
 
@@ -292,6 +424,22 @@ class Configuration(object):
         config.set('MISC', 'TMP_WORKDIR', self.TMP_WORKDIR)
         config.set('MISC', 'SECRET_KEY', self.SECRET_KEY)
         config.set('MISC', 'SAVE_INTERIM_RESULTS', str(self.SAVE_INTERIM_RESULTS))
+        config.set('MISC', 'MAPSET_SIZE_TRACKING', self.MAPSET_SIZE_TRACKING)
+        config.set('MISC', 'METADATA_FAST_PATH', str(self.METADATA_FAST_PATH))
+        config.set('MISC', 'METADATA_CACHE_SIZE', str(self.METADATA_CACHE_SIZE))
+        config.set('MISC', 'TEMP_DATABASE_SKELETONS',
+                   str(self.TEMP_DATABASE_SKELETONS))
+        config.set('MISC', 'MAPSET_TRANSFER_THREADS',
+                   str(self.MAPSET_TRANSFER_THREADS))
+        config.set('MISC', 'PROCESS_LOG_HEAD_SIZE', str(self.PROCESS_LOG_HEAD_SIZE))
+        config.set('MISC', 'PROCESS_LOG_TAIL_SIZE', str(self.PROCESS_LOG_TAIL_SIZE))
+        config.set('MISC', 'RENDER_CACHE', self.RENDER_CACHE)
+        config.set('MISC', 'RENDER_CACHE_SIZE', str(self.RENDER_CACHE_SIZE))
+        config.set('MISC', 'TILE_SEED_LIMIT', str(self.TILE_SEED_LIMIT))
+        config.set('MISC', 'RENDER_NATIVE', str(self.RENDER_NATIVE))
+        config.set('MISC', 'RENDER_NATIVE_PIXEL_LIMIT',
+                   str(self.RENDER_NATIVE_PIXEL_LIMIT))
+        config.set('MISC', 'RENDER_FRAME_LIMIT', str(self.RENDER_FRAME_LIMIT))
 
         config.add_section('LOGGING')
         config.set('LOGGING', 'LOG_INTERFACE', self.LOG_INTERFACE)
@@ -373,10 +521,38 @@ class Configuration(object):
                 if config.has_option("LIMITS", "PROCESS_NUM_LIMIT"):
                     self.PROCESS_NUM_LIMIT = config.getint(
                         "LIMITS", "PROCESS_NUM_LIMIT")
+                if config.has_option("LIMITS", "PROCESS_PARALLEL_LIMIT"):
+                    self.PROCESS_PARALLEL_LIMIT = config.getint(
+                        "LIMITS", "PROCESS_PARALLEL_LIMIT")
                 if config.has_option("LIMITS", "NUMBER_OF_WORKERS"):
                     self.NUMBER_OF_WORKERS = config.getint(
                         "LIMITS", "NUMBER_OF_WORKERS")
 
+            if config.has_section("QUEUE"):
+                if config.has_option("QUEUE", "QUEUE_TYPE"):
+                    self.QUEUE_TYPE = config.get("QUEUE", "QUEUE_TYPE")
+                if config.has_option("QUEUE", "QUEUE_SCHEDULING_POLICY"):
+                    self.QUEUE_SCHEDULING_POLICY = config.get(
+                        "QUEUE", "QUEUE_SCHEDULING_POLICY")
+                if config.has_option("QUEUE", "QUEUE_INTERACTIVE_PRIORITY"):
+                    self.QUEUE_INTERACTIVE_PRIORITY = config.getboolean(
+                        "QUEUE", "QUEUE_INTERACTIVE_PRIORITY")
+                if config.has_option("QUEUE", "QUEUE_FAIR_SHARE_WEIGHTS"):
+                    self.QUEUE_FAIR_SHARE_WEIGHTS = ast.literal_eval(
+                        config.get("QUEUE", "QUEUE_FAIR_SHARE_WEIGHTS"))
+                if config.has_option("QUEUE", "QUEUE_STATISTICS_INTERVAL"):
+                    self.QUEUE_STATISTICS_INTERVAL = config.getint(
+                        "QUEUE", "QUEUE_STATISTICS_INTERVAL")
+                if config.has_option("QUEUE", "QUEUE_WORKER_POOL"):
+                    self.QUEUE_WORKER_POOL = config.getboolean(
+                        "QUEUE", "QUEUE_WORKER_POOL")
+                if config.has_option("QUEUE", "QUEUE_WORKER_MAX_JOBS"):
+                    self.QUEUE_WORKER_MAX_JOBS = config.getint(
+                        "QUEUE", "QUEUE_WORKER_MAX_JOBS")
+                if config.has_option("QUEUE", "QUEUE_WORKER_MAX_MEMORY"):
+                    self.QUEUE_WORKER_MAX_MEMORY = config.getint(
+                        "QUEUE", "QUEUE_WORKER_MAX_MEMORY")
+
             if config.has_section("API"):
                 if config.has_option("API", "CHECK_CREDENTIALS"):
                     self.CHECK_CREDENTIALS = config.getboolean(
@@ -391,6 +567,12 @@ class Configuration(object):
                     self.FORCE_HTTPS_URLS = config.getboolean("API", "FORCE_HTTPS_URLS")
                 if config.has_option("API", "PLUGINS"):
                     self.PLUGINS = ast.literal_eval(config.get("API", "PLUGINS"))
+                if config.has_option("API", "CREDENTIAL_CACHE_TTL"):
+                    self.CREDENTIAL_CACHE_TTL = config.getfloat(
+                        "API", "CREDENTIAL_CACHE_TTL")
+                if config.has_option("API", "CREDENTIAL_CACHE_SIZE"):
+                    self.CREDENTIAL_CACHE_SIZE = config.getint(
+                        "API", "CREDENTIAL_CACHE_SIZE")
 
             if config.has_section("REDIS"):
                 if config.has_option("REDIS", "REDIS_SERVER_URL"):
@@ -402,15 +584,38 @@ class Configuration(object):
                 if config.has_option("REDIS", "REDIS_RESOURCE_EXPIRE_TIME"):
                     self.REDIS_RESOURCE_EXPIRE_TIME = config.getint(
                         "REDIS", "REDIS_RESOURCE_EXPIRE_TIME")
+                if config.has_option("REDIS", "REDIS_RESOURCE_NOTIFICATIONS"):
+                    self.REDIS_RESOURCE_NOTIFICATIONS = config.getboolean(
+                        "REDIS", "REDIS_RESOURCE_NOTIFICATIONS")
+                if config.has_option("REDIS", "REDIS_RESOURCE_NOTIFICATION_TIMEOUT"):
+                    self.REDIS_RESOURCE_NOTIFICATION_TIMEOUT = config.getfloat(
+                        "REDIS", "REDIS_RESOURCE_NOTIFICATION_TIMEOUT")
+                if config.has_option("REDIS", "REDIS_RESOURCE_ENCODING"):
+                    self.REDIS_RESOURCE_ENCODING = config.get(
+                        "REDIS", "REDIS_RESOURCE_ENCODING")
+                if config.has_option("REDIS", "REDIS_RESOURCE_COMPRESSION"):
+                    compression = config.get("REDIS", "REDIS_RESOURCE_COMPRESSION")
+                    if compression in ["", "None"]:
+                        compression = None
+                    self.REDIS_RESOURCE_COMPRESSION = compression
+                if config.has_option("REDIS", "REDIS_RESOURCE_UPDATE_MAX_RATE"):
+                    self.REDIS_RESOURCE_UPDATE_MAX_RATE = config.getfloat(
+                        "REDIS", "REDIS_RESOURCE_UPDATE_MAX_RATE")
                 if config.has_option("REDIS", "REDIS_QUEUE_SERVER_URL"):
                     self.REDIS_QUEUE_SERVER_URL = config.get(
                         "REDIS", "REDIS_QUEUE_SERVER_URL")
                 if config.has_option("REDIS", "REDIS_QUEUE_SERVER_PORT"):
-                    self.REDIS_QUEUE_SERVER_PORT = config.get(
+                    self.REDIS_QUEUE_SERVER_PORT = config.getint(
                         "REDIS", "REDIS_QUEUE_SERVER_PORT")
-                if config.has_option("REDIS", "REDIS_QUEUE_JOB_TTL"):
-                    self.REDIS_QUEUE_JOB_TTL = config.get(
-                        "REDIS", "REDIS_QUEUE_JOB_TTL")
+                if config.has_option("REDIS", "REDIS_QUEUE_SERVER_PW"):
+                    self.REDIS_QUEUE_SERVER_PW = config.get(
+                        "REDIS", "REDIS_QUEUE_SERVER_PW")
+                if config.has_option("REDIS", "REDIS_QUEUE_VISIBILITY_TIMEOUT"):
+                    self.REDIS_QUEUE_VISIBILITY_TIMEOUT = config.getint(
+                        "REDIS", "REDIS_QUEUE_VISIBILITY_TIMEOUT")
+                if config.has_option("REDIS", "REDIS_QUEUE_MAX_DELIVERIES"):
+                    self.REDIS_QUEUE_MAX_DELIVERIES = config.getint(
+                        "REDIS", "REDIS_QUEUE_MAX_DELIVERIES")
                 if config.has_option("REDIS", "WORKER_QUEUE_NAME"):
                     self.WORKER_QUEUE_NAME = config.get("REDIS", "WORKER_QUEUE_NAME")
                 if config.has_option("REDIS", "WORKER_LOGFILE"):
@@ -431,6 +636,44 @@ class Configuration(object):
                 if config.has_option("MISC", "SAVE_INTERIM_RESULTS"):
                     self.SAVE_INTERIM_RESULTS = config.getboolean(
                         "MISC", "SAVE_INTERIM_RESULTS")
+                if config.has_option("MISC", "MAPSET_SIZE_TRACKING"):
+                    self.MAPSET_SIZE_TRACKING = config.get(
+                        "MISC", "MAPSET_SIZE_TRACKING")
+                if config.has_option("MISC", "METADATA_FAST_PATH"):
+                    self.METADATA_FAST_PATH = config.getboolean(
+                        "MISC", "METADATA_FAST_PATH")
+                if config.has_option("MISC", "METADATA_CACHE_SIZE"):
+                    self.METADATA_CACHE_SIZE = config.getint(
+                        "MISC", "METADATA_CACHE_SIZE")
+                if config.has_option("MISC", "TEMP_DATABASE_SKELETONS"):
+                    self.TEMP_DATABASE_SKELETONS = config.getboolean(
+                        "MISC", "TEMP_DATABASE_SKELETONS")
+                if config.has_option("MISC", "MAPSET_TRANSFER_THREADS"):
+                    self.MAPSET_TRANSFER_THREADS = config.getint(
+                        "MISC", "MAPSET_TRANSFER_THREADS")
+                if config.has_option("MISC", "PROCESS_LOG_HEAD_SIZE"):
+                    self.PROCESS_LOG_HEAD_SIZE = config.getint(
+                        "MISC", "PROCESS_LOG_HEAD_SIZE")
+                if config.has_option("MISC", "PROCESS_LOG_TAIL_SIZE"):
+                    self.PROCESS_LOG_TAIL_SIZE = config.getint(
+                        "MISC", "PROCESS_LOG_TAIL_SIZE")
+                if config.has_option("MISC", "RENDER_CACHE"):
+                    self.RENDER_CACHE = config.get("MISC", "RENDER_CACHE")
+                if config.has_option("MISC", "RENDER_CACHE_SIZE"):
+                    self.RENDER_CACHE_SIZE = config.getint(
+                        "MISC", "RENDER_CACHE_SIZE")
+                if config.has_option("MISC", "TILE_SEED_LIMIT"):
+                    self.TILE_SEED_LIMIT = config.getint(
+                        "MISC", "TILE_SEED_LIMIT")
+                if config.has_option("MISC", "RENDER_NATIVE"):
+                    self.RENDER_NATIVE = config.getboolean(
+                        "MISC", "RENDER_NATIVE")
+                if config.has_option("MISC", "RENDER_NATIVE_PIXEL_LIMIT"):
+                    self.RENDER_NATIVE_PIXEL_LIMIT = config.getint(
+                        "MISC", "RENDER_NATIVE_PIXEL_LIMIT")
+                if config.has_option("MISC", "RENDER_FRAME_LIMIT"):
+                    self.RENDER_FRAME_LIMIT = config.getint(
+                        "MISC", "RENDER_FRAME_LIMIT")
 
             if config.has_section("LOGGING"):
                 if config.has_option("LOGGING", "LOG_INTERFACE"):
@@ -502,5 +745,17 @@ class Configuration(object):
             print_warning("REDIS", "REDIS_SERVER_PW", "XXX", "XXX")
             self.REDIS_SERVER_PW = os.environ['REDIS_SERVER_PW']
 
+        if os.environ.get('REDIS_QUEUE_SERVER_URL'):
+            print_warning("REDIS", "REDIS_QUEUE_SERVER_URL")
+            self.REDIS_QUEUE_SERVER_URL = os.environ['REDIS_QUEUE_SERVER_URL']
+
+        if os.environ.get('REDIS_QUEUE_SERVER_PORT'):
+            print_warning("REDIS", "REDIS_QUEUE_SERVER_PORT")
+            self.REDIS_QUEUE_SERVER_PORT = os.environ['REDIS_QUEUE_SERVER_PORT']
+
+        if os.environ.get('REDIS_QUEUE_SERVER_PW'):
+            print_warning("REDIS", "REDIS_QUEUE_SERVER_PW", "XXX", "XXX")
+            self.REDIS_QUEUE_SERVER_PW = os.environ['REDIS_QUEUE_SERVER_PW']
+
 
 global_config = Configuration()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Cache of verified user credentials
+
+The password hashes of the users are deliberately slow to verify. Clients
+that use HTTP basic authentication, for example to poll status URLs, pay
+this cost for each request. The CredentialCache keeps successful user name
+and password verifications for CREDENTIAL_CACHE_TTL seconds. The cache keys
+are HMAC digests of user name, password and the stored password hash with a
+random key of the server process, so that neither passwords nor reusable
+digests are kept in memory. The cache is local to the server process, a
+password that was changed by another process changes the stored password
+hash and with it the cache key, so that old passwords are not accepted.
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from actinia_core.core.common.config import global_config
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class CredentialCache(object):
+    """Bounded least recently used cache of verified credentials with
+    expiration time
+    """
+
+    def __init__(self, ttl=None, max_size=None, config=None):
+        """Constructor
+
+        Args:
+            ttl (float): The time in seconds a verification is cached, 0
+                         disables the cache. CREDENTIAL_CACHE_TTL of the
+                         configuration is used if None.
+            max_size (int): The maximum number of cached verifications,
+                            CREDENTIAL_CACHE_SIZE of the configuration is
+                            used if None
+            config: The configuration, the global configuration if None
+        """
+        self._ttl = ttl
+        self._max_size = max_size
+        self.config = config if config is not None else global_config
+        self.key = os.urandom(32)
+        self.lock = threading.Lock()
+        # digest -> (user id, expiration time)
+        self.entries = OrderedDict()
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return self.config.CREDENTIAL_CACHE_TTL
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return self.config.CREDENTIAL_CACHE_SIZE
+
+    def _digest(self, user_id, password, password_hash):
+        message = ("%s\0%s\0%s" % (user_id, password, password_hash)).encode()
+        return hmac.new(self.key, message, hashlib.sha256).digest()
+
+    def get(self, user_id, password, password_hash):
+        """Check if the credentials were verified recently
+
+        Args:
+            user_id (str): The user id
+            password (str): The password
+            password_hash (str): The current password hash of the user in
+                                 the database
+
+        Returns:
+            bool:
+            True if the credentials are in the cache, False otherwise
+        """
+        if not self.ttl or not password:
+            return False
+        digest = self._digest(user_id, password, password_hash)
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return False
+            if entry[1] < time.time():
+                del self.entries[digest]
+                return False
+            self.entries.move_to_end(digest)
+            return True
+
+    def put(self, user_id, password, password_hash):
+        """Add successfully verified credentials
+
+        Args:
+            user_id (str): The user id
+            password (str): The password
+            password_hash (str): The password hash the password was
+                                 verified with
+        """
+        if not self.ttl or not password:
+            return
+        digest = self._digest(user_id, password, password_hash)
+        with self.lock:
+            self.entries[digest] = (user_id, time.time() + self.ttl)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > max(self.max_size, 0):
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        """Remove the cached verifications of a user, for example after the
+        password or the permissions changed
+
+        Args:
+            user_id (str): The user id, all verifications are removed if None
+        """
+        with self.lock:
+            if user_id is None:
+                self.entries.clear()
+                return
+            for digest in [digest for digest, entry in self.entries.items()
+                           if entry[0] == user_id]:
+                del self.entries[digest]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# The credential cache of the server process
+credential_cache = CredentialCache()
@@ -71,3 +71,21 @@ class GoogleCloudAPIError(Exception):
     def __init__(self, message):
         message = "%s:  %s" % (str(self.__class__.__name__), message)
         Exception.__init__(self, message)
+
+
+class MetadataUnavailable(Exception):
+    """Raise this exception in case the metadata of a map layer or mapset
+    can not be read directly from the mapset files
+    """
+    def __init__(self, message):
+        message = "%s:  %s" % (str(self.__class__.__name__), message)
+        Exception.__init__(self, message)
+
+
+class RenderUnavailable(Exception):
+    """Raise this exception in case a map layer can not be rendered directly
+    from the mapset files
+    """
+    def __init__(self, message):
+        message = "%s:  %s" % (str(self.__class__.__name__), message)
+        Exception.__init__(self, message)
@@ -115,6 +115,8 @@ class ProcessChainConverter(object):
         self.webhook_finished = None
         self.webhook_update = None
         self.webhook_auth = None
+        # Set False by the process chain to switch off the mapset size tracking
+        self.mapset_size_tracking = True
 
     def process_chain_to_process_list(self, process_chain):
 
@@ -152,6 +154,9 @@ class ProcessChainConverter(object):
             raise AsyncProcessError("List of processes to be executed is missing "
                                     "in the process chain definition")
 
+        if process_chain.get("mapset_size_tracking") is False:
+            self.mapset_size_tracking = False
+
         # Check for the webhooks
         if "webhooks" in process_chain:
 
@@ -476,6 +481,10 @@ class ProcessChainConverter(object):
                 "Missing module name in module description of id %s" % str(id))
 
         module_name = module_descr["module"]
+        # The (param, value) tuples of the inputs and outputs, that are used
+        # to find independent processes
+        inputs = []
+        outputs = []
 
         if "inputs" in module_descr:
 
@@ -539,6 +548,7 @@ class ProcessChainConverter(object):
                                         self.required_mapsets.append(mapset)
 
                 params.append(param)
+                inputs.append(tuple(param.split("=", 1)))
 
         if "outputs" in module_descr:
             for output in module_descr["outputs"]:
@@ -601,6 +611,7 @@ class ProcessChainConverter(object):
                 else:
                     param = "%s=%s" % (param, value)
                 params.append(param)
+                outputs.append(tuple(param.split("=", 1)))
 
                 # save the output dict in a resource export list
                 if "export" in output:
@@ -634,7 +645,9 @@ class ProcessChainConverter(object):
                         executable=module_name,
                         executable_params=params,
                         stdin_source=stdin_func,
-                        id=id)
+                        id=id,
+                        inputs=inputs,
+                        outputs=outputs)
 
             self.process_dict[id] = p
 
@@ -879,6 +892,10 @@ class ProcessChainConverter(object):
                 "Missing module name in module description of id %s" % str(id))
 
         module_name = module_descr["module"]
+        # The (param, value) tuples of the inputs and outputs, that are used
+        # to find independent processes
+        inputs = []
+        outputs = []
 
         if "inputs" in module_descr:
             for key in module_descr["inputs"]:
@@ -922,6 +939,7 @@ class ProcessChainConverter(object):
                                         self.required_mapsets.append(mapset)
 
                 parameters.append(param)
+                inputs.append(tuple(param.split("=", 1)))
 
         if "outputs" in module_descr:
             for key in module_descr["outputs"]:
@@ -941,6 +959,7 @@ class ProcessChainConverter(object):
                     else:
                         param = "%s=%s" % (key, search_string)
                     parameters.append(param)
+                    outputs.append(tuple(param.split("=", 1)))
                     # List the resource for potential export
                     if "export" in module_descr["outputs"][key]:
                         exp = module_descr["outputs"][key]["export"]
@@ -986,7 +1005,9 @@ class ProcessChainConverter(object):
                     executable=module_name,
                     executable_params=parameters,
                     stdin_source=stdin_func,
-                    id=id)
+                    id=id,
+                    inputs=inputs,
+                    outputs=outputs)
 
         self.process_dict[id] = p
 
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Dependency graph of the processes of a process list
+
+The graph is created from the declared inputs and outputs of the processes,
+their stdin references and barriers. A process depends on an earlier
+process if it reads a map or file that the earlier process writes, or if it
+writes a map or file that the earlier process reads or writes. Map names are
+compared without the mapset.
+
+Following the GRASS GIS conventions, maps of the map, group and subgroup
+parameters are modified in place and the left sides of expressions are
+written. Barriers depend on all earlier processes and all later processes
+depend on them. Barriers are:
+
+    - processes with unknown inputs or outputs, like executables and python
+      code of process chains
+    - modules that change the state of the whole mapset: the g.* modules like
+      g.region and g.remove, the t.* modules that share the temporal
+      database, the db.* modules and r.mask
+    - processes that write the MASK raster map or expressions whose outputs
+      can not be determined
+    - modules with outputs that are not known to write exactly the declared
+      names, like i.pca or r.texture that use the output as prefix of the
+      names of the written maps
+    - r.mapcalc and r3.mapcalc without the expression parameter and modules
+      that read map names or expressions from files
+    - processes with stdin that is not provided by an earlier process of the
+      list
+"""
+
+import re
+from .process_object import Process
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+BARRIER_MODULE_PREFIXES = ("g.", "t.", "db.")
+BARRIER_MODULES = ("r.mask",)
+# Modules that write exactly the maps and files of their output parameters,
+# the outputs of all other modules may be prefixes of the written names
+EXACT_OUTPUT_MODULES = frozenset((
+    "r.buffer", "r.buffer.lowmem", "r.clump", "r.colors.out", "r.composite",
+    "r.contour", "r.cost", "r.cross", "r.fill.dir", "r.geomorphon",
+    "r.grow", "r.grow.distance", "r.lake", "r.mapcalc", "r.neighbors",
+    "r.out.gdal", "r.param.scale", "r.patch", "r.proj", "r.quantile",
+    "r.random", "r.reclass", "r.recode", "r.relief", "r.resamp.interp",
+    "r.resamp.stats", "r.resample", "r.rescale", "r.series", "r.shade",
+    "r.slope.aspect", "r.stats", "r.stream.extract", "r.surf.fractal",
+    "r.surf.gauss", "r.surf.random", "r.thin", "r.to.vect", "r.univar",
+    "r.viewshed", "r.watershed", "r3.mapcalc",
+    "v.buffer", "v.clean", "v.delaunay", "v.dissolve", "v.extract",
+    "v.generalize", "v.hull", "v.import", "v.in.ogr", "v.kernel",
+    "v.out.ogr", "v.overlay", "v.patch", "v.proj", "v.random", "v.select",
+    "v.surf.bspline", "v.surf.idw", "v.surf.rst", "v.to.points", "v.to.rast",
+    "v.univar", "v.voronoi"))
+# Modules that write the maps of their expressions
+EXPRESSION_MODULES = ("r.mapcalc", "r3.mapcalc")
+# Parameters of maps that are modified in place
+WRITE_PARAMETERS = ("map", "group", "subgroup")
+# Parameters of map algebra expressions like "result = a + b"
+EXPRESSION_PARAMETERS = ("expression",)
+# Parameters of files with map names or expressions
+FILE_PARAMETERS = ("file",)
+
+NAME_PATTERN = re.compile(r"[A-Za-z0-9_.@]+")
+NUMBER_PATTERN = re.compile(r"[0-9.]+")
+ASSIGNMENT_PATTERN = re.compile(r"\s*([A-Za-z0-9_.]+)\s*=(?!=)")
+
+
+def get_names(value):
+    """Return the map and file names of a parameter value
+
+    File paths are returned as they are, map names without the mapset.
+
+    Args:
+        value (str): The parameter value
+
+    Returns:
+        set:
+        The names
+    """
+    names = set()
+    for entry in str(value).split(","):
+        entry = entry.strip()
+        if entry.startswith("/") or "://" in entry:
+            names.add(entry)
+        else:
+            names.update(_get_map_names(entry))
+    return names
+
+
+def _get_map_names(text):
+    names = set()
+    for name in NAME_PATTERN.findall(text):
+        name = name.split("@")[0]
+        if name and NUMBER_PATTERN.fullmatch(name) is None:
+            names.add(name)
+    return names
+
+
+def get_expression_access(expression):
+    """Return the names that are read and written by map algebra expressions
+
+    Args:
+        expression (str): The expressions, separated by newlines or semicolons
+
+    Returns:
+        tuple:
+        The sets of read and written names, None if the written maps can not
+        be determined
+    """
+    reads = set()
+    writes = set()
+    for statement in re.split(r"[\n;]", str(expression)):
+        if not statement.strip():
+            continue
+        match = ASSIGNMENT_PATTERN.match(statement)
+        if match is None:
+            return None
+        writes.add(match.group(1))
+        reads.update(_get_map_names(statement[match.end():]))
+    return reads, writes
+
+
+def is_barrier(process):
+    """Check if a process must not run concurrently with other processes
+
+    Args:
+        process: The process of a process list
+
+    Returns:
+        bool:
+        True if the process is a barrier
+    """
+    if isinstance(process, Process) is False:
+        return True
+    if process.inputs is None or process.outputs is None:
+        return True
+    if process.exec_type != "grass":
+        return process.exec_type != "exec"
+    if (process.executable.startswith(BARRIER_MODULE_PREFIXES)
+            or process.executable in BARRIER_MODULES):
+        return True
+    if process.outputs and process.executable not in EXACT_OUTPUT_MODULES:
+        return True
+    params = [param for param, value in process.inputs]
+    if any(param in FILE_PARAMETERS for param in params):
+        return True
+    return (process.executable in EXPRESSION_MODULES
+            and not any(param in EXPRESSION_PARAMETERS for param in params))
+
+
+def get_access(process):
+    """Return the names that a process reads and writes
+
+    Args:
+        process (Process): The process with declared inputs and outputs
+
+    Returns:
+        tuple:
+        The sets of read and written names, None if they can not be
+        determined
+    """
+    reads = set()
+    writes = set()
+    for param, value in process.inputs:
+        if param in EXPRESSION_PARAMETERS:
+            access = get_expression_access(value)
+            if access is None:
+                return None
+            reads.update(access[0])
+            writes.update(access[1])
+        elif param in WRITE_PARAMETERS:
+            writes.update(get_names(value))
+        else:
+            reads.update(get_names(value))
+    for param, value in process.outputs:
+        writes.update(get_names(value))
+    return reads, writes
+
+
+class ProcessGraph(object):
+    """The dependencies of the processes of a process list
+    """
+
+    def __init__(self, process_list):
+        """Constructor
+
+        Args:
+            process_list (list): The processes in the order of the process list
+        """
+        self.processes = list(process_list)
+        # The indices of the processes each process depends on
+        self.dependencies = [set() for process in self.processes]
+        # The indices of the processes that depend on each process
+        self.dependents = [[] for process in self.processes]
+        self.barriers = [False for process in self.processes]
+        self._create_dependencies()
+
+    def _create_dependencies(self):
+        indices = {id(process): index for index, process in
+                   enumerate(self.processes)}
+        last_barrier = None
+        # The index, read and written names of the processes after the last
+        # barrier
+        branch_processes = []
+
+        for index, process in enumerate(self.processes):
+            access = None if is_barrier(process) else get_access(process)
+
+            stdin_index = None
+            if access is not None and process.stdin_source is not None:
+                source = getattr(process.stdin_source, "__self__", None)
+                stdin_index = indices.get(id(source))
+                if stdin_index is None or stdin_index >= index:
+                    access = None
+
+            dependencies = set()
+            if last_barrier is not None:
+                dependencies.add(last_barrier)
+
+            if access is None or "MASK" in access[1]:
+                self.barriers[index] = True
+                dependencies.update(entry[0] for entry in branch_processes)
+                last_barrier = index
+                branch_processes = []
+            else:
+                reads, writes = access
+                for other_index, other_reads, other_writes in branch_processes:
+                    if other_writes & (reads | writes) or other_reads & writes:
+                        dependencies.add(other_index)
+                if stdin_index is not None:
+                    dependencies.add(stdin_index)
+                branch_processes.append((index, reads, writes))
+
+            self.dependencies[index] = dependencies
+            for dependency in dependencies:
+                self.dependents[dependency].append(index)
+
+    def is_sequential(self):
+        """Check if the processes must run one after the other
+
+        Returns:
+            bool:
+            True if each process depends on its predecessor
+        """
+        return all(index - 1 in self.dependencies[index]
+                   for index in range(1, len(self.processes)))
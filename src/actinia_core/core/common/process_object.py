@@ -38,7 +38,8 @@ class Process(object):
     """
 
     def __init__(self, exec_type, executable, executable_params,
-                 stdin_source=None, skip_permission_check=False, id=None):
+                 stdin_source=None, skip_permission_check=False, id=None,
+                 inputs=None, outputs=None):
         """
 
         Args:
@@ -53,6 +54,12 @@ class Process(object):
                                             user can use internal process chains that
                                             contain module he has no permissions to use.
             id (str): The unique id of the process
+            inputs (list): The (parameter, value) tuples of the inputs, None if
+                           the inputs are unknown
+            outputs (list): The (parameter, value) tuples of the outputs, None
+                            if the outputs are unknown. Processes with unknown
+                            inputs or outputs are never run concurrently with
+                            other processes.
         """
 
         self.exec_type = exec_type
@@ -66,6 +73,8 @@ class Process(object):
         self.stderr = None
         self.skip_permission_check = skip_permission_check
         self.id = id
+        self.inputs = inputs
+        self.outputs = outputs
 
     def set_stdouts(self, stdout, stderr):
         """Set the content of stdout and stderr of this process
@@ -73,17 +82,23 @@ class Process(object):
         Set this after the process has finished.
 
         Args:
-            stdout: The stdout string of this process
-            stderr: The stderr string of this process
+            stdout: The stdout string or OutputCapture of this process
+            stderr: The stderr string or OutputCapture of this process
         """
         self.stdout = stdout
         self.stderr = stderr
 
+    @staticmethod
+    def _read_output(output):
+        if output is None or isinstance(output, str):
+            return output
+        return output.read()
+
     def get_stdout(self):
-        return self.stdout
+        return self._read_output(self.stdout)
 
     def get_stderr(self):
-        return self.stderr
+        return self._read_output(self.stderr)
 
     def __str__(self):
         return (
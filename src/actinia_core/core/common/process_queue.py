@@ -22,7 +22,8 @@
 #######
 
 """
-Process queue implementation using multiprocessing, Queue() and Thread.
+Process queue implementation using multiprocessing, Queue() and
+multiprocessing.connection.wait().
 
 The process queue is responsible to run all requests in actinia that
 require to execute GRASS GIS processes or UNIX processes to create a response.
@@ -31,16 +32,19 @@ The process queue supports logging of the stderr output of the executed processe
 into a rotating logfile and fluent server.
 """
 
-import pickle
 import time
 from datetime import datetime
 import queue as standard_queue
 from multiprocessing import Process, Queue
-from threading import Thread, Lock
+from multiprocessing.connection import wait
 import logging
 import atexit
 from actinia_core.core.resources_logger import ResourceLogger
+from actinia_core.core.redis_queue_statistics import RedisQueueStatisticsInterface
 from actinia_core.core.logging_interface import log
+from .process_scheduler import create_scheduling_policy, is_interactive_request
+from .process_scheduler import QueueWaitTimeStatistics
+from .worker_pool import create_worker_pool
 
 
 has_fluent = False
@@ -152,9 +156,12 @@ class EnqueuedProcess(object):
 
     def __init__(self, func, timeout,
                  resource_logger,
-                 args):
+                 args, worker_pool=None):
 
-        self.process = Process(target=func, args=args)
+        if worker_pool is not None:
+            self.process = worker_pool.create_process(target=func, args=args)
+        else:
+            self.process = Process(target=func, args=args)
         self.timeout = timeout
         self.config = args[0].config
         self.resource_id = args[0].resource_id
@@ -163,6 +170,13 @@ class EnqueuedProcess(object):
         self.api_info = args[0].api_info
         self.resource_logger = resource_logger
         self.init_time = time.time()
+        self.start_time = None
+
+        # The scheduling information
+        self.user_role = None
+        if isinstance(args[0].user_credentials, dict):
+            self.user_role = args[0].user_credentials.get("user_role")
+        self.interactive = is_interactive_request(self.api_info)
 
         self.started = False
 
@@ -177,8 +191,17 @@ class EnqueuedProcess(object):
         """
         # print("Start job: ", self.api_info)
         self.started = True
+        self.start_time = time.time()
         self.process.start()
 
+    def wait_time(self):
+        """The time in seconds the process waited in the queue before it was
+        started
+        """
+        if self.start_time is None:
+            return time.time() - self.init_time
+        return self.start_time - self.init_time
+
     def terminate(self, status, message):
         """Terminate the process
 
@@ -202,6 +225,12 @@ class EnqueuedProcess(object):
     def exitcode(self):
         return self.process.exitcode
 
+    def sentinel(self):
+        """The sentinel of the started process, that becomes ready when the
+        process exits. Use it with multiprocessing.connection.wait()
+        """
+        return self.process.sentinel
+
     def check_timeout(self):
         """Check if the process waited longer for running then the timeout that was set
 
@@ -233,12 +262,11 @@ class EnqueuedProcess(object):
         if self.process.exitcode is not None and self.process.exitcode != 0:
 
             # Check if the process noticed the error already
-            response_data = self.resource_logger.get(self.user_id,
-                                                     self.resource_id,
-                                                     self.iteration)
+            response_data = self.resource_logger.get_document(
+                self.user_id, self.resource_id, self.iteration)
 
             if response_data is not None:
-                http_code, response_model = pickle.loads(response_data)
+                http_code, response_model = response_data
                 if response_model["status"] != "error" and \
                         response_model["status"] != "terminated" and \
                         response_model["status"] != "timeout":
@@ -254,17 +282,19 @@ class EnqueuedProcess(object):
         Args:
             status: The status that should be set (terminated)
             message: The message
+            response_data: The decoded [http_code, response_model] document
+                           that is used as template, it is read from the
+                           resource logger if not provided
         """
         # print("Send resource update status: ", status, " message: ", message)
         # Get the latest response and use it as template for the resource update
         if response_data is None:
-            response_data = self.resource_logger.get(self.user_id,
-                                                     self.resource_id,
-                                                     self.iteartion)
+            response_data = self.resource_logger.get_document(
+                self.user_id, self.resource_id, self.iteration)
 
         # Send the termination response
         if response_data is not None:
-            http_code, response_model = pickle.loads(response_data)
+            http_code, response_model = response_data
             # print("Resource", http_code, response_model)
             response_model["status"] = status
             response_model["message"] = (
@@ -274,66 +304,85 @@ class EnqueuedProcess(object):
             response_model["datetime"] = str(datetime.now())
             response_model["time_delta"] = response_model["timestamp"] - orig_time
 
-            document = pickle.dumps([http_code, response_model])
-
-            self.resource_logger.commit(
+            self.resource_logger.commit_document(
                 user_id=self.user_id,
                 resource_id=self.resource_id,
                 iteration=self.iteration,
-                document=document,
+                http_code=http_code,
+                data=response_model,
                 expiration=self.config.REDIS_RESOURCE_EXPIRE_TIME)
 
 
-def queue_watcher(queue, data_set, lock):
-    """This function runs in a separate thread to check the queue
+def _next_waiting_timeout(waiting_processes, statistics_deadline=None):
+    """Compute the time until the first waiting process exceeds its timeout
+    or the queue statistics must be committed
 
     Args:
-        queue: The queue to check
-        data_set: The set to add the received data
-        lock: The lock to be used for locking the set access
+        waiting_processes: The processes that wait to be started
+        statistics_deadline: The time when the pending queue statistics must be
+                             committed or None if nothing is pending
+
+    Returns:
+        The number of seconds until the next deadline expires or None
+        if no process is waiting and no statistics are pending
     """
+    deadlines = [enqproc.init_time + enqproc.timeout
+                 for enqproc in waiting_processes]
+    if statistics_deadline is not None:
+        deadlines.append(statistics_deadline)
+    if not deadlines:
+        return None
 
-    while True:
-        try:
-            # print("Check for new data in queue")
-            data = queue.get(block=True)
-            lock.acquire_lock()
-            data_set.add(data)
-            # print("Add data to set", len(data_set))
-            lock.release_lock()
-        except standard_queue.Empty:
-            pass
+    return max(min(deadlines) - time.time(), 0)
+
+
+def _commit_queue_statistics(queue_statistics, statistics_interface):
+    """Commit the queue wait time percentiles of all users to the redis server
+
+    Args:
+        queue_statistics (QueueWaitTimeStatistics): The wait time statistics
+        statistics_interface (RedisQueueStatisticsInterface): The redis interface
+    """
+    try:
+        statistics_interface.set_wait_times(queue_statistics.all_percentiles())
+    except Exception as e:
+        log.error("Unable to commit the process queue statistics: %s" % str(e))
+    queue_statistics.changed = False
 
 
 def start_process_queue_manager(config, queue, use_logger):
     """The process queue manager that runs the infinite loop for worker creation
 
     - This function creates the stderr logger if requested
-    - It listen to a queue in an infinite loop:
-        - The queue is watched in a separate thread so that no data get lost
-        - Check if new processes are in the data set() that is filled by the
-          queue watcher
-        - Check the timeout of waiting processes
-        - Enqueue and start new processes
-        - Remove finished processes or processes that exceeded their waiting timeout
-        - Stop the queue and exit all running processes if the "STOP" isgnal was
-          send via Queue()
+    - It blocks until one of the following events happen:
+        - New data arrived in the queue
+        - A running process finished (its sentinel becomes ready)
+        - The waiting timeout of an enqueued process expired
+        - The pending queue statistics must be committed
+    - Then it:
+        - Enqueues all new processes that were received from the queue
+        - Removes finished processes
+        - Starts waiting processes as long as worker slots are free, the
+          scheduling policy decides which process is started next
+        - Removes processes that exceeded their waiting timeout
+        - Commits the queue wait time percentiles of the users to the redis
+          server
+        - Stops the queue and exits all running processes if the "STOP" signal
+          was send via Queue()
+
+    The processes run in the pre-forked workers of a WorkerPool, if
+    QUEUE_WORKER_POOL is True, otherwise each process is started as new
+    multiprocessing.Process.
 
     Args:
         config: The global config
         queue: The multiprocessing.Queue() object that should be listened to
         use_logger: Create logifle and fluent logger to log the stderr of the processes
     """
-    global finished_procs
-
-    data_set = set()
-    lock = Lock()
-    # Start the thread that permanently listens to the queue
-    queue_thread = Thread(target=queue_watcher, args=(queue, data_set, lock))
-    queue_thread.start()
-
     running_procs = set()
-    waiting_processes = set()
+    waiting_processes = create_scheduling_policy(config)
+    queue_statistics = QueueWaitTimeStatistics()
+    statistics_commit_time = 0
 
     fluent_sender = None
     # Fluentd hack to work in a multiprocessing environment
@@ -354,20 +403,36 @@ def start_process_queue_manager(config, queue, use_logger):
     # queue and terminates itself.
     resource_logger = ResourceLogger(**kwargs,
                                      fluent_sender=fluent_sender)
+    # The queue wait time statistics are stored in the redis server
+    statistics_interface = RedisQueueStatisticsInterface()
+    statistics_interface.connect(**kwargs)
     del kwargs
+    worker_pool = create_worker_pool(config)
+
+    # The read end of the queue pipe, it becomes ready when new data arrives.
+    # The same approach is used by concurrent.futures.ProcessPoolExecutor.
+    queue_reader = queue._reader
 
-    count = 0
     try:
         while True:
-            # Get the process data from the set that is filled in the queue thread
-            data = None
-            lock.acquire_lock()
-            if len(data_set) > 0:
-                # print("Jobs from queue: ", len(data_set))
-                data = data_set.pop()
-            lock.release_lock()
-
-            if data is not None:
+            # Block until new data arrived, a running process exited or the
+            # waiting timeout of a process expired
+            sentinels = [enqproc.sentinel() for enqproc in running_procs]
+            statistics_deadline = None
+            if queue_statistics.changed is True:
+                statistics_deadline = (statistics_commit_time
+                                       + config.QUEUE_STATISTICS_INTERVAL)
+            ready = wait([queue_reader] + sentinels,
+                         timeout=_next_waiting_timeout(waiting_processes,
+                                                       statistics_deadline))
+
+            # Read all available data from the queue
+            while queue_reader in ready:
+                try:
+                    data = queue.get(block=False)
+                except standard_queue.Empty:
+                    break
+
                 # Stop all (running and waiting) processes if the STOP command was
                 # detected and leave the loop
                 if "STOP" in data:
@@ -381,9 +446,9 @@ def start_process_queue_manager(config, queue, use_logger):
                             status="error",
                             message="Waiting process was terminated by server "
                                     "shutdown.")
-                    del queue_thread
+                    if worker_pool is not None:
+                        worker_pool.close()
                     queue.close()
-                    # print("Exit loop")
                     exit(0)
                 # Enqueue a new process
                 elif len(data) == 3:
@@ -392,42 +457,47 @@ def start_process_queue_manager(config, queue, use_logger):
                     enqproc = EnqueuedProcess(func=func,
                                               timeout=timeout,
                                               resource_logger=resource_logger,
-                                              args=args)
+                                              args=args,
+                                              worker_pool=worker_pool)
                     waiting_processes.add(enqproc)
 
-            if len(running_procs) < config.NUMBER_OF_WORKERS:
-                if len(waiting_processes) > 0:
-                    enqproc = waiting_processes.pop()
-                    running_procs.add(enqproc)
-                    log.info("Run process: %s", enqproc.api_info)
-                    enqproc.start()
-
-            # Purge processes that are finished or exceeded their timeout each 40th loop
-            if count % 10 == 0:
-                count = 0
-                procs_to_remove = []
-                # purge processes that has been finished
-                for enqproc in running_procs:
-                    if enqproc.started is True and enqproc.is_alive() is False:
-                        # Check if the process finished with an error and send a
-                        # resource update if required
-                        enqproc.check_exit()
-                        procs_to_remove.append(enqproc)
-                for enqproc in procs_to_remove:
-                    running_procs.remove(enqproc)
-
-                procs_to_remove = []
-                # purge processes that have exceeded their timeout for waiting
-                for enqproc in waiting_processes:
-                    check = enqproc.check_timeout()
-                    if check is True:
-                        procs_to_remove.append(enqproc)
-                for enqproc in procs_to_remove:
-                    waiting_processes.remove(enqproc)
-
-            time.sleep(0.05)
-            count += 1
+            # Purge processes that has been finished
+            procs_to_remove = []
+            for enqproc in running_procs:
+                if enqproc.sentinel() in ready or enqproc.is_alive() is False:
+                    # Check if the process finished with an error and send a
+                    # resource update if required
+                    enqproc.check_exit()
+                    procs_to_remove.append(enqproc)
+            for enqproc in procs_to_remove:
+                running_procs.remove(enqproc)
+
+            # Start waiting processes as long as worker slots are available
+            while (len(running_procs) < config.NUMBER_OF_WORKERS
+                   and len(waiting_processes) > 0):
+                enqproc = waiting_processes.pop()
+                running_procs.add(enqproc)
+                log.info("Run process: %s", enqproc.api_info)
+                enqproc.start()
+                queue_statistics.add(enqproc.user_id, enqproc.wait_time())
+
+            # Purge processes that have exceeded their timeout for waiting
+            procs_to_remove = []
+            for enqproc in waiting_processes:
+                check = enqproc.check_timeout()
+                if check is True:
+                    procs_to_remove.append(enqproc)
+            for enqproc in procs_to_remove:
+                waiting_processes.remove(enqproc)
+
+            # Commit the queue statistics
+            if (queue_statistics.changed is True and time.time()
+                    >= statistics_commit_time + config.QUEUE_STATISTICS_INTERVAL):
+                _commit_queue_statistics(queue_statistics, statistics_interface)
+                statistics_commit_time = time.time()
     except Exception:
         raise
     finally:
+        if worker_pool is not None:
+            worker_pool.close()
         queue.close()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Scheduling policies of the process queue
+
+A scheduling policy decides which of the waiting processes is started next,
+when a worker slot of the process queue is free. The following policies
+are available and can be selected with QUEUE_SCHEDULING_POLICY in the
+actinia config file:
+
+    - fifo: Processes are started in the order they were enqueued
+    - round_robin: The users with waiting processes take turns, each user
+                   gets the same share of the workers
+    - fair_share: Weighted fair share, the share of each user is weighted
+                  by its user role using QUEUE_FAIR_SHARE_WEIGHTS
+
+If QUEUE_INTERACTIVE_PRIORITY is True, then interactive processes, that are
+processes that a synchronous endpoint waits for, are always started before
+batch processes. The policy is applied within each of the two classes.
+"""
+
+import time
+from collections import deque
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+SCHEDULING_POLICIES = ["fifo", "round_robin", "fair_share"]
+
+
+def is_interactive_request(api_info):
+    """Check if the API call is an interactive request
+
+    Interactive requests are all GET requests and all requests of
+    synchronous resources (Sync* resource classes), since the client waits
+    for the response of the enqueued process.
+
+    Args:
+        api_info (ApiInfoModel): The API information of the request
+
+    Returns:
+        bool:
+        True if interactive, False otherwise
+    """
+    if not isinstance(api_info, dict):
+        return False
+    if api_info.get("method") == "GET":
+        return True
+    endpoint = api_info.get("endpoint")
+    if endpoint and endpoint.lower().startswith("sync"):
+        return True
+    return False
+
+
+class FifoSchedulingPolicy(object):
+    """First in first out scheduling of waiting processes
+
+    All scheduling policies provide the same interface: add(), pop(),
+    remove(), len() and iteration over all waiting processes.
+    """
+
+    def __init__(self, interactive_priority=True):
+        """Constructor
+
+        Args:
+            interactive_priority (bool): Start interactive processes before
+                                         batch processes
+        """
+        self.interactive_priority = interactive_priority
+        self.interactive_queue = self._create_class_queue()
+        self.batch_queue = self._create_class_queue()
+
+    def _create_class_queue(self):
+        return deque()
+
+    def _class_queue(self, enqproc):
+        if self.interactive_priority is True and enqproc.interactive is True:
+            return self.interactive_queue
+        return self.batch_queue
+
+    def _add_to_class_queue(self, class_queue, enqproc):
+        class_queue.append(enqproc)
+
+    def _pop_from_class_queue(self, class_queue):
+        return class_queue.popleft()
+
+    def _remove_from_class_queue(self, class_queue, enqproc):
+        class_queue.remove(enqproc)
+
+    def _iter_class_queue(self, class_queue):
+        return iter(class_queue)
+
+    def _len_class_queue(self, class_queue):
+        return len(class_queue)
+
+    def add(self, enqproc):
+        """Add a waiting process
+
+        Args:
+            enqproc (EnqueuedProcess): The process that waits to be started
+        """
+        self._add_to_class_queue(self._class_queue(enqproc), enqproc)
+
+    def pop(self):
+        """Remove and return the process that should be started next
+
+        Raises:
+            IndexError if no process is waiting
+
+        Returns:
+            EnqueuedProcess:
+            The process to start
+        """
+        for class_queue in (self.interactive_queue, self.batch_queue):
+            if self._len_class_queue(class_queue) > 0:
+                return self._pop_from_class_queue(class_queue)
+        raise IndexError("pop from empty scheduling policy")
+
+    def remove(self, enqproc):
+        """Remove a waiting process, for example after its waiting timeout
+        exceeded
+
+        Args:
+            enqproc (EnqueuedProcess): The process to remove
+        """
+        self._remove_from_class_queue(self._class_queue(enqproc), enqproc)
+
+    def __len__(self):
+        return (self._len_class_queue(self.interactive_queue)
+                + self._len_class_queue(self.batch_queue))
+
+    def __iter__(self):
+        # Iterate over a copy, so that processes can be removed while iterating
+        procs = list(self._iter_class_queue(self.interactive_queue))
+        procs.extend(self._iter_class_queue(self.batch_queue))
+        return iter(procs)
+
+
+class FairShareSchedulingPolicy(FifoSchedulingPolicy):
+    """Weighted fair share scheduling of waiting processes across users
+
+    Each user has its own FIFO queue. The user that received the smallest
+    weighted service so far is served next. The service of a user grows by
+    1/weight each time a process of this user is started. A user that starts
+    to submit processes is inserted with the smallest service of all users
+    that currently wait, so that idle periods are not saved up as credit.
+
+    Using the same weight for all users results in round robin scheduling.
+    """
+
+    def __init__(self, interactive_priority=True, weights=None, default_weight=1.0):
+        """Constructor
+
+        Args:
+            interactive_priority (bool): Start interactive processes before
+                                         batch processes
+            weights (dict): The weight of each user role
+                            e.g. {"superadmin": 4, "admin": 2, "user": 1}
+            default_weight (float): The weight of user roles that are not
+                                    in the weights dictionary
+        """
+        self.weights = weights if weights else {}
+        self.default_weight = default_weight
+        FifoSchedulingPolicy.__init__(self, interactive_priority=interactive_priority)
+
+    def _create_class_queue(self):
+        # user_id -> deque of processes and user_id -> weighted service
+        return {"queues": dict(), "service": dict()}
+
+    def _weight(self, enqproc):
+        weight = self.weights.get(enqproc.user_role, self.default_weight)
+        return max(float(weight), 1e-6)
+
+    def _add_to_class_queue(self, class_queue, enqproc):
+        queues = class_queue["queues"]
+        service = class_queue["service"]
+        if enqproc.user_id not in queues:
+            min_service = min([service[user_id] for user_id in queues],
+                              default=0.0)
+            service[enqproc.user_id] = max(
+                service.get(enqproc.user_id, 0.0), min_service)
+            queues[enqproc.user_id] = deque()
+        queues[enqproc.user_id].append(enqproc)
+
+    def _pop_from_class_queue(self, class_queue):
+        queues = class_queue["queues"]
+        service = class_queue["service"]
+        # The user with the smallest weighted service, ties are resolved by
+        # the age of the oldest waiting process of the users
+        user_id = min(queues, key=lambda uid: (service[uid],
+                                               queues[uid][0].init_time))
+        enqproc = queues[user_id].popleft()
+        service[user_id] += 1.0 / self._weight(enqproc)
+        if len(queues[user_id]) == 0:
+            del queues[user_id]
+            self._purge_service(class_queue)
+        return enqproc
+
+    def _remove_from_class_queue(self, class_queue, enqproc):
+        queues = class_queue["queues"]
+        queues[enqproc.user_id].remove(enqproc)
+        if len(queues[enqproc.user_id]) == 0:
+            del queues[enqproc.user_id]
+            self._purge_service(class_queue)
+
+    def _purge_service(self, class_queue):
+        # Forget the service of users without waiting processes,
+        # when no user is waiting anymore
+        if len(class_queue["queues"]) == 0:
+            class_queue["service"].clear()
+
+    def _iter_class_queue(self, class_queue):
+        for user_queue in class_queue["queues"].values():
+            for enqproc in user_queue:
+                yield enqproc
+
+    def _len_class_queue(self, class_queue):
+        return sum(len(user_queue) for user_queue in class_queue["queues"].values())
+
+
+def create_scheduling_policy(config):
+    """Create the scheduling policy that is configured in the actinia config
+
+    Args:
+        config: The global configuration
+
+    Raises:
+        ValueError in case of an unknown scheduling policy
+
+    Returns:
+        The scheduling policy object
+    """
+    policy = config.QUEUE_SCHEDULING_POLICY
+    if policy == "fifo":
+        return FifoSchedulingPolicy(
+            interactive_priority=config.QUEUE_INTERACTIVE_PRIORITY)
+    if policy == "round_robin":
+        return FairShareSchedulingPolicy(
+            interactive_priority=config.QUEUE_INTERACTIVE_PRIORITY)
+    if policy == "fair_share":
+        return FairShareSchedulingPolicy(
+            interactive_priority=config.QUEUE_INTERACTIVE_PRIORITY,
+            weights=config.QUEUE_FAIR_SHARE_WEIGHTS)
+    raise ValueError("Unknown scheduling policy <%s>, supported are %s"
+                     % (policy, str(SCHEDULING_POLICIES)))
+
+
+class QueueWaitTimeStatistics(object):
+    """Collect the time processes waited in the queue before they were started
+
+    The most recent wait times of each user are kept to compute percentiles.
+    """
+
+    def __init__(self, max_samples=1000):
+        """Constructor
+
+        Args:
+            max_samples (int): The number of recent wait times kept per user
+        """
+        self.max_samples = max_samples
+        self.samples = dict()
+        self.counts = dict()
+        self.changed = False
+
+    def add(self, user_id, wait_time):
+        """Add the wait time of a started process
+
+        Args:
+            user_id (str): The user id
+            wait_time (float): The time in seconds the process waited
+        """
+        if user_id not in self.samples:
+            self.samples[user_id] = deque(maxlen=self.max_samples)
+            self.counts[user_id] = 0
+        self.samples[user_id].append(wait_time)
+        self.counts[user_id] += 1
+        self.changed = True
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        index = int(round((percent / 100.0) * (len(sorted_values) - 1)))
+        return sorted_values[index]
+
+    def percentiles(self, user_id):
+        """Compute the wait time percentiles of a user
+
+        Args:
+            user_id (str): The user id
+
+        Returns:
+            dict:
+            The number of started processes, the number of samples, the 50, 90
+            and 99 percentile and the maximum wait time in seconds or None if
+            no wait times were recorded for the user
+        """
+        if user_id not in self.samples:
+            return None
+        values = sorted(self.samples[user_id])
+        return {"count": self.counts[user_id],
+                "samples": len(values),
+                "p50": self._percentile(values, 50),
+                "p90": self._percentile(values, 90),
+                "p99": self._percentile(values, 99),
+                "max": values[-1],
+                "timestamp": time.time()}
+
+    def all_percentiles(self):
+        """Compute the wait time percentiles of all users
+
+        Returns:
+            dict:
+            A dictionary with the user id as key and the percentiles as value
+        """
+        return {user_id: self.percentiles(user_id) for user_id in self.samples}
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Blocking wait for the exit of child processes
+
+The ProcessExitWaiter blocks until a child process exited or a timeout
+expired, without polling. On Linux 5.3 and newer a pidfd of the process is
+polled, that becomes readable as soon as the process exited. Otherwise
+subprocess.Popen.wait() with timeout is used.
+"""
+
+import os
+import select
+import subprocess
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+has_pidfd = hasattr(os, "pidfd_open") and hasattr(select, "poll")
+
+
+class ProcessExitWaiter(object):
+    """Wait for the exit of a subprocess.Popen child process
+    """
+
+    def __init__(self, proc):
+        """Constructor
+
+        Args:
+            proc (subprocess.Popen): The child process
+        """
+        self.proc = proc
+        self.pidfd = None
+        self.poller = None
+        if has_pidfd is True:
+            try:
+                self.pidfd = os.pidfd_open(proc.pid)
+            except OSError:
+                # Not supported by the kernel or the process was already reaped
+                self.pidfd = None
+            if self.pidfd is not None:
+                self.poller = select.poll()
+                self.poller.register(self.pidfd, select.POLLIN)
+
+    def wait(self, timeout):
+        """Block until the process exited or the timeout expired
+
+        Args:
+            timeout (float): The maximum number of seconds to wait
+
+        Returns:
+            bool:
+            True if the process exited, False if the timeout expired
+        """
+        if self.proc.poll() is not None:
+            return True
+        if self.poller is not None:
+            self.poller.poll(max(0, int(timeout * 1000)))
+            return self.proc.poll() is not None
+        try:
+            self.proc.wait(timeout=max(0, timeout))
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+
+    def close(self):
+        """Close the pidfd"""
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+            self.poller = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -24,10 +24,10 @@
 """
 Redis connection interface
 """
-import rq
-from redis import Redis
 from actinia_core.core.redis_user import redis_user_interface
 from actinia_core.core.redis_api_log import redis_api_log_interface
+from actinia_core.core.redis_queue_statistics import redis_queue_statistics_interface
+from actinia_core.core.redis_job_queue import redis_job_queue_interface
 from .config import global_config
 from .process_queue import enqueue_job as enqueue_job_local
 
@@ -37,104 +37,46 @@ __copyright__ = "Copyright 2016-2018, Sören Gebbert and mundialis GmbH & Co. KG
 __maintainer__ = "Sören Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
-# Job handling
-job_queues = []
-redis_conn = None
-num_queues = None
 
-
-def create_job_queues(host, port, num_of_queues):
-    """Create the job queues for asynchronous processing
-
-    TODO: The redis queue approach does not work and is deactivated
+def create_job_queues(config):
+    """Connect the redis stream job queue that is consumed by the
+    actinia-worker processes and create its consumer group
 
     Note:
         Make sure that the global configuration was updated
         before calling this function.
 
     Args:
-        host: The hostname of the redis server
-        port: The port of the redis server
-        num_of_queues: The number of queues that should be created
+        config: The global configuration
 
     """
-    # Redis work queue and connection
-    global job_queues, redis_conn, num_queues
-
-    redis_conn = Redis(host=host, port=port)
-    num_queues = num_of_queues
+    kwargs = dict()
+    kwargs['host'] = config.REDIS_QUEUE_SERVER_URL
+    kwargs['port'] = config.REDIS_QUEUE_SERVER_PORT
+    if config.REDIS_QUEUE_SERVER_PW and config.REDIS_QUEUE_SERVER_PW is not None:
+        kwargs['password'] = config.REDIS_QUEUE_SERVER_PW
 
-    for i in range(num_of_queues):
-        name = "%s_%i" % (global_config.WORKER_QUEUE_NAME, i)
-
-        string = "Create queue %s with server %s:%s" % (name, host, port)
-        print(string)
-        queue = rq.Queue(name, connection=redis_conn)
-        job_queues.append(queue)
+    redis_job_queue_interface.set_stream_name(config.WORKER_QUEUE_NAME)
+    redis_job_queue_interface.connect(**kwargs)
+    redis_job_queue_interface.create_group()
 
 
 def enqueue_job(timeout, func, *args):
     """Execute the provided function in a subprocess
 
-    Args:
-        func: The function to call from the subprocess
-        *args: The function arguments
-
-    Returns:
-        int:
-        The current queue index
-
-    """
-    enqueue_job_local(timeout, func, *args)
-    return
-
-    # Just i case the current process queue does not work
-    # Then use the most simple solution by just starting the process
-    from multiprocessing import Process
-    p = Process(target=func, args=args)
-    p.start()
-
-    return
-
-
-def enqueue_job_old(timeout, func, *args):
-    """Enqueue a job in the job queues
-
-    TODO: The redis queue approach does not work and is deactivated
-
-    The enqueue function uses a redis incr approach
-    to chose for each job a different queue
-
-    Note:
-        The function create_job_queues() must be run
-        before a job can be enqueued.
+    Depending on QUEUE_TYPE the job is run by the local process queue or
+    enqueued in the redis stream job queue.
 
     Args:
+        timeout: The timeout of the process for waiting in the queue
         func: The function to call from the subprocess
         *args: The function arguments
 
-    Returns:
-        int:
-        The current queue index
-
     """
-
-    global job_queues, redis_conn, num_queues
-
-    # Increase the counter
-    num = redis_conn.incr("actinia_worker_count", 1)
-    # Compute the current
-    current_queue = num % num_queues
-    print("###  Enqueue job in queue %i" % current_queue)
-    ret = job_queues[current_queue].enqueue(
-        func,
-        *args,
-        timeout=timeout,
-        ttl=global_config.REDIS_QUEUE_JOB_TTL,
-        result_ttl=global_config.REDIS_QUEUE_JOB_TTL)
-    print(ret)
-
-    return current_queue
+    if global_config.QUEUE_TYPE == "redis":
+        redis_job_queue_interface.enqueue(timeout, func, *args)
+    else:
+        enqueue_job_local(timeout, func, *args)
 
 
 def connect(host, port, pw=None):
@@ -142,7 +84,7 @@ def connect(host, port, pw=None):
        in the main server process.
 
        These interfaces are connected here for performance reasons.
-       The redis job queue is initialized here as well.
+       The redis job queue is connected with create_job_queues().
 
     Args:
         host (str): The hostname of the redis server
@@ -152,6 +94,7 @@ def connect(host, port, pw=None):
     """
     redis_user_interface.connect(host, port, pw)
     redis_api_log_interface.connect(host, port, pw)
+    redis_queue_statistics_interface.connect(host, port, pw)
 
 
 def disconnect():
@@ -159,3 +102,6 @@ def disconnect():
     """
     redis_user_interface.disconnect()
     redis_api_log_interface.disconnect()
+    redis_queue_statistics_interface.disconnect()
+    if redis_job_queue_interface.connection_pool is not None:
+        redis_job_queue_interface.disconnect()
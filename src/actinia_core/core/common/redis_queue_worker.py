@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Worker of the distributed job queue
+
+A worker node runs a single RedisQueueWorker that consumes jobs from the
+Redis stream job queue and runs each job in a separate process. The number
+of concurrently running jobs of a node is limited by NUMBER_OF_WORKERS of
+the node configuration. Jobs are acknowledged when their process exits, so
+jobs of crashed worker nodes are reclaimed by other nodes after the
+visibility timeout REDIS_QUEUE_VISIBILITY_TIMEOUT.
+"""
+
+import os
+import pickle
+import platform
+import signal
+import time
+from multiprocessing.connection import wait
+from actinia_core.core.resources_logger import ResourceLogger
+from actinia_core.core.redis_job_queue import RedisJobQueueInterface
+from actinia_core.core.logging_interface import log
+from .process_queue import EnqueuedProcess
+from .worker_pool import create_worker_pool
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class RedisQueueWorker(object):
+    """Consume jobs from the Redis stream job queue and run them in
+    separate processes
+    """
+
+    def __init__(self, config, consumer_name=None, number_of_workers=None,
+                 job_queue=None, resource_logger=None, poll_interval=1.0):
+        """Constructor
+
+        Args:
+            config: The configuration of the worker node
+            consumer_name (str): The unique name of the worker in the consumer
+                                 group, default is <hostname>-<pid>
+            number_of_workers (int): The maximum number of concurrently
+                                     running jobs, default is
+                                     NUMBER_OF_WORKERS of the configuration
+            job_queue (RedisJobQueueInterface): A connected job queue
+                                                interface, it is created
+                                                from the configuration if
+                                                None
+            resource_logger (ResourceLogger): The resource logger to send
+                                              status updates of terminated
+                                              jobs, it is created from the
+                                              configuration if None
+            poll_interval (float): The number of seconds to block while
+                                   waiting for new jobs
+        """
+        self.config = config
+        if consumer_name is None:
+            consumer_name = "%s-%i" % (platform.node(), os.getpid())
+        self.consumer_name = consumer_name
+        if number_of_workers is None:
+            number_of_workers = config.NUMBER_OF_WORKERS
+        self.number_of_workers = number_of_workers
+        self.visibility_timeout = config.REDIS_QUEUE_VISIBILITY_TIMEOUT
+        self.max_deliveries = config.REDIS_QUEUE_MAX_DELIVERIES
+        # Refresh the idle time of running jobs three times per visibility
+        # timeout, so that a single delayed refresh does not cause a reclaim
+        self.heartbeat_interval = self.visibility_timeout / 3.0
+        self.poll_interval = poll_interval
+        self.job_queue = job_queue
+        self.resource_logger = resource_logger
+        # message id -> EnqueuedProcess
+        self.running_jobs = dict()
+        self.heartbeat_time = 0
+        self.stop_requested = False
+        self.worker_pool = None
+
+    def connect(self):
+        """Connect the job queue and the resource logger, if they were not
+        provided, create the consumer group and start the worker pool
+        """
+        if self.job_queue is None:
+            kwargs = dict()
+            kwargs['host'] = self.config.REDIS_QUEUE_SERVER_URL
+            kwargs['port'] = self.config.REDIS_QUEUE_SERVER_PORT
+            if (self.config.REDIS_QUEUE_SERVER_PW
+                    and self.config.REDIS_QUEUE_SERVER_PW is not None):
+                kwargs['password'] = self.config.REDIS_QUEUE_SERVER_PW
+            self.job_queue = RedisJobQueueInterface(
+                stream_name=self.config.WORKER_QUEUE_NAME)
+            self.job_queue.connect(**kwargs)
+        if self.resource_logger is None:
+            kwargs = dict()
+            kwargs['host'] = self.config.REDIS_SERVER_URL
+            kwargs['port'] = self.config.REDIS_SERVER_PORT
+            if self.config.REDIS_SERVER_PW and self.config.REDIS_SERVER_PW is not None:
+                kwargs['password'] = self.config.REDIS_SERVER_PW
+            self.resource_logger = ResourceLogger(**kwargs)
+        self.job_queue.create_group()
+        if self.worker_pool is None:
+            self.worker_pool = create_worker_pool(self.config)
+
+    def _start_job(self, message_id, fields, times_delivered=1):
+        """Start the process of a job
+
+        Jobs that can not be unpickled or that were delivered too often are
+        moved to the dead letter stream. Jobs that are delivered the first
+        time and exceeded their timeout for waiting in the queue are
+        terminated.
+
+        Args:
+            message_id (str): The message id of the job
+            fields (dict): The fields of the job message
+            times_delivered (int): The number of deliveries of the job
+        """
+        try:
+            func, timeout, args = pickle.loads(fields[b"job"])
+        except Exception as e:
+            log.error("Unable to read job %s: %s" % (message_id, str(e)))
+            self.job_queue.dead_letter(message_id, fields,
+                                       "Unable to read the job: %s" % str(e))
+            return
+
+        enqproc = EnqueuedProcess(func=func, timeout=timeout,
+                                  resource_logger=self.resource_logger,
+                                  args=args, worker_pool=self.worker_pool)
+        enqproc.init_time = float(fields[b"enqueue_time"])
+
+        if times_delivered > self.max_deliveries:
+            log.error("Job %s was delivered %i times, it is moved to the dead "
+                      "letter queue" % (message_id, times_delivered))
+            self.job_queue.dead_letter(message_id, fields,
+                                       "Delivered %i times" % times_delivered)
+            enqproc.terminate(status="error",
+                              message="The process was started %i times by "
+                                      "worker nodes that did not finish it."
+                                      % (times_delivered - 1))
+            return
+
+        # Only the first delivery waited in the queue, redelivered jobs
+        # were already started by a worker node that died
+        if times_delivered == 1 and enqproc.check_timeout() is True:
+            self.job_queue.ack(message_id)
+            return
+
+        log.info("Run process %s: %s", message_id, enqproc.api_info)
+        # The job process must not inherit the stop handler of the worker,
+        # otherwise it ignores the termination request
+        sigterm_handler = signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            enqproc.start()
+        finally:
+            signal.signal(signal.SIGTERM, sigterm_handler)
+        self.running_jobs[message_id] = enqproc
+
+    def _reap_jobs(self):
+        """Acknowledge the jobs whose process finished
+
+        Returns:
+            int:
+            The number of finished jobs
+        """
+        finished = [message_id for message_id, enqproc
+                    in self.running_jobs.items() if enqproc.is_alive() is False]
+        for message_id in finished:
+            enqproc = self.running_jobs.pop(message_id)
+            enqproc.process.join()
+            enqproc.check_exit()
+            self.job_queue.ack(message_id)
+        return len(finished)
+
+    def _heartbeat(self):
+        """Reset the idle time of the running jobs, if the heartbeat interval
+        elapsed
+        """
+        if time.time() - self.heartbeat_time < self.heartbeat_interval:
+            return
+        self.heartbeat_time = time.time()
+        if self.running_jobs:
+            self.job_queue.touch(self.consumer_name, self.running_jobs.keys())
+
+    def run_once(self):
+        """Run a single iteration of the worker loop
+
+        - Acknowledge finished jobs
+        - Refresh the idle time of running jobs
+        - Claim jobs of dead workers and read new jobs while worker slots are
+          free, blocking at most poll_interval seconds if no job is available
+        - Wait for a running job to finish, if all worker slots are in use
+
+        Returns:
+            int:
+            The number of started jobs
+        """
+        self._reap_jobs()
+        self._heartbeat()
+
+        free_slots = self.number_of_workers - len(self.running_jobs)
+        if free_slots <= 0:
+            sentinels = [enqproc.sentinel() for enqproc
+                         in self.running_jobs.values()]
+            wait(sentinels, timeout=min(self.heartbeat_interval,
+                                        self.poll_interval))
+            return 0
+
+        messages = self.job_queue.reclaim(self.consumer_name,
+                                          self.visibility_timeout,
+                                          count=free_slots)
+        if not messages:
+            block = int(self.poll_interval * 1000) if self.poll_interval else None
+            messages = [(message_id, fields, 1) for message_id, fields
+                        in self.job_queue.read(self.consumer_name,
+                                               count=free_slots, block=block)]
+
+        for message_id, fields, times_delivered in messages:
+            self._start_job(message_id, fields, times_delivered)
+        return len(messages)
+
+    def stop(self, signum=None, frame=None):
+        """Request the worker loop to stop, it can be used as signal handler
+        """
+        self.stop_requested = True
+
+    def drain(self):
+        """Wait until all running jobs finished and acknowledge them
+        """
+        while self.running_jobs:
+            sentinels = [enqproc.sentinel() for enqproc
+                         in self.running_jobs.values()]
+            wait(sentinels, timeout=self.heartbeat_interval)
+            self._reap_jobs()
+            self._heartbeat()
+
+    def run(self):
+        """Run the worker loop until SIGTERM or SIGINT is received
+
+        Running jobs are finished before the worker exits. Jobs of a worker
+        that is killed are reclaimed by other workers.
+        """
+        self.connect()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        log.info("Started worker %s with %i worker slots listening to %s"
+                 % (self.consumer_name, self.number_of_workers,
+                    self.job_queue.stream_name))
+
+        while self.stop_requested is False:
+            self.run_once()
+
+        log.info("Stopping worker %s, waiting for %i running jobs"
+                 % (self.consumer_name, len(self.running_jobs)))
+        self.drain()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
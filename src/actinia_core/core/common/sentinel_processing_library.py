@@ -377,6 +377,10 @@ class Sentinel2Processing(object):
             0. Use gdaltrans to select the footprint bbox
                that should be imported from the raster layer
             1. Import band with r.import
+
+        The imports of the bands are independent of each other and of the
+        region, so that they can run concurrently. Then for each band:
+
             2. Use g.region to set the region to footprint
             3. Create a mask with r.mask
             4. Compute the cropped version of the band with r.mapcalc
@@ -397,7 +401,9 @@ class Sentinel2Processing(object):
                                        "output=%s" % self.product_id,
                                        "--q"],
                     id=f"v_import_{self.product_id}",
-                    skip_permission_check=True)
+                    skip_permission_check=True,
+                    inputs=[("input", self.gml_cache_file_name)],
+                    outputs=[("output", self.product_id)])
         import_commands.append(p)
 
         dt = dtparser.parse(self.timestamp.split(".")[0])
@@ -408,10 +414,12 @@ class Sentinel2Processing(object):
                     executable_params=["map=%s" % self.product_id,
                                        "date=%s" % timestamp],
                     id=f"v_timestamp_{self.product_id}",
-                    skip_permission_check=True)
+                    skip_permission_check=True,
+                    inputs=[("map", self.product_id)],
+                    outputs=[])
         import_commands.append(p)
 
-        # Import and update
+        # Import the bands
         for key in self.import_file_info:
             if key == "footprint":
                 continue
@@ -439,7 +447,9 @@ class Sentinel2Processing(object):
             p = Process(exec_type="exec", executable=gdal_translate,
                         executable_params=gdal_translate_params,
                         id=f"gdal_translate_{self.product_id}",
-                        skip_permission_check=True)
+                        skip_permission_check=True,
+                        inputs=[("input", input_file)],
+                        outputs=[("output", cropped_input_file)])
             import_commands.append(p)
 
             p = Process(exec_type="grass", executable="r.import",
@@ -447,9 +457,18 @@ class Sentinel2Processing(object):
                                            "output=%s" % temp_map_name,
                                            "--q"],
                         id=f"r_import_{self.product_id}",
-                        skip_permission_check=True)
+                        skip_permission_check=True,
+                        inputs=[("input", cropped_input_file)],
+                        outputs=[("output", temp_map_name)])
             import_commands.append(p)
 
+        # Crop the bands to the footprint
+        for key in self.import_file_info:
+            if key == "footprint":
+                continue
+            input_file, map_name = self.import_file_info[key]
+            temp_map_name = map_name + "_uncropped"
+
             p = Process(exec_type="grass", executable="g.region",
                         executable_params=["align=%s" % temp_map_name,
                                            "vector=%s" % self.product_id,
@@ -27,12 +27,14 @@ User management
 TODO: User update must be implemented
 """
 
+import copy
 from passlib.apps import custom_app_context as pwd_context
 from itsdangerous import (TimedJSONWebSignatureSerializer,
                           BadSignature, SignatureExpired)
 from itsdangerous import JSONWebSignatureSerializer
 from actinia_core.core.common.config import global_config
 from actinia_core.core.redis_user import redis_user_interface
+from actinia_core.core.common.credential_cache import credential_cache
 
 __author__ = "Sören Gebbert"
 __copyright__ = "Copyright 2016-2018, Sören Gebbert and mundialis GmbH & Co. KG"
@@ -54,6 +56,60 @@ class ActiniaUserError(Exception):
         Exception.__init__(self, message)
 
 
+class UserCredentials(object):
+    """Immutable snapshot of the credentials of a user
+
+    The snapshot is read with a single database request at the begin of a
+    request and is used for all credential checks of this request. The
+    permissions are copied when they are returned, so that the snapshot can
+    not be modified by its users.
+    """
+
+    __slots__ = ("user_id", "password_hash", "user_role", "user_group",
+                 "_permissions")
+
+    def __init__(self, user_id, password_hash, user_role, user_group,
+                 permissions):
+        """Constructor
+
+        Args:
+            user_id (str): The user id
+            password_hash (str): The password hash
+            user_role (str): The user role
+            user_group (str): The user group
+            permissions (dict): The permission dictionary
+        """
+        object.__setattr__(self, "user_id", user_id)
+        object.__setattr__(self, "password_hash", password_hash)
+        object.__setattr__(self, "user_role", user_role)
+        object.__setattr__(self, "user_group", user_group)
+        object.__setattr__(self, "_permissions", copy.deepcopy(permissions))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("User credentials are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("User credentials are immutable")
+
+    @property
+    def permissions(self):
+        return copy.deepcopy(self._permissions)
+
+    def to_dict(self):
+        """Return the credentials as dictionary in the format of
+        RedisUserInterface.get_credentials()
+
+        Returns:
+            dict:
+            The credential dictionary
+        """
+        return {"user_id": self.user_id,
+                "password_hash": self.password_hash,
+                "user_role": self.user_role,
+                "user_group": self.user_group,
+                "permissions": self.permissions}
+
+
 class ActiniaUser(object):
     """
     The Actinia Core user management class
@@ -73,7 +129,8 @@ class ActiniaUser(object):
                  accessible_modules=global_config.MODULE_WHITE_LIST,
                  cell_limit=global_config.MAX_CELL_LIMIT,
                  process_num_limit=global_config.PROCESS_NUM_LIMIT,
-                 process_time_limit=global_config.PROCESS_TIME_LIMT):
+                 process_time_limit=global_config.PROCESS_TIME_LIMT,
+                 process_parallel_limit=global_config.PROCESS_PARALLEL_LIMIT):
         """Constructor
 
         Initialize and create a user object. To commit a new user to the database,
@@ -93,6 +150,8 @@ class ActiniaUser(object):
                                      is allowed to run in a single chain
             process_time_limit (int): The maximum number of seconds a user
                                       process is allowed to run
+            process_parallel_limit (int): The maximum number of processes of a
+                                          single chain that run concurrently
 
         """
 
@@ -106,6 +165,9 @@ class ActiniaUser(object):
         self.accessible_modules = []
         self.process_num_limit = None
         self.process_time_limit = None
+        self.process_parallel_limit = None
+        # The credential snapshot of the request, see load_credentials()
+        self.credentials = None
 
         if user_role:
             self.set_role(user_role)
@@ -119,6 +181,8 @@ class ActiniaUser(object):
             self.set_process_num_limit(process_num_limit)
         if process_time_limit is not None:
             self.set_process_time_limit(process_time_limit)
+        if process_parallel_limit is not None:
+            self.set_process_parallel_limit(process_parallel_limit)
 
     def _generate_permission_dict(self):
         """Create the permission dictionary
@@ -128,11 +192,33 @@ class ActiniaUser(object):
                             "accessible_modules": self.accessible_modules,
                             "cell_limit": self.cell_limit,
                             "process_num_limit": self.process_num_limit,
-                            "process_time_limit": self.process_time_limit}
+                            "process_time_limit": self.process_time_limit,
+                            "process_parallel_limit": self.process_parallel_limit}
 
-    def read_from_db(self):
+    def load_credentials(self):
+        """Read the credentials of the user with a single database request
+        and keep them as immutable snapshot
+
+        All getter functions of the user use the snapshot instead of the
+        database, until the user is committed, updated or deleted.
+
+        Returns:
+            UserCredentials:
+            The credential snapshot or None if the user does not exist
+        """
+        self.credentials = None
+        if self.user_id is None:
+            return None
 
         creds = self.db.get_credentials(self.user_id)
+        if creds:
+            self.credentials = UserCredentials(**creds)
+        return self.credentials
+
+    def read_from_db(self):
+
+        self.load_credentials()
+        creds = self.get_credentials()
         self.user_role = self.get_role()
         self.user_group = self.get_group()
         self.password_hash = self.get_password_hash()
@@ -143,6 +229,8 @@ class ActiniaUser(object):
         self.accessible_modules = creds["permissions"]["accessible_modules"]
         self.process_num_limit = creds["permissions"]["process_num_limit"]
         self.process_time_limit = creds["permissions"]["process_time_limit"]
+        self.process_parallel_limit = creds["permissions"].get(
+            "process_parallel_limit", global_config.PROCESS_PARALLEL_LIMIT)
 
     def set_role(self, role):
         """Set the user role
@@ -354,6 +442,24 @@ class ActiniaUser(object):
         except Exception:
             raise ActiniaUserError("Wrong format for process_time_limit")
 
+    def set_process_parallel_limit(self, process_parallel_limit):
+        """Set the maximum number of processes of a single process chain that
+        are allowed to run concurrently
+
+        Args:
+            process_parallel_limit (int):
+
+        Raises:
+            ActiniaUserError in case the process_parallel_limit is not supported
+        """
+
+        try:
+            self.process_parallel_limit = int(process_parallel_limit)
+        except Exception:
+            raise ActiniaUserError("Wrong format for process_parallel_limit")
+        if self.process_parallel_limit < 1:
+            raise ActiniaUserError("The process_parallel_limit must be at least 1")
+
     def __str__(self):
         creds = self.get_credentials()
 
@@ -375,6 +481,8 @@ class ActiniaUser(object):
         """
         if self.user_id is None:
             return False
+        if self.credentials is not None:
+            return True
 
         return self.db.exists(self.user_id)
 
@@ -401,6 +509,8 @@ class ActiniaUser(object):
             str:
             Return the role from the database
         """
+        if self.credentials is not None:
+            return self.credentials.user_role
         return self.db.get_role(self.user_id)
 
     def get_group(self):
@@ -410,6 +520,8 @@ class ActiniaUser(object):
             str:
             Return the user group from the database
         """
+        if self.credentials is not None:
+            return self.credentials.user_group
         return self.db.get_group(self.user_id)
 
     def get_credentials(self):
@@ -419,6 +531,8 @@ class ActiniaUser(object):
             dict:
             Return the user credentials as a dictionary
         """
+        if self.credentials is not None:
+            return self.credentials.to_dict()
         return self.db.get_credentials(self.user_id)
 
     def get_accessible_datasets(self):
@@ -429,7 +543,7 @@ class ActiniaUser(object):
             Return a dictionary of location:mapset list entries
         """
 
-        self.permissions = self.db.get_credentials(self.user_id)["permissions"]
+        self.permissions = self.get_credentials()["permissions"]
 
         if self.permissions and "accessible_datasets" in self.permissions:
             return self.permissions["accessible_datasets"]
@@ -442,7 +556,7 @@ class ActiniaUser(object):
             Return a list of all accessible modules
         """
 
-        self.permissions = self.db.get_credentials(self.user_id)["permissions"]
+        self.permissions = self.get_credentials()["permissions"]
 
         if self.permissions and "accessible_modules" in self.permissions:
             return self.permissions["accessible_modules"]
@@ -455,7 +569,7 @@ class ActiniaUser(object):
             The value or None if nothing was found
         """
 
-        self.permissions = self.db.get_credentials(self.user_id)["permissions"]
+        self.permissions = self.get_credentials()["permissions"]
 
         if self.permissions and "cell_limit" in self.permissions:
             return self.permissions["cell_limit"]
@@ -468,7 +582,7 @@ class ActiniaUser(object):
             The value or None if nothing was found
         """
 
-        self.permissions = self.db.get_credentials(self.user_id)["permissions"]
+        self.permissions = self.get_credentials()["permissions"]
 
         if self.permissions and "process_num_limit" in self.permissions:
             return self.permissions["process_num_limit"]
@@ -481,11 +595,26 @@ class ActiniaUser(object):
             The value or None if nothing was found
         """
 
-        self.permissions = self.db.get_credentials(self.user_id)["permissions"]
+        self.permissions = self.get_credentials()["permissions"]
 
         if self.permissions and "process_time_limit" in self.permissions:
             return self.permissions["process_time_limit"]
 
+    def get_process_parallel_limit(self):
+        """Return the process parallel limit
+
+        Returns:
+            int:
+            The value, the default of the configuration if the user has no
+            process parallel limit
+        """
+
+        self.permissions = self.get_credentials()["permissions"]
+
+        if self.permissions and "process_parallel_limit" in self.permissions:
+            return self.permissions["process_parallel_limit"]
+        return global_config.PROCESS_PARALLEL_LIMIT
+
     def get_password_hash(self):
         """Return the password hash from the database
 
@@ -493,6 +622,8 @@ class ActiniaUser(object):
             int:
             Return the password hash from the database
         """
+        if self.credentials is not None:
+            return self.credentials.password_hash
         return self.db.get_password_hash(self.user_id)
 
     def generate_api_key(self):
@@ -544,6 +675,8 @@ class ActiniaUser(object):
 
         self._generate_permission_dict()
 
+        credential_cache.invalidate(self.user_id)
+        self.credentials = None
         ret = self.db.add(user_id=self.user_id,
                           user_group=self.user_group,
                           password_hash=self.password_hash,
@@ -574,6 +707,9 @@ class ActiniaUser(object):
 
         self._generate_permission_dict()
 
+        # The cached verifications may use the old password or permissions
+        credential_cache.invalidate(self.user_id)
+        self.credentials = None
         ret = self.db.update(user_id=self.user_id,
                              user_group=self.user_group,
                              password_hash=self.password_hash,
@@ -608,6 +744,8 @@ class ActiniaUser(object):
             True if success, False otherwise
         """
 
+        credential_cache.invalidate(self.user_id)
+        self.credentials = None
         if self.exists():
             return self.db.delete(self.user_id)
 
@@ -629,7 +767,7 @@ class ActiniaUser(object):
             return None
 
         user = ActiniaUser(data["user_id"])
-        if user.exists():
+        if user.load_credentials() is not None:
             return user
 
         return None
@@ -644,7 +782,7 @@ class ActiniaUser(object):
         except BadSignature:
             return None    # invalid token
         user = ActiniaUser(data['user_id'])
-        if user.exists():
+        if user.load_credentials() is not None:
             return user
         return None
 
@@ -661,7 +799,8 @@ class ActiniaUser(object):
                     accessible_modules=global_config.MODULE_WHITE_LIST,
                     cell_limit=global_config.MAX_CELL_LIMIT,
                     process_num_limit=global_config.PROCESS_NUM_LIMIT,
-                    process_time_limit=global_config.PROCESS_TIME_LIMT):
+                    process_time_limit=global_config.PROCESS_TIME_LIMT,
+                    process_parallel_limit=global_config.PROCESS_PARALLEL_LIMIT):
         """Create a new user object and initialize it
 
         Args:
@@ -675,6 +814,8 @@ class ActiniaUser(object):
                                      is allowed to run in a single chain
             process_time_limit (int): The maximum number of seconds a user
                                       process is allowed to run
+            process_parallel_limit (int): The maximum number of processes of a
+                                          single chain that run concurrently
 
         Returns:
             actinia_core_api.common.user.ActiniaUser:
@@ -688,7 +829,8 @@ class ActiniaUser(object):
                            accessible_modules=accessible_modules,
                            cell_limit=cell_limit,
                            process_num_limit=process_num_limit,
-                           process_time_limit=process_time_limit)
+                           process_time_limit=process_time_limit,
+                           process_parallel_limit=process_parallel_limit)
         user.hash_password(password)
 
         if user.commit() is True:
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Pool of pre-forked worker processes that run the jobs of the process queue
+
+Instead of starting a new process for each job, the jobs are sent over a
+pipe to long living worker processes. The workers keep their imported
+modules and the objects registered with get_worker_state(), for example
+the redis connections of the resource logger, for the following jobs.
+
+A worker runs a single job at a time. The environment variables and the
+working directory are restored after each job. A worker is replaced by a
+new one after QUEUE_WORKER_MAX_JOBS jobs, if its memory usage exceeds
+QUEUE_WORKER_MAX_MEMORY MB, if a job failed or if a job was terminated.
+"""
+
+import os
+import resource
+import signal
+import traceback
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from actinia_core.core.logging_interface import log
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The objects that are kept by a worker process for the following jobs,
+# None if the current process is not a pool worker
+_worker_state = None
+
+
+def get_worker_state(key, factory):
+    """Return an object that is reused by all jobs of a pool worker
+
+    The object is created with the factory function by the first job of the
+    worker. Outside of pool workers the factory function is called each time.
+
+    Args:
+        key: The hashable key of the object, it must contain all arguments
+             that are used by the factory function
+        factory (function): The function without arguments that creates the
+                            object
+
+    Returns:
+        The object
+    """
+    if _worker_state is None:
+        return factory()
+    if key not in _worker_state:
+        _worker_state[key] = factory()
+    return _worker_state[key]
+
+
+def _get_memory_usage():
+    """Return the maximum resident set size of the current process in MB
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _run_job(target, args):
+    """Run a job and return its exit code like multiprocessing.Process
+    """
+    try:
+        target(*args)
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        return 1
+    except Exception:
+        log.error("Job of pool worker %i failed: %s"
+                  % (os.getpid(), traceback.format_exc()))
+        return 1
+
+
+def _worker_loop(conn, max_jobs, max_memory):
+    """The main function of a pool worker process
+
+    It receives (target, args) tuples over the pipe, runs them and sends
+    back (exitcode, retire) tuples. The worker exits if it receives None or
+    if it retires.
+
+    Args:
+        conn (multiprocessing.connection.Connection): The worker end of the
+                                                      pipe
+        max_jobs (int): The number of jobs after that the worker retires,
+                        no limit if None
+        max_memory (float): The maximum resident set size in MB that causes
+                            the worker to retire, no limit if None
+    """
+    global _worker_state
+    _worker_state = dict()
+    # Termination requests must kill the worker, interrupts are handled by
+    # the process that owns the pool
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    num_jobs = 0
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        target, args = job
+        environ = dict(os.environ)
+        cwd = os.getcwd()
+        exitcode = _run_job(target, args)
+        # Restore the process state for the next job
+        os.environ.clear()
+        os.environ.update(environ)
+        os.chdir(cwd)
+
+        num_jobs += 1
+        retire = (exitcode != 0
+                  or (max_jobs is not None and num_jobs >= max_jobs)
+                  or (max_memory is not None
+                      and _get_memory_usage() > max_memory))
+        conn.send((exitcode, retire))
+        if retire is True:
+            break
+    conn.close()
+
+
+class PoolWorker(object):
+    """A worker process of the WorkerPool
+    """
+
+    def __init__(self, max_jobs=None, max_memory=None):
+        """Constructor that starts the worker process
+
+        Args:
+            max_jobs (int): The number of jobs after that the worker retires
+            max_memory (float): The resident set size in MB that causes the
+                                worker to retire
+        """
+        self.conn, worker_conn = Pipe()
+        self.process = Process(target=_worker_loop,
+                               args=(worker_conn, max_jobs, max_memory),
+                               daemon=True)
+        self.process.start()
+        worker_conn.close()
+        self.num_jobs = 0
+
+    def stop(self, timeout=1.0):
+        """Ask the worker to exit and kill it if it does not exit in time
+
+        Args:
+            timeout (float): The number of seconds to wait for the exit
+        """
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        """Terminate the worker process immediately
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class PooledProcess(object):
+    """A job that runs in a worker of the WorkerPool
+
+    It provides the subset of the multiprocessing.Process interface that is
+    used by the process queue: start(), is_alive(), terminate(), join(),
+    exitcode and sentinel.
+    """
+
+    def __init__(self, pool, target, args=()):
+        """Constructor
+
+        Args:
+            pool (WorkerPool): The worker pool that runs the job
+            target (function): The function to call in the worker
+            args (tuple): The function arguments, they must be picklable
+        """
+        self.pool = pool
+        self.target = target
+        self.args = args
+        self.worker = None
+        self._exitcode = None
+
+    def start(self):
+        """Send the job to an idle worker of the pool
+        """
+        self.worker = self.pool.acquire()
+        self.worker.conn.send((self.target, self.args))
+
+    def _poll(self, timeout=0):
+        """Read the result of the job, if the worker finished it
+
+        Args:
+            timeout (float): The number of seconds to wait for the result,
+                             wait until the job finished if None
+        """
+        if self.worker is None or self._exitcode is not None:
+            return
+        if not wait([self.worker.conn], timeout):
+            return
+        try:
+            exitcode, retire = self.worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker process died while running the job
+            self.worker.kill()
+            self._exitcode = self.worker.process.exitcode
+            if self._exitcode is None or self._exitcode == 0:
+                self._exitcode = 1
+            self.pool.release(self.worker, retire=True)
+            return
+        self._exitcode = exitcode
+        self.pool.release(self.worker, retire=retire)
+
+    def is_alive(self):
+        self._poll()
+        return self.worker is not None and self._exitcode is None
+
+    def join(self, timeout=None):
+        self._poll(timeout)
+
+    def terminate(self):
+        """Kill the worker that runs the job, the pool replaces it
+        """
+        self._poll()
+        if self.worker is None or self._exitcode is not None:
+            return
+        self.worker.kill()
+        self._exitcode = -signal.SIGTERM
+        self.pool.release(self.worker, retire=True)
+
+    @property
+    def exitcode(self):
+        self._poll()
+        return self._exitcode
+
+    @property
+    def sentinel(self):
+        """The worker end of the pipe, it becomes ready when the job
+        finished or the worker died
+        """
+        return self.worker.conn
+
+
+class WorkerPool(object):
+    """Pool of pre-forked worker processes
+
+    The pool does not queue jobs, the process queue starts a job only if
+    one of its worker slots is free. If more jobs than workers are started,
+    additional workers are created.
+    """
+
+    def __init__(self, size, max_jobs=None, max_memory=None):
+        """Constructor
+
+        Args:
+            size (int): The number of workers that are kept ready
+            max_jobs (int): The number of jobs after that a worker is
+                            replaced, no limit if None or 0
+            max_memory (float): The resident set size in MB that causes a
+                                worker to be replaced, no limit if None or 0
+        """
+        self.size = size
+        self.max_jobs = max_jobs if max_jobs else None
+        self.max_memory = max_memory if max_memory else None
+        self.idle_workers = []
+        self.busy_workers = set()
+
+    def _create_worker(self):
+        return PoolWorker(max_jobs=self.max_jobs, max_memory=self.max_memory)
+
+    def start(self):
+        """Start the workers of the pool
+        """
+        while len(self.idle_workers) + len(self.busy_workers) < self.size:
+            self.idle_workers.append(self._create_worker())
+
+    def create_process(self, target, args=()):
+        """Create a job that runs in the pool
+
+        Args:
+            target (function): The function to call in the worker
+            args (tuple): The function arguments, they must be picklable
+
+        Returns:
+            PooledProcess:
+            The job that can be started like a multiprocessing.Process
+        """
+        return PooledProcess(pool=self, target=target, args=args)
+
+    def acquire(self):
+        """Return an idle worker and mark it as busy
+
+        Returns:
+            PoolWorker:
+            The worker
+        """
+        worker = None
+        while self.idle_workers and worker is None:
+            worker = self.idle_workers.pop()
+            if not worker.process.is_alive():
+                worker.kill()
+                worker = None
+        if worker is None:
+            worker = self._create_worker()
+        self.busy_workers.add(worker)
+        return worker
+
+    def release(self, worker, retire=False):
+        """Return a worker after its job finished
+
+        Args:
+            worker (PoolWorker): The worker
+            retire (bool): Replace the worker with a new one
+        """
+        self.busy_workers.discard(worker)
+        worker.num_jobs += 1
+        if retire is True:
+            log.info("Replace pool worker %s after %i jobs"
+                     % (worker.process.pid, worker.num_jobs))
+            worker.kill()
+        elif len(self.idle_workers) + len(self.busy_workers) < self.size:
+            self.idle_workers.append(worker)
+            return
+        else:
+            worker.stop()
+        self.start()
+
+    def close(self):
+        """Stop all workers, running jobs are killed
+        """
+        for worker in self.idle_workers:
+            worker.stop()
+        for worker in self.busy_workers:
+            worker.kill()
+        self.idle_workers = []
+        self.busy_workers = set()
+
+
+def create_worker_pool(config):
+    """Create and start the worker pool that is configured in the actinia
+    config
+
+    Args:
+        config: The global configuration
+
+    Returns:
+        WorkerPool:
+        The started worker pool or None if QUEUE_WORKER_POOL is False
+    """
+    if config.QUEUE_WORKER_POOL is not True:
+        return None
+    pool = WorkerPool(size=config.NUMBER_OF_WORKERS,
+                      max_jobs=config.QUEUE_WORKER_MAX_JOBS,
+                      max_memory=config.QUEUE_WORKER_MAX_MEMORY)
+    pool.start()
+    return pool
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Incremental size tracking of directory trees
+
+The size of the temporary mapset is logged after each module of a process
+chain. Walking the whole mapset after each module is expensive for mapsets
+with many map layers. The DirectorySizeTracker keeps the size of the files
+of each directory and uses inotify on Linux to rescan only the directories
+that changed since the last request. Without inotify the whole tree is
+walked for each request.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+from .logging_interface import log
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+              | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                        use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                   ctypes.c_uint32]
+    _inotify_rm_watch = _libc.inotify_rm_watch
+    has_inotify = True
+except Exception:
+    has_inotify = False
+
+
+def get_directory_size(directory):
+    """Returns the directory size in bytes.
+    Args:
+        directory (string): The path to a directory
+
+    Returns:
+        total: the size of the directory in bytes
+
+    """
+    total = 0
+    try:
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                total += os.path.getsize(entry)
+            elif entry.is_dir():
+                total += get_directory_size(entry.path)
+    except NotADirectoryError:
+        return os.path.getsize(directory)
+    except PermissionError:
+        return 0
+    return total
+
+
+class DirectorySizeTracker(object):
+    """Track the size of a directory tree incrementally
+
+    The tracker keeps the size of each file of the tree. With inotify only
+    the files and directories that received events since the last call of
+    get_size() are read again, otherwise the whole tree is walked.
+    The size is the sum of the file sizes like in get_directory_size().
+    """
+
+    def __init__(self, path, use_inotify=True):
+        """Constructor
+
+        Args:
+            path (str): The path of the directory tree
+            use_inotify (bool): Use inotify if available, otherwise walk the
+                                whole tree for each size request
+        """
+        self.path = path
+        self.fd = None
+        # Directory path -> {file name: file size}
+        self.files = dict()
+        # Directory path -> set of sub directory paths
+        self.sub_directories = dict()
+        # Watch descriptor <-> directory path
+        self.wd_to_path = dict()
+        self.path_to_wd = dict()
+        self.total = 0
+
+        if use_inotify is True and has_inotify is True:
+            fd = _inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                log.warning("Unable to initialize inotify: %s"
+                            % os.strerror(ctypes.get_errno()))
+            else:
+                self.fd = fd
+                try:
+                    self._add_directory(self.path)
+                except OSError as e:
+                    log.warning("Unable to watch %s: %s" % (self.path, str(e)))
+                    self._disable_inotify()
+
+    @property
+    def incremental(self):
+        """True if the size is tracked incrementally with inotify"""
+        return self.fd is not None
+
+    def _clear(self):
+        self.files.clear()
+        self.sub_directories.clear()
+        self.wd_to_path.clear()
+        self.path_to_wd.clear()
+        self.total = 0
+
+    def _disable_inotify(self):
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = None
+        self._clear()
+
+    def _watch(self, path):
+        wd = _inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        # A moved directory keeps its watch descriptor
+        old_path = self.wd_to_path.get(wd)
+        if old_path is not None and old_path != path:
+            self.path_to_wd.pop(old_path, None)
+        self.wd_to_path[wd] = path
+        self.path_to_wd[path] = wd
+
+    @staticmethod
+    def _scan_directory(path):
+        """Read the file sizes and the sub directories of a directory
+
+        Returns:
+            tuple:
+            The {file name: file size} dictionary and the set of sub
+            directory paths
+        """
+        files = dict()
+        sub_directories = set()
+        try:
+            for entry in os.scandir(path):
+                try:
+                    if entry.is_file():
+                        files[entry.name] = os.path.getsize(entry)
+                    elif entry.is_dir():
+                        sub_directories.add(entry.path)
+                except OSError:
+                    # The entry was removed while scanning
+                    pass
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            pass
+        return files, sub_directories
+
+    def _add_directory(self, path):
+        """Watch and scan a directory tree"""
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            # Watch before scanning, so that no change is missed
+            try:
+                self._watch(directory)
+            except FileNotFoundError:
+                continue
+            files, sub_directories = self._scan_directory(directory)
+            self.files[directory] = files
+            self.sub_directories[directory] = sub_directories
+            self.total += sum(files.values())
+            pending.extend(sub_directories)
+
+    def _remove_directory(self, path):
+        """Forget a directory tree and remove its watches"""
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            self.total -= sum(self.files.pop(directory, {}).values())
+            pending.extend(self.sub_directories.pop(directory, ()))
+            wd = self.path_to_wd.pop(directory, None)
+            if wd is not None and self.wd_to_path.get(wd) == directory:
+                del self.wd_to_path[wd]
+                _inotify_rm_watch(self.fd, wd)
+
+    def _update_entry(self, directory, name):
+        """Read the state of a changed entry of a tracked directory"""
+        files = self.files.get(directory)
+        if files is None:
+            return
+        path = os.path.join(directory, name)
+        self.total -= files.pop(name, 0)
+        try:
+            is_file = os.path.isfile(path)
+            is_dir = not is_file and os.path.isdir(path)
+            if is_file:
+                size = os.path.getsize(path)
+        except OSError:
+            is_file = is_dir = False
+
+        sub_directories = self.sub_directories[directory]
+        if path in sub_directories and is_dir is False:
+            sub_directories.discard(path)
+            self._remove_directory(path)
+        if is_file:
+            files[name] = size
+            self.total += size
+        elif is_dir and path not in sub_directories:
+            sub_directories.add(path)
+            self._add_directory(path)
+
+    def _read_events(self):
+        """Read the pending inotify events
+
+        Returns:
+            list:
+            The (directory path, entry name) tuples of the changed entries in
+            the order of their first event or None if events were lost
+        """
+        changed = dict()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return list(changed)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:
+                            offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                path = self.wd_to_path.get(wd)
+                if path is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # The watch was removed, the parent directory receives
+                    # an event for the directory itself
+                    if self.path_to_wd.get(path) == wd:
+                        del self.path_to_wd[path]
+                    del self.wd_to_path[wd]
+                    continue
+                name = os.fsdecode(name.rstrip(b"\0"))
+                if name:
+                    changed[(path, name)] = None
+
+    def get_size(self):
+        """Return the current size of the directory tree in bytes
+
+        Returns:
+            int:
+            The sum of the file sizes in the directory tree
+        """
+        if self.fd is None:
+            return get_directory_size(self.path)
+
+        try:
+            readable, _, _ = select.select([self.fd], [], [], 0)
+            if readable:
+                changed = self._read_events()
+                if changed is None:
+                    # Events were lost, scan the whole tree again
+                    self._reset()
+                    return self.total
+                for directory, name in changed:
+                    self._update_entry(directory, name)
+        except OSError as e:
+            log.warning("Unable to track the size of %s incrementally: %s"
+                        % (self.path, str(e)))
+            self._disable_inotify()
+            return get_directory_size(self.path)
+        return self.total
+
+    def _reset(self):
+        for wd in list(self.wd_to_path):
+            _inotify_rm_watch(self.fd, wd)
+        self._clear()
+        self._add_directory(self.path)
+
+    def close(self):
+        """Remove all watches and close the inotify file descriptor"""
+        self._disable_inotify()
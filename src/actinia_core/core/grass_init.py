@@ -269,6 +269,342 @@ class GrassWindFile(ProcessLogging):
         return self.__windFile
 
 
+# The keys of the region file and the fields of the region dictionary
+REGION_KEYS = {"proj": "proj", "zone": "zone", "north": "north",
+               "south": "south", "east": "east", "west": "west",
+               "top": "top", "bottom": "bottom", "cols": "cols",
+               "rows": "rows", "e-w resol": "ew_res", "n-s resol": "ns_res",
+               "cols3": "cols3", "rows3": "rows3", "depths": "depths",
+               "e-w resol3": "ew_res3", "n-s resol3": "ns_res3",
+               "t-b resol": "tb_res", "format": "format",
+               "compressed": "compressed"}
+
+PROJECTION_LL = 3
+
+
+def _scan_region_value(value, projection, hemispheres):
+    """Read a coordinate or resolution like G_scan_northing(),
+    G_scan_easting() and G_scan_resolution()
+    """
+    value = value.strip()
+    if projection != PROJECTION_LL:
+        return float(value)
+    sign = 1.0
+    if value and value[-1].upper() in hemispheres:
+        if value[-1].upper() == hemispheres[1]:
+            sign = -1.0
+        value = value[:-1]
+    parts = value.split(":")
+    if len(parts) > 3:
+        raise ValueError("Invalid latitude-longitude value <%s>" % value)
+    result = 0.0
+    for part, factor in zip(parts, (1.0, 60.0, 3600.0)):
+        result += float(part) / factor
+    return sign * result
+
+
+def _trim_decimal(text):
+    """Remove trailing zeros after the decimal point like G_trim_decimal()
+    """
+    if "e" in text or "E" in text or "." not in text:
+        return text
+    return text.rstrip("0").rstrip(".")
+
+
+def _format_ll_parts(value, hemisphere):
+    """Format degrees, minutes and seconds like the format() function of the
+    GRASS GIS ll_format.c
+    """
+    if value == 0.0:
+        degrees, minutes, seconds = 0, 0, 0.0
+    else:
+        degrees = int(value)
+        minutes = max(int((value - degrees) * 60), 0)
+        seconds = max(((value - degrees) * 60 - minutes) * 60, 0.0)
+
+    seconds = float("%.10f" % seconds)
+    if seconds >= 60:
+        seconds = 0.0
+        minutes += 1
+        if minutes >= 60:
+            minutes = 0
+            degrees += 1
+
+    seconds = _trim_decimal(("0%.10f" if seconds < 10 else "%.10f") % seconds)
+    if seconds != "00":
+        return "%d:%02d:%s%s" % (degrees, minutes, seconds, hemisphere)
+    if minutes > 0:
+        return "%d:%02d%s" % (degrees, minutes, hemisphere)
+    if degrees > 0:
+        return "%d%s" % (degrees, hemisphere)
+    return "0"
+
+
+def _format_region_value(value, projection, kind):
+    """Format a coordinate or resolution like G_format_northing(),
+    G_format_easting() and G_format_resolution()
+
+    Args:
+        value (float): The value
+        projection (int): The projection code of the location
+        kind (str): "north", "east" or "res"
+    """
+    if projection == PROJECTION_LL:
+        if kind == "north":
+            return _format_ll_parts(abs(value), "S" if value < 0 else "N")
+        if kind == "east":
+            return _format_ll_parts(abs(value), "W" if value < 0 else "E")
+        return _format_ll_parts(value, "")
+    return _trim_decimal("%.8f" % value)
+
+
+def read_region(text):
+    """Read a region file (WIND, DEFAULT_WIND) like G__read_Cell_head() and
+    adjust it like G_adjust_Cell_head3()
+
+    Args:
+        text (str): The content of the region file
+
+    Raises:
+        GrassInitError in case of an invalid region
+
+    Returns:
+        dict:
+        The region with the fields of the GRASS GIS Cell_head structure
+    """
+    entries = {}
+    for line in text.splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key = key.strip().lower()
+        if key in REGION_KEYS:
+            entries[REGION_KEYS[key]] = value.strip()
+
+    try:
+        region = {"proj": int(entries["proj"]),
+                  "zone": int(entries.get("zone", 0))}
+        proj = region["proj"]
+        for key in ("north", "south"):
+            region[key] = _scan_region_value(entries[key], proj, "NS")
+        for key in ("east", "west"):
+            region[key] = _scan_region_value(entries[key], proj, "EW")
+        for key in ("ns_res", "ew_res", "ns_res3", "ew_res3"):
+            if key in entries:
+                region[key] = _scan_region_value(entries[key], proj, "")
+        region["top"] = float(entries.get("top", 1.0))
+        region["bottom"] = float(entries.get("bottom", 0.0))
+        region["tb_res"] = float(entries.get("tb_res", 1.0))
+        for key in ("rows", "cols", "rows3", "cols3", "depths"):
+            if key in entries:
+                region[key] = int(entries[key])
+    except (KeyError, ValueError) as e:
+        raise GrassInitError("Invalid region: %s" % str(e))
+
+    # The 3D settings default to the 2D settings
+    for key_3d, key_2d in (("rows3", "rows"), ("cols3", "cols"),
+                           ("ns_res3", "ns_res"), ("ew_res3", "ew_res")):
+        if key_3d not in region and key_2d in region:
+            region[key_3d] = region[key_2d]
+
+    if proj == PROJECTION_LL:
+        region["north"] = min(region["north"], 90.0)
+        region["south"] = max(region["south"], -90.0)
+        while region["east"] <= region["west"]:
+            region["east"] += 360.0
+    if (region["north"] <= region["south"] or region["east"] <= region["west"]
+            or region["top"] <= region["bottom"]):
+        raise GrassInitError("Invalid region extent")
+
+    # Compute the number of rows, columns and depths, if they are not set
+    extents = (("rows", "ns_res", region["north"] - region["south"]),
+               ("rows3", "ns_res3", region["north"] - region["south"]),
+               ("cols", "ew_res", region["east"] - region["west"]),
+               ("cols3", "ew_res3", region["east"] - region["west"]),
+               ("depths", "tb_res", region["top"] - region["bottom"]))
+    for count_key, res_key, extent in extents:
+        if count_key not in region:
+            if region.get(res_key, 0) <= 0:
+                raise GrassInitError("Invalid region resolution")
+            region[count_key] = max(
+                int((extent + region[res_key] / 2.0) / region[res_key]), 1)
+        if region[count_key] <= 0:
+            raise GrassInitError("Invalid number of region rows, columns "
+                                 "or depths")
+        # Recompute the resolution from the extent
+        region[res_key] = extent / region[count_key]
+    return region
+
+
+def format_region(region):
+    """Format a region like G__write_Cell_head3() writes WIND files
+
+    Args:
+        region (dict): The region created by read_region()
+
+    Returns:
+        str:
+        The content of the region file
+    """
+    proj = region["proj"]
+    lines = ["proj:       %d" % proj,
+             "zone:       %d" % region["zone"],
+             "north:      %s" % _format_region_value(region["north"], proj, "north"),
+             "south:      %s" % _format_region_value(region["south"], proj, "north"),
+             "east:       %s" % _format_region_value(region["east"], proj, "east"),
+             "west:       %s" % _format_region_value(region["west"], proj, "east"),
+             "cols:       %d" % region["cols"],
+             "rows:       %d" % region["rows"],
+             "e-w resol:  %s" % _format_region_value(region["ew_res"], proj, "res"),
+             "n-s resol:  %s" % _format_region_value(region["ns_res"], proj, "res"),
+             "top:        %.15f" % region["top"],
+             "bottom:     %.15f" % region["bottom"],
+             "cols3:      %d" % region["cols3"],
+             "rows3:      %d" % region["rows3"],
+             "depths:     %d" % region["depths"],
+             "e-w resol3: %s" % _format_region_value(region["ew_res3"], proj, "res"),
+             "n-s resol3: %s" % _format_region_value(region["ns_res3"], proj, "res")]
+    # The vertical resolution is never formatted as latitude-longitude
+    if proj == PROJECTION_LL:
+        tb_res = _trim_decimal("%.15g" % region["tb_res"])
+    else:
+        tb_res = _trim_decimal("%.8f" % region["tb_res"])
+    lines.append("t-b resol:  %s" % tb_res)
+    return "\n".join(lines) + "\n"
+
+
+class GrassMapsetBootstrapper(ProcessLogging):
+    """This class creates mapsets and writes the mapset settings natively,
+    like the GRASS GIS modules g.mapset -c, g.mapsets operation=add and
+    db.connect
+    """
+
+    def __init__(self, gisdbase, location_name, mapset_name):
+        """
+
+        Args:
+            gisdbase (str): The GRASS database
+            location_name (str): The location name
+            mapset_name (str): The name of the mapset
+
+        """
+        ProcessLogging.__init__(self)
+        self.location_path = os.path.join(gisdbase, location_name)
+        self.mapset_name = mapset_name
+        self.mapset_path = os.path.join(self.location_path, mapset_name)
+
+    def read_default_region(self):
+        """Read the default region of the PERMANENT mapset of the location
+
+        Raises:
+            GrassInitError if the default region is missing or invalid
+
+        Returns:
+            str:
+            The default region formatted as WIND file
+        """
+        path = os.path.join(self.location_path, "PERMANENT", "DEFAULT_WIND")
+        try:
+            with open(path, "r") as f:
+                return format_region(read_region(f.read()))
+        except OSError as e:
+            raise GrassInitError("Unable to read the default region: %s" % str(e))
+
+    def create_mapset(self, default_region=None):
+        """Create the mapset with the default region as WIND file, like
+        g.mapset -c does. Nothing is done if the mapset exists.
+
+        Args:
+            default_region (str): The formatted default region, it is read
+                                  from the PERMANENT mapset if None
+        """
+        if os.path.isdir(self.mapset_path):
+            return
+        if default_region is None:
+            default_region = self.read_default_region()
+        try:
+            os.mkdir(self.mapset_path)
+            with open(os.path.join(self.mapset_path, "WIND"), "w") as f:
+                f.write(default_region)
+        except OSError as e:
+            raise GrassInitError("Unable to create mapset <%s>: %s"
+                                 % (self.mapset_name, str(e)))
+
+    def _mapset_exists(self, mapset):
+        return os.path.isdir(os.path.join(self.location_path, mapset))
+
+    def get_search_path(self):
+        """Return the mapset search path like G_get_mapset_name()
+
+        Returns:
+            list:
+            The existing mapsets of the SEARCH_PATH file or the mapset and
+            PERMANENT
+        """
+        search_path = []
+        path = os.path.join(self.mapset_path, "SEARCH_PATH")
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                for name in f.read().split():
+                    if self._mapset_exists(name) and name not in search_path:
+                        search_path.append(name)
+        if not search_path:
+            search_path.append(self.mapset_name)
+            if self.mapset_name != "PERMANENT" and self._mapset_exists("PERMANENT"):
+                search_path.append("PERMANENT")
+        return search_path
+
+    def add_to_search_path(self, mapsets):
+        """Add mapsets to the mapset search path like g.mapsets operation=add
+
+        Args:
+            mapsets (list): The names of the mapsets to add
+
+        Raises:
+            GrassInitError if a mapset does not exist
+        """
+        search_path = self.get_search_path()
+        for mapset in mapsets:
+            if mapset in search_path:
+                continue
+            if not self._mapset_exists(mapset):
+                raise GrassInitError("Mapset <%s> not found" % mapset)
+            search_path.append(mapset)
+        # The current mapset is always the first entry
+        if self.mapset_name not in search_path:
+            search_path.insert(0, self.mapset_name)
+        with open(os.path.join(self.mapset_path, "SEARCH_PATH"), "w") as f:
+            for mapset in search_path:
+                f.write("%s\n" % mapset)
+
+    def set_db_connection(self, driver, database):
+        """Set the default database connection of the mapset like db.connect,
+        other settings of the VAR file are kept
+
+        Args:
+            driver (str): The database driver
+            database (str): The database name
+        """
+        settings = []
+        path = os.path.join(self.mapset_path, "VAR")
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        settings.append([key.strip(), value.strip()])
+        for key, value in (("DB_DRIVER", driver), ("DB_DATABASE", database)):
+            for setting in settings:
+                if setting[0] == key:
+                    setting[1] = value
+                    break
+            else:
+                settings.append([key, value])
+        with open(path, "w") as f:
+            for key, value in settings:
+                f.write("%s: %s\n" % (key, value))
+
+
 class GrassModuleRunner(ProcessLogging):
 
     def __init__(self, grassbase, grass_addon_path):
@@ -279,7 +615,7 @@ class GrassModuleRunner(ProcessLogging):
         self.grass_addon_path = grass_addon_path
 
     def _run_process(self, inputlist, raw=False, stdout=subprocess.PIPE,
-                     stderr=subprocess.PIPE, stdin=subprocess.PIPE):
+                     stderr=subprocess.PIPE, stdin=subprocess.PIPE, env=None):
         """This function runs a process and logs its stdout and stderr output.
         It either returns the subprocess or its error id, stderr and stdout
 
@@ -288,6 +624,8 @@ class GrassModuleRunner(ProcessLogging):
             raw (bool): If True return the subprocess, the caller has to take care of it
             stdout (file): A file object that receives stdout, default subprocess.PIPE
             stderr (file): A file object that receives stderr, default subprocess.PIPE
+            env (dict): The environment of the process, default the environment
+                        of the current process
 
         Returns:
             subprocess:
@@ -297,7 +635,7 @@ class GrassModuleRunner(ProcessLogging):
         try:
             self.log_info("Run process: " + str(inputlist))
             proc = subprocess.Popen(args=inputlist, stdout=stdout,
-                                    stderr=stderr, stdin=stdin)
+                                    stderr=stderr, stdin=stdin, env=env)
             self.runPID = proc.pid
             self.log_debug("Process pid: " + str(self.runPID))
 
@@ -363,7 +701,8 @@ class GrassModuleRunner(ProcessLogging):
                    args, raw=False,
                    stdout=subprocess.PIPE,
                    stderr=subprocess.PIPE,
-                   stdin=subprocess.PIPE):
+                   stdin=subprocess.PIPE,
+                   env=None):
         """Set all input and output options and start the module
 
         Raises:
@@ -380,6 +719,8 @@ class GrassModuleRunner(ProcessLogging):
             stdout (file): A file object that receives stdout, default subprocess.PIPE
             stderr (file): A file object that receives stderr, default subprocess.PIPE
             stdin (file): A file object that provides stdin, default subprocess.PIPE
+            env (dict): The environment of the module, default the environment
+                        of the current process
 
         Returns:
             subprocess:
@@ -393,10 +734,12 @@ class GrassModuleRunner(ProcessLogging):
         parameter.extend(args)
 
         if raw is False:
-            errorid, stdout_buff, stderr_buff = self._run_process(parameter)
+            errorid, stdout_buff, stderr_buff = self._run_process(parameter,
+                                                                  env=env)
         else:
             return self._run_process(
-                parameter, raw=raw, stdout=stdout, stderr=stderr, stdin=stdin)
+                parameter, raw=raw, stdout=stdout, stderr=stderr, stdin=stdin,
+                env=env)
 
         if errorid != 0:
             log = "Error while executing the grass module. "" \
@@ -463,9 +806,22 @@ class GrassInitializer(ProcessLogging):
         self.runner = GrassModuleRunner(self.grass_base_dir,
                                         self.grass_addon_path)
 
+    def switch_mapset(self, mapset_name):
+        """Switch into an existing mapset by rewriting the gisrc file
+
+        Args:
+            mapset_name (str): The name of the mapset
+        """
+        self.mapset_name = mapset_name
+        self.mapset_path = os.path.join(self.grass_data_base,
+                                        self.location_name,
+                                        self.mapset_name)
+        self.gisrc.mapset = mapset_name
+        self.gisrc.rewrite_file()
+
     def run_module(self, module_name, parameter_list, raw=False,
                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                   stdin=subprocess.PIPE):
+                   stdin=subprocess.PIPE, env=None):
         """Run a grass module
 
         Args:
@@ -476,6 +832,8 @@ class GrassInitializer(ProcessLogging):
                         is returned
             stdout (file): A file object that receives stdout, default subprocess.PIPE
             stderr (file): A file object that receives stderr, default subprocess.PIPE
+            env (dict): The environment of the module, default the environment
+                        of the current process
 
         Raises:
             This method raises a GrassInitError Exception in case
@@ -488,7 +846,7 @@ class GrassInitializer(ProcessLogging):
 
         """
         return self.runner.run_module(module_name, parameter_list, raw, stdout=stdout,
-                                      stderr=stderr, stdin=stdin)
+                                      stderr=stderr, stdin=stdin, env=env)
 
     def clean_up(self):
         """Try to remove the temporary gisrc file and the mapset lock
@@ -29,6 +29,7 @@ import os
 import subprocess
 import shutil
 from .messages_logger import MessageLogger
+from .directory_size import get_directory_size
 from actinia_core.core.common.config import global_config, DEFAULT_CONFIG_PATH
 from actinia_core.core.common.exceptions import RsyncError
 
@@ -38,29 +39,6 @@ __copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
 __email__ = "info@mundialis.de"
 
 
-def get_directory_size(directory):
-    """Returns the directory size in bytes.
-    Args:
-        directory (string): The path to a directory
-
-    Returns:
-        total: the size of the directory in bytes
-
-    """
-    total = 0
-    try:
-        for entry in os.scandir(directory):
-            if entry.is_file():
-                total += os.path.getsize(entry)
-            elif entry.is_dir():
-                total += get_directory_size(entry.path)
-    except NotADirectoryError:
-        return os.path.getsize(directory)
-    except PermissionError:
-        return 0
-    return total
-
-
 class InterimResult(object):
     """This class manages the interim results
     """
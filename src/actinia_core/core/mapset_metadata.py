@@ -0,0 +1,964 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Read-only access to the metadata of GRASS GIS mapsets
+
+The metadata of raster and vector map layers, the map layer and mapset lists
+and the space-time raster datasets of a mapset are read directly from the
+files of the mapset, without starting GRASS GIS modules:
+
+    - raster: cellhd, cats, hist and cell_misc files (r.info -gre)
+    - vector: head, dbln, hist, the topo header and the attribute table
+              (v.info -gte, v.info -h, v.info -c)
+    - lists: the cell and vector directories (g.list) and the mapset
+             directories of a location (g.mapsets -l)
+    - STRDS: the sqlite temporal database of the mapset (t.list, t.info -g)
+
+The output is formatted like the output of the GRASS GIS modules. All
+results are cached and invalidated by the modification time of the files
+that were read. MetadataUnavailable is raised for everything that can not be
+read reliably, for example reclassified or linked raster maps, vector maps
+without topology or temporal databases that are not stored in sqlite. The
+caller must use the GRASS GIS module in this case.
+"""
+
+import copy
+import fnmatch
+import os
+import re
+import sqlite3
+import struct
+from collections import OrderedDict
+from threading import Lock
+from actinia_core.core.common.exceptions import MetadataUnavailable
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The GRASS GIS projection codes of the cellhd, WIND and head files
+PROJECTION_XY = 0
+PROJECTION_UTM = 1
+PROJECTION_LL = 3
+PROJECTION_NAMES = {PROJECTION_XY: "x,y",
+                    PROJECTION_UTM: "UTM",
+                    PROJECTION_LL: "Latitude-Longitude"}
+
+# The element of the map layer types that g.list uses
+LIST_ELEMENTS = {"raster": "cell",
+                 "vector": "vector"}
+
+# The fields of the raster history file in the order of the file
+HISTORY_FIELDS = ("mapid", "title", "mapset", "creator", "maptype",
+                  "datsrc_1", "datsrc_2", "keywrd")
+
+# The column types of the sqlite attribute database driver
+SQLITE_COLUMN_TYPES = {"integer": "INTEGER", "int": "INTEGER",
+                       "int4": "INTEGER", "bigint": "INTEGER",
+                       "int8": "INTEGER",
+                       "double": "DOUBLE PRECISION",
+                       "float8": "DOUBLE PRECISION",
+                       "double precision": "DOUBLE PRECISION",
+                       "text": "TEXT", "date": "DATE",
+                       "char": "CHARACTER", "character": "CHARACTER",
+                       "varchar": "CHARACTER",
+                       "character varying": "CHARACTER"}
+
+# The characters that G_legal_filename() does not allow in names of map
+# layers and mapsets, besides whitespace and non ASCII characters
+ILLEGAL_NAME_CHARACTERS = frozenset("/\\\"'@,=*~")
+
+# The size of the topo header of GRASS GIS vector topology version 5
+TOPO_HEADER_SIZE = 142
+
+
+def format_double(value):
+    """Format a floating point value like the GRASS GIS modules, using 15
+    significant digits without trailing zeros
+
+    Args:
+        value (float): The value
+
+    Returns:
+        str:
+        The formatted value
+    """
+    text = "%.15g" % value
+    if "e" not in text and "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+def scan_coordinate(text):
+    """Read a coordinate or resolution of a GRASS GIS header file, that is
+    either a decimal number or a latitude/longitude in the format
+    dd:mm:ss.ssH
+
+    Args:
+        text (str): The coordinate
+
+    Raises:
+        MetadataUnavailable if the coordinate can not be read
+
+    Returns:
+        float:
+        The coordinate
+    """
+    text = text.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    match = re.match(r"^(\d+)(?::(\d+)(?::(\d+(?:\.\d*)?))?)?([NSEW]?)$",
+                     text, re.IGNORECASE)
+    if match is None:
+        raise MetadataUnavailable("Unable to read the coordinate <%s>" % text)
+    degrees, minutes, seconds, hemisphere = match.groups()
+    value = (float(degrees) + float(minutes or 0) / 60.0
+             + float(seconds or 0) / 3600.0)
+    if hemisphere.upper() in ("S", "W"):
+        value = -value
+    return value
+
+
+def is_legal_name(name):
+    """Check if a map layer or mapset name is legal in the sense of
+    G_legal_filename(), so that it can be joined with the path of a mapset
+    without leaving the element directory
+
+    Args:
+        name (str): The name without the mapset
+
+    Returns:
+        bool:
+        True if the name is legal, False otherwise
+    """
+    if not name or name.startswith("."):
+        return False
+    return all(" " < char < "\x7f" and char not in ILLEGAL_NAME_CHARACTERS
+               for char in name)
+
+
+def read_key_value_file(path, separator=":"):
+    """Read a GRASS GIS key: value file like cellhd, WIND, head or VAR
+
+    Args:
+        path (str): The path of the file
+        separator (str): The separator of key and value
+
+    Raises:
+        MetadataUnavailable if the file can not be read
+
+    Returns:
+        dict:
+        The keys in lower case and the values without surrounding
+        whitespace
+    """
+    entries = {}
+    try:
+        with open(path, "r", errors="replace") as f:
+            for line in f:
+                if separator not in line:
+                    continue
+                key, value = line.split(separator, 1)
+                entries[key.strip().lower()] = value.strip()
+    except OSError as e:
+        raise MetadataUnavailable("Unable to read <%s>: %s" % (path, str(e)))
+    return entries
+
+
+def _read_first_line(path, default=None):
+    """Read the first line of a file without the line break
+
+    Returns:
+        str:
+        The first line or the default if the file does not exist
+    """
+    try:
+        with open(path, "r", errors="replace") as f:
+            return f.readline().rstrip("\r\n")
+    except FileNotFoundError:
+        return default
+    except OSError as e:
+        raise MetadataUnavailable("Unable to read <%s>: %s" % (path, str(e)))
+
+
+def _read_lines(path):
+    try:
+        with open(path, "r", errors="replace") as f:
+            return [line.rstrip("\r\n") for line in f]
+    except OSError as e:
+        raise MetadataUnavailable("Unable to read <%s>: %s" % (path, str(e)))
+
+
+def _list_directory(path):
+    """List the entries of a directory like GRASS GIS, sorted and without
+    hidden files
+    """
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        raise MetadataUnavailable("Unable to list <%s>: %s" % (path, str(e)))
+    return sorted(name for name in names if not name.startswith("."))
+
+
+class MetadataCache(object):
+    """Least recently used cache of metadata, that is invalidated by the
+    modification time and size of the files that were read to create it
+    """
+
+    def __init__(self, max_size=1024):
+        """Constructor
+
+        Args:
+            max_size (int): The maximum number of cached entries
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def signature(paths):
+        """Return the modification signature of files and directories
+
+        Args:
+            paths (list): The paths
+
+        Returns:
+            tuple:
+            The inode, modification time and size of each path or None for
+            paths that do not exist
+        """
+        sig = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                sig.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def get(self, key, paths, func):
+        """Return the cached value or create it
+
+        Args:
+            key: The hashable key of the value
+            paths (list): The files and directories that func reads
+            func (function): The function without arguments that creates
+                             the value
+
+        Returns:
+            A copy of the value
+        """
+        sig = self.signature(paths)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self.entries.move_to_end(key)
+                return copy.deepcopy(entry[1])
+
+        value = func()
+        if self.max_size:
+            with self.lock:
+                self.entries[key] = (sig, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return copy.deepcopy(value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class MapsetMetadataReader(object):
+    """Read the metadata of map layers, mapsets and space-time datasets
+    from the files of GRASS GIS locations
+
+    All functions raise MetadataUnavailable if the metadata can not be read
+    reliably.
+    """
+
+    def __init__(self, max_size=1024):
+        """Constructor
+
+        Args:
+            max_size (int): The maximum number of cached results
+        """
+        self.cache = MetadataCache(max_size=max_size)
+
+    """
+    Lists
+    """
+
+    def list_mapsets(self, location_path):
+        """List the mapsets of a location like g.mapsets -l
+
+        Args:
+            location_path (str): The path of the location
+
+        Raises:
+            MetadataUnavailable if the location contains directories that
+            are not mapsets
+
+        Returns:
+            list:
+            The sorted mapset names
+        """
+        return self.cache.get(("mapsets", location_path), [location_path],
+                              lambda: self._list_mapsets(location_path))
+
+    @staticmethod
+    def _list_mapsets(location_path):
+        mapsets = []
+        for name in _list_directory(location_path):
+            path = os.path.join(location_path, name)
+            if not os.path.isdir(path):
+                continue
+            if not os.path.isfile(os.path.join(path, "WIND")):
+                raise MetadataUnavailable(
+                    "Invalid mapset <%s> in location <%s>" % (name, location_path))
+            mapsets.append(name)
+        return mapsets
+
+    def list_maps(self, mapset_path, layer_type, pattern=None):
+        """List the map layers of a mapset like g.list
+
+        Args:
+            mapset_path (str): The path of the mapset
+            layer_type (str): The layer type: raster or vector
+            pattern (str): A glob pattern to filter the layer names
+
+        Raises:
+            MetadataUnavailable for other layer types and patterns with
+            braces
+
+        Returns:
+            list:
+            The sorted layer names
+        """
+        if layer_type not in LIST_ELEMENTS:
+            raise MetadataUnavailable("Unsupported layer type <%s>" % layer_type)
+        if pattern is not None and ("{" in pattern or "}" in pattern):
+            raise MetadataUnavailable("Unsupported pattern <%s>" % pattern)
+        element_path = os.path.join(mapset_path, LIST_ELEMENTS[layer_type])
+        names = self.cache.get(("list", element_path), [element_path],
+                               lambda: _list_directory(element_path))
+        if pattern:
+            names = [name for name in names
+                     if fnmatch.fnmatchcase(name, pattern)]
+        return names
+
+    """
+    Raster map layers
+    """
+
+    def raster_info(self, mapset_path, raster_name):
+        """Read the information about a raster map layer like r.info -gre
+
+        Args:
+            mapset_path (str): The path of the mapset that contains the raster
+                               map layer
+            raster_name (str): The name of the raster map layer
+
+        Raises:
+            MetadataUnavailable in case of missing files, reclassified or
+            linked raster map layers
+
+        Returns:
+            dict:
+            The r.info key value pairs as strings
+        """
+        misc_path = os.path.join(mapset_path, "cell_misc", raster_name)
+        paths = [os.path.join(mapset_path, "cellhd", raster_name),
+                 os.path.join(mapset_path, "cats", raster_name),
+                 os.path.join(mapset_path, "hist", raster_name),
+                 misc_path]
+        paths.extend(os.path.join(misc_path, name) for name in (
+            "f_format", "range", "f_range", "timestamp", "units",
+            "vertical_datum", "bandref"))
+        return self.cache.get(
+            ("raster", mapset_path, raster_name), paths,
+            lambda: self._raster_info(mapset_path, raster_name))
+
+    def _raster_info(self, mapset_path, raster_name):
+        location_path = os.path.dirname(mapset_path)
+        mapset_name = os.path.basename(mapset_path)
+        cellhd_path = os.path.join(mapset_path, "cellhd", raster_name)
+        misc_path = os.path.join(mapset_path, "cell_misc", raster_name)
+
+        first_line = _read_first_line(cellhd_path)
+        if first_line is None:
+            raise MetadataUnavailable("Raster map <%s> not found" % raster_name)
+        if first_line.strip().lower().startswith("reclass"):
+            raise MetadataUnavailable("Raster map <%s> is a reclass map"
+                                      % raster_name)
+        if os.path.exists(os.path.join(misc_path, "gdal")):
+            raise MetadataUnavailable("Raster map <%s> is a linked map"
+                                      % raster_name)
+
+        cellhd = read_key_value_file(cellhd_path)
+        try:
+            rows = int(cellhd["rows"])
+            cols = int(cellhd["cols"])
+            proj = int(cellhd.get("proj", PROJECTION_XY))
+            north = scan_coordinate(cellhd["north"])
+            south = scan_coordinate(cellhd["south"])
+            east = scan_coordinate(cellhd["east"])
+            west = scan_coordinate(cellhd["west"])
+        except (KeyError, ValueError):
+            raise MetadataUnavailable("Unable to read the header of raster map "
+                                      "<%s>" % raster_name)
+        if rows <= 0 or cols <= 0:
+            raise MetadataUnavailable("Invalid header of raster map <%s>"
+                                      % raster_name)
+        if proj == PROJECTION_LL and east <= west:
+            east += 360.0
+
+        datatype = self._raster_datatype(misc_path)
+        ncats, title = self._raster_cats(mapset_path, raster_name)
+        history = self._raster_history(mapset_path, raster_name)
+        min_value, max_value = self._raster_range(misc_path, datatype)
+
+        info = OrderedDict()
+        info["north"] = format_double(north)
+        info["south"] = format_double(south)
+        info["east"] = format_double(east)
+        info["west"] = format_double(west)
+        info["nsres"] = format_double((north - south) / rows)
+        info["ewres"] = format_double((east - west) / cols)
+        info["rows"] = str(rows)
+        info["cols"] = str(cols)
+        info["cells"] = str(rows * cols)
+        info["datatype"] = datatype
+        info["ncats"] = str(ncats)
+        info["min"] = min_value
+        info["max"] = max_value
+        info["map"] = raster_name
+        info["maptype"] = "raster"
+        info["mapset"] = mapset_name
+        info["location"] = os.path.basename(location_path)
+        info["database"] = os.path.dirname(location_path)
+        info["date"] = '"%s"' % history["mapid"]
+        info["creator"] = '"%s"' % history["creator"]
+        info["title"] = '"%s"' % title
+        info["timestamp"] = '"%s"' % self._optional_line(misc_path, "timestamp")
+        info["units"] = '"%s"' % self._optional_line(misc_path, "units")
+        info["vdatum"] = '"%s"' % self._optional_line(misc_path,
+                                                      "vertical_datum")
+        bandref = _read_first_line(os.path.join(misc_path, "bandref"))
+        if bandref is not None:
+            info["bandref"] = '"%s"' % bandref.strip()
+        info["source1"] = '"%s"' % history["datsrc_1"]
+        info["source2"] = '"%s"' % history["datsrc_2"]
+        info["description"] = '"%s"' % history["keywrd"]
+        if history["lines"]:
+            info["comments"] = '"%s"' % "".join(history["lines"])
+        return info
+
+    @staticmethod
+    def _optional_line(misc_path, name):
+        value = _read_first_line(os.path.join(misc_path, name))
+        if value is None or not value.strip():
+            return "none"
+        return value.strip()
+
+    @staticmethod
+    def _raster_datatype(misc_path):
+        f_format_path = os.path.join(misc_path, "f_format")
+        if not os.path.exists(f_format_path):
+            return "CELL"
+        f_format = read_key_value_file(f_format_path)
+        if f_format.get("type") == "double":
+            return "DCELL"
+        if f_format.get("type") == "float":
+            return "FCELL"
+        raise MetadataUnavailable("Unknown floating point format <%s>"
+                                  % f_format_path)
+
+    @staticmethod
+    def _raster_cats(mapset_path, raster_name):
+        """Return the number of categories and the title of the cats file
+        """
+        cats_path = os.path.join(mapset_path, "cats", raster_name)
+        if not os.path.exists(cats_path):
+            raise MetadataUnavailable("Missing category file of raster map "
+                                      "<%s>" % raster_name)
+        lines = _read_lines(cats_path)
+        match = re.match(r"^#\s*(-?\d+)", lines[0] if lines else "")
+        if match is None or len(lines) < 2:
+            raise MetadataUnavailable("Unable to read the category file of "
+                                      "raster map <%s>" % raster_name)
+        return int(match.group(1)), lines[1].strip()
+
+    @staticmethod
+    def _raster_history(mapset_path, raster_name):
+        """Return the fields and comment lines of the history file
+        """
+        hist_path = os.path.join(mapset_path, "hist", raster_name)
+        if not os.path.exists(hist_path):
+            raise MetadataUnavailable("Missing history file of raster map "
+                                      "<%s>" % raster_name)
+        lines = _read_lines(hist_path)
+        if len(lines) < len(HISTORY_FIELDS):
+            raise MetadataUnavailable("Unable to read the history file of "
+                                      "raster map <%s>" % raster_name)
+        history = dict(zip(HISTORY_FIELDS, lines))
+        history["lines"] = lines[len(HISTORY_FIELDS):]
+        return history
+
+    @staticmethod
+    def _raster_range(misc_path, datatype):
+        """Return the formatted minimum and maximum of the range file
+        """
+        if datatype == "CELL":
+            range_path = os.path.join(misc_path, "range")
+            if not os.path.exists(range_path):
+                raise MetadataUnavailable("Missing range file <%s>" % range_path)
+            values = " ".join(_read_lines(range_path)).split()
+            if not values:
+                return "NULL", "NULL"
+            try:
+                return str(int(values[0])), str(int(values[1]))
+            except (IndexError, ValueError):
+                raise MetadataUnavailable("Unable to read the range file <%s>"
+                                          % range_path)
+
+        range_path = os.path.join(misc_path, "f_range")
+        try:
+            with open(range_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            raise MetadataUnavailable("Missing range file <%s>" % range_path)
+        if not data:
+            return "NULL", "NULL"
+        if len(data) != 16:
+            raise MetadataUnavailable("Unable to read the range file <%s>"
+                                      % range_path)
+        # The range is stored as two XDR (big endian) doubles
+        min_value, max_value = struct.unpack(">dd", data)
+        number_format = "%.7g" if datatype == "FCELL" else "%.15g"
+        return number_format % min_value, number_format % max_value
+
+    """
+    Vector map layers
+    """
+
+    def vector_info(self, mapset_path, vector_name, permanent_path=None):
+        """Read the information about a vector map layer like
+        v.info -gte, the COMMAND of v.info -h and the columns of v.info -c
+
+        Args:
+            mapset_path (str): The path of the mapset that contains the vector
+                               map layer
+            vector_name (str): The name of the vector map layer
+            permanent_path (str): The path of the PERMANENT mapset of the
+                                  location, to read the projection name
+
+        Raises:
+            MetadataUnavailable in case of missing topology, non-native
+            formats, latitude-longitude locations or attribute databases
+            that are not stored in sqlite
+
+        Returns:
+            dict:
+            The v.info key value pairs as strings and the list of attribute
+            columns as {"type": ..., "column": ...} dictionaries in
+            "Attributes"
+        """
+        vector_path = os.path.join(mapset_path, "vector", vector_name)
+        paths = [vector_path]
+        paths.extend(os.path.join(vector_path, name) for name in (
+            "head", "topo", "dbln", "hist", "timestamp", "frmt"))
+        if permanent_path is not None:
+            paths.append(os.path.join(permanent_path, "PROJ_INFO"))
+        # The attribute database is added to the signature by the
+        # cached function
+        key = ("vector", mapset_path, vector_name, permanent_path)
+        database = self.cache.get(
+            ("vector_database", mapset_path, vector_name), paths,
+            lambda: self._vector_database(mapset_path, vector_name))
+        if database is not None:
+            paths.append(database)
+        return self.cache.get(
+            key, paths,
+            lambda: self._vector_info(mapset_path, vector_name, permanent_path))
+
+    def _vector_database(self, mapset_path, vector_name):
+        links = self._vector_dblinks(mapset_path, vector_name)
+        if links:
+            return links[0]["database"]
+        return None
+
+    def _vector_info(self, mapset_path, vector_name, permanent_path):
+        location_path = os.path.dirname(mapset_path)
+        mapset_name = os.path.basename(mapset_path)
+        vector_path = os.path.join(mapset_path, "vector", vector_name)
+
+        if not os.path.isfile(os.path.join(vector_path, "head")):
+            raise MetadataUnavailable("Vector map <%s> not found" % vector_name)
+        if os.path.exists(os.path.join(vector_path, "frmt")):
+            raise MetadataUnavailable("Vector map <%s> is not a native vector "
+                                      "map" % vector_name)
+
+        head = read_key_value_file(os.path.join(vector_path, "head"))
+        try:
+            proj = int(head.get("proj", PROJECTION_XY) or PROJECTION_XY)
+            zone = int(head.get("zone", 0) or 0)
+            threshold = float(head.get("map thresh", 0) or 0)
+            scale = int(float(head.get("map scale", 1) or 1))
+        except ValueError:
+            raise MetadataUnavailable("Unable to read the header of vector map "
+                                      "<%s>" % vector_name)
+        if proj == PROJECTION_LL:
+            raise MetadataUnavailable("Latitude-longitude vector maps are not "
+                                      "supported")
+        topo = self._read_topo_header(os.path.join(vector_path, "topo"))
+        links = self._vector_dblinks(mapset_path, vector_name)
+        if len(links) > 1:
+            raise MetadataUnavailable("Vector map <%s> has more than one "
+                                      "attribute layer" % vector_name)
+
+        info = OrderedDict()
+        info["north"] = format_double(topo["north"])
+        info["south"] = format_double(topo["south"])
+        info["east"] = format_double(topo["east"])
+        info["west"] = format_double(topo["west"])
+        info["top"] = format_double(topo["top"])
+        info["bottom"] = format_double(topo["bottom"])
+        info["nodes"] = str(topo["nodes"])
+        info["points"] = str(topo["points"])
+        info["lines"] = str(topo["lines"])
+        info["boundaries"] = str(topo["boundaries"])
+        info["centroids"] = str(topo["centroids"])
+        info["areas"] = str(topo["areas"])
+        info["islands"] = str(topo["islands"])
+        if topo["map3d"]:
+            info["faces"] = str(topo["faces"])
+            info["kernels"] = str(topo["kernels"])
+            info["volumes"] = str(topo["volumes"])
+            info["holes"] = str(topo["holes"])
+        info["primitives"] = str(topo["primitives"])
+        info["map3d"] = "1" if topo["map3d"] else "0"
+        info["name"] = vector_name
+        info["mapset"] = mapset_name
+        info["location"] = os.path.basename(location_path)
+        info["database"] = os.path.dirname(location_path)
+        info["title"] = head.get("map name", "")
+        info["scale"] = "1:%i" % scale
+        info["creator"] = head.get("digit name", "")
+        info["organization"] = head.get("organization", "")
+        info["source_date"] = head.get("map date", "")
+        timestamp = _read_first_line(os.path.join(vector_path, "timestamp"))
+        info["timestamp"] = timestamp.strip() if timestamp else "none"
+        info["format"] = "native"
+        info["level"] = "2"
+        info["num_dblinks"] = str(len(links))
+        for link in links:
+            info["attribute_layer_number"] = link["number"]
+            info["attribute_layer_name"] = link["name"]
+            info["attribute_database"] = link["database"]
+            info["attribute_database_driver"] = link["driver"]
+            info["attribute_table"] = link["table"]
+            info["attribute_primary_key"] = link["key"]
+        info["projection"] = self._projection_name(proj, permanent_path)
+        if proj == PROJECTION_UTM:
+            info["zone"] = str(zone)
+        info["digitization_threshold"] = "%f" % threshold
+        info["comment"] = head.get("other info", "")
+
+        # The command that created the vector map layer (v.info -h)
+        hist_path = os.path.join(vector_path, "hist")
+        if os.path.exists(hist_path):
+            for line in _read_lines(hist_path):
+                if "COMMAND:" in line:
+                    info["COMMAND"] = line.split(":", 1)[1]
+
+        # The columns of the attribute table of the first layer (v.info -c)
+        layer_links = [link for link in links if link["number"] == "1"]
+        if not layer_links:
+            raise MetadataUnavailable("Vector map <%s> has no attribute table "
+                                      "in layer 1" % vector_name)
+        info["Attributes"] = self._table_columns(layer_links[0])
+        return info
+
+    @staticmethod
+    def _read_topo_header(topo_path):
+        """Read the counts and the bounding box of the topo file header
+        """
+        try:
+            with open(topo_path, "rb") as f:
+                data = f.read(TOPO_HEADER_SIZE + 32)
+        except OSError:
+            raise MetadataUnavailable("Missing topology <%s>" % topo_path)
+        if len(data) < TOPO_HEADER_SIZE:
+            raise MetadataUnavailable("Invalid topology <%s>" % topo_path)
+
+        major, minor, back_major, back_minor, byte_order = struct.unpack(
+            "5B", data[:5])
+        if major != 5 or byte_order not in (0, 1):
+            raise MetadataUnavailable("Unsupported topology version %i.%i of "
+                                      "<%s>" % (major, minor, topo_path))
+        # 0 is little endian, 1 is big endian
+        endian = "<" if byte_order == 0 else ">"
+        head_size, with_z = struct.unpack(endian + "iB", data[5:10])
+        # The size depends on the size of the file offsets
+        if head_size < TOPO_HEADER_SIZE:
+            raise MetadataUnavailable("Invalid topology header size %i of <%s>"
+                                      % (head_size, topo_path))
+        north, south, east, west, top, bottom = struct.unpack(
+            endian + "6d", data[10:58])
+        (nodes, edges, lines, areas, isles, volumes, holes,
+         n_points, n_lines, n_boundaries, n_centroids, n_faces,
+         n_kernels) = struct.unpack(endian + "13i", data[58:110])
+        counts = (nodes, edges, lines, areas, isles, volumes, holes, n_points,
+                  n_lines, n_boundaries, n_centroids, n_faces, n_kernels)
+        if min(counts) < 0 or lines != (n_points + n_lines + n_boundaries
+                                        + n_centroids + n_faces + n_kernels):
+            raise MetadataUnavailable("Inconsistent topology <%s>" % topo_path)
+        if nodes == 0 and lines == 0:
+            # The bounding box of empty vector maps is not defined
+            north = south = east = west = top = bottom = 0.0
+
+        return {"north": north, "south": south, "east": east, "west": west,
+                "top": top, "bottom": bottom, "nodes": nodes,
+                "points": n_points, "lines": n_lines,
+                "boundaries": n_boundaries, "centroids": n_centroids,
+                "areas": areas, "islands": isles, "faces": n_faces,
+                "kernels": n_kernels, "volumes": volumes, "holes": holes,
+                "primitives": lines, "map3d": bool(with_z)}
+
+    @staticmethod
+    def _substitute_variables(path, mapset_path):
+        location_path = os.path.dirname(mapset_path)
+        path = path.replace("$GISDBASE", os.path.dirname(location_path))
+        path = path.replace("$LOCATION_NAME", os.path.basename(location_path))
+        path = path.replace("$MAPSET", os.path.basename(mapset_path))
+        return path
+
+    def _vector_dblinks(self, mapset_path, vector_name):
+        """Read the attribute database links of the dbln file
+        """
+        dbln_path = os.path.join(mapset_path, "vector", vector_name, "dbln")
+        if not os.path.exists(dbln_path):
+            return []
+        links = []
+        for line in _read_lines(dbln_path):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "|" in line:
+                fields = line.split("|")
+            else:
+                fields = line.split()
+            if len(fields) != 5 or "/" not in fields[0]:
+                raise MetadataUnavailable("Unable to read the database links "
+                                          "<%s>" % dbln_path)
+            number, name = fields[0].split("/", 1)
+            links.append({"number": number, "name": name,
+                          "table": fields[1], "key": fields[2],
+                          "database": self._substitute_variables(
+                              fields[3], mapset_path),
+                          "driver": fields[4]})
+        return links
+
+    @staticmethod
+    def _table_columns(link):
+        """Read the column types and names of an attribute table in the
+        format of v.info -c
+        """
+        if link["driver"] != "sqlite":
+            raise MetadataUnavailable("Unsupported database driver <%s>"
+                                      % link["driver"])
+        if not os.path.isfile(link["database"]):
+            raise MetadataUnavailable("Missing attribute database <%s>"
+                                      % link["database"])
+        try:
+            connection = sqlite3.connect("file:%s?mode=ro" % link["database"],
+                                         uri=True)
+            try:
+                rows = connection.execute(
+                    "PRAGMA table_info(\"%s\")"
+                    % link["table"].replace('"', '""')).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            raise MetadataUnavailable("Unable to read the attribute table <%s>: "
+                                      "%s" % (link["table"], str(e)))
+        if not rows:
+            raise MetadataUnavailable("Missing attribute table <%s>"
+                                      % link["table"])
+        columns = []
+        for row in rows:
+            declared = " ".join(str(row[2]).lower().split())
+            declared = re.sub(r"\s*\(\s*\d+\s*\)$", "", declared)
+            if declared not in SQLITE_COLUMN_TYPES:
+                raise MetadataUnavailable("Unsupported column type <%s>" % row[2])
+            columns.append({"type": SQLITE_COLUMN_TYPES[declared],
+                            "column": row[1]})
+        return columns
+
+    @staticmethod
+    def _projection_name(proj, permanent_path):
+        if proj in PROJECTION_NAMES:
+            return PROJECTION_NAMES[proj]
+        if permanent_path is not None:
+            proj_info = read_key_value_file(
+                os.path.join(permanent_path, "PROJ_INFO"))
+            if "name" in proj_info:
+                return proj_info["name"]
+        raise MetadataUnavailable("Unknown projection name")
+
+    """
+    Space-time raster datasets
+    """
+
+    def _temporal_database(self, mapset_path):
+        """Return the path of the sqlite temporal database of a mapset
+        """
+        var_path = os.path.join(mapset_path, "VAR")
+        variables = {}
+        if os.path.exists(var_path):
+            variables = read_key_value_file(var_path)
+        driver = variables.get("tgisdb_driver", "sqlite")
+        if driver != "sqlite":
+            raise MetadataUnavailable("Unsupported temporal database driver "
+                                      "<%s>" % driver)
+        database = variables.get("tgisdb_database",
+                                 "$GISDBASE/$LOCATION_NAME/$MAPSET/tgis/sqlite.db")
+        return self._substitute_variables(database, mapset_path)
+
+    @staticmethod
+    def _query_temporal_database(database, queries):
+        """Run read only queries on the temporal database
+
+        Args:
+            database (str): The path of the sqlite database
+            queries (list): A list of (sql, parameters) tuples
+
+        Returns:
+            list:
+            The rows of each query as list of sqlite3.Row
+        """
+        try:
+            connection = sqlite3.connect(
+                "file:%s?mode=ro" % database, uri=True,
+                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+            connection.row_factory = sqlite3.Row
+            try:
+                return [connection.execute(sql, parameters).fetchall()
+                        for sql, parameters in queries]
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            raise MetadataUnavailable("Unable to read the temporal database "
+                                      "<%s>: %s" % (database, str(e)))
+
+    def list_strds(self, mapset_path):
+        """List the space-time raster datasets of a mapset like
+        t.list type=strds column=name where="mapset='<mapset>'"
+
+        Args:
+            mapset_path (str): The path of the mapset
+
+        Returns:
+            list:
+            The names of the STRDS with absolute time followed by the names
+            of the STRDS with relative time, each ordered by id
+        """
+        database = self._temporal_database(mapset_path)
+        return self.cache.get(("strds_list", database), [database],
+                              lambda: self._list_strds(mapset_path, database))
+
+    def _list_strds(self, mapset_path, database):
+        if not os.path.exists(database):
+            # The temporal database is created with the first dataset
+            return []
+        mapset_name = os.path.basename(mapset_path)
+        queries = [("SELECT name FROM %s WHERE mapset = ? ORDER BY id" % view,
+                    (mapset_name,))
+                   for view in ("strds_view_abs_time", "strds_view_rel_time")]
+        names = []
+        for rows in self._query_temporal_database(database, queries):
+            names.extend(row["name"] for row in rows)
+        return names
+
+    def strds_info(self, mapset_path, strds_name):
+        """Read the information about a space-time raster dataset like
+        t.info -g
+
+        Args:
+            mapset_path (str): The path of the mapset that contains the STRDS
+            strds_name (str): The name of the STRDS
+
+        Raises:
+            MetadataUnavailable if the STRDS does not exist
+
+        Returns:
+            dict:
+            The columns of the STRDS tables as strings, that contain the
+            t.info key value pairs
+        """
+        database = self._temporal_database(mapset_path)
+        return self.cache.get(
+            ("strds", database, strds_name), [database],
+            lambda: self._strds_info(mapset_path, database, strds_name))
+
+    def _strds_info(self, mapset_path, database, strds_name):
+        if not os.path.exists(database):
+            raise MetadataUnavailable("Missing temporal database <%s>" % database)
+        strds_id = "%s@%s" % (strds_name, os.path.basename(mapset_path))
+        tables = ("strds_base", "strds_absolute_time", "strds_relative_time",
+                  "strds_spatial_extent", "strds_metadata")
+        results = self._query_temporal_database(
+            database, [("SELECT * FROM %s WHERE id = ?" % table, (strds_id,))
+                       for table in tables])
+        base, absolute, relative, extent, metadata = [
+            rows[0] if rows else None for rows in results]
+        if base is None or extent is None or metadata is None:
+            raise MetadataUnavailable("STRDS <%s> not found" % strds_id)
+
+        info = OrderedDict()
+        for row in (base, absolute, relative, extent, metadata):
+            if row is None:
+                continue
+            for key in row.keys():
+                info[key] = str(row[key])
+        return info
+
+
+def create_metadata_reader(config):
+    """Create the metadata reader that is configured in the actinia config
+
+    Args:
+        config: The global configuration
+
+    Returns:
+        MapsetMetadataReader:
+        The metadata reader
+    """
+    return MapsetMetadataReader(max_size=config.METADATA_CACHE_SIZE)
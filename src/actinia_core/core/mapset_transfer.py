@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Storage aware transfer of mapsets
+
+Mapsets are moved, copied and merged in-process with the fastest strategy
+the storage supports:
+
+    - os.rename() if a mapset is moved within a filesystem
+    - reflink copies (FICLONE) on filesystems with copy-on-write support,
+      like btrfs and XFS
+    - hardlinks if the files may be shared, like cp -l
+    - parallel copies of the files otherwise
+
+Strategies that are not supported by the storage are disabled for the rest
+of the transfer after the first failure.
+"""
+
+import errno
+import fcntl
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The ioctl request of linux/fs.h that clones a file
+FICLONE = 0x40049409
+
+# The errors that show that a strategy is not supported by the storage
+UNSUPPORTED_ERRORS = (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY,
+                      errno.EINVAL, errno.ENOSYS, errno.EPERM, errno.EMLINK)
+
+
+def reflink_file(source_path, target_path):
+    """Create a copy-on-write clone of a file
+
+    Args:
+        source_path (str): The source file
+        target_path (str): The target file, that must not exist
+
+    Raises:
+        OSError if the filesystem does not support reflinks
+    """
+    with open(source_path, "rb") as source:
+        with open(target_path, "xb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+class MapsetTransfer(object):
+    """Move, copy or link directory trees like mapsets with the fastest
+    strategy the storage supports
+    """
+
+    def __init__(self, num_threads=4, use_reflink=True,
+                 progress_callback=None, progress_interval=5.0):
+        """Constructor
+
+        Args:
+            num_threads (int): The number of threads that transfer files
+            use_reflink (bool): Try to create reflink copies
+            progress_callback (function): The function that is called with
+                                          the number of transferred bytes and
+                                          the total number of bytes
+            progress_interval (float): The minimum number of seconds between
+                                       two progress callbacks
+
+        """
+        self.num_threads = max(int(num_threads), 1)
+        self.use_reflink = use_reflink
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        # The number of files or trees transferred with each strategy
+        self.statistics = {"renamed": 0, "reflinked": 0,
+                           "linked": 0, "copied": 0}
+        self.lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self._reflink = self.use_reflink
+        self._hardlink = True
+        self.total_bytes = 0
+        self.transferred_bytes = 0
+        self._last_progress = time.time()
+
+    def move(self, source_path, target_path):
+        """Move a directory tree, like mv
+
+        The tree is renamed if source and target are on the same filesystem,
+        otherwise it is copied and removed.
+
+        Args:
+            source_path (str): The source directory
+            target_path (str): The target directory, that must not exist
+
+        Raises:
+            OSError in case of an error
+        """
+        if os.path.lexists(target_path):
+            raise FileExistsError(errno.EEXIST, "Target exists", target_path)
+        try:
+            os.rename(source_path, target_path)
+            self.statistics["renamed"] += 1
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        self.copy(source_path, target_path)
+        shutil.rmtree(source_path)
+
+    def copy(self, source_path, target_path):
+        """Copy a directory tree or file, like cp -fr
+
+        Existing target files are replaced and not modified, so that files
+        that are hardlinked with other mapsets keep their content.
+
+        Args:
+            source_path (str): The source directory or file
+            target_path (str): The target directory or file
+
+        Raises:
+            OSError in case of an error
+        """
+        self._transfer(source_path, target_path, hardlink=False)
+
+    def link(self, source_path, target_path):
+        """Hardlink a directory tree or file, like cp -flr
+
+        Files are copied if hardlinks are not supported.
+
+        Args:
+            source_path (str): The source directory or file
+            target_path (str): The target directory or file
+
+        Raises:
+            OSError in case of an error
+        """
+        self._transfer(source_path, target_path, hardlink=True)
+
+    def _transfer(self, source_path, target_path, hardlink):
+        self._reset()
+        files = []
+        if os.path.isdir(source_path) and not os.path.islink(source_path):
+            for root, dirs, filenames in os.walk(source_path):
+                target_root = os.path.join(
+                    target_path, os.path.relpath(root, source_path))
+                os.makedirs(target_root, exist_ok=True)
+                for name in dirs + filenames:
+                    source = os.path.join(root, name)
+                    target = os.path.join(target_root, name)
+                    if os.path.islink(source):
+                        self._copy_symlink(source, target)
+                    elif name in filenames:
+                        files.append((source, target))
+        elif os.path.islink(source_path):
+            self._copy_symlink(source_path, target_path)
+        else:
+            files.append((source_path, target_path))
+
+        sizes = [os.stat(source).st_size for source, target in files]
+        self.total_bytes = sum(sizes)
+
+        def transfer_file(args):
+            (source, target), size = args
+            self._transfer_file(source, target, hardlink)
+            self._add_progress(size)
+
+        if self.num_threads == 1 or len(files) < 2:
+            for args in zip(files, sizes):
+                transfer_file(args)
+        else:
+            with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+                # Iterate the results to raise the errors of the threads
+                for _ in executor.map(transfer_file, zip(files, sizes)):
+                    pass
+
+        if self.progress_callback is not None:
+            self.progress_callback(self.transferred_bytes, self.total_bytes)
+
+    def _copy_symlink(self, source, target):
+        # Symbolic links are copied as links, like cp -r does
+        if os.path.lexists(target):
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            else:
+                os.unlink(target)
+        os.symlink(os.readlink(source), target)
+
+    def _transfer_file(self, source, target, hardlink):
+        if os.path.lexists(target):
+            os.unlink(target)
+
+        if hardlink is True and self._hardlink is True:
+            try:
+                os.link(source, target)
+                self._count("linked")
+                return
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                self._hardlink = False
+
+        if self._reflink is True:
+            try:
+                reflink_file(source, target)
+                shutil.copymode(source, target)
+                self._count("reflinked")
+                return
+            except OSError as e:
+                if os.path.lexists(target):
+                    os.unlink(target)
+                if e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                self._reflink = False
+
+        shutil.copyfile(source, target)
+        shutil.copymode(source, target)
+        self._count("copied")
+
+    def _count(self, strategy):
+        with self.lock:
+            self.statistics[strategy] += 1
+
+    def _add_progress(self, size):
+        with self.lock:
+            self.transferred_bytes += size
+            now = time.time()
+            if self.progress_callback is None \
+                    or now - self._last_progress < self.progress_interval:
+                return
+            self._last_progress = now
+        self.progress_callback(self.transferred_bytes, self.total_bytes)
@@ -0,0 +1,804 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Render raster maps directly from the files of a mapset
+
+The images are identical in layout to the images of d.rast, d.rgb and
+d.shade with the PNG driver: The region of the raster maps is adjusted to the
+requested extent like g.region, the region is fitted into the image keeping
+its aspect ratio and sampled with the nearest neighbor, the colors are looked
+up in the color tables of the maps.
+
+Only the raster file formats that are fully understood are rendered, all
+other maps raise RenderUnavailable, so that the GRASS GIS display modules are
+used instead:
+
+    - Integer and floating point maps that are uncompressed or compressed
+      with RLE, zlib or bzip2, lz4 and zstd if their modules are installed
+    - Uncompressed null files or compressed null files if lz4 is installed
+    - Color tables of the current format without shift, invert and modular
+      rules
+    - Images with at most RENDER_NATIVE_PIXEL_LIMIT pixels, the memory of the
+      server process is proportional to the number of pixels
+
+Uncompressed maps are memory mapped, of compressed maps only the rows are
+read that are sampled.
+"""
+
+import bz2
+import os
+import struct
+import zlib
+from .common.config import global_config
+from .common.exceptions import MetadataUnavailable, RenderUnavailable
+from .grass_init import PROJECTION_LL
+from .mapset_metadata import is_legal_name, read_key_value_file
+from .tile_grid import read_raster_region
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import lz4.block as lz4_block
+except ImportError:
+    lz4_block = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The compression methods of the raster rows
+COMPRESSION_NONE = 0
+COMPRESSION_RLE = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_LZ4 = 3
+COMPRESSION_BZIP2 = 4
+COMPRESSION_ZSTD = 5
+# The color of null cells and of values without color rule, if the color
+# table does not define them
+DEFAULT_COLOR = (255, 255, 255)
+# The maximum number of integer values, whose colors are precomputed in a
+# lookup table
+MAX_LOOKUP_TABLE_SIZE = 1 << 20
+# The zlib compression level of the PNG images
+PNG_COMPRESSION_LEVEL = 1
+
+
+def _expand(data, size, method):
+    """Decompress the data of a row with the GRASS GIS compression method"""
+    try:
+        if method == COMPRESSION_ZLIB:
+            return zlib.decompress(data)
+        if method == COMPRESSION_BZIP2:
+            return bz2.decompress(data)
+        if method == COMPRESSION_LZ4 and lz4_block is not None:
+            return lz4_block.decompress(data, uncompressed_size=size)
+        if method == COMPRESSION_ZSTD and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(
+                data, max_output_size=size)
+    except Exception as e:
+        raise RenderUnavailable("Unable to decompress a raster row: %s"
+                                % str(e))
+    raise RenderUnavailable("Unsupported compression method %i" % method)
+
+
+def _read_row_pointers(f, rows, file_size):
+    """Read the offsets of the rows of a compressed raster or null file"""
+    size = f.read(1)
+    if len(size) != 1 or not 1 <= size[0] <= 8:
+        raise RenderUnavailable("Invalid row pointers")
+    size = size[0]
+    data = f.read((rows + 1) * size)
+    if len(data) != (rows + 1) * size:
+        raise RenderUnavailable("Invalid row pointers")
+    offsets = np.zeros(rows + 1, dtype=np.int64)
+    table = np.frombuffer(data, dtype=np.uint8).reshape(rows + 1, size)
+    for i in range(size):
+        offsets = (offsets << 8) + table[:, i]
+    if offsets[0] != 1 + (rows + 1) * size or offsets[-1] != file_size \
+            or np.any(np.diff(offsets) < 0):
+        raise RenderUnavailable("Invalid row pointers")
+    return offsets
+
+
+def _decode_cell(data, nbytes):
+    """Decode big endian integer cell values like cell_values_int() of the
+    raster library, values with 4 or more bytes store the sign in the
+    highest bit
+    """
+    data = data.reshape(data.shape[:-1] + (-1, nbytes)).astype(np.int64)
+    negative = None
+    if nbytes >= 4:
+        negative = data[..., 0] >= 0x80
+        data[..., 0] &= 0x7f
+    values = data[..., 0]
+    for i in range(1, nbytes):
+        values = (values << 8) + data[..., i]
+    if negative is not None:
+        values = np.where(negative, -values, values)
+    return values
+
+
+class RasterFile(object):
+    """The header, cell values and null cells of a raster map
+    """
+
+    def __init__(self, mapset_path, name):
+        """Constructor
+
+        Args:
+            mapset_path (str): The path of the mapset
+            name (str): The name of the raster map, optionally with the
+                        mapset
+
+        Raises:
+            RenderUnavailable if the raster map can not be read directly
+        """
+        if np is None:
+            raise RenderUnavailable("NumPy is not available")
+        if "@" in name:
+            name, mapset = name.split("@", 1)
+            if is_legal_name(mapset) is False:
+                raise RenderUnavailable("Invalid mapset name <%s>" % mapset)
+            mapset_path = os.path.join(os.path.dirname(mapset_path), mapset)
+        if is_legal_name(name) is False:
+            raise RenderUnavailable("Invalid raster map name <%s>" % name)
+        self.name = name
+        self.mapset_path = mapset_path
+        misc_path = os.path.join(mapset_path, "cell_misc", name)
+        cellhd_path = os.path.join(mapset_path, "cellhd", name)
+        try:
+            with open(cellhd_path, "r") as f:
+                cellhd = f.read()
+            if cellhd.startswith("reclass"):
+                raise RenderUnavailable("Raster map <%s> is a reclass map"
+                                        % name)
+            self.region = read_raster_region(cellhd_path)
+            header = {}
+            for line in cellhd.splitlines():
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    header[key.strip()] = value.strip()
+            self.compressed = int(header.get("compressed", 0))
+            cell_format = int(header.get("format", 0))
+        except (OSError, ValueError, MetadataUnavailable) as e:
+            raise RenderUnavailable("Unable to read the header of raster "
+                                    "map <%s>: %s" % (name, str(e)))
+        if any(os.path.exists(os.path.join(misc_path, file))
+               for file in ("gdal", "vrt")):
+            raise RenderUnavailable("Raster map <%s> is linked" % name)
+
+        self.rows = self.region["rows"]
+        self.cols = self.region["cols"]
+        fcell_path = os.path.join(mapset_path, "fcell", name)
+        self.is_fp = os.path.isfile(fcell_path)
+        if self.is_fp:
+            try:
+                f_format = read_key_value_file(os.path.join(misc_path,
+                                                            "f_format"))
+            except MetadataUnavailable as e:
+                raise RenderUnavailable(str(e))
+            if f_format.get("byte_order", "xdr") != "xdr":
+                raise RenderUnavailable("Unsupported byte order")
+            self.nbytes = 8 if f_format.get("type") == "double" else 4
+            self.data_path = fcell_path
+            # Floating point maps were compressed with zlib before the
+            # compression method was stored in the header
+            if self.compressed == COMPRESSION_RLE:
+                self.compressed = COMPRESSION_ZLIB
+        else:
+            self.nbytes = cell_format + 1
+            self.data_path = os.path.join(mapset_path, "cell", name)
+        if self.compressed < 0 or self.rows < 1 or self.cols < 1 \
+                or not 1 <= self.nbytes <= 8:
+            raise RenderUnavailable("Unsupported format of raster map <%s>"
+                                    % name)
+        self.null_path = os.path.join(misc_path, "null")
+        self.null_compressed_path = os.path.join(misc_path, "nullcmpr")
+
+    def _decode(self, data):
+        if self.is_fp:
+            dtype = ">f8" if self.nbytes == 8 else ">f4"
+            return data.view(dtype).astype(np.float64)
+        return _decode_cell(data, self.nbytes)
+
+    def _read_uncompressed(self, rows):
+        row_size = self.cols * self.nbytes
+        if os.path.getsize(self.data_path) != self.rows * row_size:
+            raise RenderUnavailable("Invalid size of raster map <%s>"
+                                    % self.name)
+        data = np.memmap(self.data_path, dtype=np.uint8, mode="r",
+                         shape=(self.rows, row_size))
+        return self._decode(np.ascontiguousarray(data[rows]))
+
+    def _read_compressed_row(self, f, offsets, row):
+        row_size = self.cols * self.nbytes
+        f.seek(offsets[row])
+        data = f.read(offsets[row + 1] - offsets[row])
+        if self.is_fp:
+            # The first byte flags if the row is compressed
+            flag, data = data[:1], data[1:]
+            if flag == b"1":
+                data = _expand(data, row_size, self.compressed)
+            elif flag != b"0":
+                raise RenderUnavailable("Invalid row of raster map <%s>"
+                                        % self.name)
+            return data, self.nbytes
+        # The first byte is the number of bytes of the cell values of the row
+        nbytes, data = data[0], data[1:]
+        if not 1 <= nbytes <= 8:
+            raise RenderUnavailable("Invalid row of raster map <%s>"
+                                    % self.name)
+        row_size = self.cols * nbytes
+        if len(data) < row_size:
+            if self.compressed == COMPRESSION_RLE:
+                pairs = np.frombuffer(data[:len(data) // (nbytes + 1) * (
+                    nbytes + 1)], dtype=np.uint8).reshape(-1, nbytes + 1)
+                data = np.repeat(pairs[:, 1:], pairs[:, 0], axis=0).tobytes()
+            else:
+                data = _expand(data, row_size, self.compressed)
+        return data, nbytes
+
+    def _read_compressed(self, rows):
+        values = np.empty((len(rows), self.cols),
+                          dtype=np.float64 if self.is_fp else np.int64)
+        with open(self.data_path, "rb") as f:
+            offsets = _read_row_pointers(f, self.rows,
+                                         os.fstat(f.fileno()).st_size)
+            for i, row in enumerate(rows):
+                data, nbytes = self._read_compressed_row(f, offsets, row)
+                if len(data) != self.cols * nbytes:
+                    raise RenderUnavailable("Invalid row of raster map <%s>"
+                                            % self.name)
+                data = np.frombuffer(data, dtype=np.uint8)
+                if self.is_fp:
+                    values[i] = self._decode(data)
+                else:
+                    values[i] = _decode_cell(data, nbytes)
+        return values
+
+    def _read_null_bits(self, rows):
+        row_size = (self.cols + 7) // 8
+        if os.path.isfile(self.null_path):
+            if os.path.getsize(self.null_path) != self.rows * row_size:
+                raise RenderUnavailable("Invalid null file of raster map "
+                                        "<%s>" % self.name)
+            bits = np.memmap(self.null_path, dtype=np.uint8, mode="r",
+                             shape=(self.rows, row_size))[rows]
+        elif os.path.isfile(self.null_compressed_path):
+            bits = np.empty((len(rows), row_size), dtype=np.uint8)
+            with open(self.null_compressed_path, "rb") as f:
+                offsets = _read_row_pointers(f, self.rows,
+                                             os.fstat(f.fileno()).st_size)
+                for i, row in enumerate(rows):
+                    f.seek(offsets[row])
+                    data = f.read(offsets[row + 1] - offsets[row])
+                    if len(data) < row_size:
+                        data = _expand(data, row_size, COMPRESSION_LZ4)
+                    if len(data) != row_size:
+                        raise RenderUnavailable("Invalid null file of raster "
+                                                "map <%s>" % self.name)
+                    bits[i] = np.frombuffer(data, dtype=np.uint8)
+        else:
+            return None
+        # A set bit marks a null cell, the highest bit is the first cell
+        return np.unpackbits(bits, axis=1)[:, :self.cols].astype(bool)
+
+    def read_rows(self, rows):
+        """Read rows of the raster map
+
+        Args:
+            rows (numpy.ndarray): The indices of the rows
+
+        Raises:
+            RenderUnavailable if the rows can not be read
+
+        Returns:
+            tuple:
+            The cell values as int64 or float64 array and the boolean null
+            array with the shape (len(rows), cols)
+        """
+        try:
+            if self.compressed == COMPRESSION_NONE:
+                values = self._read_uncompressed(rows)
+            else:
+                values = self._read_compressed(rows)
+            nulls = self._read_null_bits(rows)
+        except (OSError, ValueError) as e:
+            raise RenderUnavailable("Unable to read raster map <%s>: %s"
+                                    % (self.name, str(e)))
+        if self.is_fp:
+            if nulls is None:
+                nulls = np.isnan(values)
+            else:
+                nulls |= np.isnan(values)
+        elif nulls is None:
+            # Zero is null in integer maps without null file, like in the
+            # raster library
+            nulls = values == 0
+        return values, nulls
+
+
+def _parse_color(token):
+    """Parse a value:red:green:blue or value:grey token of a color table"""
+    parts = token.split(":")
+    if len(parts) == 2:
+        parts = [parts[0], parts[1], parts[1], parts[1]]
+    if len(parts) != 4:
+        raise ValueError("Invalid color <%s>" % token)
+    return parts[0], tuple(int(part) for part in parts[1:])
+
+
+class ColorTable(object):
+    """The color rules of a raster map
+    """
+
+    def __init__(self, rules, null_color=DEFAULT_COLOR,
+                 default_color=DEFAULT_COLOR):
+        """Constructor
+
+        Args:
+            rules (list): The (low value, low color, high value, high color)
+                          tuples in the order of the color table, later rules
+                          take precedence over earlier rules
+            null_color (tuple): The color of null cells
+            default_color (tuple): The color of values without rule
+        """
+        self.rules = rules
+        self.null_color = null_color
+        self.default_color = default_color
+        lows = np.array([rule[0] for rule in rules], dtype=np.float64)
+        highs = np.array([rule[2] for rule in rules], dtype=np.float64)
+        self.lows = lows
+        self.highs = highs
+        self.low_colors = np.array([rule[1] for rule in rules],
+                                   dtype=np.float64).reshape(-1, 3)
+        self.high_colors = np.array([rule[3] for rule in rules],
+                                    dtype=np.float64).reshape(-1, 3)
+        # Sorted rules that do not overlap are looked up with a binary search
+        self.is_sorted = bool(np.all(lows <= highs) and np.all(
+            lows[1:] >= highs[:-1]))
+
+    @staticmethod
+    def read(path):
+        """Read a color table in the format of Rast_write_colors()
+
+        Args:
+            path (str): The path of the colr file
+
+        Raises:
+            RenderUnavailable if the color table can not be read
+
+        Returns:
+            ColorTable:
+            The color table
+        """
+        rules = []
+        colors = {"nv": DEFAULT_COLOR, "*": DEFAULT_COLOR}
+        try:
+            with open(path, "r") as f:
+                lines = f.read().splitlines()
+            if not lines or not lines[0].startswith("% "):
+                raise ValueError("Unsupported color table format")
+            for line in lines[1:]:
+                tokens = line.split()
+                if not tokens:
+                    continue
+                if tokens[0].startswith(("nv:", "*:")):
+                    key, color = _parse_color(tokens[0])
+                    colors[key] = color
+                    continue
+                if len(tokens) > 2 or tokens[0].startswith("%"):
+                    raise ValueError("Unsupported color rule <%s>" % line)
+                low, low_color = _parse_color(tokens[0])
+                high, high_color = _parse_color(tokens[-1])
+                rules.append((float(low), low_color, float(high), high_color))
+        except (OSError, ValueError) as e:
+            raise RenderUnavailable("Unable to read the color table <%s>: %s"
+                                    % (path, str(e)))
+        return ColorTable(rules, colors["nv"], colors["*"])
+
+    def _interpolate(self, values, index):
+        low = self.lows[index]
+        delta = self.highs[index] - low
+        ratio = np.divide(values - low, delta, out=np.zeros_like(values),
+                          where=delta != 0)
+        low_colors = self.low_colors[index]
+        return low_colors + ratio[:, np.newaxis] * (
+            self.high_colors[index] - low_colors)
+
+    def _lookup_values(self, values):
+        """Compute the colors of float64 values, the values of sorted rules
+        are interpolated channel by channel between the rule limits
+        """
+        colors = np.empty((len(values), 3), dtype=np.float64)
+        colors[:] = self.default_color
+        if not self.rules:
+            return colors
+        if self.is_sorted:
+            index = np.searchsorted(self.lows, values, side="right") - 1
+            covered = (index >= 0) & (values <= self.highs[np.maximum(index,
+                                                                      0)])
+            limits = np.column_stack((self.lows, self.highs)).ravel()
+            for channel in range(3):
+                colors[:, channel] = np.interp(values, limits, np.column_stack(
+                    (self.low_colors[:, channel],
+                     self.high_colors[:, channel])).ravel())
+            colors[~covered] = self.default_color
+            return colors
+        for i in range(len(self.rules)):
+            covered = (values >= self.lows[i]) & (values <= self.highs[i])
+            colors[covered] = self._interpolate(
+                values[covered], np.full(np.count_nonzero(covered), i))
+        return colors
+
+    def lookup(self, values, nulls):
+        """Look up the colors of cell values
+
+        The colors of integer values are computed once for each value of
+        their range and then taken from the lookup table.
+
+        Args:
+            values (numpy.ndarray): The cell values
+            nulls (numpy.ndarray): The boolean array of null cells
+
+        Returns:
+            numpy.ndarray:
+            The uint8 array of the red, green and blue values with the shape
+            values.shape + (3,)
+        """
+        shape = values.shape
+        values = values.ravel()
+        nulls = nulls.ravel()
+        colors = None
+        if values.dtype.kind == "i" and not nulls.all():
+            valid = values[~nulls]
+            min_value, max_value = int(valid.min()), int(valid.max())
+            if max_value - min_value < MAX_LOOKUP_TABLE_SIZE:
+                table = self._lookup_values(np.arange(
+                    min_value, max_value + 1, dtype=np.float64))
+                # Null cells may have any value
+                colors = table.astype(np.uint8)[np.clip(
+                    values - min_value, 0, max_value - min_value)]
+        if colors is None:
+            colors = self._lookup_values(np.where(
+                nulls, 0, values).astype(np.float64)).astype(np.uint8)
+        colors[nulls] = self.null_color
+        return colors.reshape(shape + (3,))
+
+
+def get_render_region(region, options):
+    """Adjust the region of a raster map to the extent of the render options
+    like g.region, which keeps the resolution
+
+    Args:
+        region (dict): The region of the raster map
+        options (dict): The render options with optional n, s, e and w
+
+    Raises:
+        RenderUnavailable if the region is invalid
+
+    Returns:
+        dict:
+        The north, south, east, west, rows, cols, ns_res and ew_res of the
+        region
+    """
+    result = {}
+    for key, option in (("north", "n"), ("south", "s"), ("east", "e"),
+                        ("west", "w")):
+        result[key] = float(options.get(option, region[key]))
+    for first, last, res, num in (("north", "south", "ns_res", "rows"),
+                                  ("east", "west", "ew_res", "cols")):
+        size = result[first] - result[last]
+        if size <= 0:
+            raise RenderUnavailable("Invalid region")
+        result[num] = max(int((size + region[res] / 2.0) / region[res]), 1)
+        result[res] = size / result[num]
+    return result
+
+
+def get_pixel_mapping(size, num, offset, device_size):
+    """Map the pixels of an image axis to the region cells like the
+    raster drawing of the PNG driver
+
+    Args:
+        size (int): The number of pixels
+        num (int): The number of region cells
+        offset (float): The first device coordinate of the region
+        device_size (float): The size of the region in device coordinates
+
+    Returns:
+        numpy.ndarray:
+        The region cell of each pixel or -1 outside of the region
+    """
+    first = int(np.floor(offset + 0.5))
+    last = int(np.floor(offset + device_size + 0.5))
+    pixels = np.arange(size, dtype=np.float64)
+    cells = np.floor((pixels + 0.5 - first) * num / max(last - first, 1))
+    cells = cells.astype(np.int64)
+    cells[(pixels < first) | (pixels >= last)] = -1
+    return cells
+
+
+def get_cell_mapping(cells, region_first, region_res, map_first, map_res,
+                     map_num, sign):
+    """Map region cells to the cells of a raster map with the nearest
+    neighbor like the window mapping of the raster library
+
+    Args:
+        cells (numpy.ndarray): The region cells, -1 outside of the region
+        region_first (float): The north or west border of the region
+        region_res (float): The resolution of the region
+        map_first (float): The north or west border of the raster map
+        map_res (float): The resolution of the raster map
+        map_num (int): The number of rows or columns of the raster map
+        sign (int): -1 for rows, 1 for columns
+
+    Returns:
+        numpy.ndarray:
+        The raster map cell of each region cell or -1 outside of the map
+    """
+    centers = region_first + sign * (cells + 0.5) * region_res
+    result = np.floor(sign * (centers - map_first) / map_res).astype(np.int64)
+    result[(cells < 0) | (result < 0) | (result >= map_num)] = -1
+    return result
+
+
+class RasterRenderer(object):
+    """Render raster maps of a mapset into PNG images
+
+    Usage:
+
+        renderer = RasterRenderer(mapset_path, ["elevation"], options)
+        image = renderer.render_raster()
+    """
+
+    def __init__(self, mapset_path, names, options):
+        """Constructor
+
+        Args:
+            mapset_path (str): The path of the mapset
+            names (list): The names of the raster maps, optionally with the
+                          mapset, that must have the same region
+            options (dict): The render options width, height and optional n,
+                            s, e and w
+
+        Raises:
+            RenderUnavailable if the maps can not be rendered directly
+        """
+        self.width = int(round(float(options["width"])))
+        self.height = int(round(float(options["height"])))
+        if self.width * self.height > global_config.RENDER_NATIVE_PIXEL_LIMIT:
+            raise RenderUnavailable("The image has more than %i pixels"
+                                    % global_config.RENDER_NATIVE_PIXEL_LIMIT)
+        self.rasters = [RasterFile(mapset_path, name) for name in names]
+        region = self.rasters[0].region
+        for raster in self.rasters[1:]:
+            if any(raster.region[key] != region[key] for key in (
+                    "north", "south", "east", "west", "rows", "cols")):
+                raise RenderUnavailable("The raster maps have different "
+                                        "regions")
+        self.region = get_render_region(region, options)
+        if region["proj"] == PROJECTION_LL and (
+                self.region["west"] < region["west"]
+                or self.region["east"] > region["east"]):
+            # The raster library wraps longitudes around the globe
+            raise RenderUnavailable("The region exceeds the raster map")
+
+    def _get_mapping(self):
+        """Map the pixels to raster cells, the region is fitted into the image
+        keeping its aspect ratio like D_fit_d_to_u()
+        """
+        region = self.region
+        region_width = region["east"] - region["west"]
+        region_height = region["north"] - region["south"]
+        scale = min(self.width / region_width, self.height / region_height)
+        device_width = region_width * scale
+        device_height = region_height * scale
+        pixel_rows = get_pixel_mapping(
+            self.height, region["rows"], (self.height - device_height) / 2.0,
+            device_height)
+        pixel_cols = get_pixel_mapping(
+            self.width, region["cols"], (self.width - device_width) / 2.0,
+            device_width)
+        raster = self.rasters[0].region
+        rows = get_cell_mapping(pixel_rows, region["north"], region["ns_res"],
+                                raster["north"], raster["ns_res"],
+                                raster["rows"], -1)
+        cols = get_cell_mapping(pixel_cols, region["west"], region["ew_res"],
+                                raster["west"], raster["ew_res"],
+                                raster["cols"], 1)
+        inside = (pixel_rows >= 0)[:, np.newaxis] & (pixel_cols >= 0)
+        return rows, cols, inside
+
+    @staticmethod
+    def _sample(raster, rows, cols):
+        """Read the sampled cells of a raster map, cells outside of the map
+        are null
+        """
+        needed, index = np.unique(rows[rows >= 0], return_inverse=True)
+        row_index = np.full(len(rows), -1, dtype=np.int64)
+        row_index[rows >= 0] = index
+        if len(needed):
+            values, nulls = raster.read_rows(needed)
+        else:
+            values = np.zeros((0, raster.cols), dtype=np.int64)
+            nulls = np.zeros((0, raster.cols), dtype=bool)
+        values = np.pad(values, ((0, 1), (0, 1)))
+        nulls = np.pad(nulls, ((0, 1), (0, 1)), constant_values=True)
+        # The index -1 selects the padded null row and column
+        grid = np.ix_(row_index, cols)
+        return values[grid], nulls[grid]
+
+    def _read_colors(self, raster):
+        return ColorTable.read(os.path.join(raster.mapset_path, "colr",
+                                            raster.name))
+
+    def _create_image(self, colors, opaque, inside):
+        image = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        image[..., :3] = colors
+        image[..., 3] = np.where(inside & opaque, 255, 0)
+        image[..., :3][image[..., 3] == 0] = 0
+        return encode_png(image)
+
+    def render_raster(self):
+        """Render the first raster map like d.rast -n, null cells are drawn
+        in the null color of the color table
+
+        Returns:
+            bytes:
+            The PNG image
+        """
+        raster = self.rasters[0]
+        color_table = self._read_colors(raster)
+        rows, cols, inside = self._get_mapping()
+        values, nulls = self._sample(raster, rows, cols)
+        return self._create_image(color_table.lookup(values, nulls), True,
+                                  inside)
+
+    def render_rgb(self):
+        """Render the first three raster maps as red, green and blue channel
+        like d.rgb -n, each channel is the color component of its map
+
+        Returns:
+            bytes:
+            The PNG image
+        """
+        rows, cols, inside = self._get_mapping()
+        colors = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        for channel, raster in enumerate(self.rasters[:3]):
+            color_table = self._read_colors(raster)
+            values, nulls = self._sample(raster, rows, cols)
+            colors[..., channel] = color_table.lookup(values,
+                                                      nulls)[..., channel]
+        return self._create_image(colors, True, inside)
+
+    def render_shade(self):
+        """Render the second raster map shaded with the first raster map like
+        d.shade, the colors are multiplied with the grey value of the shade
+        map, null cells of both maps are transparent
+
+        Returns:
+            bytes:
+            The PNG image
+        """
+        shade, color = self.rasters[:2]
+        rows, cols, inside = self._get_mapping()
+        shade_values, shade_nulls = self._sample(shade, rows, cols)
+        color_values, color_nulls = self._sample(color, rows, cols)
+        intensity = self._read_colors(shade).lookup(
+            shade_values, shade_nulls).astype(np.uint16).sum(axis=2) // 3
+        colors = self._read_colors(color).lookup(color_values, color_nulls)
+        colors = colors * intensity[..., np.newaxis] // 255
+        return self._create_image(colors.astype(np.uint8),
+                                  ~(shade_nulls | color_nulls), inside)
+
+
+def encode_png(image):
+    """Encode an RGBA image as PNG file
+
+    Args:
+        image (numpy.ndarray): The uint8 array with the shape
+                               (height, width, 4)
+
+    Returns:
+        bytes:
+        The PNG file
+    """
+    height, width = image.shape[:2]
+    # Each row starts with the filter type 0
+    data = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    data[:, 1:] = image.reshape(height, width * 4)
+
+    def chunk(chunk_type, content):
+        return struct.pack(">I", len(content)) + chunk_type + content + \
+            struct.pack(">I", zlib.crc32(chunk_type + content))
+
+    return b"\x89PNG\r\n\x1a\n" + \
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0,
+                                   0)) + \
+        chunk(b"IDAT", zlib.compress(data.tobytes(), PNG_COMPRESSION_LEVEL)) + \
+        chunk(b"IEND", b"")
+
+
+def render_raster(mapset_path, name, options):
+    """Render a raster map like d.rast
+
+    Args:
+        mapset_path (str): The path of the mapset
+        name (str): The name of the raster map
+        options (dict): The render options
+
+    Raises:
+        RenderUnavailable if the raster map can not be rendered directly
+
+    Returns:
+        bytes:
+        The PNG image
+    """
+    return RasterRenderer(mapset_path, [name], options).render_raster()
+
+
+def render_rgb(mapset_path, options):
+    """Render three raster maps like d.rgb
+
+    Args:
+        mapset_path (str): The path of the mapset
+        options (dict): The render options with the red, green and blue maps
+
+    Raises:
+        RenderUnavailable if the raster maps can not be rendered directly
+
+    Returns:
+        bytes:
+        The PNG image
+    """
+    return RasterRenderer(mapset_path, [options["red"], options["green"],
+                                        options["blue"]], options).render_rgb()
+
+
+def render_shade(mapset_path, options):
+    """Render a raster map shaded with another raster map like d.shade
+
+    Args:
+        mapset_path (str): The path of the mapset
+        options (dict): The render options with the shade and color maps
+
+    Raises:
+        RenderUnavailable if the raster maps can not be rendered directly
+
+    Returns:
+        bytes:
+        The PNG image
+    """
+    return RasterRenderer(mapset_path, [options["shade"], options["color"]],
+                          options).render_shade()
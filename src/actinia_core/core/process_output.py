@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Streaming capture of the stdout and stderr output of processes
+
+The output of a process is read from a pipe by a reader thread. Outputs that
+fit into the log size are kept in memory. Larger outputs are spilled to a
+file, only the head and the tail of the output are kept in memory for the
+process log. The file provides the full output to stdout parsers and stdin
+sources and can be exported as resource.
+"""
+
+import io
+import os
+from threading import Thread
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The size of the chunks that are read from the pipe
+CHUNK_SIZE = 65536
+
+
+class OutputCapture(object):
+    """Capture the output of a process from a pipe with a reader thread
+
+    Usage:
+
+        capture = OutputCapture(spill_path, head_size=1024, tail_size=1024)
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE)
+        capture.start(proc.stdout)
+        proc.wait()
+        capture.join()
+        log = capture.get_log()
+        output = capture.read()
+    """
+
+    def __init__(self, spill_path, head_size=524288, tail_size=524288):
+        """Constructor
+
+        Args:
+            spill_path (str): The path of the file that receives the full
+                              output, if it exceeds the log size
+            head_size (int): The number of bytes of the beginning of the
+                             output that are kept for the log
+            tail_size (int): The number of bytes of the end of the output
+                             that are kept for the log
+        """
+        self.spill_path = spill_path
+        self.head_size = max(head_size, 0)
+        self.tail_size = max(tail_size, 0)
+        # The whole output until it exceeds the log size, the head afterwards
+        self.head = bytearray()
+        self.tail = bytearray()
+        # The number of bytes that were read
+        self.size = 0
+        # True if the output was spilled to the spill file
+        self.spilled = False
+        self.spill_file = None
+        self.thread = None
+        self.error = None
+
+    @property
+    def truncated(self):
+        """True if the log contains only the head and the tail of the output"""
+        return self.spilled
+
+    def start(self, stream):
+        """Start the reader thread
+
+        Args:
+            stream: The binary pipe that is read until EOF and closed
+        """
+        self.thread = Thread(target=self._read_stream, args=(stream,),
+                             daemon=True)
+        self.thread.start()
+
+    def join(self, timeout=None):
+        """Wait until the stream was read completely
+
+        Args:
+            timeout (float): The maximum time in seconds to wait for a
+                             stream, that is kept open by a child process
+                             of the process
+
+        Returns:
+            bool:
+            True if the stream was read completely
+        """
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False
+        return True
+
+    def _read_stream(self, stream):
+        fd = stream.fileno()
+        try:
+            while True:
+                chunk = os.read(fd, CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.write(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            stream.close()
+            if self.spill_file is not None:
+                self.spill_file.close()
+                self.spill_file = None
+
+    def write(self, chunk):
+        """Add a chunk of the output
+
+        Args:
+            chunk (bytes): The chunk
+        """
+        self.size += len(chunk)
+        if self.spilled is False:
+            self.head.extend(chunk)
+            if len(self.head) <= self.head_size + self.tail_size:
+                return
+            # Spill the output and keep only head and tail in memory
+            self.spill_file = open(self.spill_path, "wb")
+            self.spill_file.write(self.head)
+            self.spilled = True
+            chunk = bytes(self.head[self.head_size:])
+            del self.head[self.head_size:]
+        else:
+            self.spill_file.write(chunk)
+        self.tail.extend(chunk)
+        if len(self.tail) > self.tail_size:
+            del self.tail[:len(self.tail) - self.tail_size]
+
+    def get_log(self):
+        """Return the output for the process log, the head and the tail of
+        the output if it exceeds the log size
+
+        Returns:
+            str:
+            The decoded output
+        """
+        if self.spilled is False:
+            return self.head.decode(errors="replace")
+        num_truncated = self.size - len(self.head) - len(self.tail)
+        return "%s\n[... %i bytes truncated ...]\n%s" % (
+            self.head.decode(errors="replace"), num_truncated,
+            self.tail.decode(errors="replace"))
+
+    def read(self):
+        """Return the full output
+
+        Returns:
+            str:
+            The decoded output
+        """
+        if self.spilled is False:
+            return self.head.decode(errors="replace")
+        with open(self.spill_path, "rb") as f:
+            return f.read().decode(errors="replace")
+
+    def open_lines(self):
+        """Open the full output to read it line by line, without reading it
+        completely into memory
+
+        Returns:
+            The text file object of the output, with "\n" as the only line
+            break
+        """
+        if self.spilled is False:
+            return io.StringIO(self.head.decode(errors="replace"), newline="\n")
+        return open(self.spill_path, "r", errors="replace", newline="\n")
+
+    def remove(self):
+        """Remove the spill file"""
+        if self.spilled is True and os.path.isfile(self.spill_path):
+            os.remove(self.spill_path)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Redis server interface for the distributed job queue
+
+The job queue is a Redis stream that is consumed by a consumer group. Any
+number of worker nodes can join the consumer group, each job is delivered
+to a single worker. A job stays in the pending entries list of the consumer
+group until the worker acknowledges it after the job process finished
+(at-least-once delivery). Workers refresh the idle time of their running jobs
+periodically, so jobs that are idle longer than the visibility timeout belong
+to dead workers and can be reclaimed by other workers.
+"""
+
+import pickle
+import time
+import redis
+from actinia_core.core.common.redis_base import RedisBaseInterface
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class RedisJobQueueInterface(RedisBaseInterface):
+    """
+    The Redis job queue interface based on Redis streams and consumer groups
+
+    Each stream entry has the following fields:
+
+        - job: The pickled tuple (func, timeout, args)
+        - enqueue_time: The time stamp when the job was enqueued
+    """
+    group_name = "actinia-workers"
+
+    def __init__(self, stream_name="job_queue"):
+        """Constructor
+
+        Args:
+            stream_name (str): The name of the stream that is used as job queue
+        """
+        RedisBaseInterface.__init__(self)
+        self.set_stream_name(stream_name)
+
+    def set_stream_name(self, stream_name):
+        """Set the name of the stream that is used as job queue
+
+        Args:
+            stream_name (str): The name of the stream
+        """
+        self.stream_name = stream_name
+        self.dead_letter_stream_name = "%s-dead-letter" % stream_name
+
+    def create_group(self):
+        """Create the stream and the consumer group of the workers, if they
+        do not exist
+
+        Returns:
+            bool:
+            True if the group was created, False if it already existed
+        """
+        try:
+            self.redis_server.xgroup_create(self.stream_name, self.group_name,
+                                            id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+            return False
+        return True
+
+    def enqueue(self, timeout, func, *args):
+        """Add a job to the job queue
+
+        Args:
+            timeout: The timeout of the process for waiting in the queue
+            func: The function to call from the worker process
+            *args: The function arguments, the first argument must be the
+                   ResourceDataContainer
+
+        Returns:
+            str:
+            The message id of the job
+        """
+        fields = {"job": pickle.dumps((func, timeout, args)),
+                  "enqueue_time": repr(time.time())}
+        message_id = self.redis_server.xadd(self.stream_name, fields)
+        return message_id.decode()
+
+    @staticmethod
+    def _decode_messages(messages):
+        """Convert the stream messages in (message id, fields) tuples with
+        string message ids, deleted messages are skipped
+        """
+        result = []
+        for message_id, fields in messages:
+            if isinstance(message_id, bytes):
+                message_id = message_id.decode()
+            if fields:
+                result.append((message_id, fields))
+        return result
+
+    def read(self, consumer, count=1, block=None):
+        """Read new jobs that were not delivered to any worker before
+
+        Args:
+            consumer (str): The unique name of the worker
+            count (int): The maximum number of jobs to read
+            block (int): The number of milliseconds to wait for new jobs,
+                         None does not block
+
+        Returns:
+            list:
+            A list of (message id, fields) tuples
+        """
+        response = self.redis_server.xreadgroup(self.group_name, consumer,
+                                                {self.stream_name: ">"},
+                                                count=count, block=block)
+        messages = []
+        for stream, stream_messages in response:
+            messages.extend(self._decode_messages(stream_messages))
+        return messages
+
+    def reclaim(self, consumer, min_idle_time, count=1):
+        """Claim pending jobs of other workers that were idle longer than
+        the visibility timeout
+
+        Args:
+            consumer (str): The unique name of the worker that claims the jobs
+            min_idle_time (float): The visibility timeout in seconds
+            count (int): The maximum number of jobs to claim
+
+        Returns:
+            list:
+            A list of (message id, fields, times delivered) tuples
+        """
+        response = self.redis_server.xautoclaim(self.stream_name,
+                                                self.group_name, consumer,
+                                                int(min_idle_time * 1000),
+                                                start_id="0-0", count=count)
+        messages = self._decode_messages(response[1])
+        # Remove pending entries of messages that were deleted from the stream
+        for message_id, fields in response[1]:
+            if not fields:
+                self.redis_server.xack(self.stream_name, self.group_name,
+                                       message_id)
+        if len(response) > 2 and response[2]:
+            self.redis_server.xack(self.stream_name, self.group_name,
+                                   *response[2])
+
+        result = []
+        for message_id, fields in messages:
+            result.append((message_id, fields,
+                           self.times_delivered(message_id)))
+        return result
+
+    def times_delivered(self, message_id):
+        """Return how often a pending job was delivered to a worker
+
+        Args:
+            message_id (str): The message id of the job
+
+        Returns:
+            int:
+            The number of deliveries, 0 if the job is not pending
+        """
+        entries = self.redis_server.xpending_range(self.stream_name,
+                                                   self.group_name,
+                                                   min=message_id,
+                                                   max=message_id, count=1)
+        if not entries:
+            return 0
+        return entries[0]["times_delivered"]
+
+    def touch(self, consumer, message_ids):
+        """Reset the idle time of running jobs, so that they are not
+        reclaimed by other workers
+
+        Args:
+            consumer (str): The unique name of the worker that runs the jobs
+            message_ids (list): The message ids of the running jobs
+
+        Returns:
+            list:
+            The message ids that are still owned by the worker
+        """
+        if not message_ids:
+            return []
+        claimed = self.redis_server.xclaim(self.stream_name, self.group_name,
+                                           consumer, 0, list(message_ids),
+                                           justid=True)
+        return [message_id.decode() if isinstance(message_id, bytes)
+                else message_id for message_id in claimed]
+
+    def ack(self, message_id):
+        """Acknowledge a finished job and remove it from the job queue
+
+        Args:
+            message_id (str): The message id of the job
+
+        Returns:
+            bool:
+            True if the job was pending, False otherwise
+        """
+        pipe = self.redis_server.pipeline()
+        pipe.xack(self.stream_name, self.group_name, message_id)
+        pipe.xdel(self.stream_name, message_id)
+        acked, deleted = pipe.execute()
+        return bool(acked)
+
+    def dead_letter(self, message_id, fields, reason):
+        """Move a job that can not be processed to the dead letter stream
+
+        Args:
+            message_id (str): The message id of the job
+            fields (dict): The fields of the job message
+            reason (str): The reason why the job can not be processed
+
+        Returns:
+            bool:
+            True if the job was pending, False otherwise
+        """
+        dead_fields = dict(fields)
+        dead_fields["message_id"] = message_id
+        dead_fields["reason"] = reason
+        pipe = self.redis_server.pipeline()
+        pipe.xadd(self.dead_letter_stream_name, dead_fields)
+        pipe.xack(self.stream_name, self.group_name, message_id)
+        pipe.xdel(self.stream_name, message_id)
+        added, acked, deleted = pipe.execute()
+        return bool(acked)
+
+    def pending_count(self):
+        """Return the number of jobs that were delivered to workers but not
+        acknowledged
+
+        Returns:
+            int:
+            The number of pending jobs
+        """
+        return self.redis_server.xpending(self.stream_name,
+                                          self.group_name)["pending"]
+
+    def length(self):
+        """Return the number of jobs in the job queue, including the pending
+        jobs
+
+        Returns:
+            int:
+            The number of jobs
+        """
+        return self.redis_server.xlen(self.stream_name)
+
+    def delete(self):
+        """Remove the job queue, the consumer group and the dead letter stream
+
+        Returns:
+            bool:
+            True in case of success, False otherwise
+        """
+        return bool(self.redis_server.delete(self.stream_name,
+                                             self.dead_letter_stream_name))
+
+
+# Create the Redis interface instance
+redis_job_queue_interface = RedisJobQueueInterface()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Redis server interface for process queue statistics
+"""
+
+import pickle
+from actinia_core.core.common.redis_base import RedisBaseInterface
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class RedisQueueStatisticsInterface(RedisBaseInterface):
+    """
+    The Redis process queue statistics interface
+
+    The process queue manager stores the queue wait time percentiles of each
+    user in a single hash, using the user id as field and the pickled
+    percentile dictionary as value.
+    """
+    wait_time_hash = "PROCESS-QUEUE-WAIT-TIMES"
+
+    def __init__(self):
+        RedisBaseInterface.__init__(self)
+
+    def set_wait_times(self, wait_times):
+        """Store the wait time percentiles of several users
+
+        Args:
+            wait_times (dict): A dictionary with the user id as key and the
+                               percentile dictionary as value
+
+        Returns:
+            bool:
+            True in case of success, False otherwise
+        """
+        if not wait_times:
+            return False
+        mapping = {user_id: pickle.dumps(percentiles)
+                   for user_id, percentiles in wait_times.items()}
+        return bool(self.redis_server.hset(self.wait_time_hash, mapping=mapping))
+
+    def get_wait_times(self, user_id):
+        """Return the wait time percentiles of a user
+
+        Args:
+            user_id (str): The user id
+
+        Returns:
+            dict:
+            The percentile dictionary or None
+        """
+        entry = self.redis_server.hget(self.wait_time_hash, user_id)
+        if entry is None:
+            return None
+        return pickle.loads(entry)
+
+    def get_all_wait_times(self):
+        """Return the wait time percentiles of all users
+
+        Returns:
+            dict:
+            A dictionary with the user id as key and the percentile dictionary
+            as value
+        """
+        entries = self.redis_server.hgetall(self.wait_time_hash)
+        return {user_id.decode(): pickle.loads(entry)
+                for user_id, entry in entries.items()}
+
+    def delete(self):
+        """Remove all wait time statistics
+
+        Returns:
+            bool:
+            True in case of success, False otherwise
+        """
+        return bool(self.redis_server.delete(self.wait_time_hash))
+
+
+# Create the Redis interface instance
+redis_queue_statistics_interface = RedisQueueStatisticsInterface()
@@ -25,6 +25,8 @@
 Redis server resource logging interface
 """
 
+import time
+import redis
 from actinia_core.core.common.redis_base import RedisBaseInterface
 
 __license__ = "GPLv3"
@@ -42,6 +44,29 @@ class RedisResourceInterface(RedisBaseInterface):
     # The database to store the long pending resource status and results
     resource_id_prefix = "RESOURCE-ID::"
     resource_id_termination_prefix = "RESOURCE-ID-TERMINATION::"
+    # The database to store the large part of the resource entries, like the
+    # process log, that is not required for status requests
+    resource_body_prefix = "RESOURCE-BODY::"
+    # The pub/sub channel that receives the final resource entry
+    resource_id_finished_channel_prefix = "RESOURCE-ID-FINISHED::"
+    # The pub/sub channel that receives the termination requests
+    resource_id_termination_channel_prefix = "RESOURCE-ID-TERMINATION::"
+    # The secondary indexes of the resource entries, sorted sets of resource
+    # ids with the accept time stamp as score. There is an index of all
+    # resources and one for each user, both also split by status.
+    resource_index = "RESOURCE-INDEX"
+    resource_status_index_prefix = "RESOURCE-STATUS-INDEX::"
+    resource_user_index_prefix = "RESOURCE-USER-INDEX::"
+    resource_user_status_index_prefix = "RESOURCE-USER-STATUS-INDEX::"
+    # Marks that the index of a user or of all resources contains the
+    # resource entries that were created before the index existed
+    resource_index_built_prefix = "RESOURCE-INDEX-BUILT::"
+    # Marks that a job renders an image that other requests wait for, the
+    # value is the resource id of the job
+    render_lock_prefix = "RENDER-LOCK::"
+    # The resource states that have a status index
+    resource_states = ("accepted", "running", "finished", "error",
+                       "terminated", "timeout")
 
     def __init__(self):
         """
@@ -118,31 +143,286 @@ class RedisResourceInterface(RedisBaseInterface):
         """
         RedisBaseInterface.__init__(self)
 
-    def set(self, resource_id, resource_entry, expiration=864000):
+    def set(self, resource_id, resource_entry, expiration=864000,
+            finished=False, resource_body=None, status=None, timestamp=None):
         """Set or update a resource entry
 
         Args:
             resource_id (str): The unique id of the resource
             resource_entry (str): The entry that should be put in the database
             expiration (int): The time in seconds when this resource should expire
+            finished (bool): If True the resource reached a final state and the
+                             entry is published to the processes that wait
+                             for the resource, see wait_for_finished()
+            resource_body (str): The large part of the resource entry that is
+                                 stored separately, an existing body is
+                                 removed if None
+            status (str): The status of the resource for the status indexes
+            timestamp (float): The accept time stamp of the resource, the
+                               resource is added to the indexes if set
 
         """
-        return self.redis_server.setex(self.resource_id_prefix + resource_id,
-                                       expiration, resource_entry)
+        pipe = self.redis_server.pipeline()
+        # The result of the SETEX command is returned, it must be the first
+        # command of the pipeline
+        pipe.setex(self.resource_id_prefix + resource_id, expiration,
+                   resource_entry)
+        if timestamp is not None:
+            self._add_to_indexes(pipe, resource_id, status, timestamp,
+                                 expiration)
+        if resource_body is not None:
+            pipe.setex(self.resource_body_prefix + resource_id, expiration,
+                       resource_body)
+        else:
+            pipe.delete(self.resource_body_prefix + resource_id)
+        if finished is True:
+            pipe.publish(self.resource_id_finished_channel_prefix + resource_id,
+                         resource_entry)
+        return pipe.execute()[0]
+
+    @staticmethod
+    def _get_user_id(resource_id):
+        """The user id is the first part of the resource id user/resource[/iteration]
+        """
+        return resource_id.split("/")[0]
+
+    def get_index_key(self, user_id=None, status=None):
+        """Return the key of a resource index
+
+        Args:
+            user_id (str): The user id or None for the index of all resources
+            status (str): The status or None for the index of all states
+
+        Returns:
+            str:
+            The key of the sorted set
+        """
+        if user_id is None:
+            if status is None:
+                return self.resource_index
+            return self.resource_status_index_prefix + status
+        if status is None:
+            return self.resource_user_index_prefix + user_id
+        return "%s%s::%s" % (self.resource_user_status_index_prefix, user_id,
+                             status)
+
+    def _add_to_indexes(self, pipe, resource_id, status, timestamp, expiration):
+        """Add the commands to update the indexes of a resource to a pipeline
+
+        The index keys expire with the latest committed resource entry.
+        """
+        user_id = self._get_user_id(resource_id)
+        member = {resource_id: timestamp}
+        for index_user_id in (user_id, None):
+            pipe.zadd(self.get_index_key(index_user_id), member)
+            for state in self.resource_states:
+                index_key = self.get_index_key(index_user_id, state)
+                if state == status:
+                    pipe.zadd(index_key, member)
+                    pipe.expire(index_key, expiration)
+                else:
+                    pipe.zrem(index_key, resource_id)
+        pipe.expire(self.get_index_key(user_id), expiration)
+        pipe.expire(self.get_index_key(None), expiration)
+
+    def add_to_indexes(self, entries, expiration=864000):
+        """Add existing resource entries to the indexes
+
+        Args:
+            entries (list): A list of (resource id, status, accept time stamp)
+                            tuples
+            expiration (int): The expiration time of the index keys
+
+        """
+        pipe = self.redis_server.pipeline()
+        for resource_id, status, timestamp in entries:
+            self._add_to_indexes(pipe, resource_id, status, timestamp,
+                                 expiration)
+        pipe.execute()
+
+    def remove_from_indexes(self, resource_ids):
+        """Remove resources from all indexes, for example after their
+        resource entry expired
+
+        Args:
+            resource_ids (list): The unique ids of the resources
+
+        """
+        if not resource_ids:
+            return
+        pipe = self.redis_server.pipeline()
+        for resource_id in resource_ids:
+            user_id = self._get_user_id(resource_id)
+            for index_user_id in (user_id, None):
+                pipe.zrem(self.get_index_key(index_user_id), resource_id)
+                for state in self.resource_states:
+                    pipe.zrem(self.get_index_key(index_user_id, state),
+                              resource_id)
+        pipe.execute()
+
+    def is_index_built(self, user_id=None):
+        """Check if the index of a user or of all resources was built
+
+        Args:
+            user_id (str): The user id or None for the index of all resources
+
+        Returns:
+            bool:
+            True if the index was built, False otherwise
+        """
+        return bool(self.redis_server.exists(
+            self.resource_index_built_prefix + str(user_id)))
+
+    def set_index_built(self, user_id=None, expiration=864000):
+        """Mark the index of a user or of all resources as built
+
+        The mark expires together with the index keys, so that the index is
+        built again if the index keys expired.
+
+        Args:
+            user_id (str): The user id or None for the index of all resources
+            expiration (int): The expiration time of the mark
+
+        """
+        pipe = self.redis_server.pipeline()
+        pipe.setex(self.resource_index_built_prefix + str(user_id),
+                   expiration, 1)
+        pipe.expire(self.get_index_key(user_id), expiration)
+        pipe.execute()
+
+    def iter_index(self, index_key, cursor=None, batch_size=100):
+        """Iterate over the resource ids of an index, latest resources first
+
+        Args:
+            index_key (str): The key of the index, see get_index_key()
+            cursor (tuple): The (score, resource id) of the last resource of
+                            the previous page, start with the latest resource
+                            if None
+            batch_size (int): The number of resource ids to read at once
+
+        Returns:
+            generator:
+            A generator of (resource id, score) tuples
+        """
+        def decode(items):
+            return [(member.decode(), score) for member, score in items]
+
+        max_score = "+inf"
+        if cursor is not None:
+            score, resource_id = cursor
+            # The resources with the same score are ordered by id
+            for member, member_score in decode(self.redis_server.zrevrangebyscore(
+                    index_key, score, score, withscores=True)):
+                if member < resource_id:
+                    yield member, member_score
+            max_score = "(%r" % score
+
+        while True:
+            batch = decode(self.redis_server.zrevrangebyscore(
+                index_key, max_score, "-inf", start=0, num=batch_size,
+                withscores=True))
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+            # Resources with the same score as the last resource of the batch
+            # that did not fit in the batch
+            last_id, last_score = batch[-1]
+            for member, member_score in decode(self.redis_server.zrevrangebyscore(
+                    index_key, last_score, last_score, withscores=True)):
+                if member < last_id:
+                    yield member, member_score
+            max_score = "(%r" % last_score
+
+    def get_entries(self, resource_ids):
+        """Get several resource entries with a single request
+
+        Args:
+            resource_ids (list): The unique ids of the resources
+
+        Returns:
+            list:
+            The resource entries, missing entries are None
+        """
+        if not resource_ids:
+            return []
+        return self.redis_server.mget([self.resource_id_prefix + resource_id
+                                       for resource_id in resource_ids])
+
+    def subscribe_finished(self, resource_id):
+        """Subscribe to the final resource entry of a resource
+
+        Subscribe before the resource entry is read the first time, so that
+        the notification can not be missed.
+
+        Args:
+            resource_id (str): The unique id of the resource
+
+        Returns:
+            redis.client.PubSub:
+            The subscription that must be closed by the caller
+        """
+        pubsub = self.redis_server.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.resource_id_finished_channel_prefix + resource_id)
+        return pubsub
+
+    @staticmethod
+    def wait_for_finished(pubsub, timeout):
+        """Block until the final resource entry was published or the timeout
+        expired
+
+        Args:
+            pubsub (redis.client.PubSub): The subscription created by
+                                          subscribe_finished()
+            timeout (float): The maximum number of seconds to wait
+
+        Returns:
+            str:
+            The final resource entry or None
+        """
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            message = pubsub.get_message(timeout=remaining)
+            if message is not None and message["type"] == "message":
+                return message["data"]
 
     def set_termination(self, resource_id, expiration=3600):
         """Set or update a resource termination entry
 
         The running job will check for termination periodically and will terminate
-        the job if an entry exists.
+        the job if an entry exists. The termination request is also published,
+        so that a job with a termination listener is terminated immediately,
+        see subscribe_termination().
 
         Args:
             resource_id (str): The unique id of the resource that should be terminated
             expiration (int): The time in seconds when this resource should expire
 
         """
-        return self.redis_server.setex(
-            self.resource_id_termination_prefix + resource_id, expiration, 1)
+        pipe = self.redis_server.pipeline()
+        pipe.setex(self.resource_id_termination_prefix + resource_id, expiration, 1)
+        pipe.publish(self.resource_id_termination_channel_prefix + resource_id, 1)
+        return pipe.execute()[0]
+
+    def subscribe_termination(self, resource_id):
+        """Subscribe to the termination requests of a resource
+
+        Subscribe before the termination entry is read, so that a termination
+        request can not be missed.
+
+        Args:
+            resource_id (str): The unique id of the resource
+
+        Returns:
+            redis.client.PubSub:
+            The subscription that must be closed by the caller
+        """
+        pubsub = self.redis_server.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.resource_id_termination_channel_prefix + resource_id)
+        return pubsub
 
     def get(self, resource_id):
         """Get the resource entry if exists
@@ -157,6 +437,48 @@ class RedisResourceInterface(RedisBaseInterface):
         value = self.redis_server.get(self.resource_id_prefix + resource_id)
         return value
 
+    def get_body(self, resource_id):
+        """Get the body of the resource entry if exists
+
+        Args:
+            resource_id (str): The unique id of the resource
+
+        Returns:
+            str:
+            The body of the resource entry or None
+        """
+        return self.redis_server.get(self.resource_body_prefix + resource_id)
+
+    def get_entry_and_body(self, resource_id):
+        """Get the resource entry and its body with a single request
+
+        Args:
+            resource_id (str): The unique id of the resource
+
+        Returns:
+            (str, str):
+            The resource entry and the body, each can be None
+        """
+        entry, body = self.redis_server.mget(
+            [self.resource_id_prefix + resource_id,
+             self.resource_body_prefix + resource_id])
+        return entry, body
+
+    def get_bodies(self, resource_ids):
+        """Get the bodies of several resource entries with a single request
+
+        Args:
+            resource_ids (list): The unique ids of the resources
+
+        Returns:
+            list:
+            The bodies of the resource entries, missing bodies are None
+        """
+        if not resource_ids:
+            return []
+        return self.redis_server.mget([self.resource_body_prefix + resource_id
+                                       for resource_id in resource_ids])
+
     def get_keys_from_pattern(self, resource_id_pattern):
         """Get all keys of a resource_id_pattern
 
@@ -185,13 +507,41 @@ class RedisResourceInterface(RedisBaseInterface):
             list:
             A list of resource entries
         """
-        key_list = self.redis_server.keys(self.resource_id_prefix + regexpr)
-        resource_list = []
+        return [entry for resource_id, entry in self.get_entry_list(regexpr)]
+
+    def get_entry_list(self, regexpr, batch_size=1000):
+        """Get a list of resource ids and resource entries if exists
+
+        The keys are iterated with SCAN, so that the Redis server is not
+        blocked by large databases.
+
+        Args:
+            regexpr (str): A regular expression
+            batch_size (int): The number of keys to read at once
+
+        Returns:
+            list:
+            A list of (resource id, resource entry) tuples
+        """
+        prefix_length = len(self.resource_id_prefix)
+        entry_list = []
+        key_list = []
+
+        def read_entries():
+            entries = self.redis_server.mget(key_list)
+            entry_list.extend((key.decode()[prefix_length:], entry)
+                              for key, entry in zip(key_list, entries)
+                              if entry is not None)
+            del key_list[:]
+
+        for key in self.redis_server.scan_iter(
+                match=self.resource_id_prefix + regexpr, count=batch_size):
+            key_list.append(key)
+            if len(key_list) >= batch_size:
+                read_entries()
         if key_list:
-            for key in key_list:
-                value = self.redis_server.get(key.decode())
-                resource_list.append(value)
-        return resource_list
+            read_entries()
+        return entry_list
 
     def get_termination(self, resource_id):
         """Get the resource termination entry if exists
@@ -209,6 +559,54 @@ class RedisResourceInterface(RedisBaseInterface):
         return bool(self.redis_server.get(
             self.resource_id_termination_prefix + resource_id))
 
+    def lock_render(self, render_key, resource_id, expiration=600):
+        """Mark that a job renders an image, if no other job renders it
+
+        Args:
+            render_key (str): The key of the rendered image
+            resource_id (str): The unique id of the resource of the job
+            expiration (int): The time in seconds after that the mark is
+                              removed
+
+        Returns:
+            bool:
+            True if the mark was set, False if another job renders the image
+        """
+        return bool(self.redis_server.set(self.render_lock_prefix + render_key,
+                                          resource_id, nx=True, ex=expiration))
+
+    def is_render_locked(self, render_key):
+        """Check if a job renders an image
+
+        Args:
+            render_key (str): The key of the rendered image
+
+        Returns:
+            bool:
+            True if a job renders the image
+        """
+        return bool(self.redis_server.exists(
+            self.render_lock_prefix + render_key))
+
+    def unlock_render(self, render_key, resource_id):
+        """Remove the mark of a rendered image, if it was set by the job
+
+        Args:
+            render_key (str): The key of the rendered image
+            resource_id (str): The unique id of the resource of the job
+        """
+        key = self.render_lock_prefix + render_key
+        with self.redis_server.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) == resource_id.encode():
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+            except redis.WatchError:
+                # The mark expired and was set by another job
+                pass
+
     def get_termination_list(self, regexpr):
         """Get a list of termination resource entries if exists
 
@@ -236,7 +634,9 @@ class RedisResourceInterface(RedisBaseInterface):
             resource_id (str): The unique id of the resource
 
         """
-        return self.redis_server.delete(self.resource_id_prefix + resource_id)
+        self.remove_from_indexes([resource_id])
+        return self.redis_server.delete(self.resource_id_prefix + resource_id,
+                                        self.resource_body_prefix + resource_id)
 
     def delete_termination(self, resource_id):
         """Delete a termination resource entry
@@ -339,7 +739,6 @@ def test_resource_entries(r):
 if __name__ == '__main__':
     import os
     import signal
-    import time
 
     pid = os.spawnl(
         os.P_NOWAIT, "/usr/bin/redis-server", "./redis.conf", "--port 7000")
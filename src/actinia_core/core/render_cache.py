@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Content addressed cache of rendered PNG images
+
+The key of an image is the hash of the render type, the mapset, the names
+of the rendered maps, the modification time and size of their files, which
+include the color tables, and the render options. A changed map results in a
+new key, so that cached images never have to be updated. The key is used as
+ETag of the image.
+
+The images of a mapset are stored in their own directory, that is removed
+when a persistent job wrote to the mapset. The size of the cache is bound,
+the least recently used images are removed first. The cache directory is
+only scanned if the tracked size exceeds the bound or after a share of the
+maximum size was written, since other processes write into the same cache.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from .mapset_metadata import is_legal_name
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The files of raster maps that are not stored in the mapset
+LINKED_RASTER_FILES = ("gdal", "vrt")
+# The element directories of the raster maps of a space time raster dataset
+STRDS_ELEMENTS = ("cell", "fcell", "cellhd", "colr", "cell_misc")
+# The cache directory is scanned at the latest after 1/EVICT_INTERVAL of the
+# maximum size was written by the process
+EVICT_INTERVAL = 16
+# The least recently used images are removed until the cache has this share
+# of the maximum size, so that the following images do not scan again
+EVICT_TARGET = 0.9
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+
+def _resolve_map(mapset_path, name):
+    """Return the mapset path and the name of a map name that may contain
+    the mapset
+
+    Raises:
+        ValueError if the name of the map or mapset is not legal
+    """
+    if "@" in name:
+        name, mapset = name.split("@", 1)
+        if is_legal_name(mapset) is False:
+            raise ValueError("Invalid mapset name <%s>" % mapset)
+        mapset_path = os.path.join(os.path.dirname(mapset_path), mapset)
+    if is_legal_name(name) is False:
+        raise ValueError("Invalid map name <%s>" % name)
+    return mapset_path, name
+
+
+def raster_signature(mapset_path, name):
+    """Return the modification signature of the files of a raster map
+
+    Args:
+        mapset_path (str): The path of the mapset
+        name (str): The name of the raster map, optionally with the mapset
+
+    Returns:
+        list:
+        The signature or None if the raster map is a reclass map or is
+        linked with r.external, since their images depend on other files
+
+    Raises:
+        ValueError if the name of the map or mapset is not legal
+    """
+    mapset_path, name = _resolve_map(mapset_path, name)
+    cellhd = os.path.join(mapset_path, "cellhd", name)
+    try:
+        with open(cellhd, "rb") as f:
+            if f.read(7) == b"reclass":
+                return None
+    except OSError:
+        pass
+    misc_path = os.path.join(mapset_path, "cell_misc", name)
+    try:
+        misc_files = sorted(os.listdir(misc_path))
+    except OSError:
+        misc_files = []
+    if any(file in LINKED_RASTER_FILES for file in misc_files):
+        return None
+    paths = [cellhd] + [os.path.join(mapset_path, element, name) for element
+                        in ("cell", "fcell", "colr", "cats")]
+    paths += [os.path.join(misc_path, file) for file in misc_files]
+    return [name, misc_files, [_stat(path) for path in paths]]
+
+
+def vector_signature(mapset_path, name):
+    """Return the modification signature of the files of a vector map
+
+    Args:
+        mapset_path (str): The path of the mapset
+        name (str): The name of the vector map, optionally with the mapset
+
+    Returns:
+        list:
+        The signature or None if the vector map is linked with v.external
+
+    Raises:
+        ValueError if the name of the map or mapset is not legal
+    """
+    mapset_path, name = _resolve_map(mapset_path, name)
+    vector_path = os.path.join(mapset_path, "vector", name)
+    try:
+        files = sorted(os.listdir(vector_path))
+    except OSError:
+        files = []
+    if "frmt" in files:
+        return None
+    return [name, files, [_stat(os.path.join(vector_path, file))
+                          for file in files]]
+
+
+def strds_signature(mapset_path, name):
+    """Return the modification signature of a space time raster dataset
+
+    The temporal database and the element directories of the registered
+    raster maps are used, since the raster maps are only known after the
+    temporal database was queried.
+
+    Args:
+        mapset_path (str): The path of the mapset
+        name (str): The name of the space time raster dataset
+
+    Returns:
+        list:
+        The signature
+
+    Raises:
+        ValueError if the name of the map or mapset is not legal
+    """
+    mapset_path, name = _resolve_map(mapset_path, name)
+    paths = [os.path.join(mapset_path, "tgis", "sqlite.db")]
+    paths += [os.path.join(mapset_path, element) for element in STRDS_ELEMENTS]
+    return [name, [_stat(path) for path in paths]]
+
+
+class RenderCache(object):
+    """Cache of rendered PNG images with a size bound on disk
+
+    Usage:
+
+        cache = RenderCache(cache_dir, max_size=512 * 1024 * 1024)
+        key = cache.create_key(mapset_path, "raster", options,
+                               rasters=["elevation"])
+        path = cache.get(key)
+        if path is None:
+            cache.put(key, rendered_file)
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """Constructor
+
+        Args:
+            cache_dir (str): The directory of the cached images
+            max_size (int): The maximum size of the cached images in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # The size of the cache at the last scan plus the size of the images
+        # that were written since then, None if it is unknown
+        self.size = None
+        # The size of the images that were written since the last scan
+        self.written = 0
+
+    @staticmethod
+    def get_mapset_digest(mapset_path):
+        """Return the name of the cache directory of a mapset
+
+        Args:
+            mapset_path (str): The path of the mapset
+
+        Returns:
+            str:
+            The name of the directory
+        """
+        return hashlib.sha1(os.path.normpath(
+            mapset_path).encode()).hexdigest()[:16]
+
+    def create_key(self, mapset_path, render_type, options, rasters=(),
+                   vectors=(), strds=()):
+        """Create the key of an image
+
+        Args:
+            mapset_path (str): The path of the mapset that contains the maps
+            render_type (str): The type of the image, for example "raster" or
+                               "legend"
+            options (dict): The render options
+            rasters (list): The names of the rendered raster maps
+            vectors (list): The names of the rendered vector maps
+            strds (list): The names of the rendered space time raster
+                          datasets
+
+        Returns:
+            str:
+            The key or None if the image can not be cached, images of maps
+            with illegal names are not cached
+        """
+        signatures = []
+        for names, signature in ((rasters, raster_signature),
+                                 (vectors, vector_signature),
+                                 (strds, strds_signature)):
+            for name in names:
+                try:
+                    sig = signature(mapset_path, name)
+                except ValueError:
+                    return None
+                if sig is None:
+                    return None
+                signatures.append(sig)
+        content = json.dumps([render_type, os.path.normpath(mapset_path),
+                              signatures, options], sort_keys=True,
+                             default=str)
+        return "%s-%s" % (self.get_mapset_digest(mapset_path),
+                          hashlib.sha256(content.encode()).hexdigest())
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key.split("-", 1)[0],
+                            key + ".png")
+
+    def get(self, key):
+        """Return the path of a cached image and mark it as recently used
+
+        Args:
+            key (str): The key of the image
+
+        Returns:
+            str:
+            The path of the image or None if it is not cached
+        """
+        path = self._get_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, image_file):
+        """Copy a rendered image into the cache
+
+        Args:
+            key (str): The key of the image
+            image_file (str): The path of the rendered image
+
+        Returns:
+            bool:
+            True if the image was cached, False if the mapset was
+            invalidated while the image was copied
+        """
+        return self._store(key, lambda temp_path: shutil.copyfile(
+            image_file, temp_path))
+
+    def put_image(self, key, image):
+        """Write a rendered image into the cache
+
+        Args:
+            key (str): The key of the image
+            image (bytes): The PNG image
+
+        Returns:
+            bool:
+            True if the image was cached, False if the mapset was
+            invalidated while the image was written
+        """
+        def write(temp_path):
+            with open(temp_path, "wb") as f:
+                f.write(image)
+        return self._store(key, write)
+
+    def _store(self, key, write):
+        path = self._get_path(key)
+        # The image is renamed into place, since other processes may read it
+        temp_path = "%s.%s.tmp" % (path, uuid.uuid4().hex)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write(temp_path)
+            os.replace(temp_path, path)
+            image_size = os.path.getsize(path)
+        except OSError:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            return False
+        with self.lock:
+            self.written += image_size
+            if self.size is not None:
+                self.size += image_size
+            scan = (self.size is None or self.size > self.max_size
+                    or self.written * EVICT_INTERVAL >= self.max_size)
+        if scan is True:
+            self.evict()
+        return True
+
+    def get_size(self):
+        """Return the size of the cached images
+
+        Returns:
+            int:
+            The size in bytes
+        """
+        return sum(entry[1] for entry in self._list_entries())
+
+    def _list_entries(self):
+        entries = []
+        try:
+            mapset_dirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            return entries
+        for mapset_dir in mapset_dirs:
+            try:
+                for entry in os.scandir(mapset_dir.path):
+                    if entry.name.endswith(".png"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size,
+                                        entry.path))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Scan the cache and remove the least recently used images if the
+        size of the cache is larger than the maximum size, until it is not
+        larger than EVICT_TARGET of the maximum size
+        """
+        with self.lock:
+            self.written = 0
+        entries = self._list_entries()
+        size = sum(entry[1] for entry in entries)
+        if size > self.max_size:
+            for mtime, file_size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= file_size
+                if size <= self.max_size * EVICT_TARGET:
+                    break
+        with self.lock:
+            self.size = size + self.written
+
+    def invalidate_mapset(self, mapset_path):
+        """Remove the cached images of a mapset
+
+        Args:
+            mapset_path (str): The path of the mapset
+        """
+        shutil.rmtree(os.path.join(self.cache_dir,
+                                   self.get_mapset_digest(mapset_path)),
+                      ignore_errors=True)
+        with self.lock:
+            self.size = None
+
+
+def create_render_cache(config):
+    """Create the render cache that is configured in the actinia config
+
+    Args:
+        config: The global configuration
+
+    Returns:
+        RenderCache:
+        The render cache or None if it is disabled
+    """
+    if not config.RENDER_CACHE or config.RENDER_CACHE_SIZE <= 0:
+        return None
+    return RenderCache(config.RENDER_CACHE,
+                       config.RENDER_CACHE_SIZE * 1024 * 1024)
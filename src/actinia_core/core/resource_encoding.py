@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Compact, schema versioned encoding of resource entries
+
+A resource entry is split in two parts that are stored in separate Redis
+keys:
+
+    - The head contains the http code and the small fields of the response
+      model like status, progress, message and time stamps. It is read by
+      status requests, resource listings and waiting requests.
+    - The body contains the large fields (process log, process chain list
+      and process results). It is only read if the full response is required.
+
+Both parts are encoded with JSON or msgpack and optionally compressed with
+zstd. Each encoded entry starts with a header that contains the magic bytes,
+the schema version, the serialization format and the compression flag.
+Entries without header are pickled documents of older actinia versions,
+that stored the whole [http_code, response_model] list with pickle.
+"""
+
+import json
+import pickle
+from actinia_core.core.logging_interface import log
+
+has_msgpack = False
+try:
+    import msgpack
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+has_zstd = False
+try:
+    import zstandard
+    has_zstd = True
+except ImportError:
+    has_zstd = False
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+RESOURCE_SCHEMA_VERSION = 1
+RESOURCE_MAGIC = b"ACTR"
+# The large fields of the response model that are stored in the body
+RESOURCE_BODY_FIELDS = ("process_log", "process_chain_list", "process_results")
+
+_FORMATS = {"json": b"j", "msgpack": b"m"}
+_UNCOMPRESSED = b"-"
+_ZSTD = b"z"
+_HEADER_SIZE = len(RESOURCE_MAGIC) + 3
+
+
+def _to_builtin(obj):
+    """Convert objects that are not supported by JSON and msgpack"""
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    return str(obj)
+
+
+class ResourceEncoder(object):
+    """Encode and decode the head and body of resource entries
+    """
+
+    def __init__(self, encoding="json", compression=None,
+                 compression_threshold=1024):
+        """Constructor
+
+        Args:
+            encoding (str): The serialization format "json" or "msgpack",
+                            json is used if msgpack is not installed
+            compression (str): None or "zstd", entries are not compressed if
+                               zstandard is not installed
+            compression_threshold (int): Entries smaller than this number of
+                                         bytes are not compressed
+        """
+        if encoding not in _FORMATS:
+            raise ValueError("Unknown resource encoding <%s>, supported are %s"
+                             % (encoding, str(list(_FORMATS.keys()))))
+        if encoding == "msgpack" and has_msgpack is False:
+            log.warning("msgpack is not available, resource entries are "
+                        "encoded with json")
+            encoding = "json"
+        if compression == "zstd" and has_zstd is False:
+            log.warning("zstandard is not available, resource entries are "
+                        "not compressed")
+            compression = None
+        self.encoding = encoding
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+
+    def encode(self, obj):
+        """Encode an object
+
+        Args:
+            obj: A dictionary or list of builtin Python types
+
+        Returns:
+            bytes:
+            The encoded object with header
+        """
+        if self.encoding == "msgpack":
+            payload = msgpack.packb(obj, default=_to_builtin, use_bin_type=True)
+        else:
+            payload = json.dumps(obj, default=_to_builtin,
+                                 separators=(",", ":")).encode("utf-8")
+
+        compression = _UNCOMPRESSED
+        if self.compression == "zstd" and len(payload) >= self.compression_threshold:
+            payload = zstandard.ZstdCompressor().compress(payload)
+            compression = _ZSTD
+
+        return (RESOURCE_MAGIC + bytes([RESOURCE_SCHEMA_VERSION])
+                + _FORMATS[self.encoding] + compression + payload)
+
+    @staticmethod
+    def is_encoded(data):
+        """Check if the data was created by encode() or is a legacy pickle
+
+        Args:
+            data (bytes): The stored entry
+
+        Returns:
+            bool:
+            True if the data has a header, False otherwise
+        """
+        return data[:len(RESOURCE_MAGIC)] == RESOURCE_MAGIC
+
+    @staticmethod
+    def decode(data):
+        """Decode an entry that was created by encode() or pickle
+
+        Args:
+            data (bytes): The stored entry
+
+        Raises:
+            ValueError: If the schema version, format or compression is not
+                        supported
+
+        Returns:
+            The decoded object
+        """
+        if ResourceEncoder.is_encoded(data) is False:
+            return pickle.loads(data)
+
+        offset = len(RESOURCE_MAGIC)
+        version = data[offset]
+        format_ = data[offset + 1:offset + 2]
+        compression = data[offset + 2:offset + 3]
+        payload = data[_HEADER_SIZE:]
+
+        if version > RESOURCE_SCHEMA_VERSION:
+            raise ValueError("Unsupported resource schema version %i" % version)
+        if compression == _ZSTD:
+            if has_zstd is False:
+                raise ValueError("zstandard is required to decode the "
+                                 "resource entry")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression != _UNCOMPRESSED:
+            raise ValueError("Unknown resource compression %s" % compression)
+
+        if format_ == _FORMATS["msgpack"]:
+            if has_msgpack is False:
+                raise ValueError("msgpack is required to decode the resource "
+                                 "entry")
+            return msgpack.unpackb(payload, raw=False)
+        if format_ == _FORMATS["json"]:
+            return json.loads(payload.decode("utf-8"))
+        raise ValueError("Unknown resource format %s" % format_)
+
+    def encode_document(self, http_code, response_model):
+        """Split a response in head and body and encode both
+
+        Args:
+            http_code (int): The http code of the response
+            response_model (dict): The response model
+
+        Returns:
+            (bytes, bytes):
+            The encoded head and the encoded body
+        """
+        head = dict()
+        body = dict()
+        for key, value in response_model.items():
+            if key in RESOURCE_BODY_FIELDS:
+                body[key] = value
+            else:
+                head[key] = value
+        return (self.encode({"http_code": http_code, "response": head}),
+                self.encode(body))
+
+    @staticmethod
+    def decode_head(head_data):
+        """Decode the head of a resource entry
+
+        Legacy pickled entries are decoded completely.
+
+        Args:
+            head_data (bytes): The encoded head or a legacy pickled document
+
+        Returns:
+            (int, dict):
+            The http code and the response model without body fields
+        """
+        head = ResourceEncoder.decode(head_data)
+        if isinstance(head, (list, tuple)):
+            return head[0], head[1]
+        return head["http_code"], head["response"]
+
+    @staticmethod
+    def decode_document(head_data, body_data=None):
+        """Decode the head and body of a resource entry
+
+        Args:
+            head_data (bytes): The encoded head or a legacy pickled document
+            body_data (bytes): The encoded body or None
+
+        Returns:
+            (int, dict):
+            The http code and the full response model
+        """
+        http_code, response_model = ResourceEncoder.decode_head(head_data)
+        if body_data is not None:
+            response_model.update(ResourceEncoder.decode(body_data))
+        return http_code, response_model
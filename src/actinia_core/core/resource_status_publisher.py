@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Background publisher of resource status updates
+
+A processing job reports its progress with many intermediate "running"
+updates. The ResourceStatusPublisher commits them from a background thread,
+so that the job does not wait for the resource database, fluentd or the
+update webhook. Intermediate updates are coalesced: only the latest pending
+update is committed and at most max_rate updates per second are committed.
+Final states are committed immediately and the caller waits until they
+were committed and sent to the finished webhook.
+"""
+
+import threading
+import time
+from actinia_core.core.logging_interface import log
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class CoalescingSender(object):
+    """Send documents in a background thread, pending intermediate documents
+    are replaced by newer ones
+
+    Documents can be provided as callables that create the document, so that
+    documents that are replaced are never created.
+    """
+
+    def __init__(self, send_func, min_interval=0.0, name="CoalescingSender"):
+        """Constructor
+
+        Args:
+            send_func: The function that is called with the document and the
+                       final flag, exceptions are logged
+            min_interval (float): The minimum number of seconds between two
+                                  intermediate documents
+            name (str): The name of the background thread
+        """
+        self.send_func = send_func
+        self.min_interval = min_interval
+        self.name = name
+        self.condition = threading.Condition()
+        self.pending = None
+        self.pending_final = None
+        self.finished = False
+        self.closed = False
+        self.busy = False
+        self.last_send_time = 0.0
+        self.thread = None
+
+    def submit(self, document, final=False):
+        """Submit a document
+
+        Intermediate documents that are submitted after a final document
+        are ignored.
+
+        Args:
+            document: The document or a callable that creates the document
+            final (bool): True if this is a final document, that is sent
+                          without rate limit
+        """
+        with self.condition:
+            if final is True:
+                # The final document supersedes all pending documents
+                self.pending = None
+                self.pending_final = document
+                self.finished = True
+            elif self.finished is False:
+                self.pending = document
+            else:
+                return
+            if self.thread is None or self.thread.is_alive() is False:
+                self.thread = threading.Thread(target=self._run, name=self.name)
+                self.thread.daemon = True
+                self.thread.start()
+            self.condition.notify_all()
+
+    def _next_document(self):
+        """Wait for the next document to send
+
+        Returns:
+            tuple:
+            The (document, final) tuple or (None, None) if the sender was
+            closed and all documents were sent
+        """
+        with self.condition:
+            while True:
+                if self.pending_final is not None:
+                    document, self.pending_final = self.pending_final, None
+                    self.busy = True
+                    return document, True
+                if self.pending is not None:
+                    wait_time = (self.last_send_time + self.min_interval
+                                 - time.time())
+                    if wait_time <= 0 or self.closed is True:
+                        document, self.pending = self.pending, None
+                        self.busy = True
+                        return document, False
+                    self.condition.wait(wait_time)
+                    continue
+                if self.closed is True:
+                    return None, None
+                self.condition.wait()
+
+    def _run(self):
+        while True:
+            document, final = self._next_document()
+            if final is None:
+                return
+            try:
+                if callable(document):
+                    document = document()
+                self.send_func(document, final)
+            except Exception as e:
+                log.error("%s: Unable to send document: %s" % (self.name, str(e)))
+            finally:
+                with self.condition:
+                    self.last_send_time = time.time()
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until all submitted documents were sent
+
+        Args:
+            timeout (float): The maximum number of seconds to wait
+
+        Returns:
+            bool:
+            True if all documents were sent, False if the timeout exceeded
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        with self.condition:
+            # Pending intermediate documents are sent without rate limit
+            self.last_send_time = 0.0
+            self.condition.notify_all()
+            while (self.pending is not None or self.pending_final is not None
+                   or self.busy is True):
+                wait_time = None
+                if end_time is not None:
+                    wait_time = end_time - time.time()
+                    if wait_time <= 0:
+                        return False
+                self.condition.wait(wait_time)
+        return True
+
+    def close(self, timeout=None):
+        """Send all pending documents and stop the background thread
+
+        Args:
+            timeout (float): The maximum number of seconds to wait
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+class ResourceStatusPublisher(object):
+    """Commit the resource status updates of a job in the background and
+    forward them to the update and finished webhooks
+    """
+
+    def __init__(self, commit_func, webhook_func=None, max_rate=2.0,
+                 name="resource"):
+        """Constructor
+
+        Args:
+            commit_func: The function that commits a document to the resource
+                         database, called with the document
+            webhook_func: The function that sends a committed document to a
+                          webhook, called with the document and the webhook
+                          type 'update' or 'finished'
+            max_rate (float): The maximum number of intermediate updates per
+                              second that are committed, unlimited if 0 or None
+            name (str): The name used for the background threads
+        """
+        self.commit_func = commit_func
+        self.webhook_func = webhook_func
+        min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.database_sender = CoalescingSender(
+            self._commit, min_interval=min_interval,
+            name="%s-status-publisher" % name)
+        self.webhook_sender = None
+        if webhook_func is not None:
+            self.webhook_sender = CoalescingSender(
+                self._post, name="%s-webhook-publisher" % name)
+
+    def _commit(self, document, final):
+        self.commit_func(document)
+        if self.webhook_sender is not None:
+            self.webhook_sender.submit(document, final)
+
+    def _post(self, document, final):
+        self.webhook_func(document, "finished" if final is True else "update")
+
+    def publish(self, document, final=False):
+        """Publish a status update
+
+        Intermediate updates return immediately. Final updates return after
+        they were committed and sent to the webhook.
+
+        Args:
+            document: The pickled response document or a callable that
+                      creates it
+            final (bool): True for final states like finished or error
+        """
+        self.database_sender.submit(document, final)
+        if final is True:
+            self.flush()
+
+    def flush(self, timeout=None):
+        """Wait until all published updates were committed and sent to the
+        webhooks
+
+        Args:
+            timeout (float): The maximum number of seconds to wait for each
+                             of the background threads
+        """
+        self.database_sender.flush(timeout)
+        if self.webhook_sender is not None:
+            self.webhook_sender.flush(timeout)
+
+    def close(self, timeout=None):
+        """Commit all pending updates and stop the background threads
+
+        Args:
+            timeout (float): The maximum number of seconds to wait for each
+                             of the background threads
+        """
+        self.database_sender.close(timeout)
+        if self.webhook_sender is not None:
+            self.webhook_sender.close(timeout)
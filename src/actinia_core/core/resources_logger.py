@@ -23,10 +23,24 @@
 
 """
 Resource logger and management interface
+
+The resource entries are stored with the compact encoding of
+resource_encoding.py. The methods commit() and get() accept and return pickled
+[http_code, response_model] documents, commit_document() and get_document()
+accept and return the decoded documents without pickling them.
+
+The response models are stored as JSON or msgpack, hence a stored document
+contains only builtin types: tuples and sets are returned as lists, bytes as
+UTF-8 strings and objects of other types as their string representation.
 """
+import base64
 import pickle
+import time
+from actinia_core.core.common.config import global_config
 from .redis_resources import RedisResourceInterface
 from .redis_fluentd_logger_base import RedisFluentLoggerBase
+from .resource_encoding import ResourceEncoder
+from .termination_listener import TerminationListener
 
 __license__ = "GPLv3"
 __author__ = "Sören Gebbert, Carmen Tawalika, Anika Weinmann"
@@ -37,11 +51,20 @@ class ResourceLogger(RedisFluentLoggerBase):
     """Write, update, receive and delete entries in the resource database
     """
 
+    # The states of a resource that will not change anymore
+    final_states = ("finished", "error", "timeout", "terminated")
+
     def __init__(
             self, host, port, password=None, config=None, user_id=None,
             fluent_sender=None):
         RedisFluentLoggerBase.__init__(
             self, config=config, user_id=user_id, fluent_sender=fluent_sender)
+        if config is None:
+            config = global_config
+        self.encoder = ResourceEncoder(
+            encoding=config.REDIS_RESOURCE_ENCODING,
+            compression=config.REDIS_RESOURCE_COMPRESSION)
+        self.index_expiration = config.REDIS_RESOURCE_EXPIRE_TIME
         # Connect to a redis database
         self.db = RedisResourceInterface()
         redis_args = (host, port)
@@ -96,13 +119,56 @@ class ResourceLogger(RedisFluentLoggerBase):
 
         """
 
-        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
-        redis_return = bool(self.db.set(db_resource_id, document, expiration))
         http_code, data = pickle.loads(document)
-        data["logger"] = 'resources_logger'
+        return self.commit_document(user_id, resource_id, iteration, http_code,
+                                    data, expiration)
+
+    def commit_document(self, user_id, resource_id, iteration, http_code,
+                        data, expiration=8640000):
+        """Commit a decoded resource document to the database, create a new
+        entry if it does not exists, update existing resource entries
+
+        The response model is encoded without pickling it, tuples and sets
+        are stored as lists and objects that are not supported by the
+        encoding as their string representation.
+
+        Args:
+            user_id (str): The user id
+            resource_id (str): The resource id
+            iteration (int): The iteration of the job
+            http_code (int): The http code of the response
+            data (dict): The response model
+            expiration (int): Number of seconds of expiration time, default
+                              8640000s hence 100 days
+
+        Returns:
+            bool:
+            True for success, False otherwise
+
+        """
+        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
+        head, body = self.encoder.encode_document(http_code, data)
+        # Processes that wait for the resource are notified about final states
+        finished = data.get("status") in self.final_states
+        redis_return = bool(self.db.set(db_resource_id, head, expiration,
+                                        finished=finished, resource_body=body,
+                                        status=data.get("status"),
+                                        timestamp=self._get_timestamp(data)))
+        # The response model of the caller is not modified
+        data = dict(data, logger='resources_logger')
         self.send_to_logger("RESOURCE_LOG", data)
         return redis_return
 
+    @staticmethod
+    def _get_timestamp(data):
+        """The accept time stamp of a response model, that orders the
+        resources in the indexes
+        """
+        timestamp = data.get("accept_timestamp")
+        if timestamp is None:
+            timestamp = time.time()
+        return float(timestamp)
+
     def commit_termination(self, user_id, resource_id, iteration=None, expiration=3600):
         """Commit a resource entry to the database that requires the
         termination of the resource, create a new one if it does not exists,
@@ -138,7 +204,128 @@ class ResourceLogger(RedisFluentLoggerBase):
 
         """
         db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
-        return self.db.get(db_resource_id)
+        return self._get_document(db_resource_id)
+
+    def get_document(self, user_id, resource_id, iteration=None):
+        """Get the decoded resource document
+
+        Args:
+            user_id (str): The user id
+            resource_id (str): The resource id
+            iteration (int): The iteration of the job
+
+        Returns:
+            list:
+            The [http_code, response_model] document or None
+
+        """
+        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
+        return self._read_document(db_resource_id)
+
+    def _read_document(self, db_resource_id):
+        """Read the head and body of a resource entry and return the decoded
+        document
+        """
+        head, body = self.db.get_entry_and_body(db_resource_id)
+        if head is None:
+            return None
+        return list(self.encoder.decode_document(head, body))
+
+    def _get_document(self, db_resource_id):
+        """Read the head and body of a resource entry and return the pickled
+        document
+        """
+        document = self._read_document(db_resource_id)
+        if document is None:
+            return None
+        return pickle.dumps(document)
+
+    def _complete_document(self, db_resource_id, http_code, response_model):
+        """Read the body of a resource entry which head was already decoded
+        and return the pickled document
+        """
+        body = self.db.get_body(db_resource_id)
+        if body is not None:
+            response_model.update(self.encoder.decode(body))
+        return pickle.dumps([http_code, response_model])
+
+    def get_status(self, user_id, resource_id, iteration=None):
+        """Get the resource entry without the process log, the process chain
+        list and the process results
+
+        Args:
+            user_id (str): The user id
+            resource_id (str): The resource id
+            iteration (int): The iteration of the job
+
+        Returns:
+            (int, dict):
+            The http code and the response model or None
+
+        """
+        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
+        head = self.db.get(db_resource_id)
+        if head is None:
+            return None
+        return self.encoder.decode_head(head)
+
+    def wait_for_final_state(self, user_id, resource_id, iteration=None,
+                             poll_time=0.2, use_notifications=True,
+                             notification_timeout=5):
+        """Wait until the resource finished, terminated or failed with an
+        error
+
+        If notifications are used, the final resource entry is pushed by the
+        process that commits it. The resource entry is read again if no
+        notification arrived within the notification timeout, so that a
+        lost notification only delays the response. Otherwise the resource
+        entry is polled.
+
+        Args:
+            user_id (str): The user id
+            resource_id (str): The resource id
+            iteration (int): The iteration of the job
+            poll_time (float): Time to sleep between polls, if notifications
+                               are not used
+            use_notifications (bool): Block on the notification of the final
+                                      state instead of polling
+            notification_timeout (float): Time in seconds after that the
+                                          resource entry is read again if
+                                          no notification arrived
+
+        Returns:
+            str:
+            The final resource document or None if the resource does not exist
+
+        """
+        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
+        pubsub = None
+        if use_notifications is True:
+            pubsub = self.db.subscribe_finished(db_resource_id)
+
+        try:
+            # Only the head of the resource entry is read until the final
+            # state was reached
+            head = self.db.get(db_resource_id)
+            while head:
+                http_code, response_model = self.encoder.decode_head(head)
+                if response_model["status"] in self.final_states:
+                    return self._complete_document(db_resource_id, http_code,
+                                                   response_model)
+
+                head = None
+                if pubsub is not None:
+                    head = self.db.wait_for_finished(pubsub,
+                                                     notification_timeout)
+                else:
+                    time.sleep(poll_time)
+                if head is None:
+                    head = self.db.get(db_resource_id)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+        return None
 
     def get_latest_iteration(self, user_id, resource_id=None):
         """Get resource entry with latest iteration
@@ -164,7 +351,7 @@ class ResourceLogger(RedisFluentLoggerBase):
         iteration = self._get_iteration_from_db_resource_id(db_resource_id)
         if iteration == 1:
             iteration = None
-        return iteration, self.db.get(db_resource_id)
+        return iteration, self._get_document(db_resource_id)
 
     def get_all_iteration(self, user_id, resource_id):
         """Get resource entry of all iterations
@@ -190,49 +377,195 @@ class ResourceLogger(RedisFluentLoggerBase):
                     user_id, resource_id, iteration)
             else:
                 db_resource_id_iter = db_resource_id
-            resp_dict[str(iteration)] = pickle.loads(self.db.get(
-                db_resource_id_iter))[1]
+            head, body = self.db.get_entry_and_body(db_resource_id_iter)
+            resp_dict[str(iteration)] = self.encoder.decode_document(
+                head, body)[1]
         return pickle.dumps([200, resp_dict])
 
-    def get_user_resources(self, user_id):
-        """Get a user specific list of resource entries
+    def _build_index(self, user_id=None):
+        """Add the resource entries that were created before the indexes
+        existed to the index of a user or of all resources
+
+        The index is only built once, until the index keys expired.
 
         Args:
-            user_id (str): The user id
+            user_id (str): The user id or None for the index of all resources
+
+        """
+        if self.db.is_index_built(user_id):
+            return
+        pattern = "*" if user_id is None else user_id + "/*"
+        entries = []
+        for db_resource_id, head in self.db.get_entry_list(pattern):
+            http_code, data = self.encoder.decode_head(head)
+            entries.append((db_resource_id, data.get("status"),
+                            self._get_timestamp(data)))
+        self.db.add_to_indexes(entries, self.index_expiration)
+        self.db.set_index_built(user_id, self.index_expiration)
+
+    @staticmethod
+    def encode_cursor(score, db_resource_id):
+        """Encode the position of a resource in an index as opaque cursor
+        """
+        cursor = "%r:%s" % (score, db_resource_id)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor that was created with encode_cursor()
+
+        Raises:
+            ValueError if the cursor is invalid
+
+        Returns:
+            tuple:
+            The (score, db resource id) tuple
+        """
+        try:
+            score, db_resource_id = base64.urlsafe_b64decode(
+                cursor.encode()).decode().split(":", 1)
+            return float(score), db_resource_id
+        except Exception:
+            raise ValueError("Invalid cursor <%s>" % cursor)
+
+    def list_resources(self, user_id=None, status=None, num=None, cursor=None,
+                       with_body=True, batch_size=100):
+        """Get a page of response models, latest resources first
+
+        The resources are read from the sorted set indexes, so only the
+        resource entries of the page are read. Index members of expired
+        resource entries are removed from the indexes while reading.
+
+        Args:
+            user_id (str): The user id or None for the resources of all users
+            status (str): Return only resources with this status, all if None
+            num (int): The maximum number of resources, all if None
+            cursor (str): The cursor returned with the previous page, start
+                          with the latest resource if None
+            with_body (bool): If False the process log, the process chain list
+                              and the process results are not read
+            batch_size (int): The number of resource entries to read at once
+
+        Raises:
+            ValueError if the cursor is invalid
+
+        Returns:
+            tuple:
+            A list of response models and the cursor of the next page, the
+            cursor is None if there is no next page
+
+        """
+        if cursor is not None:
+            cursor = self.decode_cursor(cursor)
+        self._build_index(user_id)
+        if status is not None and status not in self.db.resource_states:
+            # Only the known states are indexed
+            index_key = self.db.get_index_key(user_id)
+        else:
+            index_key = self.db.get_index_key(user_id, status)
+        # One resource more than requested is read, to know if there is a
+        # next page
+        limit = None if num is None else num + 1
+        if limit is not None:
+            batch_size = max(1, min(batch_size, limit))
+
+        selected = []
+        next_cursor = None
+        batch = []
+
+        def read_batch():
+            heads = self.db.get_entries([db_resource_id for db_resource_id,
+                                         score in batch])
+            expired = []
+            for (db_resource_id, score), head in zip(batch, heads):
+                if head is None:
+                    expired.append(db_resource_id)
+                    continue
+                if limit is not None and len(selected) >= limit:
+                    break
+                http_code, data = self.encoder.decode_head(head)
+                if status is None or data.get("status") == status:
+                    selected.append((db_resource_id, data, score))
+            self.db.remove_from_indexes(expired)
+            del batch[:]
+
+        for item in self.db.iter_index(index_key, cursor, batch_size):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                read_batch()
+                if limit is not None and len(selected) >= limit:
+                    break
+        if batch:
+            read_batch()
+
+        if limit is not None and len(selected) >= limit:
+            del selected[num:]
+            if selected:
+                db_resource_id, data, score = selected[-1]
+                next_cursor = self.encode_cursor(score, db_resource_id)
+        return self._complete_resource_list(selected, with_body), next_cursor
+
+    def _complete_resource_list(self, selected, with_body):
+        """Read the bodies of the selected resources
+
+        Args:
+            selected (list): A list of (db resource id, response model, score)
+                             tuples
+            with_body (bool): If False the response models are returned
+                              without reading the bodies
 
         Returns:
             list:
-            A list of resource document
+            A list of response models
 
         """
-        resource_list_pickled = self.db.get_list(user_id + "*")
-        resource_list = []
+        if with_body is False:
+            return [data for db_resource_id, data, score in selected]
 
-        if resource_list_pickled:
-            for entry in resource_list_pickled:
-                http_code, data = pickle.loads(entry)
-                resource_list.append(data)
+        bodies = self.db.get_bodies([db_resource_id for db_resource_id, data,
+                                     score in selected])
+        resource_list = []
+        for (db_resource_id, data, score), body in zip(selected, bodies):
+            if body is not None:
+                data.update(self.encoder.decode(body))
+            resource_list.append(data)
 
         return resource_list
 
-    def get_all_resources(self):
-        """Get all resource entries
+    def get_user_resources(self, user_id, status=None, num=None, with_body=True):
+        """Get a user specific list of resource entries
+
+        Args:
+            user_id (str): The user id
+            status (str): Return only resources with this status, all if None
+            num (int): The maximum number of resources, all if None
+            with_body (bool): If False the process log, the process chain list
+                              and the process results are not read
 
         Returns:
             list:
-            A list resource document
+            A list of resource document
 
         """
+        return self.list_resources(user_id, status=status, num=num,
+                                   with_body=with_body)[0]
 
-        resource_list_pickled = self.db.get_list("*")
-        resource_list = []
+    def get_all_resources(self, status=None, num=None, with_body=True):
+        """Get all resource entries
 
-        if resource_list_pickled:
-            for entry in resource_list_pickled:
-                http_code, data = pickle.loads(entry)
-                resource_list.append(data)
+        Args:
+            status (str): Return only resources with this status, all if None
+            num (int): The maximum number of resources, all if None
+            with_body (bool): If False the process log, the process chain list
+                              and the process results are not read
 
-        return resource_list
+        Returns:
+            list:
+            A list resource document
+
+        """
+        return self.list_resources(None, status=status, num=num,
+                                   with_body=with_body)[0]
 
     def get_termination(self, user_id, resource_id, iteration=None):
         """Get resource entry that requires the termination of the resource
@@ -250,6 +583,25 @@ class ResourceLogger(RedisFluentLoggerBase):
         db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
         return self.db.get_termination(db_resource_id)
 
+    def create_termination_listener(self, user_id, resource_id, iteration=None):
+        """Create and start a listener that receives the termination requests
+        of a resource
+
+        Args:
+            user_id (str): The user id
+            resource_id (str): The resource id
+            iteration (int): The iteration of the job
+
+        Returns:
+            TerminationListener:
+            The started listener that must be stopped by the caller
+
+        """
+        db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
+        listener = TerminationListener(self.db, db_resource_id)
+        listener.start()
+        return listener
+
     def delete(self, user_id, resource_id, iteration=None):
         """Delete resource entry
 
@@ -281,3 +633,49 @@ class ResourceLogger(RedisFluentLoggerBase):
         """
         db_resource_id = self._generate_db_resource_id(user_id, resource_id, iteration)
         return bool(self.db.delete_termination(db_resource_id))
+
+    def lock_render(self, render_key, resource_id, expiration=600):
+        """Mark that the job of a resource renders an image
+
+        Args:
+            render_key (str): The key of the rendered image
+            resource_id (str): The resource id
+            expiration (int): The time in seconds after that the mark is
+                              removed
+
+        Returns:
+            bool:
+            True if the mark was set, False if another job renders the image
+
+        """
+        return self.db.lock_render(render_key, resource_id, expiration)
+
+    def unlock_render(self, render_key, resource_id):
+        """Remove the mark of a rendered image
+
+        Args:
+            render_key (str): The key of the rendered image
+            resource_id (str): The resource id
+
+        """
+        self.db.unlock_render(render_key, resource_id)
+
+    def wait_for_render(self, render_key, timeout, poll_time=0.05):
+        """Wait until no job renders an image
+
+        Args:
+            render_key (str): The key of the rendered image
+            timeout (float): The maximum time in seconds to wait
+            poll_time (float): Time to sleep between polls
+
+        Returns:
+            bool:
+            True if the image was rendered, False if the timeout was reached
+
+        """
+        end_time = time.time() + timeout
+        while self.db.is_render_locked(render_key) is True:
+            if time.time() >= end_time:
+                return False
+            time.sleep(poll_time)
+        return True
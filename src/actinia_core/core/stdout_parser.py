@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Parser of the stdout output of processes
+
+The stdout output is parsed in blocks of rows, so that large outputs that
+were spilled to a file are never loaded completely into memory. Tables and
+lists are either parsed into rows of strings, or into typed columns if the
+columnar payload is requested:
+
+    {"num_rows": 2, "types": ["int", "float", "str"],
+     "columns": [[1, 2], [0.5, null], ["a", "b"]]}
+
+A column is of type int if all values are integers, of type float if all
+values are finite numbers and of type str otherwise. Empty values and the
+GRASS GIS null value "*" are null in int and float columns.
+"""
+
+import json
+import math
+from itertools import repeat
+from .common.exceptions import AsyncProcessError
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The values that are null in numeric columns
+NULL_VALUES = ("", "*")
+# The approximate number of characters that are parsed at once
+BLOCK_SIZE = 1048576
+# The ASCII characters that are stripped by str.strip(), except line breaks
+ASCII_WHITESPACE = " \t\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+def iter_row_blocks(stdout, block_size=BLOCK_SIZE):
+    """Iterate over blocks of rows of a stdout output, the rows are like the
+    rows of stdout.strip().split("\n") without leading and trailing
+    whitespace
+
+    Args:
+        stdout: The stdout string or an OutputCapture
+        block_size (int): The approximate number of characters of a block
+
+    Yields:
+        list:
+        The rows of a block, at least one empty row
+    """
+    if not isinstance(stdout, str) and stdout.truncated is False:
+        stdout = stdout.read()
+    if isinstance(stdout, str):
+        # The output is already in memory
+        yield list(map(str.strip, stdout.strip().split("\n")))
+        return
+
+    lines = stdout.open_lines()
+    # The number of empty rows that are only yielded if another row follows
+    num_empty = 0
+    started = False
+    with lines:
+        while True:
+            block = lines.readlines(block_size)
+            if not block:
+                break
+            rows = list(map(str.strip, block))
+            end = len(rows)
+            while end > 0 and not rows[end - 1]:
+                end -= 1
+            if end == 0:
+                num_empty += len(rows)
+                continue
+            begin = 0
+            if started is False:
+                while not rows[begin]:
+                    begin += 1
+                started = True
+            elif num_empty > 0:
+                yield [""] * num_empty
+            num_empty = len(rows) - end
+            yield rows[begin:end]
+    if started is False:
+        yield [""]
+
+
+def has_whitespace(text):
+    """Check if a text contains characters that are stripped by str.strip(),
+    other than line breaks
+
+    Args:
+        text (str): The text
+
+    Returns:
+        bool:
+        True if the values of the text must be stripped
+    """
+    if text.isascii() is False:
+        return True
+    return any(char in text for char in ASCII_WHITESPACE)
+
+
+def convert_column(values):
+    """Convert a column of strings into a typed column
+
+    Args:
+        values (list): The stripped strings of the column
+
+    Returns:
+        tuple:
+        The type "int", "float" or "str" and the list of values, null
+        values are None
+    """
+    has_nulls = False
+    valid = values
+    for type_name, converter in (("int", int), ("float", float)):
+        try:
+            converted = list(map(converter, valid))
+        except ValueError:
+            if has_nulls is False and any(null in values for null in NULL_VALUES):
+                # Convert the values without nulls
+                has_nulls = True
+                valid = [value for value in values if value not in NULL_VALUES]
+                if not valid:
+                    return "str", values
+                try:
+                    converted = list(map(converter, valid))
+                except ValueError:
+                    continue
+            else:
+                continue
+        if converter is float and not all(map(math.isfinite, converted)):
+            # NaN and inf are not allowed in JSON
+            break
+        if has_nulls is False:
+            return type_name, converted
+        converted = iter(converted)
+        return type_name, [None if value in NULL_VALUES else next(converted)
+                           for value in values]
+    return "str", values
+
+
+def split_columns(rows, delimiter):
+    """Split a block of rows into columns
+
+    If all rows have the same number of columns, the joined block is split
+    at once and the columns are sliced from the flat list of values.
+
+    Args:
+        rows (list): The stripped rows
+        delimiter (str): The delimiter of the columns
+
+    Returns:
+        list:
+        The lists of the stripped values of the columns, short rows are
+        filled with empty strings
+    """
+    num_delimiters = rows[0].count(delimiter)
+    if "\n" not in delimiter and set(map(str.count, rows, repeat(
+            delimiter, len(rows)))) == {num_delimiters}:
+        num_columns = num_delimiters + 1
+        text = "\n".join(rows)
+        values = text.replace(delimiter, "\n").split("\n")
+        if has_whitespace(text):
+            return [list(map(str.strip, values[i::num_columns]))
+                    for i in range(num_columns)]
+        return [values[i::num_columns] for i in range(num_columns)]
+    # Rows with different numbers of columns
+    split_rows = [row.split(delimiter) for row in rows]
+    num_columns = max(len(values) for values in split_rows)
+    return [[values[i].strip() if i < len(values) else "" for values in split_rows]
+            for i in range(num_columns)]
+
+
+def convert_value(value):
+    """Convert a single string into an int or float if possible
+
+    Args:
+        value (str): The value
+
+    Returns:
+        The converted value or the string
+    """
+    for converter in (int, float):
+        try:
+            converted = converter(value)
+        except ValueError:
+            continue
+        if converter is float and not math.isfinite(converted):
+            # NaN and inf are not allowed in JSON
+            break
+        return converted
+    return value
+
+
+def parse_table(blocks, delimiter, columnar=False):
+    """Parse the rows of a table
+
+    Args:
+        blocks: The iterable of blocks of rows
+        delimiter (str): The delimiter of the columns
+        columnar (bool): Return typed columns instead of rows of strings
+
+    Returns:
+        The list of rows or the columnar payload
+    """
+    if columnar is False:
+        result = []
+        for rows in blocks:
+            if has_whitespace("\n".join(rows)):
+                result.extend([list(map(str.strip, row.split(delimiter)))
+                               for row in rows])
+            else:
+                result.extend([row.split(delimiter) for row in rows])
+        return result
+
+    columns = []
+    num_rows = 0
+    for rows in blocks:
+        block_columns = split_columns(rows, delimiter)
+        for i in range(len(columns), len(block_columns)):
+            # Rows with more columns than the previous rows
+            columns.append([""] * num_rows)
+        for i, column in enumerate(columns):
+            if i < len(block_columns):
+                column.extend(block_columns[i])
+            else:
+                column.extend([""] * len(rows))
+        num_rows += len(rows)
+
+    types = []
+    for i, column in enumerate(columns):
+        type_name, columns[i] = convert_column(column)
+        types.append(type_name)
+    return {"num_rows": num_rows, "types": types, "columns": columns}
+
+
+def parse_list(blocks, columnar=False):
+    """Parse the rows of a list
+
+    Args:
+        blocks: The iterable of blocks of rows
+        columnar (bool): Return a typed column instead of strings
+
+    Returns:
+        The list of values or the columnar payload
+    """
+    values = []
+    for rows in blocks:
+        values.extend(rows)
+    if columnar is False:
+        return values
+    type_name, values = convert_column(values)
+    return {"num_rows": len(values), "type": type_name, "values": values}
+
+
+def parse_kv(blocks, delimiter, columnar=False):
+    """Parse the key/value rows
+
+    Args:
+        blocks: The iterable of blocks of rows
+        delimiter (str): The delimiter of key and value
+        columnar (bool): Convert numeric values into int and float
+
+    Raises:
+        AsyncProcessError: If a row has no delimiter
+
+    Returns:
+        dict:
+        The key/value pairs
+    """
+    result = dict()
+    for rows in blocks:
+        for row in rows:
+            key, sep, value = row.partition(delimiter)
+            if not sep:
+                raise AsyncProcessError(
+                    "Unable to parse the key/value row <%s> with delimiter <%s>"
+                    % (row, delimiter))
+            value = value.strip()
+            result[key.strip()] = convert_value(value) if columnar else value
+    return result
+
+
+def parse_json(stdout, delimiter):
+    """Parse key/value rows or a JSON document
+
+    Args:
+        stdout (str): The stdout string
+        delimiter (str): The delimiter of key and value
+
+    Returns:
+        The key/value pairs, the JSON document or the stdout string if it
+        can not be parsed
+    """
+    result = None
+    try:
+        result = {i[0]: i[1] for i in [
+            entry.split(delimiter, 1) for entry in
+            stdout.strip('\n').split('\n')]
+        }
+    except Exception:
+        try:
+            result = json.loads(stdout)
+        except Exception:
+            pass
+    finally:
+        if not result:
+            result = stdout
+    return result
+
+
+def parse_stdout(stdout, format, delimiter, columnar=False):
+    """Parse the stdout output of a process
+
+    Args:
+        stdout: The stdout string or an OutputCapture
+        format (str): The format "table", "list", "kv" or "json"
+        delimiter (str): The delimiter of the columns or key and value
+        columnar (bool): Return tables and lists as typed columns and
+                         convert numeric key/value pairs
+
+    Raises:
+        AsyncProcessError: If the format is unknown or the output can not be
+                           parsed
+
+    Returns:
+        The parser result
+    """
+    if "table" in format:
+        return parse_table(iter_row_blocks(stdout), delimiter, columnar)
+    elif "list" in format:
+        return parse_list(iter_row_blocks(stdout), columnar)
+    elif "kv" in format:
+        return parse_kv(iter_row_blocks(stdout), delimiter, columnar)
+    elif "json" in format:
+        if not isinstance(stdout, str):
+            stdout = stdout.read()
+        return parse_json(stdout, delimiter)
+    raise AsyncProcessError("Wrong stdout parser format")
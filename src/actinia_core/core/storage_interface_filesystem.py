@@ -156,3 +156,5 @@ class ResourceStorageFilesystem(ResourceStorageBase):
         if (os.path.exists(self.resource_export_path)
                 and os.path.isdir(self.resource_export_path)):
             shutil.rmtree(self.resource_export_path, ignore_errors=True)
+        # The directory is created again by setup()
+        self.dir_created = False
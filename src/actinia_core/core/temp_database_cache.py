@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Cache of prepared temporary GRASS GIS database skeletons
+
+A skeleton contains everything that is required to set up the temporary
+database of a job without running GRASS GIS modules:
+
+    - the mapsets of the global and user group location that must be
+      linked into the temporary location
+    - the default region of the PERMANENT mapset, that is the initial
+      region of new mapsets
+
+The temporary mapset is created with the GrassMapsetBootstrapper, that gets
+the normalized default region of the skeleton.
+
+Skeletons are cached for each location, user group, set of required mapsets
+and user permissions. A skeleton is invalidated if the location directories
+change, which is the case if mapsets are created or deleted, or if the
+default region changes. The cache lives in the process that runs the jobs,
+so it is reused by all jobs of a pool worker.
+"""
+
+import os
+from collections import OrderedDict
+from threading import Lock
+from .grass_init import GrassInitError, read_region, format_region
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def _get_signature(paths):
+    """Return the inode, modification time and size of files and
+    directories, None for paths that do not exist
+    """
+    sig = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            sig.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class TempDatabaseSkeleton(object):
+    """A prepared temporary GRASS GIS database layout
+    """
+
+    def __init__(self, mapsets_to_link, location_paths):
+        """Constructor
+
+        Args:
+            mapsets_to_link (list): The (mapset_path, mapset) tuples of the
+                                    mapsets that are linked into the
+                                    temporary location
+            location_paths (list): The global and user group location paths,
+                                   whose modification invalidates the
+                                   skeleton
+        """
+        self.mapsets_to_link = list(mapsets_to_link)
+        # The normalized default region, None if it is not available
+        self.default_region = None
+        self.default_wind_path = None
+        for mapset_path, mapset in self.mapsets_to_link:
+            if mapset == "PERMANENT":
+                self.default_wind_path = os.path.join(mapset_path, "DEFAULT_WIND")
+                try:
+                    with open(self.default_wind_path, "r") as f:
+                        self.default_region = format_region(read_region(f.read()))
+                except (OSError, GrassInitError):
+                    self.default_region = None
+                break
+        self.watched_paths = list(location_paths)
+        if self.default_wind_path is not None:
+            self.watched_paths.append(self.default_wind_path)
+        self.signature = _get_signature(self.watched_paths)
+
+    def is_valid(self):
+        """Check if the linked locations and the default region are unchanged
+
+        Returns:
+            bool:
+            True if the skeleton can be used
+        """
+        return _get_signature(self.watched_paths) == self.signature
+
+    def link_mapsets(self, temp_location_path):
+        """Create the temporary location and link the mapsets into it
+
+        Args:
+            temp_location_path (str): The path of the temporary location
+        """
+        os.mkdir(temp_location_path)
+        for mapset_path, mapset in self.mapsets_to_link:
+            link_path = os.path.join(temp_location_path, mapset)
+            if os.path.isdir(link_path) is False:
+                os.symlink(mapset_path, link_path)
+
+
+class TempDatabaseSkeletonCache(object):
+    """Least recently used cache of temporary database skeletons
+    """
+
+    def __init__(self, max_size=64):
+        """Constructor
+
+        Args:
+            max_size (int): The maximum number of cached skeletons
+        """
+        self.max_size = max_size
+        self.skeletons = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def create_key(location_paths, mapsets, user_credentials):
+        """Create the cache key of a skeleton
+
+        Args:
+            location_paths (list): The global and user group location paths
+            mapsets (list): The required mapsets, an empty list if all
+                            accessible mapsets are linked
+            user_credentials (dict): The user credentials that define the
+                                     accessible mapsets of the global location
+
+        Returns:
+            tuple:
+            The cache key
+        """
+        permissions = user_credentials["permissions"]
+        return (tuple(location_paths), tuple(sorted(set(mapsets))),
+                user_credentials["user_role"],
+                repr(permissions.get("accessible_datasets")))
+
+    def get(self, key, create_func):
+        """Return a valid skeleton or create it
+
+        Args:
+            key (tuple): The key created with create_key()
+            create_func (function): The function without arguments that
+                                    creates the skeleton
+
+        Returns:
+            TempDatabaseSkeleton:
+            The skeleton
+        """
+        with self.lock:
+            skeleton = self.skeletons.get(key)
+            if skeleton is not None:
+                if skeleton.is_valid():
+                    self.skeletons.move_to_end(key)
+                    return skeleton
+                del self.skeletons[key]
+
+        skeleton = create_func()
+        with self.lock:
+            self.skeletons[key] = skeleton
+            while len(self.skeletons) > self.max_size:
+                self.skeletons.popitem(last=False)
+        return skeleton
+
+    def invalidate(self, location_path=None):
+        """Remove the skeletons of a location or all skeletons
+
+        Args:
+            location_path (str): The path of the global or user group location,
+                                 all skeletons are removed if None
+        """
+        with self.lock:
+            for key in list(self.skeletons):
+                if location_path is None or location_path in key[0]:
+                    del self.skeletons[key]
+
+
+# The skeleton cache of the current process
+skeleton_cache = TempDatabaseSkeletonCache()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Listener for termination requests of a running job
+
+The termination requests of a resource are published by the resource
+database. A job starts a TerminationListener that receives them in a
+background thread and kills the registered child process immediately. The
+job checks is_terminated() instead of reading the termination entry from
+the resource database. Several child processes can be registered, if
+independent processes of a process chain run concurrently.
+"""
+
+import threading
+from actinia_core.core.logging_interface import log
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class TerminationListener(object):
+    """Receive the termination requests of a resource in a background thread
+    """
+
+    def __init__(self, db, resource_id, poll_timeout=1.0):
+        """Constructor
+
+        Args:
+            db (RedisResourceInterface): The connected resource database
+            resource_id (str): The unique id of the resource in the database
+            poll_timeout (float): The maximum number of seconds the listener
+                                  thread blocks before it checks if it
+                                  should stop
+        """
+        self.db = db
+        self.resource_id = resource_id
+        self.poll_timeout = poll_timeout
+        self.terminated = threading.Event()
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.pubsub = None
+        self.thread = None
+
+    def start(self):
+        """Subscribe to the termination requests and start the listener thread
+
+        Termination requests that were committed before the listener was
+        started are read from the resource database.
+        """
+        self.pubsub = self.db.subscribe_termination(self.resource_id)
+        if self.db.get_termination(self.resource_id) is True:
+            self._terminate()
+        self.thread = threading.Thread(target=self._run,
+                                       name="%s-termination-listener"
+                                            % self.resource_id)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set() and not self.terminated.is_set():
+            try:
+                message = self.pubsub.get_message(timeout=self.poll_timeout)
+            except Exception as e:
+                if self.stopped.is_set():
+                    return
+                log.error("Termination listener of %s: %s"
+                          % (self.resource_id, str(e)))
+                # Fall back to the termination entry
+                self.stopped.wait(self.poll_timeout)
+                if self.db.get_termination(self.resource_id) is True:
+                    self._terminate()
+                continue
+            if message is not None and message["type"] == "message":
+                self._terminate()
+
+    def _terminate(self):
+        """Set the terminated flag and kill the running child processes
+        """
+        with self.lock:
+            self.terminated.set()
+            self._kill_processes()
+
+    def _kill_processes(self):
+        for process in self.processes:
+            try:
+                process.kill()
+            except OSError:
+                # The process already finished
+                pass
+
+    def set_process(self, process):
+        """Register the running child process that is killed if a
+        termination request arrives
+
+        The process is killed immediately, if the resource was already
+        terminated.
+
+        Args:
+            process: The child process with a kill() method, None to remove
+                     the registered process
+        """
+        with self.lock:
+            self.processes = set() if process is None else {process}
+            if self.terminated.is_set():
+                self._kill_processes()
+
+    def add_process(self, process):
+        """Register an additional running child process, see set_process()
+
+        Args:
+            process: The child process with a kill() method
+        """
+        with self.lock:
+            self.processes.add(process)
+            if self.terminated.is_set():
+                self._kill_processes()
+
+    def remove_process(self, process):
+        """Remove a registered child process
+
+        Args:
+            process: The child process that was registered with add_process()
+        """
+        with self.lock:
+            self.processes.discard(process)
+
+    def is_terminated(self):
+        """Check if a termination request was received
+
+        Returns:
+            bool:
+            True if the resource should be terminated, False otherwise
+        """
+        return self.terminated.is_set()
+
+    def stop(self):
+        """Stop the listener thread and close the subscription
+        """
+        self.stopped.set()
+        with self.lock:
+            self.processes = set()
+        if self.thread is not None:
+            self.thread.join(self.poll_timeout + 1)
+        if self.pubsub is not None:
+            try:
+                self.pubsub.close()
+            except Exception:
+                pass
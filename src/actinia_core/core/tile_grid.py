@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+XYZ tile grids of locations
+
+Tiles are rendered in the coordinate reference system of the location, so
+that no reprojection is required. The tile grid depends on the location:
+
+    - Web Mercator locations use the XYZ/WMTS GoogleMapsCompatible grid
+    - Latitude-longitude locations use the WMTS WorldCRS84Quad grid with
+      two tiles at zoom level 0
+    - Other locations use a square grid, whose tile at zoom level 0 covers
+      the default region of the location
+
+The tile x grows from west to east, the tile y from north to south.
+"""
+
+import math
+import os
+from .common.exceptions import MetadataUnavailable
+from .grass_init import format_region, read_region
+from .mapset_metadata import read_key_value_file
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The width and height of a tile in pixel
+TILE_SIZE = 256
+# The maximum zoom level
+MAX_ZOOM = 24
+# The number of tiles in x and y direction that are rendered together, if
+# a tile is requested that is not cached
+METATILE_SIZE = 4
+# The EPSG codes of Web Mercator
+WEB_MERCATOR_EPSG = ("3857", "900913", "3785", "102100")
+# The half of the extent of Web Mercator
+WEB_MERCATOR_EXTENT = 20037508.342789244
+
+
+class TileGrid(object):
+    """A tile grid with square tiles, the number of tiles doubles in x and y
+    direction with each zoom level
+    """
+
+    def __init__(self, name, west, north, size, matrix_width=1,
+                 matrix_height=1):
+        """Constructor
+
+        Args:
+            name (str): The name of the grid
+            west (float): The west border of the grid
+            north (float): The north border of the grid
+            size (float): The width and height of a tile at zoom level 0
+            matrix_width (int): The number of tiles in x direction at zoom
+                                level 0
+            matrix_height (int): The number of tiles in y direction at zoom
+                                 level 0
+        """
+        self.name = name
+        self.west = west
+        self.north = north
+        self.size = size
+        self.matrix_width = matrix_width
+        self.matrix_height = matrix_height
+
+    def to_dict(self):
+        """Return the grid as dictionary that can be pickled
+
+        Returns:
+            dict:
+            The arguments of the constructor
+        """
+        return {"name": self.name, "west": self.west, "north": self.north,
+                "size": self.size, "matrix_width": self.matrix_width,
+                "matrix_height": self.matrix_height}
+
+    @staticmethod
+    def from_dict(grid):
+        """Create the grid from the dictionary of to_dict()
+
+        Args:
+            grid (dict): The dictionary
+
+        Returns:
+            TileGrid:
+            The grid
+        """
+        return TileGrid(**grid)
+
+    def get_matrix_size(self, z):
+        """Return the number of tiles of a zoom level
+
+        Args:
+            z (int): The zoom level
+
+        Returns:
+            tuple:
+            The number of tiles in x and y direction
+        """
+        return self.matrix_width << z, self.matrix_height << z
+
+    def is_valid(self, z, x, y):
+        """Check if a tile is part of the grid
+
+        Args:
+            z (int): The zoom level
+            x (int): The column of the tile
+            y (int): The row of the tile
+
+        Returns:
+            bool:
+            True if the tile is part of the grid
+        """
+        if z < 0 or z > MAX_ZOOM:
+            return False
+        num_x, num_y = self.get_matrix_size(z)
+        return 0 <= x < num_x and 0 <= y < num_y
+
+    def get_tile_bounds(self, z, x, y):
+        """Return the extent of a tile
+
+        Args:
+            z (int): The zoom level
+            x (int): The column of the tile
+            y (int): The row of the tile
+
+        Returns:
+            dict:
+            The north, south, east and west border of the tile
+        """
+        size = self.size / (1 << z)
+        return {"n": self.north - y * size, "s": self.north - (y + 1) * size,
+                "e": self.west + (x + 1) * size, "w": self.west + x * size}
+
+    def get_tiles(self, z, n, s, e, w):
+        """Return the tiles of a zoom level that intersect an extent
+
+        Args:
+            z (int): The zoom level
+            n (float): The north border of the extent
+            s (float): The south border of the extent
+            e (float): The east border of the extent
+            w (float): The west border of the extent
+
+        Returns:
+            list:
+            The [z, x, y] lists of the tiles
+        """
+        size = self.size / (1 << z)
+        num_x, num_y = self.get_matrix_size(z)
+        x_min = max(int(math.floor((w - self.west) / size)), 0)
+        x_max = min(int(math.ceil((e - self.west) / size)), num_x)
+        y_min = max(int(math.floor((self.north - n) / size)), 0)
+        y_max = min(int(math.ceil((self.north - s) / size)), num_y)
+        return [[z, x, y] for y in range(y_min, y_max)
+                for x in range(x_min, x_max)]
+
+    def get_metatile(self, z, x, y, size=METATILE_SIZE):
+        """Return the tiles of the metatile that contains a tile
+
+        Args:
+            z (int): The zoom level
+            x (int): The column of the tile
+            y (int): The row of the tile
+            size (int): The number of tiles of the metatile in x and y
+                        direction
+
+        Returns:
+            list:
+            The [z, x, y] lists of the tiles, the requested tile is the first
+        """
+        num_x, num_y = self.get_matrix_size(z)
+        x_min = x - x % size
+        y_min = y - y % size
+        tiles = [[z, x, y]]
+        for tile_y in range(y_min, min(y_min + size, num_y)):
+            for tile_x in range(x_min, min(x_min + size, num_x)):
+                if tile_x != x or tile_y != y:
+                    tiles.append([z, tile_x, tile_y])
+        return tiles
+
+
+def create_tile_grid(location_path):
+    """Create the tile grid of a location
+
+    Args:
+        location_path (str): The path of the location
+
+    Raises:
+        MetadataUnavailable if the projection or the default region can not
+        be read
+
+    Returns:
+        TileGrid:
+        The tile grid
+    """
+    permanent_path = os.path.join(location_path, "PERMANENT")
+    proj_info = {}
+    if os.path.isfile(os.path.join(permanent_path, "PROJ_INFO")):
+        proj_info = read_key_value_file(os.path.join(permanent_path,
+                                                     "PROJ_INFO"))
+    if proj_info.get("proj") == "ll":
+        return TileGrid("WorldCRS84Quad", -180.0, 90.0, 180.0, 2, 1)
+    epsg_path = os.path.join(permanent_path, "PROJ_EPSG")
+    if os.path.isfile(epsg_path):
+        epsg = read_key_value_file(epsg_path).get("epsg")
+        if epsg in WEB_MERCATOR_EPSG:
+            return TileGrid("GoogleMapsCompatible", -WEB_MERCATOR_EXTENT,
+                            WEB_MERCATOR_EXTENT, 2 * WEB_MERCATOR_EXTENT)
+    region = read_raster_region(os.path.join(permanent_path, "DEFAULT_WIND"))
+    return TileGrid("DefaultRegion", region["west"], region["north"],
+                    max(region["east"] - region["west"],
+                        region["north"] - region["south"]))
+
+
+def read_raster_region(path):
+    """Read the region of a region file or the header of a raster map
+
+    Args:
+        path (str): The path of the WIND, DEFAULT_WIND or cellhd file
+
+    Raises:
+        MetadataUnavailable if the file can not be read
+
+    Returns:
+        dict:
+        The region created by read_region()
+    """
+    try:
+        with open(path, "r") as f:
+            return read_region(f.read())
+    except Exception as e:
+        raise MetadataUnavailable("Unable to read the region <%s>: %s"
+                                  % (path, str(e)))
+
+
+def create_tile_region(region, bounds, tile_size=TILE_SIZE):
+    """Create the region file of a tile
+
+    Args:
+        region (dict): The region of the mapset created by read_region(),
+                       that provides the projection and the 3D settings
+        bounds (dict): The tile extent of TileGrid.get_tile_bounds()
+        tile_size (int): The width and height of the tile in pixel
+
+    Returns:
+        str:
+        The content of the region file
+    """
+    region = dict(region)
+    region.update(north=bounds["n"], south=bounds["s"], east=bounds["e"],
+                  west=bounds["w"], rows=tile_size, cols=tile_size,
+                  rows3=tile_size, cols3=tile_size)
+    region["ns_res"] = region["ns_res3"] = (bounds["n"] - bounds["s"]) / tile_size
+    region["ew_res"] = region["ew_res3"] = (bounds["e"] - bounds["w"]) / tile_size
+    return format_region(region)
+
+
+def get_tile_options(grid, z, x, y, tile_size=TILE_SIZE):
+    """Return the render options of a tile, that are part of the render
+    cache key
+
+    Args:
+        grid (TileGrid): The tile grid
+        z (int): The zoom level
+        x (int): The column of the tile
+        y (int): The row of the tile
+        tile_size (int): The width and height of the tile in pixel
+
+    Returns:
+        dict:
+        The render options
+    """
+    return {"grid": grid.to_dict(), "z": z, "x": x, "y": y,
+            "width": tile_size, "height": tile_size}
@@ -65,6 +65,7 @@ from actinia_core.rest.process_validation import SyncProcessValidationResource
 from actinia_core.rest.user_management import \
      UserListResource, UserManagementResource
 from actinia_core.rest.api_log_management import APILogResource
+from actinia_core.rest.process_queue_statistics import ProcessQueueWaitTimeResource
 from actinia_core.rest.user_api_key import TokenCreationResource, APIKeyCreationResource
 from actinia_core.rest.resource_management \
     import ResourceManager, ResourcesManager, ResourceIterationManager
@@ -78,6 +79,10 @@ from actinia_core.rest.raster_renderer import SyncEphemeralRasterRendererResourc
 from actinia_core.rest.raster_renderer import SyncEphemeralRasterRGBRendererResource
 from actinia_core.rest.raster_renderer import SyncEphemeralRasterShapeRendererResource
 from actinia_core.rest.strds_renderer import SyncEphemeralSTRDSRendererResource
+from actinia_core.rest.strds_frame_renderer import \
+    SyncEphemeralSTRDSFrameRendererResource
+from actinia_core.rest.raster_tiles import SyncEphemeralRasterTileResource
+from actinia_core.rest.raster_tiles import AsyncEphemeralRasterTileSeedingResource
 from actinia_core.rest.process_chain_monitoring import \
     MaxMapsetSizeResource, MapsetSizeResource, MapsetSizeRenderResource, \
     MapsetSizeDiffResource, MapsetSizeDiffRenderResource
@@ -129,6 +134,14 @@ def create_core_endpoints():
         SyncEphemeralRasterRendererResource,
         '/locations/<string:location_name>/mapsets/<string:mapset_name>/'
         'raster_layers/<string:raster_name>/render')
+    flask_api.add_resource(
+        SyncEphemeralRasterTileResource,
+        '/locations/<string:location_name>/mapsets/<string:mapset_name>/'
+        'raster_layers/<string:raster_name>/tiles/<int:z>/<int:x>/<int:y>.png')
+    flask_api.add_resource(
+        AsyncEphemeralRasterTileSeedingResource,
+        '/locations/<string:location_name>/mapsets/<string:mapset_name>/'
+        'raster_layers/<string:raster_name>/tiles')
     flask_api.add_resource(
         SyncEphemeralRasterRGBRendererResource,
         '/locations/<string:location_name>/mapsets/<string:mapset_name>/render_rgb')
@@ -164,6 +177,10 @@ def create_core_endpoints():
         SyncEphemeralSTRDSRendererResource,
         '/locations/<string:location_name>/mapsets/<string:mapset_name>/'
         'strds/<string:strds_name>/render')
+    flask_api.add_resource(
+        SyncEphemeralSTRDSFrameRendererResource,
+        '/locations/<string:location_name>/mapsets/<string:mapset_name>/'
+        'strds/<string:strds_name>/render_frames')
 
     # Validation
     flask_api.add_resource(
@@ -215,6 +232,9 @@ def create_core_endpoints():
     flask_api.add_resource(APIKeyCreationResource, '/api_key', )
     flask_api.add_resource(APILogResource, '/api_log/<string:user_id>')
 
+    # Process queue statistics
+    flask_api.add_resource(ProcessQueueWaitTimeResource, '/process_queue/wait_times')
+
     # Resource management
     """
     The endpoint '/resources/<string:user_id>/<string:resource_id>' has two
@@ -65,14 +65,12 @@ if global_config.REDIS_SERVER_PW and global_config.REDIS_SERVER_PW is not None:
 connect(*redis_args)
 del redis_args
 
-# Create the process queue
-create_process_queue(global_config)
-
-# Disabled since the redis queue does not work in Python3
-# Create the job queue for redis
-# create_job_queues(global_config.REDIS_QUEUE_SERVER_URL,
-#                  global_config.REDIS_QUEUE_SERVER_PORT,
-#                  global_config.NUMBER_OF_WORKERS)
+# Create the process queue or connect the redis job queue that is consumed
+# by the actinia-worker processes
+if global_config.QUEUE_TYPE == "redis":
+    create_job_queues(global_config)
+else:
+    create_process_queue(global_config)
 
 ###############################################################################
 if __name__ == '__main__':
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Models for the process queue statistics
+"""
+
+from flask_restful_swagger_2 import Schema
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class QueueWaitTimeModel(Schema):
+    """Response schema for the process queue wait time percentiles of a user
+    """
+    type = 'object'
+    properties = {
+        'count': {
+            'type': 'integer',
+            'format': 'int64',
+            'description': 'The number of processes of the user that were started'
+        },
+        'samples': {
+            'type': 'integer',
+            'format': 'int64',
+            'description': 'The number of recent wait times used for the '
+                           'percentiles'
+        },
+        'p50': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The median wait time in seconds'
+        },
+        'p90': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The 90 percentile of the wait time in seconds'
+        },
+        'p99': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The 99 percentile of the wait time in seconds'
+        },
+        'max': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The maximum wait time in seconds'
+        },
+        'timestamp': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The time stamp of the statistics'
+        }
+    }
+    required = ["count", "samples", "p50", "p90", "p99", "max"]
+
+
+class QueueWaitTimeListModel(Schema):
+    """Response schema that contains the process queue wait time percentiles of
+    several users, using the user id as key.
+    """
+    type = 'object'
+    properties = {
+        'wait_times': {
+            'type': 'object',
+            'additionalProperties': QueueWaitTimeModel,
+            'description': 'The wait time percentiles with the user id as key'
+        }
+    }
+    required = ["wait_times"]
+
+    example = {
+        "wait_times": {
+            "user": {
+                "count": 120,
+                "samples": 120,
+                "p50": 0.004,
+                "p90": 1.21,
+                "p99": 12.7,
+                "max": 15.3,
+                "timestamp": 1612345678.91
+            }
+        }
+    }
@@ -252,7 +252,19 @@ class StdoutParser(Schema):
                                      ' list and key/value module output. Many GRASS '
                                      'GIS  modules use by default \"|\" in tables and '
                                      '\"=\" in key/value pairs. A new line \"\\n\" is '
-                                     'always the delimiter between rows in the output.'}
+                                     'always the delimiter between rows in the '
+                                     'output.'},
+        'columnar': {'type': 'boolean',
+                     'default': False,
+                     'description': 'If true, table and list output is returned '
+                                    'as typed columns: {"num_rows": 2, "types": '
+                                    '["int", "float"], "columns": [[1, 2], '
+                                    '[0.5, null]]} for tables and {"num_rows": 2, '
+                                    '"type": "int", "values": [1, 2]} for lists. '
+                                    'Columns are of type int, float or str, empty '
+                                    'values and \"*\" are null in numeric columns. '
+                                    'Numeric values of key/value output are '
+                                    'returned as numbers.'}
     }
     required = ['id', 'format', 'delimiter']
     description = (
@@ -430,6 +442,12 @@ class ProcessChainModel(Schema):
                  'description': "A list of process definitions that should be executed "
                                 "in the order provided by the list."},
         'webhooks': Webhooks,
+        'mapset_size_tracking': {
+            'type': 'boolean',
+            'default': True,
+            'description': 'Set false to skip the computation of the mapset '
+                           'size after each module, the mapset_size of the '
+                           'process log is not set in this case.'},
     }
     required = ['version', 'list']
     example = {
@@ -104,13 +104,36 @@ class ProcessLogModel(Schema):
         },
         'stdout': {
             'type': 'string',
-            'description': 'The stdout output of the executable'
+            'description': 'The stdout output of the executable, only the '
+                           'beginning and the end of large outputs'
         },
         'stderr': {
             'type': 'array',
             'items': {'type': 'string'},
             'description': 'The stderr output of the executable as list of strings'
         },
+        'stdout_url': {
+            'type': 'string',
+            'description': 'The URL of the full stdout output, if it was '
+                           'truncated'
+        },
+        'stderr_url': {
+            'type': 'string',
+            'description': 'The URL of the full stderr output, if it was '
+                           'truncated'
+        },
+        'stdout_truncated': {
+            'type': 'boolean',
+            'description': 'True if the stdout output was truncated, the '
+                           'full output is only available as stdout_url in '
+                           'case of processing with export'
+        },
+        'stderr_truncated': {
+            'type': 'boolean',
+            'description': 'True if the stderr output was truncated, the '
+                           'full output is only available as stderr_url in '
+                           'case of processing with export'
+        },
         'return_code': {
             'type': 'number',
             'format': 'int32',
@@ -125,6 +148,13 @@ class ProcessLogModel(Schema):
             'type': 'number',
             'format': 'float',
             'description': 'The size of the mapset in bytes'
+        },
+        'overhead_time': {
+            'type': 'number',
+            'format': 'float',
+            'description': 'The time in seconds that was required in addition '
+                           'to the runtime of the executable, to start it, '
+                           'to detect its exit and to read its output'
         }
     }
     required = ['executable', 'parameter', 'stdout', 'stderr', 'return_code']
@@ -472,6 +502,11 @@ class ProcessingResponseListModel(Schema):
             'type': 'array',
             'items': ProcessingResponseModel,
             'description': 'A list of ProcessingResponseModel objects'
+        },
+        'next_cursor': {
+            'type': 'string',
+            'description': 'The cursor to request the next page of the list, '
+                           'it is only set if the list was limited by num'
         }
     }
     required = ["resource_list"]
@@ -1306,6 +1341,11 @@ class UserInfoResponseModel(Schema):
                     'type': 'string',
                     'description': 'The time a process must not exceed'
                 },
+                'process_parallel_limit': {
+                    'type': 'string',
+                    'description': 'The maximum number of independent processes '
+                                   'of one process chain that run concurrently'
+                },
                 'accessible_datasets': {
                     'type': 'object',
                     'properties': {},
@@ -1356,7 +1396,8 @@ class UserInfoResponseModel(Schema):
             ],
             "cell_limit": 100000000000,
             "process_num_limit": 1000,
-            "process_time_limit": 31536000
+            "process_time_limit": 31536000,
+            "process_parallel_limit": 4
         },
         "Status": "success",
         "User group": "superadmin",
@@ -140,8 +140,8 @@ class DownloadCacheSize(EphemeralProcessing):
                                       executable=executable,
                                       id="compute_download_cache_size",
                                       executable_params=args))
-            print("Disk usage ", self.module_output_log[0]["stdout"])
-            dc_size = int(self.module_output_log[0]["stdout"].split("\t")[0])
+            print("Disk usage ", self._get_module_stdout(0))
+            dc_size = int(self._get_module_stdout(0).split("\t")[0])
             quota_size = int(self.config.DOWNLOAD_CACHE_QUOTA * 1024 * 1024 * 1024)
 
             model = StorageModel(
@@ -25,6 +25,7 @@
 Base class for asynchronous processing
 """
 
+import copy
 import math
 import os
 import pickle
@@ -32,21 +33,29 @@ import requests
 import shutil
 import subprocess
 import sys
-import tempfile
+import threading
 import time
 import traceback
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from flask import jsonify, make_response, json
 from requests.auth import HTTPBasicAuth
 
 from actinia_core.core.common.process_object import Process
-from actinia_core.core.grass_init import GrassInitializer
+from actinia_core.core.common.process_wait import ProcessExitWaiter
+from actinia_core.core.grass_init import GrassInitializer, GrassInitError, \
+    GrassMapsetBootstrapper
 from actinia_core.core.messages_logger import MessageLogger
+from actinia_core.core.process_output import OutputCapture
+from actinia_core.core.stdout_parser import parse_stdout
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.redis_lock import RedisLockingInterface
 from actinia_core.core.resources_logger import ResourceLogger
+from actinia_core.core.resource_status_publisher import ResourceStatusPublisher
 from actinia_core.core.common.process_chain import ProcessChainConverter
+from actinia_core.core.common.process_graph import ProcessGraph
+from actinia_core.core.common.worker_pool import get_worker_state
 from actinia_core.core.common.exceptions \
     import AsyncProcessError, AsyncProcessTermination, RsyncError
 from actinia_core.core.common.exceptions import AsyncProcessTimeLimit
@@ -54,7 +63,10 @@ from actinia_core.models.response_models \
     import ProcessingResponseModel, ExceptionTracebackModel
 from actinia_core.models.response_models \
     import create_response_from_model, ProcessLogModel, ProgressInfoModel
-from actinia_core.core.interim_results import InterimResult, get_directory_size
+from actinia_core.core.interim_results import InterimResult
+from actinia_core.core.directory_size import DirectorySizeTracker
+from actinia_core.core.temp_database_cache import TempDatabaseSkeleton
+from actinia_core.core.temp_database_cache import skeleton_cache
 from actinia_core.rest.user_auth import check_location_mapset_module_access
 from actinia_core.rest.resource_base import ResourceBase
 
@@ -289,6 +301,9 @@ class EphemeralProcessing(object):
         self.temp_grass_data_base_name = "gisdbase_" + self.unique_id
         self.temp_mapset_name = "mapset_" + self.unique_id
         self.temp_mapset_path = None
+        # The skeleton of the temporary database, that is used to create the
+        # temporary mapset without GRASS GIS modules
+        self.temp_database_skeleton = None
 
         self.ginit = None
 
@@ -310,6 +325,8 @@ class EphemeralProcessing(object):
         self.cell_limit = 0
         self.process_time_limit = 0
         self.process_num_limit = 0
+        # The maximum number of independent processes that run concurrently
+        self.process_parallel_limit = 1
         # Set this True so that regions are not checked before processing
         self.skip_region_check = False
 
@@ -318,6 +335,19 @@ class EphemeralProcessing(object):
         # The stdout, stderr and parameter log of the module chains
         # using a dict with the process id as key
         self.module_output_dict = dict()
+        # The stdout and stderr captures of the module output log, that
+        # provide the full output of truncated logs
+        self.module_output_captures = list()
+        # The stdout captures using a dict with the process id as key
+        self.module_output_capture_dict = dict()
+        # The number of bytes of the beginning and the end of stdout and
+        # stderr that are stored in the module output log
+        self.process_log_head_size = self.config.PROCESS_LOG_HEAD_SIZE
+        self.process_log_tail_size = self.config.PROCESS_LOG_TAIL_SIZE
+        # The time in seconds to wait for the output of a finished process
+        self.process_output_timeout = 60
+        # The counter to generate unique output file names
+        self.process_output_count = 0
         # The list of output parser definitions that must be applied
         # after the module run. The parser result will be stored in
         # the module_result dictionary using the parser id
@@ -379,31 +409,55 @@ class EphemeralProcessing(object):
         self.webhook_update = None
         # The authentication for the webhook (base 64 decoded "username:password")
         self.webhook_auth = None
+        # The background publisher of the status updates, created in the setup
+        self.status_publisher = None
+        # The listener that receives termination requests, created in the setup
+        self.termination_listener = None
+        # The mapset size is logged after each module, if tracking is enabled
+        self.mapset_size_tracking = self.config.MAPSET_SIZE_TRACKING != "off"
+        self.mapset_size_tracker = None
+        # Protects the progress and the mapset size tracker, if processes
+        # run concurrently
+        self.process_lock = threading.Lock()
+        # The child processes that are currently running
+        self.running_processes = set()
+        # True if the running processes were killed after a failure
+        self.processes_killed = False
 
     def _send_resource_update(self, message, results=None):
         """Create an HTTP response document and send it to the status database
 
+        The document is created by the status publisher only if it is not
+        replaced by a newer update before it is committed.
+
         Args:
             message (str): The message
             results (dict): Results of the processing using the process chain
                             id for identification
 
         """
-        data = create_response_from_model(self.response_model_class,
-                                          status="running",
-                                          user_id=self.user_id,
-                                          resource_id=self.resource_id,
-                                          iteration=self.iteration,
-                                          # process_log=self.module_output_log,
-                                          progress=self.progress,
-                                          results=results,
-                                          message=message,
-                                          orig_time=self.orig_time,
-                                          orig_datetime=self.orig_datetime,
-                                          http_code=200,
-                                          status_url=self.status_url,
-                                          api_info=self.api_info)
-        self._send_to_database(document=data, final=False)
+        # The progress is changed by the processing while the update waits
+        progress = copy.deepcopy(self.progress)
+
+        def create_document():
+            return create_response_from_model(self.response_model_class,
+                                              status="running",
+                                              user_id=self.user_id,
+                                              resource_id=self.resource_id,
+                                              iteration=self.iteration,
+                                              # process_log=self.module_output_log,
+                                              progress=progress,
+                                              results=results,
+                                              message=message,
+                                              orig_time=self.orig_time,
+                                              orig_datetime=self.orig_datetime,
+                                              http_code=200,
+                                              status_url=self.status_url,
+                                              api_info=self.api_info)
+        if self.status_publisher is None:
+            self._send_to_database(document=create_document(), final=False)
+        else:
+            self.status_publisher.publish(create_document, final=False)
 
     def _send_resource_finished(self, message, results=None):
         """Create an HTTP response document and send it to the status database
@@ -520,23 +574,47 @@ class EphemeralProcessing(object):
         If a webhook URL is provided, the JSON response will be send to the
         provided endpoint using a POST request.
 
+        If the status publisher was created in the setup, intermediate
+        documents are committed in the background and may be replaced by
+        newer documents. Final documents are committed immediately.
+
         Args:
             document (str): The response document
             final (bool): Set True if this was the final resource commit
                           (no update) to activate the webhook call
 
         """
+        if self.status_publisher is not None:
+            self.status_publisher.publish(document, final=final)
+            return
+
+        self._commit_to_database(document)
+        # Call the webhook after the final result was send to the database
+        self._send_to_webhook(document, 'finished' if final is True else 'update')
 
+    def _commit_to_database(self, document):
+        """Commit the document to the resource database
+
+        Args:
+            document (str): The response document
+        """
         self.resource_logger.commit(
             user_id=self.user_id, resource_id=self.resource_id,
             iteration=self.iteration, document=document,
             expiration=self.config.REDIS_RESOURCE_EXPIRE_TIME)
 
-        # Call the webhook after the final result was send to the database
+    def _send_to_webhook(self, document, type):
+        """Send the document to the finished or update webhook, if the
+        webhook URL was provided. Errors are logged.
+
+        Args:
+            document (str): The response document
+            type (str): The webhook type: 'finished' or 'update'
+        """
         try:
-            if final is True and self.webhook_finished is not None:
+            if type == 'finished' and self.webhook_finished is not None:
                 self._post_to_webhook(document, 'finished')
-            elif final is False and self.webhook_update is not None:
+            elif type == 'update' and self.webhook_update is not None:
                 self._post_to_webhook(document, 'update')
         except Exception as e:
             e_type, e_value, e_tb = sys.exc_info()
@@ -590,14 +668,14 @@ class EphemeralProcessing(object):
 
         for iter in range(1, self.rdc.iteration):
             if iter == 1:
-                old_response_data = self.resource_logger.get(
+                old_response_data = self.resource_logger.get_document(
                     self.user_id, self.resource_id)
             else:
-                old_response_data = self.resource_logger.get(
+                old_response_data = self.resource_logger.get_document(
                     self.user_id, self.resource_id, iter)
             if old_response_data is None:
                 return None
-            _, response_model = pickle.loads(old_response_data)
+            _, response_model = old_response_data
             for element in response_model['process_log']:
                 self.module_output_dict[element['id']] = element
 
@@ -663,6 +741,8 @@ class EphemeralProcessing(object):
         if (hasattr(self.proc_chain_converter, 'webhook_auth')
                 and self.proc_chain_converter.webhook_auth is not None):
             self.webhook_auth = self.proc_chain_converter.webhook_auth
+        if getattr(self.proc_chain_converter, 'mapset_size_tracking', True) is False:
+            self.mapset_size_tracking = False
 
         # Check for empty process chain
         if len(process_list) == 0 and len(self.resource_export_list) == 0:
@@ -742,29 +822,47 @@ class EphemeralProcessing(object):
         else:
             self.setup_flag = True
 
-        # fluent sender for this subprocess
+        # fluent sender for this subprocess, the fluent sender and the redis
+        # connections are reused by the following jobs of a pool worker
         fluent_sender = None
         if self.has_fluent is True:
             from fluent import sender
-            fluent_sender = sender.FluentSender('actinia_core_logger',
-                                                host=self.config.LOG_FLUENT_HOST,
-                                                port=self.config.LOG_FLUENT_PORT)
+            fluent_sender = get_worker_state(
+                ("fluent_sender", self.config.LOG_FLUENT_HOST,
+                 self.config.LOG_FLUENT_PORT),
+                lambda: sender.FluentSender('actinia_core_logger',
+                                            host=self.config.LOG_FLUENT_HOST,
+                                            port=self.config.LOG_FLUENT_PORT))
         kwargs = dict()
         kwargs['host'] = self.config.REDIS_SERVER_URL
         kwargs['port'] = self.config.REDIS_SERVER_PORT
         if self.config.REDIS_SERVER_PW and self.config.REDIS_SERVER_PW is not None:
             kwargs['password'] = self.config.REDIS_SERVER_PW
-        self.resource_logger = ResourceLogger(**kwargs,
-                                              fluent_sender=fluent_sender)
+        redis_key = tuple(sorted(kwargs.items()))
+        self.resource_logger = get_worker_state(
+            ("resource_logger",) + redis_key,
+            lambda: ResourceLogger(**kwargs, fluent_sender=fluent_sender))
+        self.status_publisher = ResourceStatusPublisher(
+            commit_func=self._commit_to_database,
+            webhook_func=self._send_to_webhook,
+            max_rate=self.config.REDIS_RESOURCE_UPDATE_MAX_RATE,
+            name=str(self.resource_id))
+        if self.config.REDIS_RESOURCE_NOTIFICATIONS is True:
+            self.termination_listener = \
+                self.resource_logger.create_termination_listener(
+                    self.user_id, self.resource_id, self.iteration)
 
         self.message_logger = MessageLogger(
             config=self.config, user_id=self.user_id, fluent_sender=fluent_sender)
 
-        self.lock_interface = RedisLockingInterface()
-        self.lock_interface.connect(**kwargs)
-        del kwargs
+        self.lock_interface = get_worker_state(
+            ("lock_interface",) + redis_key,
+            lambda: self._create_lock_interface(kwargs))
         self.process_time_limit = int(
             self.user_credentials["permissions"]["process_time_limit"])
+        self.process_parallel_limit = int(
+            self.user_credentials["permissions"].get(
+                "process_parallel_limit", self.config.PROCESS_PARALLEL_LIMIT))
 
         # Check and create all required paths to global, user and temporary locations
         if init_grass is True:
@@ -781,6 +879,12 @@ class EphemeralProcessing(object):
             message_logger=self.message_logger,
             send_resource_update=self._send_resource_update)
 
+    @staticmethod
+    def _create_lock_interface(kwargs):
+        lock_interface = RedisLockingInterface()
+        lock_interface.connect(**kwargs)
+        return lock_interface
+
     def _setup_paths(self):
         """Helper method to setup the pathes
         """
@@ -856,46 +960,74 @@ class EphemeralProcessing(object):
             mapsets = []
 
         try:
-            # Create the temporary location directory
-            os.mkdir(self.temp_location_path)
-
             # Always link the PERMANENT mapset
             if len(mapsets) > 0 and "PERMANENT" not in mapsets:
                 mapsets.append("PERMANENT")
 
-            mapsets_to_link = []
-            check_all_mapsets = False
-            if not mapsets:
-                check_all_mapsets = True
+            # The mapsets to link are determined once for each location, user
+            # group, set of mapsets and user permissions, the skeleton is
+            # reused until a mapset is created or deleted
+            location_paths = [self.global_location_path, self.user_location_path]
+            if self.config.TEMP_DATABASE_SKELETONS is True:
+                key = skeleton_cache.create_key(location_paths, mapsets,
+                                                self.user_credentials)
+                skeleton = skeleton_cache.get(
+                    key, lambda: TempDatabaseSkeleton(
+                        self._list_mapsets_to_link(mapsets), location_paths))
+            else:
+                skeleton = TempDatabaseSkeleton(
+                    self._list_mapsets_to_link(mapsets), location_paths)
+
+            # Create the temporary location directory and link the original
+            # mapsets from global and user database into it
+            skeleton.link_mapsets(self.temp_location_path)
+            self.temp_database_skeleton = skeleton
+
+        except Exception as e:
+            raise AsyncProcessError("Unable to create a temporary GIS database"
+                                    ", Exception: %s" % str(e))
 
-            # User and global location mapset linking
-            self._link_mapsets(mapsets, mapsets_to_link, check_all_mapsets)
+    def _list_mapsets_to_link(self, mapsets):
+        """List the mapsets of the global and user group location that are
+        linked into the temporary location
 
-            # Check if we missed some of the required mapsets
-            if check_all_mapsets is False:
-                mapset_list = []
-                for mapset_path, mapset in mapsets_to_link:
-                    mapset_list.append(mapset)
+        Args:
+            mapsets (list): A list of mapset names that should be linked into
+                            the temporary location. If the list is empty, all
+                            available user accessible mapsets of the global
+                            and user group specific location will be linked.
 
-                for mapset in mapsets:
-                    if mapset not in mapset_list:
-                        raise AsyncProcessError(
-                            "Unable to link all required mapsets into temporary "
-                            "location. Missing or un-accessible mapset "
-                            "<%s> in location <%s>"
-                            % (mapset, self.location_name))
+        Raises:
+            This function raises AsyncProcessError if a required mapset is
+            missing or can not be accessed.
 
-            # Link the original mapsets from global and user database into the
-            # temporary location
+        Returns:
+            list:
+            The (mapset_path, mapset) tuples of the mapsets to link
+        """
+        mapsets_to_link = []
+        check_all_mapsets = False
+        if not mapsets:
+            check_all_mapsets = True
+
+        # User and global location mapset linking, the list of mapsets
+        # must not be modified
+        self._link_mapsets(list(mapsets), mapsets_to_link, check_all_mapsets)
+
+        # Check if we missed some of the required mapsets
+        if check_all_mapsets is False:
+            mapset_list = []
             for mapset_path, mapset in mapsets_to_link:
-                if os.path.isdir(
-                        os.path.join(self.temp_location_path, mapset)) is False:
-                    os.symlink(mapset_path, os.path.join(
-                        self.temp_location_path, mapset))
+                mapset_list.append(mapset)
 
-        except Exception as e:
-            raise AsyncProcessError("Unable to create a temporary GIS database"
-                                    ", Exception: %s" % str(e))
+            for mapset in mapsets:
+                if mapset not in mapset_list:
+                    raise AsyncProcessError(
+                        "Unable to link all required mapsets into temporary "
+                        "location. Missing or un-accessible mapset "
+                        "<%s> in location <%s>"
+                        % (mapset, self.location_name))
+        return mapsets_to_link
 
     def _link_mapsets(self, mapsets, mapsets_to_link, check_all_mapsets):
         """Helper method to link locations mapsets
@@ -1064,6 +1196,65 @@ class EphemeralProcessing(object):
                     "Error while rsyncing of interim temporary file path to new "
                     "temporare file path")
 
+        if self.ginit.grass_data_base == self.temp_grass_data_base:
+            try:
+                self._bootstrap_temporary_mapset(temp_mapset_name)
+            except GrassInitError as e:
+                self.message_logger.info(
+                    "Unable to create the temporary mapset natively, using the "
+                    "GRASS GIS modules: %s" % str(e))
+                self._create_temporary_mapset_with_modules(temp_mapset_name)
+        else:
+            self._create_temporary_mapset_with_modules(temp_mapset_name)
+
+        # self.ginit.run_module("g.gisenv", ["set=DEBUG=2",])
+
+        # If a source mapset is provided, the WIND file will be copied from it to the
+        # temporary mapset
+        if source_mapset_name is not None and interim_result_mapset is None:
+            source_mapset_path = os.path.join(
+                self.temp_location_path, source_mapset_name)
+            if os.path.exists(os.path.join(source_mapset_path, "WIND")):
+                shutil.copyfile(os.path.join(source_mapset_path, "WIND"),
+                                os.path.join(self.temp_mapset_path, "WIND"))
+
+    def _bootstrap_temporary_mapset(self, temp_mapset_name):
+        """Create the temporary mapset, set the mapset search path and the
+        vector database connection without GRASS GIS modules and switch into it
+
+        An existing mapset, like a mapset with interim results, is not
+        modified except for the mapset search path and the database connection.
+
+        Args:
+            temp_mapset_name (str): The name of the temporary mapset to be created
+
+        Raises:
+            GrassInitError if the mapset can not be created
+        """
+        default_region = None
+        if self.temp_database_skeleton is not None:
+            default_region = self.temp_database_skeleton.default_region
+
+        bootstrapper = GrassMapsetBootstrapper(
+            self.temp_grass_data_base, self.location_name, temp_mapset_name)
+        bootstrapper.create_mapset(default_region=default_region)
+        if self.required_mapsets:
+            bootstrapper.add_to_search_path(self.required_mapsets)
+        bootstrapper.set_db_connection(
+            "sqlite", "$GISDBASE/$LOCATION_NAME/$MAPSET/vector/$MAP/sqlite.db")
+        self.ginit.switch_mapset(temp_mapset_name)
+
+        if self.required_mapsets:
+            self.message_logger.info("Added the following mapsets to the mapset "
+                                     "search path: " + ",".join(self.required_mapsets))
+
+    def _create_temporary_mapset_with_modules(self, temp_mapset_name):
+        """Create the temporary mapset with g.mapset, set the mapset search path
+        and the vector database connection and switch into it
+
+        Args:
+            temp_mapset_name (str): The name of the temporary mapset to be created
+        """
         self.ginit.run_module("g.mapset", ["-c", "mapset=%s" % temp_mapset_name])
 
         if self.required_mapsets:
@@ -1079,17 +1270,6 @@ class EphemeralProcessing(object):
             "driver=sqlite",
             "database=$GISDBASE/$LOCATION_NAME/$MAPSET/vector/$MAP/sqlite.db"])
 
-        # self.ginit.run_module("g.gisenv", ["set=DEBUG=2",])
-
-        # If a source mapset is provided, the WIND file will be copied from it to the
-        # temporary mapset
-        if source_mapset_name is not None and interim_result_mapset is None:
-            source_mapset_path = os.path.join(
-                self.temp_location_path, source_mapset_name)
-            if os.path.exists(os.path.join(source_mapset_path, "WIND")):
-                shutil.copyfile(os.path.join(source_mapset_path, "WIND"),
-                                os.path.join(self.temp_mapset_path, "WIND"))
-
     def _cleanup(self):
         """Clean up the GrassInitializer files created in
         self._setup() and remove the created temporary database.
@@ -1171,8 +1351,9 @@ class EphemeralProcessing(object):
         Args:
             num (int): The number for which the progress should be increased
         """
-        self.progress_steps += num
-        self.progress["step"] = self.progress_steps
+        with self.process_lock:
+            self.progress_steps += num
+            self.progress["step"] = self.progress_steps
 
     def _add_actinia_process(self, process: Process):
         """Add an actinia process to the list and dictionary
@@ -1192,6 +1373,21 @@ class EphemeralProcessing(object):
         self.number_of_processes += num
         self.progress["num_of_steps"] = self.number_of_processes
 
+    def _is_terminated(self):
+        """Check if the resource should be terminated
+
+        The termination listener is checked if it was created in the setup,
+        otherwise the termination entry is read from the resource database.
+
+        Returns:
+            bool:
+            True if the resource should be terminated, False otherwise
+        """
+        if self.termination_listener is not None:
+            return self.termination_listener.is_terminated()
+        return self.resource_logger.get_termination(
+            self.user_id, self.resource_id, self.iteration) is True
+
     def _wait_for_process(self, module_name, module_parameter, proc, poll_time):
         """Wait for a specific process. Catch termination requests, process time limits
         and send updates to the user.
@@ -1210,49 +1406,78 @@ class EphemeralProcessing(object):
 
         start_time = time.time()
 
-        termination_check_count = 0
-        update_check_count = 0
+        # The termination listener kills the process as soon as a termination
+        # request arrives
+        if self.termination_listener is not None:
+            self.termination_listener.add_process(proc)
+        with self.process_lock:
+            self.running_processes.add(proc)
+            if self.processes_killed is True:
+                # A concurrently running process failed while this process
+                # was started
+                proc.kill()
+        try:
+            with ProcessExitWaiter(proc) as waiter:
+                self._block_for_process(module_name, module_parameter, proc,
+                                        waiter, poll_time, start_time)
+        finally:
+            with self.process_lock:
+                self.running_processes.discard(proc)
+            if self.termination_listener is not None:
+                self.termination_listener.remove_process(proc)
+
+        if self.termination_listener is not None and self._is_terminated():
+            raise AsyncProcessTermination("Process <%s> was terminated "
+                                          "by user request" % module_name)
+
+        return time.time() - start_time
+
+    def _block_for_process(self, module_name, module_parameter, proc, waiter,
+                           poll_time, start_time):
+        """Block until a process finished, see _wait_for_process()
+
+        The wait is interrupted to check for termination every 10 poll times,
+        if no termination listener is available, to send a status update
+        every 100 poll times and when the process time limit is reached.
+        """
+        update_interval = 100 * poll_time
+        termination_interval = 10 * poll_time
+        next_update = start_time + update_interval
+        time_limit = start_time + self.process_time_limit
         while True:
-            if proc.poll() is not None:
+            curr_time = time.time()
+            timeout = min(next_update, time_limit) - curr_time
+            if self.termination_listener is None:
+                timeout = min(timeout, termination_interval)
+            if waiter.wait(timeout) is True:
                 break
-            else:
-                # Sleep some time and update the resource status
-                time.sleep(poll_time)
-                termination_check_count += 1
-                update_check_count += 1
-
-                # Check all 10 loops for termination
-                if termination_check_count == 10:
-                    termination_check_count = 0
-                    # check if the resource should be terminated
-                    # and kill the current process
-                    if self.resource_logger.get_termination(
-                            self.user_id, self.resource_id, self.iteration) is True:
-                        proc.kill()
-                        raise AsyncProcessTermination("Process <%s> was terminated "
-                                                      "by user request" % module_name)
-
-                # Send all 100 loops a status update
-                if update_check_count == 100:
-                    update_check_count = 0
-                    # Check max runtime of process
-                    curr_time = time.time()
-                    if (curr_time - start_time) > self.process_time_limit:
-                        proc.kill()
-                        raise AsyncProcessTimeLimit(
-                            "Time (%i seconds) exceeded to run executable %s"
-                            % (self.process_time_limit, module_name))
-                    # Reduce the length of the command line parameters for lesser
-                    # logging overhead
-                    mparams = str(module_parameter)
-                    if len(mparams) > 100:
-                        mparams = "%s ... %s" % (mparams[0:50], mparams[-50:])
-                    message = (
-                        "Running executable %s with parameters %s for %g seconds"
-                        % (module_name, mparams, curr_time - start_time))
-                    self._send_resource_update(message)
 
-        return time.time() - start_time
+            # check if the resource should be terminated
+            # and kill the current process
+            if self.termination_listener is None and self._is_terminated():
+                proc.kill()
+                raise AsyncProcessTermination("Process <%s> was terminated "
+                                              "by user request" % module_name)
+
+            curr_time = time.time()
+            # Check max runtime of process
+            if curr_time >= time_limit:
+                proc.kill()
+                raise AsyncProcessTimeLimit(
+                    "Time (%i seconds) exceeded to run executable %s"
+                    % (self.process_time_limit, module_name))
+
+            if curr_time >= next_update:
+                next_update = curr_time + update_interval
+                # Reduce the length of the command line parameters for lesser
+                # logging overhead
+                mparams = str(module_parameter)
+                if len(mparams) > 100:
+                    mparams = "%s ... %s" % (mparams[0:50], mparams[-50:])
+                message = (
+                    "Running executable %s with parameters %s for %g seconds"
+                    % (module_name, mparams, curr_time - start_time))
+                self._send_resource_update(message)
 
     def _run_process(self, process, poll_time=0.05):
         """Run a process actinia_core.core.common.process_object.Process) with options and send
@@ -1281,8 +1506,7 @@ class EphemeralProcessing(object):
             (returncode, stdout_buff, stderr_buff)
 
         """
-        if self.resource_logger.get_termination(
-                self.user_id, self.resource_id, self.iteration) is True:
+        if self._is_terminated():
             raise AsyncProcessTermination("Process <%s> was terminated by "
                                           "user request" % process.executable)
 
@@ -1326,15 +1550,34 @@ class EphemeralProcessing(object):
             tuple:
             (returncode, stdout_buff, stderr_buff)
 
+        """
+        self._prepare_module_run(process)
+        return self._run_executable(process, poll_time)
+
+    def _prepare_module_run(self, process):
+        """Check the termination and the region before a GRASS module is run,
+        see _run_module()
+
+        Args:
+            process actinia_core.core.common.process_object.Process):
+                The process object that should be executed
+
+        Raises:
+            AsyncProcessError:
+            AsyncProcessTermination:
+
         """
         # Count the processes
         self.process_count += 1
-        # Check for each 20. process if a kill request was received
+        # The termination listener is checked before each process, without
+        # listener the database is checked for each 20. process.
         # This is required in case a single of many fast running processes in a chain
         # is not able to trigger the termination check in the while loop
+        if self.termination_listener is not None and self._is_terminated():
+            raise AsyncProcessTermination("Process <%s> was terminated "
+                                          "by user request" % process.executable)
         if self.process_count % 20 == 0:
-            if self.resource_logger.get_termination(
-                    self.user_id, self.resource_id, self.iteration) is True:
+            if self.termination_listener is None and self._is_terminated():
                 raise AsyncProcessTermination("Process <%s> was terminated "
                                               "by user request" % process.executable)
 
@@ -1351,14 +1594,14 @@ class EphemeralProcessing(object):
         # Save the last module name. This is needed to check the region settings
         self.last_module = process.executable
 
-        return self._run_executable(process, poll_time)
-
-    def _run_executable(self, process, poll_time=0.005):
+    def _run_executable(self, process, poll_time=0.005, env=None):
         """Runs a GRASS module or aactinia_core.core.Unix executable and sets up
         the correct handling of stdout, stderr and stdin, creates the
         process log model and returns stdout, stderr and the return code.
 
-        It creates the temporary file paths.
+        The output is read from pipes by reader threads. Outputs that exceed
+        the log size are spilled to files in the temporary file path, the
+        process log contains only their head and tail.
 
         The returncode of 0 indicates that it ran successfully. A negative value -N
         indicates that the child was terminated by signal N (POSIX only; see also
@@ -1369,6 +1612,8 @@ class EphemeralProcessing(object):
                 The process object that should be executed
             poll_time (float): The time to check the process status and to send
                                updates to the resource db
+            env (dict): The environment of the process, default the environment
+                        of the current process
 
         Raises:
             AsyncProcessError:
@@ -1377,15 +1622,16 @@ class EphemeralProcessing(object):
 
         Returns:
             tuple:
-            (returncode, stdout_buff, stderr_buff)
+            (returncode, stdout_log, stderr_log)
 
         """
+        # The time actinia needs in addition to the run time of the executable
+        # is logged as overhead time
+        executable_start_time = time.time()
 
-        # Use temporary files to catch stdout and stderr
-        stdout_buff = tempfile.NamedTemporaryFile(
-            mode="w+b", delete=True, dir=self.temp_file_path)
-        stderr_buff = tempfile.NamedTemporaryFile(
-            mode="w+b", delete=True, dir=self.temp_file_path)
+        # Read stdout and stderr from pipes, large outputs are spilled to files
+        stdout_capture = self._create_output_capture(process, "stdout")
+        stderr_capture = self._create_output_capture(process, "stderr")
         stdin_file = None
 
         if process.stdin_source is not None:
@@ -1403,18 +1649,22 @@ class EphemeralProcessing(object):
         if process.exec_type in "grass":
             proc = self.ginit.run_module(process.executable,
                                          process.executable_params, raw=True,
-                                         stdout=stdout_buff,
-                                         stderr=stderr_buff,
-                                         stdin=stdin_file)
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE,
+                                         stdin=stdin_file,
+                                         env=env)
         else:
             inputlist = list()
             inputlist.append(process.executable)
             inputlist.extend(process.executable_params)
 
             proc = subprocess.Popen(args=inputlist,
-                                    stdout=stdout_buff,
-                                    stderr=stderr_buff,
-                                    stdin=stdin_file)
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    stdin=stdin_file,
+                                    env=env)
+        stdout_capture.start(proc.stdout)
+        stderr_capture.start(proc.stderr)
 
         run_time = self._wait_for_process(process.executable,
                                           process.executable_params,
@@ -1422,18 +1672,19 @@ class EphemeralProcessing(object):
 
         proc.wait()
 
-        stdout_buff.flush()
-        stderr_buff.flush()
-        stdout_buff.seek(0)
-        stderr_buff.seek(0)
-        stdout_string = stdout_buff.read().decode()
-        stderr_string = stderr_buff.read().decode()
-        stdout_buff.close()
-        stderr_buff.close()
+        for capture in (stdout_capture, stderr_capture):
+            # Child processes of the executable may keep the pipes open
+            if capture.join(timeout=self.process_output_timeout) is False:
+                self.message_logger.warning(
+                    "Output of executable <%s> was not closed after %i seconds"
+                    % (process.executable, self.process_output_timeout))
         if stdin_file:
             stdin_file.close()
 
-        process.set_stdouts(stdout=stdout_string, stderr=stderr_string)
+        stdout_string = stdout_capture.get_log()
+        stderr_string = stderr_capture.get_log()
+
+        process.set_stdouts(stdout=stdout_capture, stderr=stderr_capture)
 
         kwargs = {
             'id': process.id,
@@ -1443,15 +1694,24 @@ class EphemeralProcessing(object):
             'stdout': stdout_string,
             'stderr': stderr_string.split("\n"),
             'run_time': run_time}
-        if self.temp_mapset_path:
-            kwargs['mapset_size'] = get_directory_size(self.temp_mapset_path)
+        for stream, capture in (("stdout", stdout_capture),
+                                ("stderr", stderr_capture)):
+            if capture.truncated is True:
+                kwargs['%s_truncated' % stream] = True
+        if self.temp_mapset_path and self.mapset_size_tracking is True:
+            with self.process_lock:
+                kwargs['mapset_size'] = self._get_mapset_size()
+        kwargs['overhead_time'] = time.time() - executable_start_time - run_time
 
         plm = ProcessLogModel(**kwargs)
 
-        self.module_output_log.append(plm)
+        with self.process_lock:
+            self.module_output_log.append(plm)
+            self.module_output_captures.append((stdout_capture, stderr_capture))
         # Store the log in an additional dictionary for automated output generation
         if process.id is not None:
             self.module_output_dict[process.id] = plm
+            self.module_output_capture_dict[process.id] = stdout_capture
 
         if proc.returncode != 0:
             raise AsyncProcessError(
@@ -1469,6 +1729,67 @@ class EphemeralProcessing(object):
 
         return proc.returncode, stdout_string, stderr_string
 
+    def _create_output_capture(self, process, stream):
+        """Create the capture of the stdout or stderr output of a process
+
+        Args:
+            process: The process object that should be executed
+            stream (str): "stdout" or "stderr"
+
+        Returns:
+            OutputCapture:
+            The capture that spills large outputs into the temporary file path
+        """
+        with self.process_lock:
+            self.process_output_count += 1
+            count = self.process_output_count
+        name = process.id if process.id is not None else process.executable
+        name = "".join(char if char.isalnum() or char in "._-" else "_"
+                       for char in os.path.basename(str(name)))
+        spill_path = os.path.join(self.temp_file_path,
+                                  "%s_%i_%s.txt" % (name, count, stream))
+        return OutputCapture(spill_path, head_size=self.process_log_head_size,
+                             tail_size=self.process_log_tail_size)
+
+    def _get_module_stdout(self, index):
+        """Return the full stdout output of a process of the module output log
+
+        The stdout in the module output log is truncated, if it exceeds the
+        log size.
+
+        Args:
+            index (int): The index of the process in the module output log
+
+        Returns:
+            str:
+            The stdout output
+        """
+        return self.module_output_captures[index][0].read()
+
+    def _get_mapset_size(self):
+        """Return the size of the temporary mapset in bytes
+
+        The size tracker is created for the current temporary mapset on
+        demand and reads only the changes since the last call if inotify is
+        available.
+
+        Returns:
+            int:
+            The size of the temporary mapset
+        """
+        if (self.mapset_size_tracker is None
+                or self.mapset_size_tracker.path != self.temp_mapset_path):
+            self._close_mapset_size_tracker()
+            self.mapset_size_tracker = DirectorySizeTracker(
+                self.temp_mapset_path,
+                use_inotify=self.config.MAPSET_SIZE_TRACKING == "inotify")
+        return self.mapset_size_tracker.get_size()
+
+    def _close_mapset_size_tracker(self):
+        if self.mapset_size_tracker is not None:
+            self.mapset_size_tracker.close()
+            self.mapset_size_tracker = None
+
     def _create_temporary_grass_environment(self, source_mapset_name=None,
                                             interim_result_mapset=None,
                                             interim_result_file_path=None):
@@ -1640,61 +1961,27 @@ class EphemeralProcessing(object):
         This functions analyzes the output_parser_list for entries to parse.
         It will convert the stdout strings into tables, lists or key/value outputs
         and stores the result in the module_result dictionary using the provided
-        id of the StdoutParser.
+        id of the StdoutParser. The output is parsed row by row from the
+        output capture, tables and lists are parsed into typed columns if
+        the parser is columnar.
 
         """
 
         for entry in self.output_parser_list:
             for process_id, stdout_def in entry.items():
                 id = stdout_def["id"]
-                format = stdout_def["format"]
-                delimiter = stdout_def["delimiter"]
                 if process_id not in self.module_output_dict:
                     raise AsyncProcessError(
                         "Unable to find process id in module output dictionary")
-                stdout = self.module_output_dict[process_id]["stdout"]
-                # Split the rows by the \n new line delimiter
-                rows = stdout.strip().split("\n")
-                if "table" in format:
-                    result = []
-                    for row in rows:
-                        row = row.strip()
-                        values = row.split(delimiter)
-                        value_list = []
-                        for value in values:
-                            value_list.append(value.strip())
-                        result.append(value_list)
-                elif "list" in format:
-                    result = []
-                    for row in rows:
-                        value = row.strip()
-                        result.append(value)
-                elif "kv" in format:
-                    result = dict()
-                    for row in rows:
-                        row = row.strip()
-                        key, value = row.split(delimiter, 1)
-                        result[key.strip()] = value.strip()
-                elif "json" in format:
-                    result = None
-                    try:
-                        result = {i[0]: i[1] for i in [
-                            entry.split(delimiter, 1) for entry in
-                            stdout.strip('\n').split('\n')]
-                        }
-                    except Exception:
-                        try:
-                            result = json.loads(stdout)
-                        except Exception:
-                            pass
-                    finally:
-                        if not result:
-                            result = stdout
+                if process_id in self.module_output_capture_dict:
+                    stdout = self.module_output_capture_dict[process_id]
                 else:
-                    raise AsyncProcessError("Wrong stdout parser format")
+                    stdout = self.module_output_dict[process_id]["stdout"]
 
                 # Store the parser result
-                self.module_results[id] = result
+                self.module_results[id] = parse_stdout(
+                    stdout, stdout_def["format"], stdout_def["delimiter"],
+                    columnar=stdout_def.get("columnar", False) is True)
 
     def _execute_process_list(self, process_list):
         """Run all modules or executables that are specified in the process list
@@ -1709,13 +1996,202 @@ class EphemeralProcessing(object):
             or AsyncProcessTermination
 
         """
+        self.processes_killed = False
+        if (self.process_parallel_limit > 1 and len(process_list) > 1
+                and self.interim_result.saving_interim_results is False):
+            graph = ProcessGraph(process_list)
+            if graph.is_sequential() is False:
+                self._execute_process_graph(graph)
+                return
+
         for process in process_list:
-            if process.exec_type == "grass":
-                self._run_module(process)
-            elif process.exec_type == "exec":
-                self._run_process(process)
-            elif process.exec_type == "python":
-                eval(process.executable)
+            self._prepare_process(process)
+            self._execute_process(process)
+
+    def _prepare_process(self, process):
+        """Overwrite this function in subclasses to prepare the run of a process
+        of a process list, it is called in the thread that executes the
+        process list before the process is started
+
+        Args:
+            process: The process of the process list
+        """
+        pass
+
+    def _execute_process(self, process):
+        """Run a module, executable or python code of a process list
+
+        Args:
+            process: The process of the process list
+        """
+        if process.exec_type == "grass":
+            self._run_module(process)
+        elif process.exec_type == "exec":
+            self._run_process(process)
+        elif process.exec_type == "python":
+            eval(process.executable)
+
+    def _execute_process_graph(self, graph):
+        """Run the processes of a process list, independent processes run
+        concurrently up to the process parallel limit of the user
+
+        Barriers like g.region run alone in the current thread. All other
+        processes run in worker threads, each with its own copy of the
+        current region as WIND_OVERRIDE region. If a process fails, all
+        running processes are killed. The process log is kept in the order
+        of the process list.
+
+        Args:
+            graph (ProcessGraph): The dependency graph of the process list
+
+        Raises:
+            This method will raise an AsyncProcessError, AsyncProcessTimeLimit
+            or AsyncProcessTermination
+        """
+        self.message_logger.info(
+            "Run independent processes concurrently, up to %i processes"
+            % self.process_parallel_limit)
+        num_dependencies = [len(entry) for entry in graph.dependencies]
+        # The indices of the processes that can be started, in the order of
+        # the process list
+        ready = [index for index, num in enumerate(num_dependencies) if num == 0]
+        running = {}
+        errors = []
+        log_start = len(self.module_output_log)
+
+        def finish(index):
+            for dependent in graph.dependents[index]:
+                num_dependencies[dependent] -= 1
+                if num_dependencies[dependent] == 0:
+                    ready.append(dependent)
+            ready.sort()
+
+        with ThreadPoolExecutor(max_workers=self.process_parallel_limit) as executor:
+            try:
+                while ready or running:
+                    while (ready and len(running) < self.process_parallel_limit
+                           and not errors):
+                        index = ready.pop(0)
+                        process = graph.processes[index]
+                        self._prepare_process(process)
+                        if graph.barriers[index] is True:
+                            # All other processes depend on the barrier or
+                            # have finished
+                            self._execute_process(process)
+                            finish(index)
+                            continue
+                        if process.exec_type == "grass":
+                            self._prepare_module_run(process)
+                        elif self._is_terminated():
+                            raise AsyncProcessTermination(
+                                "Process <%s> was terminated by user request"
+                                % process.executable)
+                        region_name = self._create_branch_region(index)
+                        future = executor.submit(self._run_branch_process,
+                                                 process, region_name)
+                        running[future] = index
+
+                    if not running:
+                        break
+
+                    done, not_done = wait(running, return_when=FIRST_COMPLETED)
+                    for future in sorted(done, key=lambda f: running[f]):
+                        index = running.pop(future)
+                        if future.exception() is not None:
+                            errors.append(future.exception())
+                        else:
+                            finish(index)
+
+                    if errors:
+                        self._kill_running_processes()
+            except BaseException:
+                self._kill_running_processes()
+                raise
+            finally:
+                executor.shutdown(wait=True)
+                self._sort_process_log(graph, log_start)
+
+        if errors:
+            raise errors[0]
+
+    def _sort_process_log(self, graph, start):
+        """Sort the process log entries of concurrently run processes into
+        the order of the process list
+
+        Args:
+            graph (ProcessGraph): The dependency graph of the process list
+            start (int): The index of the first log entry of the process list
+        """
+        # The processes keep the stdout capture of their log entry
+        indices = {id(process.stdout): index for index, process
+                   in enumerate(graph.processes)
+                   if getattr(process, "stdout", None) is not None}
+        with self.process_lock:
+            entries = list(zip(self.module_output_log[start:],
+                               self.module_output_captures[start:]))
+            if len(entries) != len(self.module_output_log) - start:
+                return
+            entries.sort(key=lambda entry: indices.get(id(entry[1][0]),
+                                                       len(indices)))
+            self.module_output_log[start:] = [entry[0] for entry in entries]
+            self.module_output_captures[start:] = [entry[1] for entry
+                                                   in entries]
+
+    def _create_branch_region(self, index):
+        """Copy the current region of the temporary mapset into a named region,
+        that is used as WIND_OVERRIDE region of a concurrently running process
+
+        Args:
+            index (int): The index of the process in the process list
+
+        Returns:
+            str:
+            The name of the region, None if the temporary mapset has no region
+        """
+        if self.temp_mapset_path is None:
+            return None
+        wind_path = os.path.join(self.temp_mapset_path, "WIND")
+        if os.path.isfile(wind_path) is False:
+            return None
+        region_name = "actinia_branch_%i_%s" % (index, uuid.uuid4().hex)
+        windows_path = os.path.join(self.temp_mapset_path, "windows")
+        os.makedirs(windows_path, exist_ok=True)
+        shutil.copyfile(wind_path, os.path.join(windows_path, region_name))
+        return region_name
+
+    def _run_branch_process(self, process, region_name):
+        """Run a process in a worker thread with its own region and remove the
+        region afterwards
+
+        Args:
+            process: The process of the process list
+            region_name (str): The name of the WIND_OVERRIDE region or None
+        """
+        env = None
+        if region_name is not None:
+            env = os.environ.copy()
+            env["WIND_OVERRIDE"] = region_name
+        try:
+            return self._run_executable(process, poll_time=0.05, env=env)
+        finally:
+            if region_name is not None:
+                region_path = os.path.join(self.temp_mapset_path, "windows",
+                                           region_name)
+                if os.path.isfile(region_path):
+                    os.remove(region_path)
+
+    def _kill_running_processes(self):
+        """Kill all running child processes and the processes that are started
+        afterwards by running worker threads
+        """
+        with self.process_lock:
+            self.processes_killed = True
+            for proc in self.running_processes:
+                try:
+                    proc.kill()
+                except OSError:
+                    # The process already finished
+                    pass
 
     def _final_cleanup(self):
         """Overwrite this function in subclasses to perform the final cleanup,
@@ -1794,3 +2270,9 @@ class EphemeralProcessing(object):
                     exception=self.run_state["exception"])
             else:
                 self._send_resource_error(message="Unknown error")
+            # Commit pending updates and stop the background threads
+            if self.status_publisher is not None:
+                self.status_publisher.close()
+            if self.termination_listener is not None:
+                self.termination_listener.stop()
+            self._close_mapset_size_tracker()
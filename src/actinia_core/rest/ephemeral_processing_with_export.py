@@ -506,12 +506,8 @@ class EphemeralProcessingWithExport(EphemeralProcessing):
 
         for resource in self.resource_export_list:
 
-            # print("Check for termination %i"
-            # % self.resource_logger.get_termination(self.user_id, self.resource_id))
-
             # Check for termination requests between the exports
-            if bool(self.resource_logger.get_termination(
-                    self.user_id, self.resource_id, self.iteration)) is True:
+            if self._is_terminated():
                 raise AsyncProcessTermination(
                     "Resource export was terminated by user request")
 
@@ -605,12 +601,50 @@ class EphemeralProcessingWithExport(EphemeralProcessing):
 
         # Export all resources and generate the finish response
         self._export_resources()
+        self._export_process_outputs()
+
+    def _export_process_outputs(self):
+        """Store the full stdout and stderr outputs, that are truncated in the
+        process log, in the resource storage
+
+        The resource URL is added to the process log entry as stdout_url or
+        stderr_url.
+        """
+        for plm, captures in zip(self.module_output_log,
+                                 self.module_output_captures):
+            for stream, capture in zip(("stdout", "stderr"), captures):
+                if capture.truncated is False or "%s_url" % stream in plm:
+                    continue
+                resource_url = self.storage_interface.store_resource(
+                    capture.spill_path)
+                self.resource_url_list.append(resource_url)
+                plm["%s_url" % stream] = resource_url
+
+    def _export_failed_process_outputs(self):
+        """Store the full outputs of the processes of a failed or terminated
+        process chain, the outputs of the failed process are usually required
+        to find the error
+
+        The outputs must be stored before the temporary files are removed.
+        """
+        if not any(capture.truncated for captures in self.module_output_captures
+                   for capture in captures):
+            return
+        try:
+            self.storage_interface.setup()
+            self._export_process_outputs()
+        except Exception as e:
+            # The error of the process chain is reported instead
+            self.message_logger.error(
+                "Unable to store the outputs of the processes: %s" % str(e))
 
     def _final_cleanup(self):
         """Overwrite this function in subclasses to perform the final cleanup
         """
-        # Clean up and remove the temporary gisdbase
-        self._cleanup()
         # Remove resource directories
         if "error" in self.run_state or "terminated" in self.run_state:
             self.storage_interface.remove_resources()
+        if "success" not in self.run_state:
+            self._export_failed_process_outputs()
+        # Clean up and remove the temporary gisdbase
+        self._cleanup()
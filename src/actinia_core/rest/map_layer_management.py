@@ -28,7 +28,7 @@ from flask import jsonify, make_response
 from flask_restful_swagger_2 import swagger
 import pickle
 from actinia_core.rest.persistent_processing import PersistentProcessing
-from actinia_core.rest.resource_base import ResourceBase
+from actinia_core.rest.resource_base import ResourceBase, get_metadata_reader
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.request_parser import glist_parser, \
      extract_glist_parameters
@@ -83,13 +83,26 @@ class MapsetLayersResource(ResourceBase):
             }
 
         """
+        args = glist_parser.parse_args()
+        options = extract_glist_parameters(args)
+        pc = {"1": {"module": "g.list", "inputs": dict(options)}}
+        pc["1"]["inputs"]["mapset"] = mapset_name
+        pc["1"]["inputs"]["type"] = self.layer_type
+        response = self.get_metadata_response(
+            lambda: get_metadata_reader().list_maps(
+                self.get_mapset_path(location_name, mapset_name),
+                self.layer_type, pattern=options.get("pattern")),
+            process_chain=pc,
+            response_model_class=StringListProcessingResultResponseModel)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False,
                               has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name)
 
         if rdc:
-            args = glist_parser.parse_args()
             rdc.set_user_data((args, self.layer_type))
             enqueue_job(self.job_timeout, list_raster_layers, rdc)
             http_code, response_model = self.wait_until_finish()
@@ -536,7 +549,7 @@ class PersistentListLayers(PersistentProcessing):
         self._execute_process_list(process_list)
 
         raster_layers_with_mapset = []
-        raster_layers = self.module_output_log[0]["stdout"].split()
+        raster_layers = self._get_module_stdout(0).split()
 
         for raster_layer in raster_layers:
             raster_layers_with_mapset.append(raster_layer.strip())
@@ -29,17 +29,22 @@ Mapset management resources
 * Lock mapset, unlock mapset, get mapset lock status
 """
 
+import os
 import shutil
 from flask import jsonify, make_response
 from flask_restful_swagger_2 import swagger
 import pickle
 from actinia_core.rest.persistent_processing import PersistentProcessing
-from actinia_core.rest.resource_base import ResourceBase
+from actinia_core.rest.resource_base import ResourceBase, get_metadata_reader
 from actinia_core.core.common.app import auth
 from actinia_core.core.common.api_logger import log_api_call
+from actinia_core.core.common.config import global_config
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.common.exceptions import AsyncProcessError
+from actinia_core.core.common.exceptions import MetadataUnavailable
+from actinia_core.core.temp_database_cache import skeleton_cache
 from actinia_core.rest.user_auth import check_user_permissions
+from actinia_core.rest.user_auth import check_location_mapset_module_access
 from actinia_core.rest.user_auth import very_admin_role
 from actinia_core.models.response_models import ProcessingResponseModel, \
     StringListProcessingResultResponseModel, MapsetInfoResponseModel, \
@@ -91,6 +96,15 @@ class ListMapsetsResource(ResourceBase):
     def get(self, location_name):
         """Get a list of all mapsets that are located in a specific location.
         """
+        response = self.get_metadata_response(
+            lambda: self._list_mapsets(location_name),
+            process_chain={"1": {"module": "g.mapsets",
+                                 "inputs": {"separator": "newline"},
+                                 "flags": "l"}},
+            response_model_class=StringListProcessingResultResponseModel)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name="PERMANENT")
@@ -102,6 +116,33 @@ class ListMapsetsResource(ResourceBase):
 
         return make_response(jsonify(response_model), http_code)
 
+    def _list_mapsets(self, location_name):
+        """List the mapsets of the global and the user group location that
+        can be accessed by the user, like the mapsets that are linked into
+        the temporary database of the job
+        """
+        reader = get_metadata_reader()
+        global_location_path = os.path.join(self.grass_data_base, location_name)
+        user_location_path = os.path.join(self.grass_user_data_base,
+                                          self.user_group, location_name)
+        if not (os.path.isdir(global_location_path)
+                or os.path.isdir(user_location_path)):
+            raise MetadataUnavailable("Location <%s> not found" % location_name)
+
+        mapsets = set()
+        if os.path.isdir(global_location_path):
+            for mapset in reader.list_mapsets(global_location_path):
+                resp = check_location_mapset_module_access(
+                    user_credentials=self.user_credentials,
+                    config=global_config,
+                    location_name=location_name,
+                    mapset_name=mapset)
+                if resp is None:
+                    mapsets.add(mapset)
+        if os.path.isdir(user_location_path):
+            mapsets.update(reader.list_mapsets(user_location_path))
+        return sorted(mapsets)
+
 
 def list_raster_mapsets(*args):
     processing = PersistentMapsetLister(*args)
@@ -132,7 +173,7 @@ class PersistentMapsetLister(PersistentProcessing):
         self._execute_process_list(process_list)
 
         mapset_lists = []
-        mapsets = self.module_output_log[0]["stdout"].split()
+        mapsets = self._get_module_stdout(0).split()
 
         for mapset in mapsets:
             mapset_lists.append(mapset.strip())
@@ -344,7 +385,7 @@ class PersistentGetProjectionRegionInfo(PersistentProcessing):
         self._execute_process_list(process_list)
 
         mapset_region = {}
-        region_settings = self.module_output_log[0]["stdout"].split()
+        region_settings = self._get_module_stdout(0).split()
 
         for region_token in region_settings:
             if "=" in region_token:
@@ -355,10 +396,10 @@ class PersistentGetProjectionRegionInfo(PersistentProcessing):
                     mapset_region[key] = float(value)
 
         self.module_results = dict(region=RegionModel(**mapset_region),
-                                   projection=self.module_output_log[1]["stdout"])
+                                   projection=self._get_module_stdout(1))
 
         # self.module_results = MapsetInfoModel(region=RegionModel(**mapset_region),
-        #                             projection=self.module_output_log[1]["stdout"])
+        #                             projection=self._get_module_stdout(1))
 
 
 def create_mapset(*args):
@@ -390,7 +431,7 @@ class PersistentMapsetCreator(PersistentProcessing):
         self._execute_process_list(process_list)
 
         mapset_list = []
-        mapsets = self.module_output_log[0]["stdout"].split()
+        mapsets = self._get_module_stdout(0).split()
 
         for mapset in mapsets:
             mapset_list.append(mapset.strip())
@@ -403,6 +444,9 @@ class PersistentMapsetCreator(PersistentProcessing):
         self.required_mapsets = ["PERMANENT"]
         self._create_temporary_mapset(temp_mapset_name=self.temp_mapset_name)
         self._copy_merge_tmp_mapset_to_target_mapset()
+        # Temporary database skeletons of other processes are invalidated by
+        # the modification time of the location
+        skeleton_cache.invalidate(self.user_location_path)
 
         self.finish_message = \
             "Mapset <%s> successfully created." % self.target_mapset_name
@@ -440,6 +484,7 @@ class PersistentMapsetDeleter(PersistentProcessing):
         # The variable self.orig_mapset_path is set by _check_lock_target_mapset()
         if self.target_mapset_exists is True:
             shutil.rmtree(self.orig_mapset_path)
+            skeleton_cache.invalidate(self.user_location_path)
             self.lock_interface.unlock(self.target_mapset_lock_id)
             self.finish_message = \
                 "Mapset <%s> successfully removed." % self.target_mapset_name
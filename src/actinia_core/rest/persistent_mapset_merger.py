@@ -195,8 +195,7 @@ class PersistentMapsetMerger(PersistentProcessing):
         # Copy each mapset into the target
         for lock_id in self.lock_ids:
             # Check for termination requests
-            if self.resource_logger.get_termination(
-                    self.user_id, self.resource_id) is True:
+            if self._is_terminated():
                 raise AsyncProcessTermination(
                     "Mapset merging was terminated "
                     "by user request at setp %i of %i" % (step, steps))
@@ -30,7 +30,6 @@ import os
 import pickle
 import shutil
 import sqlite3
-import subprocess
 from copy import deepcopy
 from flask import jsonify, make_response
 from flask_restful_swagger_2 import swagger
@@ -40,6 +39,8 @@ from actinia_core.rest.resource_base import ResourceBase
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.common.exceptions import AsyncProcessError
 from actinia_core.core.common.process_chain import ProcessChainModel
+from actinia_core.core.mapset_transfer import MapsetTransfer
+from actinia_core.core.render_cache import create_render_cache
 from actinia_core.models.response_models import ProcessingResponseModel
 
 __license__ = "GPLv3"
@@ -644,19 +645,29 @@ class PersistentProcessing(EphemeralProcessing):
 
             if os.path.exists(source_path) is True:
                 # Hardlink the sources into the target
-                stdout = subprocess.PIPE
-                stderr = subprocess.PIPE
-
-                p = subprocess.Popen(["/bin/cp", "-flr",
-                                      "%s" % source_path,
-                                      "%s/." % target_path],
-                                     stdout=stdout,
-                                     stderr=stderr)
-                (stdout_buff, stderr_buff) = p.communicate()
-                if p.returncode != 0:
+                try:
+                    self._create_mapset_transfer().link(
+                        source_path, os.path.join(target_path, directory))
+                except OSError as e:
                     raise AsyncProcessError(
-                        "Unable to merge mapsets. Error in linking:"
-                        " stdout: %s stderr: %s" % (stdout_buff, stderr_buff))
+                        "Unable to merge mapsets. Error in linking: %s" % str(e))
+
+    def _create_mapset_transfer(self):
+        """Create the transfer of mapset content that reports the progress as
+        resource update
+
+        Returns:
+            MapsetTransfer:
+            The mapset transfer
+        """
+        def progress(transferred_bytes, total_bytes):
+            if total_bytes > 0:
+                self._send_resource_update(
+                    "Transferred %i of %i MB of the mapset" % (
+                        transferred_bytes // 1048576, total_bytes // 1048576))
+
+        return MapsetTransfer(num_threads=self.config.MAPSET_TRANSFER_THREADS,
+                              progress_callback=progress)
 
     def _copy_merge_tmp_mapset_to_target_mapset(self):
         """Copy the temporary mapset into the original location
@@ -692,7 +703,8 @@ class PersistentProcessing(EphemeralProcessing):
         # otherwise use the temporary mapset name for copying which is later
         # on merged into the target mapset and then removed
         if self.target_mapset_exists is True:
-            target_path = self.user_location_path + "/."
+            target_path = os.path.join(self.user_location_path,
+                                       self.temp_mapset_name)
             message = "Copy temporary mapset <%s> to target location " \
                       "<%s>" % (self.temp_mapset_name, self.location_name)
         else:
@@ -702,22 +714,10 @@ class PersistentProcessing(EphemeralProcessing):
 
         self._send_resource_update(message)
 
+        # The temporary database is removed after processing, so the
+        # temporary mapset is moved instead of copied
         try:
-            stdout = subprocess.PIPE
-            stderr = subprocess.PIPE
-            p = subprocess.Popen(["/bin/cp", "-fr",
-                                  "%s" % source_path,
-                                  "%s" % target_path],
-                                 stdout=stdout,
-                                 stderr=stderr)
-            (stdout_buff, stderr_buff) = p.communicate()
-            if p.returncode != 0:
-                raise AsyncProcessError(
-                    "Unable to copy temporary mapset to "
-                    "original location. Copy error "
-                    "stdout: %s stderr: %s returncode: %i" % (stdout_buff,
-                                                              stderr_buff,
-                                                              p.returncode))
+            self._create_mapset_transfer().move(source_path, target_path)
         except Exception as e:
             raise AsyncProcessError("Unable to copy temporary mapset to "
                                     "original location. Exception %s" % str(e))
@@ -737,40 +737,32 @@ class PersistentProcessing(EphemeralProcessing):
                 if os.path.isdir(interim_dir):
                     shutil.rmtree(interim_dir)
 
-    def _execute_process_list(self, process_list):
-        """Extend the mapset lock and execute the provided process list
+    def _prepare_process(self, process):
+        """Extend the mapset locks before a process of a process list is run
 
         Args:
-            process_list: The process list to execute
+            process: The process of the process list
 
         Raises:
-            This method will raise an AsyncProcessError or AsyncProcessTermination
+            This method will raise an AsyncProcessError
         """
-        for process in process_list:
-            # Extent the lock for each process by max processing time * 2
-            if self.target_mapset_lock_set is True:
-                ret = self.lock_interface.extend(resource_id=self.target_mapset_lock_id,
-                                                 expiration=self.process_time_limit * 2)
-                if ret == 0:
-                    raise AsyncProcessError(
-                        "Unable to extend lock for mapset <%s>"
-                        % self.target_mapset_name)
-
-            if self.temp_mapset_lock_set is True:
-                # Extent the lock for each process by max processing time * 2
-                ret = self.lock_interface.extend(resource_id=self.temp_mapset_lock_id,
-                                                 expiration=self.process_time_limit * 2)
-                if ret == 0:
-                    raise AsyncProcessError(
-                        "Unable to extend lock for "
-                        "temporary mapset <%s>" % self.temp_mapset_name)
+        # Extent the lock for each process by max processing time * 2
+        if self.target_mapset_lock_set is True:
+            ret = self.lock_interface.extend(resource_id=self.target_mapset_lock_id,
+                                             expiration=self.process_time_limit * 2)
+            if ret == 0:
+                raise AsyncProcessError(
+                    "Unable to extend lock for mapset <%s>"
+                    % self.target_mapset_name)
 
-            if process.exec_type == "grass":
-                self._run_module(process)
-            elif process.exec_type == "exec":
-                self._run_process(process)
-            elif process.exec_type == "python":
-                eval(process.executable)
+        if self.temp_mapset_lock_set is True:
+            # Extent the lock for each process by max processing time * 2
+            ret = self.lock_interface.extend(resource_id=self.temp_mapset_lock_id,
+                                             expiration=self.process_time_limit * 2)
+            if ret == 0:
+                raise AsyncProcessError(
+                    "Unable to extend lock for "
+                    "temporary mapset <%s>" % self.temp_mapset_name)
 
     def _execute(self, skip_permission_check=False):
         """Overwrite this function in subclasses
@@ -843,6 +835,15 @@ class PersistentProcessing(EphemeralProcessing):
         # Parse the module sdtout outputs and create the results
         self._parse_module_outputs()
 
+    def _invalidate_render_cache(self):
+        """Remove the cached images of the target mapset, that may have been
+        modified by the job
+        """
+        render_cache = create_render_cache(self.config)
+        if render_cache is not None:
+            render_cache.invalidate_mapset(os.path.join(
+                self.user_location_path, self.target_mapset_name))
+
     def _final_cleanup(self):
         """Final cleanup called in the run function at the very end of processing
         """
@@ -850,6 +851,7 @@ class PersistentProcessing(EphemeralProcessing):
         self._cleanup()
         # Unlock the mapsets
         if self.target_mapset_lock_set is True:
+            self._invalidate_render_cache()
             self.lock_interface.unlock(self.target_mapset_lock_id)
         if self.temp_mapset_lock_set is True:
             self.lock_interface.unlock(self.temp_mapset_lock_id)
@@ -61,6 +61,9 @@ def create_scatter_plot(x, y, xlabel, ylabel, title):
 
 def compute_mapset_size_diffs(mapset_sizes):
     diffs = [None] * len(mapset_sizes)
+    if not mapset_sizes:
+        # The mapset size tracking was switched off
+        return diffs
     # TODO not correct cause an empty mapset has also a size!
     diffs[0] = mapset_sizes[0]
     for i in range(1, len(mapset_sizes)):
@@ -128,7 +131,8 @@ class MapsetSizeResource(ResourceManager):
                     400)
 
             mapset_sizes = [
-                proc['mapset_size'] for proc in pc_response_model['process_log']]
+                proc['mapset_size'] for proc in pc_response_model['process_log']
+                if 'mapset_size' in proc]
 
             return make_response(jsonify(MapsetSizeResponseModel(
                 status="success", mapset_sizes=mapset_sizes)), http_code)
@@ -198,7 +202,8 @@ class MapsetSizeDiffResource(ResourceManager):
                     400)
 
             mapset_sizes = [
-                proc['mapset_size'] for proc in pc_response_model['process_log']]
+                proc['mapset_size'] for proc in pc_response_model['process_log']
+                if 'mapset_size' in proc]
             diffs = compute_mapset_size_diffs(mapset_sizes)
 
             return make_response(jsonify(MapsetSizeResponseModel(
@@ -269,8 +274,9 @@ class MaxMapsetSizeResource(ResourceManager):
                     400)
 
             mapset_sizes = [
-                proc['mapset_size'] for proc in pc_response_model['process_log']]
-            max_mapset_size = max(mapset_sizes)
+                proc['mapset_size'] for proc in pc_response_model['process_log']
+                if 'mapset_size' in proc]
+            max_mapset_size = max(mapset_sizes, default=0)
 
             return make_response(jsonify(MaxMapsetSizeResponseModel(
                 status="success", max_mapset_size=max_mapset_size)), http_code)
@@ -340,7 +346,8 @@ class MapsetSizeRenderResource(ResourceManager):
                     400)
 
             mapset_sizes = [
-                proc['mapset_size'] for proc in pc_response_model['process_log']]
+                proc['mapset_size'] for proc in pc_response_model['process_log']
+                if 'mapset_size' in proc]
 
             y = np.array(mapset_sizes)
             x = np.array(list(range(1, len(mapset_sizes) + 1)))
@@ -429,7 +436,8 @@ class MapsetSizeDiffRenderResource(ResourceManager):
                     400)
 
             mapset_sizes = [
-                proc['mapset_size'] for proc in pc_response_model['process_log']]
+                proc['mapset_size'] for proc in pc_response_model['process_log']
+                if 'mapset_size' in proc]
             diffs = compute_mapset_size_diffs(mapset_sizes)
 
             y = np.array(diffs)
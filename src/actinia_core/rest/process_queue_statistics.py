@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Process queue statistics
+"""
+from flask import g
+from flask import jsonify, make_response
+from flask_restful import Resource
+
+from flask_restful_swagger_2 import swagger
+
+from actinia_core.core.common.app import auth
+from actinia_core.core.common.api_logger import log_api_call
+from actinia_core.core.redis_queue_statistics import redis_queue_statistics_interface
+from actinia_core.models.openapi.process_queue import QueueWaitTimeListModel
+from actinia_core.models.response_models import SimpleResponseModel
+from actinia_core.rest.user_auth import check_user_permissions
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class ProcessQueueWaitTimeResource(Resource):
+    """Deliver the process queue wait time percentiles of the users
+    """
+
+    decorators = [log_api_call, check_user_permissions,
+                  auth.login_required]
+
+    def __init__(self):
+
+        # Configuration
+        Resource.__init__(self)
+
+        # Store the user id and user role of the current user
+        self.user_id = g.user.get_id()
+        self.user_role = g.user.get_role()
+
+    @swagger.doc({
+        'tags': ['Process Queue'],
+        'description': 'Get the process queue wait time percentiles of the users. '
+                       'Admin and superadmin roles get the wait times of all '
+                       'users, user and guest roles only their own. '
+                       'Minimum required user role: guest.',
+        'responses': {
+            '200': {
+                'description': 'The process queue wait time percentiles using '
+                               'the user id as key',
+                'schema': QueueWaitTimeListModel
+            },
+            '400': {
+                'description': 'The error message why the statistics gathering '
+                               'did not succeeded',
+                'schema': SimpleResponseModel
+            }
+        }
+    })
+    def get(self):
+        """Get the process queue wait time percentiles of the users."""
+
+        try:
+            if self.user_role in ["admin", "superadmin"]:
+                wait_times = redis_queue_statistics_interface.get_all_wait_times()
+            else:
+                wait_times = dict()
+                user_wait_times = redis_queue_statistics_interface.get_wait_times(
+                    self.user_id)
+                if user_wait_times is not None:
+                    wait_times[self.user_id] = user_wait_times
+        except Exception as e:
+            return make_response(jsonify(SimpleResponseModel(
+                status="error",
+                message="Unable to read the process queue statistics: %s"
+                        % str(e))), 400)
+
+        return make_response(jsonify(QueueWaitTimeListModel(
+            wait_times=wait_times)), 200)
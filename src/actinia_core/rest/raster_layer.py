@@ -34,6 +34,7 @@ from werkzeug.utils import secure_filename
 from actinia_core.rest.ephemeral_processing import EphemeralProcessing
 from actinia_core.rest.persistent_processing import PersistentProcessing
 from actinia_core.rest.map_layer_base import MapLayerRegionResourceBase
+from actinia_core.rest.resource_base import get_metadata_reader
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.common.exceptions import AsyncProcessError
 from actinia_core.core.utils import allowed_file
@@ -103,6 +104,15 @@ class RasterLayerResource(MapLayerRegionResourceBase):
     def get(self, location_name, mapset_name, raster_name):
         """Get information about an existing raster map layer.
         """
+        response = self.get_metadata_response(
+            lambda: RasterInfoModel(**get_metadata_reader().raster_info(
+                self.get_mapset_path(location_name, mapset_name), raster_name)),
+            process_chain={"1": {"module": "r.info",
+                                 "inputs": {"map": raster_name + "@" + mapset_name},
+                                 "flags": "gre"}})
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -302,7 +312,7 @@ class EphemeralRasterInfo(EphemeralProcessing):
             process_chain=pc, skip_permission_check=True)
         self._execute_process_list(process_list)
 
-        kv_list = self.module_output_log[0]["stdout"].split("\n")
+        kv_list = self._get_module_stdout(0).split("\n")
 
         raster_info = {}
 
@@ -414,7 +424,7 @@ class PersistentRasterCreator(PersistentProcessing):
         self._execute_process_list(pc_1)
 
         # check if raster exists
-        raster_list = self.module_output_log[0]["stdout"].split("\n")
+        raster_list = self._get_module_stdout(0).split("\n")
 
         if len(raster_list[0]) > 0:
             try:
@@ -25,10 +25,9 @@
 Raster map renderer
 """
 
-from flask import jsonify, make_response, Response
 from flask_restful import reqparse
 from .ephemeral_processing import EphemeralProcessing
-from .resource_base import ResourceBase
+from .renderer_base import RendererBaseResource
 from actinia_core.core.common.redis_interface import enqueue_job
 import tempfile
 import os
@@ -43,7 +42,7 @@ __maintainer__ = "Sören Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
 
-class SyncEphemeralRasterLegendResource(ResourceBase):
+class SyncEphemeralRasterLegendResource(RendererBaseResource):
     """Render the raster legend with d.legend
     """
     def create_parser(self):
@@ -168,6 +167,12 @@ class SyncEphemeralRasterLegendResource(ResourceBase):
         if isinstance(options, dict) is False:
             return options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "legend", options, rasters=[raster_name])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -178,15 +183,7 @@ class SyncEphemeralRasterLegendResource(ResourceBase):
         enqueue_job(self.job_timeout, start_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
 
 
 def start_job(*args):
@@ -27,10 +27,10 @@ Raster map renderer
 """
 from flask_restful_swagger_2 import swagger
 import tempfile
-import os
-from flask import jsonify, make_response, Response
 from .ephemeral_processing import EphemeralProcessing
 from actinia_core.core.common.redis_interface import enqueue_job
+from actinia_core.core.native_renderer import render_raster, render_rgb, \
+    render_shade
 from .renderer_base import RendererBaseResource, EphemeralRendererBase
 from actinia_core.models.response_models import ProcessingErrorResponseModel
 
@@ -147,6 +147,17 @@ class SyncEphemeralRasterRendererResource(RendererBaseResource):
         if isinstance(options, dict) is False:
             return options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "raster", options, rasters=[raster_name])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+        response = self.get_native_render_response(
+            location_name, mapset_name, lambda mapset_path: render_raster(
+                mapset_path, raster_name, options), cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -157,15 +168,7 @@ class SyncEphemeralRasterRendererResource(RendererBaseResource):
         enqueue_job(self.job_timeout, start_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
 
 
 def start_job(*args):
@@ -389,6 +392,18 @@ class SyncEphemeralRasterRGBRendererResource(RendererBaseResource):
         if isinstance(rgb_options, dict) is False:
             return rgb_options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "rgb", rgb_options, rasters=[
+                rgb_options["red"], rgb_options["green"], rgb_options["blue"]])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+        response = self.get_native_render_response(
+            location_name, mapset_name, lambda mapset_path: render_rgb(
+                mapset_path, rgb_options), cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name)
@@ -398,15 +413,7 @@ class SyncEphemeralRasterRGBRendererResource(RendererBaseResource):
         enqueue_job(self.job_timeout, start_rgb_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
 
 
 def start_rgb_job(*args):
@@ -616,6 +623,18 @@ class SyncEphemeralRasterShapeRendererResource(RendererBaseResource):
         if isinstance(options, dict) is False:
             return options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "shade", options,
+            rasters=[options["shade"], options["color"]])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+        response = self.get_native_render_response(
+            location_name, mapset_name, lambda mapset_path: render_shade(
+                mapset_path, options), cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name)
@@ -625,15 +644,7 @@ class SyncEphemeralRasterShapeRendererResource(RendererBaseResource):
         enqueue_job(self.job_timeout, start_shade_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
 
 
 def start_shade_job(*args):
@@ -0,0 +1,588 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+XYZ tiles of raster map layers
+
+Tiles that are not cached are rendered together with the other missing
+tiles of their metatile in a single job, so that a GRASS GIS session renders
+many tiles. A mark in redis ensures that only one job renders a metatile,
+concurrent requests of its tiles wait for the job and read the render cache.
+The seeding job renders the tiles of zoom ranges in advance.
+Tiles are stored in the render cache, that is invalidated if the raster map
+layer or its mapset changes.
+"""
+
+import os
+import pickle
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import jsonify, make_response
+from flask_restful_swagger_2 import swagger
+from actinia_core.core.common.config import global_config
+from actinia_core.core.common.exceptions import MetadataUnavailable
+from actinia_core.core.common.redis_interface import enqueue_job
+from actinia_core.core.mapset_metadata import is_legal_name
+from actinia_core.core.render_cache import create_render_cache
+from actinia_core.core.tile_grid import create_tile_grid, create_tile_region
+from actinia_core.core.tile_grid import get_tile_options, read_raster_region
+from actinia_core.core.tile_grid import TileGrid, MAX_ZOOM, TILE_SIZE
+from actinia_core.models.response_models import ProcessingErrorResponseModel
+from actinia_core.models.response_models import ProcessingResponseModel
+from .renderer_base import RendererBaseResource, EphemeralRendererBase
+from .renderer_base import get_render_cache
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+TILE_PATH_PARAMETERS = [
+    {
+        'name': 'location_name',
+        'description': 'The location name',
+        'required': True,
+        'in': 'path',
+        'type': 'string',
+        'default': 'nc_spm_08'
+    },
+    {
+        'name': 'mapset_name',
+        'description': 'The name of the mapset that contains the '
+                       'required raster map layer',
+        'required': True,
+        'in': 'path',
+        'type': 'string',
+        'default': 'PERMANENT'
+    },
+    {
+        'name': 'raster_name',
+        'description': 'The name of the raster map layer to render',
+        'required': True,
+        'in': 'path',
+        'type': 'string',
+        'default': 'elevation'
+    }
+]
+
+
+def get_tile_cache_key(render_cache, mapset_path, raster_name, grid, tile):
+    """Create the render cache key of a tile
+
+    Args:
+        render_cache (RenderCache): The render cache
+        mapset_path (str): The path of the mapset of the raster map layer
+        raster_name (str): The name of the raster map layer
+        grid (TileGrid): The tile grid
+        tile (list): The zoom level, column and row of the tile
+
+    Returns:
+        str:
+        The key or None if the tile can not be cached
+    """
+    return render_cache.create_key(mapset_path, "tile",
+                                   get_tile_options(grid, *tile),
+                                   rasters=[raster_name])
+
+
+class RasterTileResourceBase(RendererBaseResource):
+    """Base class of the tile resources
+    """
+
+    def get_tile_grid(self, location_name, mapset_name):
+        """Return the mapset path and the tile grid of the location
+
+        Args:
+            location_name (str): The name of the location
+            mapset_name (str): The name of the mapset
+
+        Raises:
+            MetadataUnavailable if the mapset can not be accessed or the tile
+            grid can not be created
+
+        Returns:
+            tuple:
+            The mapset path and the TileGrid
+        """
+        mapset_path = self.get_mapset_path(location_name, mapset_name)
+        return mapset_path, create_tile_grid(os.path.dirname(mapset_path))
+
+
+class SyncEphemeralRasterTileResource(RasterTileResourceBase):
+    """Render a tile of a raster map layer synchronously
+    """
+
+    @swagger.doc({
+        'tags': ['Raster Management'],
+        'description': 'Render a 256x256 pixel XYZ tile of a raster map layer '
+                       'as PNG image. The tile grid is the GoogleMapsCompatible '
+                       'grid in Web Mercator locations, the WorldCRS84Quad grid '
+                       'in latitude-longitude locations and a square grid '
+                       'that covers the default region in other locations. '
+                       'Tiles are cached, the ETag of a tile can be used '
+                       'with If-None-Match. Minimum required user role: user.',
+        'parameters': TILE_PATH_PARAMETERS + [
+            {
+                'name': 'z',
+                'description': 'The zoom level',
+                'required': True,
+                'in': 'path',
+                'type': 'integer'
+            },
+            {
+                'name': 'x',
+                'description': 'The column of the tile, from west to east',
+                'required': True,
+                'in': 'path',
+                'type': 'integer'
+            },
+            {
+                'name': 'y',
+                'description': 'The row of the tile, from north to south',
+                'required': True,
+                'in': 'path',
+                'type': 'integer'
+            }
+        ],
+        'produces': ["image/png"],
+        'responses': {
+            '200': {
+                'description': 'The PNG image'},
+            '304': {
+                'description': 'The tile was not modified'},
+            '400': {
+                'description': 'The error message and a detailed log why '
+                               'rendering did not succeeded',
+                'schema': ProcessingErrorResponseModel
+            }
+        }
+    })
+    def get(self, location_name, mapset_name, raster_name, z, x, y):
+        """Render a tile of a raster map layer as PNG image.
+        """
+        try:
+            mapset_path, grid = self.get_tile_grid(location_name, mapset_name)
+        except MetadataUnavailable as e:
+            return self.get_error_response(message=str(e))
+        if grid.is_valid(z, x, y) is False:
+            return self.get_error_response(
+                message="The tile <%i/%i/%i> is not part of the tile grid"
+                        % (z, x, y))
+
+        render_cache = get_render_cache()
+        tile = [z, x, y]
+        cache_key = None
+        if render_cache is not None:
+            cache_key = get_tile_cache_key(render_cache, mapset_path,
+                                           raster_name, grid, tile)
+            response = self.get_cached_image_response(cache_key)
+            if response is not None:
+                return response
+        if cache_key is None:
+            return self._render_tiles(location_name, mapset_name, raster_name,
+                                      grid, tile, [tile], {})
+
+        # Only one job renders the missing tiles of a metatile, the other
+        # requests of its tiles wait for the job and read the cache
+        metatile = grid.get_metatile(z, x, y)
+        render_key = get_tile_cache_key(render_cache, mapset_path, raster_name,
+                                        grid, min(metatile))
+        lock_timeout = int(
+            self.user_credentials["permissions"]["process_time_limit"])
+        if self.resource_logger.lock_render(render_key, self.resource_id,
+                                            lock_timeout) is False:
+            self.resource_logger.wait_for_render(render_key, lock_timeout)
+            response = self.get_cached_image_response(cache_key)
+            if response is not None:
+                return response
+            # The job failed or did not render the tile
+            return self._render_tiles(location_name, mapset_name, raster_name,
+                                      grid, tile, [tile],
+                                      {"%i/%i/%i" % tuple(tile): cache_key})
+
+        try:
+            tiles = []
+            cache_keys = {}
+            for metatile_tile in metatile:
+                key = get_tile_cache_key(render_cache, mapset_path,
+                                         raster_name, grid, metatile_tile)
+                if metatile_tile == tile or render_cache.get(key) is None:
+                    tiles.append(metatile_tile)
+                    cache_keys["%i/%i/%i" % tuple(metatile_tile)] = key
+            return self._render_tiles(location_name, mapset_name, raster_name,
+                                      grid, tile, tiles, cache_keys)
+        finally:
+            self.resource_logger.unlock_render(render_key, self.resource_id)
+
+    def _render_tiles(self, location_name, mapset_name, raster_name, grid,
+                      tile, tiles, cache_keys):
+        """Render tiles in a job, put them into the render cache and return
+        the requested tile
+
+        Args:
+            location_name (str): The name of the location
+            mapset_name (str): The name of the mapset
+            raster_name (str): The name of the raster map layer
+            grid (TileGrid): The tile grid
+            tile (list): The requested tile
+            tiles (list): The tiles to render, including the requested tile
+            cache_keys (dict): The render cache keys of the tile ids
+
+        Returns:
+            The response with the image of the requested tile or the error
+            response of the job
+        """
+        render_cache = get_render_cache()
+        rdc = self.preprocess(has_json=False, has_xml=False,
+                              location_name=location_name,
+                              mapset_name=mapset_name,
+                              map_name=raster_name)
+
+        rdc.set_user_data({"grid": grid.to_dict(), "tiles": tiles})
+
+        enqueue_job(self.job_timeout, start_job, rdc)
+
+        http_code, response_model = self.wait_until_finish(0.05)
+        if http_code != 200 or not response_model["process_results"]:
+            return make_response(jsonify(response_model), http_code)
+
+        image = None
+        tile_id = "%i/%i/%i" % tuple(tile)
+        cache_key = cache_keys.get(tile_id)
+        for result_id, result_file in response_model["process_results"].items():
+            if os.path.isfile(result_file) is False:
+                continue
+            key = cache_keys.get(result_id)
+            cached = key is not None and render_cache.put(key, result_file)
+            if result_id == tile_id:
+                image = open(result_file, "rb").read()
+                if cached is False:
+                    cache_key = None
+            os.remove(result_file)
+        if image is None:
+            return make_response(jsonify(response_model), http_code)
+        return self.create_image_response(image, cache_key)
+
+
+class AsyncEphemeralRasterTileSeedingResource(RasterTileResourceBase):
+    """Render the tiles of zoom levels of a raster map layer into the tile
+    cache asynchronously
+    """
+
+    @swagger.doc({
+        'tags': ['Raster Management'],
+        'description': 'Render the tiles of a range of zoom levels of a raster '
+                       'map layer into the tile cache. Only tiles that '
+                       'intersect the raster map layer and the optional '
+                       'extent are rendered. Minimum required user role: user.',
+        'parameters': TILE_PATH_PARAMETERS + [
+            {
+                'name': 'min_zoom',
+                'description': 'The minimum zoom level',
+                'required': True,
+                'in': 'query',
+                'type': 'integer'
+            },
+            {
+                'name': 'max_zoom',
+                'description': 'The maximum zoom level',
+                'required': True,
+                'in': 'query',
+                'type': 'integer'
+            },
+            {
+                'name': 'n',
+                'description': 'Northern border of the seeded extent',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'double'
+            },
+            {
+                'name': 's',
+                'description': 'Southern border of the seeded extent',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'double'
+            },
+            {
+                'name': 'e',
+                'description': 'Eastern border of the seeded extent',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'double'
+            },
+            {
+                'name': 'w',
+                'description': 'Western border of the seeded extent',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'double'
+            }
+        ],
+        'produces': ["application/json"],
+        'responses': {
+            '200': {
+                'description': 'The response of the seeding job, the results '
+                               'contain the number of rendered tiles',
+                'schema': ProcessingResponseModel
+            },
+            '400': {
+                'description': 'The error message and a detailed log why '
+                               'seeding did not succeeded',
+                'schema': ProcessingErrorResponseModel
+            }
+        }
+    })
+    def post(self, location_name, mapset_name, raster_name):
+        """Render the tiles of zoom levels of a raster map layer into the
+        tile cache.
+        """
+        parser = self.create_parser()
+        parser.add_argument(
+            'min_zoom', required=True, type=int, location='args',
+            help='The minimum zoom level must be specified as integer value')
+        parser.add_argument(
+            'max_zoom', required=True, type=int, location='args',
+            help='The maximum zoom level must be specified as integer value')
+        args = parser.parse_args()
+
+        if not 0 <= args["min_zoom"] <= args["max_zoom"] <= MAX_ZOOM:
+            return self.get_error_response(
+                message="The zoom levels must be between 0 and %i" % MAX_ZOOM)
+        if get_render_cache() is None:
+            return self.get_error_response(message="The render cache is disabled")
+        if is_legal_name(raster_name) is False:
+            return self.get_error_response(
+                message="Invalid raster map name <%s>" % raster_name)
+        try:
+            mapset_path, grid = self.get_tile_grid(location_name, mapset_name)
+            region = read_raster_region(os.path.join(mapset_path, "cellhd",
+                                                     raster_name))
+        except MetadataUnavailable as e:
+            return self.get_error_response(message=str(e))
+
+        # The tiles that intersect the raster map layer and the extent
+        extent = {"n": region["north"], "s": region["south"],
+                  "e": region["east"], "w": region["west"]}
+        for key, limit in (("n", min), ("s", max), ("e", min), ("w", max)):
+            if args[key] is not None:
+                extent[key] = limit(extent[key], args[key])
+        tiles = []
+        if extent["n"] > extent["s"] and extent["e"] > extent["w"]:
+            for z in range(args["min_zoom"], args["max_zoom"] + 1):
+                tiles.extend(grid.get_tiles(z, **extent))
+                if len(tiles) > global_config.TILE_SEED_LIMIT:
+                    return self.get_error_response(
+                        message="The number of tiles exceeds the limit of %i "
+                                "tiles" % global_config.TILE_SEED_LIMIT)
+
+        rdc = self.preprocess(has_json=False, has_xml=False,
+                              location_name=location_name,
+                              mapset_name=mapset_name,
+                              map_name=raster_name)
+        if rdc:
+            rdc.set_user_data({"grid": grid.to_dict(), "tiles": tiles,
+                               "mapset_path": mapset_path})
+            enqueue_job(self.job_timeout, start_seeding_job, rdc)
+
+        http_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), http_code)
+
+
+def start_job(*args):
+    processing = EphemeralRasterTileRenderer(*args)
+    processing.run()
+
+
+def start_seeding_job(*args):
+    processing = EphemeralRasterTileSeeder(*args)
+    processing.run()
+
+
+class EphemeralRasterTileRenderer(EphemeralRendererBase):
+    """Render tiles of a raster map layer in a single GRASS GIS session
+    """
+
+    def __init__(self, *args):
+        EphemeralRendererBase.__init__(self, *args)
+        self.tile_files = {}
+
+    def _execute(self, skip_permission_check=True):
+        """Render the tiles
+
+        Workflow:
+
+            1. A d.rast process is created for each tile
+            2. The processes run concurrently, each with the region of its
+               tile as WIND_OVERRIDE region
+            3. The rendered tiles are handled by _tile_rendered()
+
+        """
+
+        self._setup()
+
+        raster_name = self.map_name
+        options = self.rdc.user_data
+        self.required_mapsets.append(self.mapset_name)
+        grid = TileGrid.from_dict(options["grid"])
+        tiles = options["tiles"]
+
+        pc = {"version": 1, "list": []}
+        for tile in tiles:
+            pc["list"].append({
+                "id": "tile_%i_%i_%i" % tuple(tile),
+                "module": "d.rast",
+                "inputs": [{"param": "map",
+                            "value": raster_name + "@" + self.mapset_name}],
+                "flags": "n"})
+
+        self.skip_region_check = True
+        process_list = self._create_temporary_grass_environment_and_process_list(
+            process_chain=pc, skip_permission_check=True)
+        self._render_tiles(grid, tiles, process_list)
+
+        self.module_results = self.tile_files
+
+    def _render_tiles(self, grid, tiles, process_list):
+        """Run the d.rast processes of the tiles concurrently, up to the
+        process parallel limit of the user
+
+        Args:
+            grid (TileGrid): The tile grid
+            tiles (list): The tiles
+            process_list (list): The d.rast processes of the tiles
+
+        Raises:
+            This method will raise an AsyncProcessError, AsyncProcessTimeLimit
+            or AsyncProcessTermination
+        """
+        region = read_raster_region(os.path.join(self.temp_mapset_path, "WIND"))
+        windows_path = os.path.join(self.temp_mapset_path, "windows")
+        os.makedirs(windows_path, exist_ok=True)
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.process_parallel_limit) as executor:
+            try:
+                for tile, process in zip(tiles, process_list):
+                    if len(running) >= self.process_parallel_limit:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    self._prepare_module_run(process)
+                    region_name = "actinia_tile_%i_%i_%i" % tuple(tile)
+                    with open(os.path.join(windows_path, region_name), "w") as f:
+                        f.write(create_tile_region(
+                            region, grid.get_tile_bounds(*tile)))
+                    running.add(executor.submit(
+                        self._render_tile, process, tile, region_name))
+                for future in wait(running).done:
+                    future.result()
+            except BaseException:
+                self._kill_running_processes()
+                raise
+
+    def _render_tile(self, process, tile, region_name):
+        """Run the d.rast process of a tile in a worker thread
+
+        Args:
+            process: The d.rast process
+            tile (list): The zoom level, column and row of the tile
+            region_name (str): The name of the WIND_OVERRIDE region of the tile
+        """
+        # The tile file is read by the server after the job finished, hence
+        # it is not created in the temporary GRASS GIS database. The file is
+        # created securely and overwritten by the PNG driver, that must not
+        # read the empty file.
+        fd, result_file = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        env = os.environ.copy()
+        env.update({"WIND_OVERRIDE": region_name,
+                    "GRASS_RENDER_IMMEDIATE": "png",
+                    "GRASS_RENDER_WIDTH": str(TILE_SIZE),
+                    "GRASS_RENDER_HEIGHT": str(TILE_SIZE),
+                    "GRASS_RENDER_TRANSPARENT": "TRUE",
+                    "GRASS_RENDER_TRUECOLOR": "TRUE",
+                    "GRASS_RENDER_FILE": result_file,
+                    "GRASS_RENDER_FILE_READ": "FALSE"})
+        try:
+            self._run_executable(process, poll_time=0.05, env=env)
+        except BaseException:
+            if os.path.isfile(result_file):
+                os.remove(result_file)
+            raise
+        finally:
+            os.remove(os.path.join(self.temp_mapset_path, "windows",
+                                   region_name))
+        self._tile_rendered(tile, result_file)
+
+    def _tile_rendered(self, tile, result_file):
+        """Handle a rendered tile, the tile file is returned as process result
+
+        Args:
+            tile (list): The zoom level, column and row of the tile
+            result_file (str): The PNG file of the tile
+        """
+        self.tile_files["%i/%i/%i" % tuple(tile)] = result_file
+
+
+class EphemeralRasterTileSeeder(EphemeralRasterTileRenderer):
+    """Render tiles of a raster map layer into the tile cache
+    """
+
+    def __init__(self, *args):
+        EphemeralRasterTileRenderer.__init__(self, *args)
+        self.render_cache = create_render_cache(self.config)
+        self.num_cached_tiles = 0
+
+    def _execute(self, skip_permission_check=True):
+        """Render the tiles into the tile cache
+        """
+        EphemeralRasterTileRenderer._execute(self, skip_permission_check)
+        self.module_results = {"num_tiles": len(self.rdc.user_data["tiles"]),
+                               "num_cached_tiles": self.num_cached_tiles}
+
+    def _tile_rendered(self, tile, result_file):
+        """Put a rendered tile into the tile cache
+
+        Args:
+            tile (list): The zoom level, column and row of the tile
+            result_file (str): The PNG file of the tile
+        """
+        try:
+            if self.render_cache is None or os.path.isfile(result_file) is False:
+                return
+            key = get_tile_cache_key(
+                self.render_cache, self.rdc.user_data["mapset_path"],
+                self.map_name, TileGrid.from_dict(self.rdc.user_data["grid"]),
+                tile)
+            if key is not None and self.render_cache.put(key, result_file):
+                with self.process_lock:
+                    self.num_cached_tiles += 1
+        finally:
+            if os.path.isfile(result_file):
+                os.remove(result_file)
@@ -25,9 +25,14 @@
 Render base classes
 """
 
+from flask import jsonify, make_response, request, Response
 from flask_restful import reqparse
 from .ephemeral_processing import EphemeralProcessing
 from .resource_base import ResourceBase
+from actinia_core.core.common.config import global_config
+from actinia_core.core.common.exceptions import MetadataUnavailable, \
+    RenderUnavailable
+from actinia_core.core.render_cache import create_render_cache
 import os
 
 __license__ = "GPLv3"
@@ -36,6 +41,22 @@ __copyright__ = "Copyright 2016-2018, Sören Gebbert and mundialis GmbH & Co. KG
 __maintainer__ = "Sören Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
+# The render cache of the server process
+_render_cache = None
+
+
+def get_render_cache():
+    """Return the render cache of the server process
+
+    Returns:
+        RenderCache:
+        The render cache or None if it is disabled
+    """
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = create_render_cache(global_config)
+    return _render_cache
+
 
 REGION_PARAMETERS = {
     'parameters': [
@@ -183,6 +204,137 @@ class RendererBaseResource(ResourceBase):
             options["end_time"] = args["end_time"]
         return options
 
+    def get_render_cache_key(self, location_name, mapset_name, render_type,
+                             options, rasters=(), vectors=(), strds=()):
+        """Create the render cache key of the requested image
+
+        Args:
+            location_name (str): The name of the location
+            mapset_name (str): The name of the mapset that contains the maps
+            render_type (str): The type of the image
+            options (dict): The render options
+            rasters (list): The names of the rendered raster maps
+            vectors (list): The names of the rendered vector maps
+            strds (list): The names of the rendered space time raster
+                          datasets
+
+        Returns:
+            str:
+            The key or None if the image can not be cached
+        """
+        render_cache = get_render_cache()
+        if render_cache is None:
+            return None
+        try:
+            mapset_path = self.get_mapset_path(location_name, mapset_name)
+        except MetadataUnavailable:
+            return None
+        return render_cache.create_key(mapset_path, render_type, options,
+                                       rasters=rasters, vectors=vectors,
+                                       strds=strds)
+
+    @staticmethod
+    def create_image_response(image, cache_key):
+        """Create the response of a PNG image
+
+        Args:
+            image (bytes): The PNG image
+            cache_key (str): The render cache key that is used as ETag
+
+        Returns:
+            The response
+        """
+        response = Response(image, mimetype='image/png')
+        if cache_key is not None:
+            response.set_etag(cache_key)
+            # Clients must revalidate the image with If-None-Match
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def get_cached_image_response(self, cache_key):
+        """Return the response of a cached image
+
+        Args:
+            cache_key (str): The render cache key of the image
+
+        Returns:
+            The response with the cached image, a 304 response if the
+            request contains the ETag of the image in If-None-Match or None
+            if the image is not cached
+        """
+        if cache_key is None:
+            return None
+        path = get_render_cache().get(cache_key)
+        if path is None:
+            return None
+        if request.if_none_match.contains_weak(cache_key):
+            response = Response(status=304)
+            response.set_etag(cache_key)
+            return response
+        try:
+            with open(path, "rb") as f:
+                image = f.read()
+        except OSError:
+            # The image was evicted or invalidated
+            return None
+        return self.create_image_response(image, cache_key)
+
+    def get_native_render_response(self, location_name, mapset_name, render,
+                                   cache_key=None):
+        """Render the image directly from the raster files of the mapset
+        without running a job and put it into the render cache
+
+        The native renderer can be disabled with RENDER_NATIVE.
+
+        Args:
+            location_name (str): The name of the location
+            mapset_name (str): The name of the mapset that contains the maps
+            render (function): The function of the native_renderer module
+                               that gets the mapset path and returns the PNG
+                               image
+            cache_key (str): The render cache key of the image or None
+
+        Returns:
+            The response with the image or None if the image can not be
+            rendered directly, then the job must be enqueued
+        """
+        if global_config.RENDER_NATIVE is not True:
+            return None
+        try:
+            mapset_path = self.get_mapset_path(location_name, mapset_name)
+            image = render(mapset_path)
+        except (MetadataUnavailable, RenderUnavailable):
+            return None
+        if cache_key is not None and get_render_cache().put_image(
+                cache_key, image) is False:
+            cache_key = None
+        return self.create_image_response(image, cache_key)
+
+    def get_render_response(self, http_code, response_model, cache_key=None):
+        """Return the rendered image of a finished job and put it into the
+        render cache
+
+        Args:
+            http_code (int): The HTTP code of the job
+            response_model (dict): The response model of the job
+            cache_key (str): The render cache key of the image or None
+
+        Returns:
+            The response with the image or the error response
+        """
+        if http_code == 200:
+            result_file = response_model["process_results"]
+            # Open the image file, read it and then delete it
+            if result_file:
+                if os.path.isfile(result_file):
+                    image = open(result_file, "rb").read()
+                    if cache_key is not None and get_render_cache().put(
+                            cache_key, result_file) is False:
+                        cache_key = None
+                    os.remove(result_file)
+                    return self.create_image_response(image, cache_key)
+        return make_response(jsonify(response_model), http_code)
+
 
 class EphemeralRendererBase(EphemeralProcessing):
 
@@ -37,13 +37,17 @@ from actinia_core.core.common.app import auth
 from actinia_core.core.common.app import flask_api
 from actinia_core.core.common.config import global_config
 from actinia_core.core.common.api_logger import log_api_call
+from actinia_core.core.common.exceptions import MetadataUnavailable
+from actinia_core.core.mapset_metadata import create_metadata_reader
 from actinia_core.core.messages_logger import MessageLogger
 from actinia_core.core.resources_logger import ResourceLogger
 from actinia_core.core.resource_data_container import ResourceDataContainer
 from actinia_core.models.response_models import ProcessingResponseModel
 from actinia_core.models.response_models import create_response_from_model, ApiInfoModel
+from actinia_core.models.response_models import ProgressInfoModel
 from .resource_streamer import RequestStreamerResource
 from .user_auth import check_user_permissions, create_dummy_user
+from .user_auth import check_location_mapset_module_access
 from .resource_management import ResourceManager
 
 __license__ = "GPLv3"
@@ -51,6 +55,23 @@ __author__ = "Sören Gebbert, Anika Weinmann"
 __copyright__ = "Copyright 2016-2018, Sören Gebbert and mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis"
 
+# The reader of the metadata fast path, that caches the metadata of all
+# requests of the server process
+_metadata_reader = None
+
+
+def get_metadata_reader():
+    """Return the metadata reader of the server process
+
+    Returns:
+        MapsetMetadataReader:
+        The metadata reader
+    """
+    global _metadata_reader
+    if _metadata_reader is None:
+        _metadata_reader = create_metadata_reader(global_config)
+    return _metadata_reader
+
 
 class ResourceBase(Resource):
     """This is the base class for all asynchronous and synchronous processing resources.
@@ -348,6 +369,96 @@ class ResourceBase(Resource):
                                      mapset_name=mapset_name,
                                      map_name=map_name)
 
+    def get_mapset_path(self, location_name, mapset_name):
+        """Return the path of a mapset in the global or user group database
+        that can be accessed by the user
+
+        The global location is used if it contains the mapset, otherwise
+        the location of the user group.
+
+        Args:
+            location_name (str): The name of the location
+            mapset_name (str): The name of the mapset
+
+        Raises:
+            MetadataUnavailable if the mapset does not exist or can not be
+            accessed
+
+        Returns:
+            str:
+            The path of the mapset
+        """
+        mapset_path = os.path.join(self.grass_data_base, location_name,
+                                   mapset_name)
+        if os.path.isfile(os.path.join(mapset_path, "WIND")):
+            resp = check_location_mapset_module_access(
+                user_credentials=self.user_credentials,
+                config=global_config,
+                location_name=location_name,
+                mapset_name=mapset_name)
+            if resp is None:
+                return mapset_path
+            raise MetadataUnavailable("Unable to access mapset <%s>"
+                                      % mapset_name)
+        mapset_path = os.path.join(self.grass_user_data_base, self.user_group,
+                                   location_name, mapset_name)
+        if os.path.isfile(os.path.join(mapset_path, "WIND")):
+            return mapset_path
+        raise MetadataUnavailable("Unable to find mapset <%s> in location <%s>"
+                                  % (mapset_name, location_name))
+
+    def get_metadata_response(self, read_metadata, process_chain,
+                              response_model_class=ProcessingResponseModel,
+                              message="Processing successfully finished"):
+        """Answer a read-only metadata request directly from the files of
+        the mapset without running a job
+
+        The response is identical to the response of the job that runs the
+        GRASS GIS modules of the process chain, but without process log.
+        The metadata fast path can be disabled with METADATA_FAST_PATH.
+
+        Args:
+            read_metadata (function): The function without arguments that
+                                      reads the metadata with the
+                                      MapsetMetadataReader and returns the
+                                      process results
+            process_chain (dict): The process chain of the equivalent job
+            response_model_class (class): The response model class of the
+                                          equivalent job
+            message (str): The finish message of the equivalent job
+
+        Returns:
+            The result of make_response() or None if the metadata can not be
+            read directly, then the job must be enqueued
+        """
+        if global_config.METADATA_FAST_PATH is not True:
+            return None
+        try:
+            results = read_metadata()
+        except MetadataUnavailable:
+            return None
+
+        self.response_data = create_response_from_model(
+            response_model_class,
+            status="finished",
+            user_id=self.user_id,
+            resource_id=self.resource_id,
+            iteration=self.iteration,
+            process_log=[],
+            progress=ProgressInfoModel(step=1, num_of_steps=1),
+            results=results,
+            message=message,
+            http_code=200,
+            orig_time=self.orig_time,
+            orig_datetime=self.orig_datetime,
+            status_url=self.status_url,
+            api_info=self.api_info,
+            process_chain_list=[process_chain])
+        self.resource_logger.commit(
+            self.user_id, self.resource_id, self.iteration, self.response_data)
+        http_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), http_code)
+
     def generate_uuids(self):
         """Return a unique request and resource id based on uuid4
 
@@ -370,31 +481,27 @@ class ResourceBase(Resource):
         Call this method if a job was enqueued and the POST/GET/DELETE/PUT
         method should wait for it
 
+        The final state is pushed by the process via Redis pub/sub if
+        REDIS_RESOURCE_NOTIFICATIONS is set, otherwise the Redis db is polled.
+
         Args:
             poll_time (float): Time to sleep between Redis db polls for process
-                               status requests
+                               status requests, if notifications are disabled
 
         Returns:
             (int, dict)
             The http_code and the generated data dictionary
         """
-        # Wait for the async process by asking the redis database for updates
-        while True:
-            response_data = self.resource_logger.get(self.user_id,
-                                                     self.resource_id,
-                                                     self.iteration)
-            if not response_data:
-                message = ("Unable to receive process status. User id "
-                           "%s resource id %s and iteration %d"
-                           % (self.user_id, self.resource_id, self.iteration))
-                return make_response(message, 400)
-
-            http_code, response_model = pickle.loads(response_data)
-            if response_model["status"] == "finished" \
-                    or response_model["status"] == "error" \
-                    or response_model["status"] == "timeout" \
-                    or response_model["status"] == "terminated":
-                break
-            time.sleep(poll_time)
-
+        response_data = self.resource_logger.wait_for_final_state(
+            self.user_id, self.resource_id, self.iteration,
+            poll_time=poll_time,
+            use_notifications=global_config.REDIS_RESOURCE_NOTIFICATIONS,
+            notification_timeout=global_config.REDIS_RESOURCE_NOTIFICATION_TIMEOUT)
+        if not response_data:
+            message = ("Unable to receive process status. User id "
+                       "%s resource id %s and iteration %d"
+                       % (self.user_id, self.resource_id, self.iteration))
+            return make_response(message, 400)
+
+        http_code, response_model = pickle.loads(response_data)
         return (http_code, response_model)
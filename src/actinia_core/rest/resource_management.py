@@ -456,6 +456,10 @@ resource_parser.add_argument(
     help='The type of the jobs that should be shown: '
          'all, running, error, terminated, finished',
     location='args')
+resource_parser.add_argument(
+    'cursor', type=str,
+    help='The cursor of the next page that was returned with the previous page',
+    location='args')
 
 
 class ResourcesManager(ResourceManagerBase):
@@ -471,19 +475,20 @@ class ResourcesManager(ResourceManagerBase):
         # Configuration
         ResourceManagerBase.__init__(self)
 
-    def _get_resource_list(self, user_id, type_="all"):
-        """Get a list of resources that have been generated by the calling user
-        """
-        parsed_list = []
-        resource_list = self.resource_logger.get_user_resources(user_id)
+    def _get_resource_list(self, user_id, type_="all", num=None, cursor=None,
+                           with_body=True):
+        """Get a page of resources that have been generated by the calling user
 
-        for entry in resource_list:
-            if type_.lower() == "all":
-                parsed_list.append(entry)
-            elif type_.lower() == entry["status"]:
-                parsed_list.append(entry)
+        Returns:
+            tuple:
+            The list of resources and the cursor of the next page
+        """
+        status = None
+        if type_.lower() != "all":
+            status = type_.lower()
 
-        return parsed_list
+        return self.resource_logger.list_resources(
+            user_id, status=status, num=num, cursor=cursor, with_body=with_body)
 
     @swagger.doc({
         'tags': ['Resource Management'],
@@ -511,12 +516,21 @@ class ResourcesManager(ResourceManagerBase):
                 'required': False,
                 'in': 'query',
                 'type': 'string'
+            },
+            {
+                'name': 'cursor',
+                'description': 'The cursor of the next page, that was returned '
+                               'as next_cursor with the previous page',
+                'required': False,
+                'in': 'query',
+                'type': 'string'
             }
         ],
         'responses': {
             '200': {
                 'description': 'Returned a list of resources that have been '
-                               'generated by the specified user.',
+                               'generated by the specified user, latest '
+                               'resources first.',
                 'schema': ProcessingResponseListModel
             },
             '401': {
@@ -540,16 +554,22 @@ class ResourcesManager(ResourceManagerBase):
         type_ = "all"
         if "type" in args and args["type"]:
             type_ = args["type"]
+        cursor = None
+        if "cursor" in args and args["cursor"]:
+            cursor = args["cursor"]
+
+        try:
+            resource_list, next_cursor = self._get_resource_list(
+                user_id, type_=type_, num=num, cursor=cursor)
+        except ValueError as e:
+            return make_response(jsonify(SimpleResponseModel(
+                status="error", message=str(e))), 400)
 
-        resource_list = self._get_resource_list(user_id, type_=type_)
-
-        if num is not None:
-            response_list = resource_list[0:num]
-        else:
-            response_list = resource_list
-
+        if next_cursor is not None:
+            return make_response(jsonify(ProcessingResponseListModel(
+                resource_list=resource_list, next_cursor=next_cursor)), 200)
         return make_response(jsonify(ProcessingResponseListModel(
-            resource_list=response_list)), 200)
+            resource_list=resource_list)), 200)
 
     @swagger.doc({
         'tags': ['Resource Management'],
@@ -585,15 +605,15 @@ class ResourcesManager(ResourceManagerBase):
         if ret:
             return ret
 
-        resource_list = self._get_resource_list(user_id)
-
+        # The termination requires only the status of the resources
         termination_requests = 0
-        for entry in resource_list:
-            if "status" in entry:
-                if entry["status"] in ["accepted", "running"]:
-                    self.resource_logger.commit_termination(
-                        user_id, entry["resource_id"])
-                    termination_requests += 1
+        for type_ in ["accepted", "running"]:
+            resource_list, next_cursor = self._get_resource_list(
+                user_id, type_=type_, with_body=False)
+            for entry in resource_list:
+                self.resource_logger.commit_termination(
+                    user_id, entry["resource_id"])
+                termination_requests += 1
 
         return make_response(jsonify(SimpleResponseModel(
             status="finished",
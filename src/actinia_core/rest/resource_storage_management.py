@@ -145,7 +145,7 @@ class ResourceStorageSize(EphemeralProcessing):
                                       id="compute_download_cache_size",
                                       executable_params=args))
 
-            dc_size = int(self.module_output_log[0]["stdout"].split("\t")[0])
+            dc_size = int(self._get_module_stdout(0).split("\t")[0])
             quota_size = int(self.config.GRASS_RESOURCE_QUOTA * 1024 * 1024 * 1024)
 
             model = StorageModel(
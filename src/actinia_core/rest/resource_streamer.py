@@ -23,11 +23,17 @@
 
 """
 This module is responsible to answer requests for file based resources.
+
+The files are sent with support for HTTP range requests, multipart
+byteranges and conditional requests with ETag and Last-Modified validators.
 """
-from flask import jsonify, make_response
-from flask_restful import Resource
-from flask import send_from_directory
+import mimetypes
 import os
+import uuid
+from flask import jsonify, make_response, request, Response
+from flask_restful import Resource
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
 from actinia_core.core.common.config import global_config
 from actinia_core.core.common.app import auth
 from actinia_core.core.common.api_logger import log_api_call
@@ -39,6 +45,220 @@ __copyright__ = "Copyright 2016-2018, Sören Gebbert and mundialis GmbH & Co. KG
 __maintainer__ = "Sören Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
+# The size of the blocks that are read from files that can not be passed to
+# the file wrapper of the WSGI server
+BLOCK_SIZE = 1024 * 1024
+# Requests with more ranges are answered with the complete file
+MAX_RANGES = 100
+
+
+def get_file_etag(stat):
+    """Create a strong ETag from the modification time, size and inode of a
+    file
+
+    Args:
+        stat (os.stat_result): The status of the file
+
+    Returns:
+        str: The ETag
+    """
+    return "%x-%x-%x" % (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def get_byte_ranges(byte_range, size):
+    """Compute the byte ranges of a file that are requested
+
+    Args:
+        byte_range (werkzeug.datastructures.Range): The parsed Range header
+        size (int): The size of the file
+
+    Returns:
+        list: The list of (start, stop) tuples of the satisfiable ranges, an
+              empty list if no range is satisfiable or None if the
+              complete file must be sent
+    """
+    if byte_range is None or byte_range.units != "bytes" \
+            or len(byte_range.ranges) > MAX_RANGES:
+        return None
+    ranges = []
+    for start, stop in byte_range.ranges:
+        if start < 0:
+            # Suffix range of the last bytes
+            start = max(size + start, 0)
+            stop = size
+        elif stop is None or stop > size:
+            stop = size
+        if start < stop:
+            ranges.append((start, stop))
+    return ranges
+
+
+def _check_conditions(etag, mtime):
+    """Evaluate the preconditions of the request in the order of RFC 7232
+
+    Args:
+        etag (str): The ETag of the file
+        mtime (int): The modification time of the file in seconds
+
+    Returns:
+        int: 412 if a precondition failed, 304 if the file was not modified
+             or None
+    """
+    if request.if_match:
+        if not request.if_match.contains(etag):
+            return 412
+    elif request.if_unmodified_since is not None \
+            and mtime > request.if_unmodified_since.timestamp():
+        return 412
+
+    if request.if_none_match:
+        if request.if_none_match.contains_weak(etag):
+            return 304
+    elif request.if_modified_since is not None \
+            and mtime <= request.if_modified_since.timestamp():
+        return 304
+    return None
+
+
+def _is_range_valid(etag, mtime):
+    """Check the If-Range header, ranges are only sent if the file was not
+    modified
+    """
+    if_range = request.if_range
+    if if_range.etag is not None:
+        # If-Range requires the strong comparison
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return int(if_range.date.timestamp()) == mtime
+    return True
+
+
+def _read_blocks(file_object, start, length):
+    """Read a part of a file in blocks, positional reads leave the file
+    position untouched
+    """
+    fd = file_object.fileno()
+    while length > 0:
+        data = os.pread(fd, min(BLOCK_SIZE, length), start)
+        if not data:
+            break
+        start += len(data)
+        length -= len(data)
+        yield data
+
+
+def _send_file_part(file_object, start, length):
+    """Create the response body of a part of a file
+
+    The file is passed to the file wrapper of the WSGI server if it has one,
+    the body is then sent by the server. Gunicorn sends the file with
+    os.sendfile() from the current file position up to the Content-Length
+    of the response, so the file is not copied into Python objects.
+    """
+    file_wrapper = request.environ.get("wsgi.file_wrapper")
+    if file_wrapper is not None:
+        file_object.seek(start)
+        return file_wrapper(file_object, BLOCK_SIZE)
+    return _read_blocks(file_object, start, length)
+
+
+def _send_multipart(file_object, parts, closing):
+    """Create the multipart/byteranges body from the part headers and
+    ranges
+    """
+    for header, start, stop in parts:
+        yield header
+        yield from _read_blocks(file_object, start, stop - start)
+    yield closing
+
+
+def create_file_response(file_path, file_name=None, as_attachment=True):
+    """Create the response that sends a file
+
+    The request is answered with the complete file, the requested byte
+    ranges or a 304 response if the file was not modified. Requests that
+    contain invalid Range headers are answered with the complete file.
+
+    Args:
+        file_path (str): The path of the file
+        file_name (str): The file name that is used in the
+                         Content-Disposition header, the name of the file by
+                         default
+        as_attachment (bool): Send the file as attachment
+
+    Returns:
+        flask.Response: The response
+
+    Raises:
+        OSError: If the file can not be opened
+    """
+    file_object = open(file_path, "rb")
+    try:
+        stat = os.fstat(file_object.fileno())
+        size = stat.st_size
+        mtime = int(stat.st_mtime)
+        etag = get_file_etag(stat)
+        mimetype = mimetypes.guess_type(file_path)[0] or \
+            "application/octet-stream"
+
+        status = _check_conditions(etag, mtime)
+        ranges = None
+        if status is None and _is_range_valid(etag, mtime):
+            ranges = get_byte_ranges(request.range, size)
+            if ranges == []:
+                status = 416
+    except Exception:
+        file_object.close()
+        raise
+
+    if status is not None:
+        file_object.close()
+        response = Response(status=status)
+        if status == 416:
+            response.headers["Content-Range"] = "bytes */%i" % size
+    elif ranges is None:
+        response = Response(_send_file_part(file_object, 0, size),
+                            mimetype=mimetype, direct_passthrough=True)
+        response.headers["Content-Length"] = str(size)
+    elif len(ranges) == 1:
+        start, stop = ranges[0]
+        response = Response(_send_file_part(file_object, start, stop - start),
+                            status=206, mimetype=mimetype,
+                            direct_passthrough=True)
+        response.headers["Content-Length"] = str(stop - start)
+        response.headers["Content-Range"] = "bytes %i-%i/%i" % (
+            start, stop - 1, size)
+    else:
+        boundary = uuid.uuid4().hex
+        parts = [(("\r\n--%s\r\nContent-Type: %s\r\n"
+                   "Content-Range: bytes %i-%i/%i\r\n\r\n" % (
+                       boundary, mimetype, start, stop - 1,
+                       size)).encode(), start, stop)
+                 for start, stop in ranges]
+        closing = ("\r\n--%s--\r\n" % boundary).encode()
+        length = sum(len(header) + stop - start for header, start, stop
+                     in parts) + len(closing)
+        response = Response(_send_multipart(file_object, parts, closing),
+                            status=206,
+                            content_type="multipart/byteranges; boundary=" +
+                            boundary, direct_passthrough=True)
+        response.headers["Content-Length"] = str(length)
+
+    if status is None:
+        # The file is closed after the response was sent, a generator that
+        # was not started does not close it
+        response.call_on_close(file_object.close)
+        if as_attachment is True:
+            response.headers.set("Content-Disposition", "attachment",
+                                 filename=file_name or
+                                 os.path.basename(file_path))
+    if status != 412:
+        response.set_etag(etag)
+        response.headers["Last-Modified"] = http_date(mtime)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 
 class RequestStreamerResource(Resource):
     """
@@ -50,6 +270,10 @@ class RequestStreamerResource(Resource):
     def get(self, user_id, resource_id, file_name):
         """Get the file based resource as HTTP attachment
 
+        Byte ranges of the file can be requested with the Range header, the
+        ETag and Last-Modified validators of the response can be used for
+        conditional requests.
+
         Args:
             user_id (str): The unique user name/id
             resource_id (str): The id of the resource
@@ -67,11 +291,17 @@ class RequestStreamerResource(Resource):
                 Content-Length: 3469
                 Content-Type: image/tiff
                 Last-Modified: Tue, 07 Jun 2016 10:34:17 GMT
-                Cache-Control: public, max-age=43200
-                Expires: Tue, 07 Jun 2016 22:34:18 GMT
-                ETag: "1465295657.53-3469-665590421"
+                Cache-Control: no-cache
+                Accept-Ranges: bytes
+                ETag: "5b0d5b8c1e0a4c00-d8d-27ab0f15"
                 Date: Tue, 07 Jun 2016 10:34:18 GMT
 
+            The HTTP status 206 header of the request with the header
+            Range: bytes=0-1023::
+
+                Content-Length: 1024
+                Content-Range: bytes 0-1023/3469
+                Content-Type: image/tiff
 
             The HTTP status 400 response JSON contents::
 
@@ -82,16 +312,16 @@ class RequestStreamerResource(Resource):
 
         """
 
-        resource_dir = global_config.GRASS_RESOURCE_DIR
-        user_export_path = os.path.join(resource_dir, user_id)
-        resource_export_path = os.path.join(user_export_path, resource_id)
-        resource_export_file_path = os.path.join(resource_export_path, file_name)
+        resource_export_file_path = safe_join(global_config.GRASS_RESOURCE_DIR,
+                                              user_id, resource_id, file_name)
 
-        if (os.path.exists(resource_export_file_path) is True
+        if (resource_export_file_path is not None
+                and os.path.isfile(resource_export_file_path) is True
                 and os.access(resource_export_file_path, os.R_OK) is True):
+            try:
+                return create_file_response(resource_export_file_path)
+            except OSError:
+                pass
 
-            return send_from_directory(resource_export_path,
-                                       file_name, as_attachment=True)
-        else:
-            return make_response(jsonify({"status": "error",
-                                          "message": "Resource does not exist"}), 400)
+        return make_response(jsonify({"status": "error",
+                                      "message": "Resource does not exist"}), 400)
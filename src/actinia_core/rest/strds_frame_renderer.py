@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Render the raster map layers of a STRDS as animation frames
+
+All frames are rendered in a single job: The region and the color table are
+set up once for all frames, then a d.rast process is run for each frame
+concurrently. The frames are either streamed to the client as ZIP file while
+they are rendered, or composed into an animated GIF or WebP image.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import jsonify, make_response, Response
+from flask_restful_swagger_2 import swagger
+from actinia_core.core.common.config import global_config
+from actinia_core.core.common.exceptions import AsyncProcessError
+from actinia_core.core.common.redis_interface import enqueue_job
+from actinia_core.models.response_models import ProcessingErrorResponseModel
+from .renderer_base import RendererBaseResource, REGION_PARAMETERS
+from .strds_renderer import EphemeralSTRDSRenderer, create_strds_where
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The output formats and their mime types
+FRAME_FORMATS = {"zip": "application/zip", "gif": "image/gif",
+                 "webp": "image/webp"}
+# The default display time of a frame of an animation in milliseconds
+FRAME_DURATION = 500
+# The time between the checks for new frames in seconds
+FRAME_POLL_TIME = 0.05
+
+
+def get_frame_name(index):
+    """Return the file name of a frame
+
+    Args:
+        index (int): The index of the frame
+
+    Returns:
+        str:
+        The file name
+    """
+    return "frame_%05i.png" % (index + 1)
+
+
+def sample_maps(maps, max_frames):
+    """Select evenly spaced raster map layers including the first and the
+    last one
+
+    Args:
+        maps (list): The raster map layers in temporal order
+        max_frames (int): The maximum number of frames
+
+    Returns:
+        list:
+        The selected raster map layers
+    """
+    if len(maps) <= max_frames:
+        return maps
+    if max_frames == 1:
+        return maps[:1]
+    step = (len(maps) - 1) / (max_frames - 1)
+    return [maps[int(round(i * step))] for i in range(max_frames)]
+
+
+class ZipStream(object):
+    """Unseekable file object that collects the data written by ZipFile,
+    so that a ZIP file can be sent while it is written
+    """
+
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        self.data.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        """Return and remove the data written since the last call
+
+        Returns:
+            bytes:
+            The data
+        """
+        data = b"".join(self.data)
+        self.data = []
+        return data
+
+
+class SyncEphemeralSTRDSFrameRendererResource(RendererBaseResource):
+
+    @swagger.doc({
+        'tags': ['STRDS Management'],
+        'description': 'Render the raster map layers of a specific STRDS as '
+                       'animation frames in a single job. The frames are '
+                       'streamed as ZIP file of PNG images while they are '
+                       'rendered, or composed into an animated GIF or WebP '
+                       'image. Minimum required user role: user.',
+        'parameters': [
+            {
+                'name': 'location_name',
+                'description': 'The location name',
+                'required': True,
+                'in': 'path',
+                'type': 'string',
+                'default': 'nc_spm_08'
+            },
+            {
+                'name': 'mapset_name',
+                'description': 'The name of the mapset that contains the '
+                               'required STRDS',
+                'required': True,
+                'in': 'path',
+                'type': 'string',
+                'default': 'PERMANENT'
+            },
+            {
+                'name': 'strds_name',
+                'description': 'The name of the STRDS to render',
+                'required': True,
+                'in': 'path',
+                'type': 'string',
+                'default': 'elevation'
+            },
+            {
+                'name': 'format',
+                'description': 'The output format: zip, gif or webp, default '
+                               'is zip',
+                'required': False,
+                'in': 'query',
+                'type': 'string',
+                'enum': sorted(FRAME_FORMATS),
+                'default': 'zip'
+            },
+            {
+                'name': 'max_frames',
+                'description': 'The maximum number of frames, evenly spaced '
+                               'raster map layers are selected if the STRDS '
+                               'contains more raster map layers',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'integer'
+            },
+            {
+                'name': 'frame_duration',
+                'description': 'The display time of a frame of an animated '
+                               'image in milliseconds, default is 500',
+                'required': False,
+                'in': 'query',
+                'type': 'number',
+                'format': 'integer',
+                'default': FRAME_DURATION
+            }
+        ] + REGION_PARAMETERS['parameters'] + [
+            {
+                'name': 'start_time',
+                'description': 'Raster map layers that have equal or greater '
+                               'the start time will be rendered',
+                'required': False,
+                'in': 'query',
+                'type': 'string'
+            },
+            {
+                'name': 'end_time',
+                'description': 'Raster map layers that have equal or lower the '
+                               'end time will be rendered',
+                'required': False,
+                'in': 'query',
+                'type': 'string'
+            }
+        ],
+        'produces': sorted(FRAME_FORMATS.values()),
+        'responses': {
+            '200': {
+                'description': 'The ZIP file with the PNG frames and the '
+                               'frames.json file that lists the raster map '
+                               'layer and start time of each frame, or the '
+                               'animated image'},
+            '400': {
+                'description': 'The error message and a detailed log why '
+                               'rendering did not succeeded',
+                'schema': ProcessingErrorResponseModel
+            }
+        }
+    })
+    def get(self, location_name, mapset_name, strds_name):
+        """Render the raster map layers of a specific STRDS as animation
+        frames.
+        """
+        parser = self.create_parser()
+        parser.add_argument(
+            'format', type=str, location='args',
+            help='The output format must be zip, gif or webp')
+        parser.add_argument(
+            'max_frames', type=int, location='args',
+            help='The maximum number of frames must be specified as integer')
+        parser.add_argument(
+            'frame_duration', type=int, location='args',
+            help='The frame duration must be specified as integer')
+        args = parser.parse_args()
+        options = self.create_parser_options(args)
+
+        if isinstance(options, dict) is False:
+            return options
+
+        options["format"] = args["format"] or "zip"
+        if options["format"] not in FRAME_FORMATS:
+            return self.get_error_response(
+                message="Format must be one of %s" % ", ".join(
+                    sorted(FRAME_FORMATS)))
+        options["max_frames"] = global_config.RENDER_FRAME_LIMIT
+        if args["max_frames"] is not None:
+            if not 1 <= args["max_frames"] <= global_config.RENDER_FRAME_LIMIT:
+                return self.get_error_response(
+                    message="The maximum number of frames must be between 1 "
+                            "and %i" % global_config.RENDER_FRAME_LIMIT)
+            options["max_frames"] = args["max_frames"]
+        options["frame_duration"] = FRAME_DURATION
+        if args["frame_duration"] is not None:
+            if args["frame_duration"] < 1:
+                return self.get_error_response(
+                    message="Frame duration must be larger than 0")
+            options["frame_duration"] = args["frame_duration"]
+        # The directory is shared with the job, that writes the frames
+        options["frame_dir"] = tempfile.mkdtemp()
+
+        rdc = self.preprocess(has_json=False, has_xml=False,
+                              location_name=location_name,
+                              mapset_name=mapset_name,
+                              map_name=strds_name)
+
+        rdc.set_user_data(options)
+
+        enqueue_job(self.job_timeout, start_job, rdc)
+
+        if options["format"] == "zip":
+            return self.get_frame_stream_response(options["frame_dir"],
+                                                  strds_name)
+
+        http_code, response_model = self.wait_until_finish(0.05)
+        try:
+            if http_code == 200:
+                result_file = response_model["process_results"]
+                if result_file and os.path.isfile(result_file):
+                    with open(result_file, "rb") as f:
+                        return Response(f.read(), mimetype=FRAME_FORMATS[
+                            options["format"]])
+            return make_response(jsonify(response_model), http_code)
+        finally:
+            shutil.rmtree(options["frame_dir"], ignore_errors=True)
+
+    def _is_job_finished(self):
+        status = self.resource_logger.get_status(self.user_id,
+                                                 self.resource_id,
+                                                 self.iteration)
+        return status is None or \
+            status[1]["status"] in self.resource_logger.final_states
+
+    def get_frame_stream_response(self, frame_dir, strds_name):
+        """Stream the frames of the job as ZIP file while they are rendered
+
+        The response is sent when the first frame was rendered. If the job
+        fails before, the error response of the job is returned.
+
+        Args:
+            frame_dir (str): The directory of the frames
+            strds_name (str): The name of the STRDS
+
+        Returns:
+            The streamed response or the error response
+        """
+        first_frame = os.path.join(frame_dir, get_frame_name(0))
+        while not os.path.isfile(first_frame) and not self._is_job_finished():
+            time.sleep(FRAME_POLL_TIME)
+        if not os.path.isfile(first_frame):
+            http_code, response_model = self.wait_until_finish(0.05)
+            shutil.rmtree(frame_dir, ignore_errors=True)
+            return make_response(jsonify(response_model), http_code)
+
+        response = Response(self._stream_frames(frame_dir),
+                            mimetype=FRAME_FORMATS["zip"])
+        response.headers["Content-Disposition"] = \
+            "attachment; filename=%s.zip" % strds_name
+        return response
+
+    def _stream_frames(self, frame_dir):
+        """Generate the ZIP file of the frames in their temporal order, the
+        frames.json file with the raster map layers of the frames or the
+        error.json file with the response of the failed job is appended
+        """
+        stream = ZipStream()
+        try:
+            with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as zip_file:
+                index = 0
+                while True:
+                    frame_file = os.path.join(frame_dir, get_frame_name(index))
+                    if os.path.isfile(frame_file):
+                        zip_file.write(frame_file, get_frame_name(index))
+                        os.remove(frame_file)
+                        index += 1
+                        yield stream.read()
+                    elif self._is_job_finished():
+                        # The last frame may be renamed before the job finished
+                        if not os.path.isfile(frame_file):
+                            break
+                    else:
+                        time.sleep(FRAME_POLL_TIME)
+                http_code, response_model = self.wait_until_finish(0.05)
+                if http_code == 200:
+                    zip_file.writestr("frames.json", json.dumps(
+                        response_model["process_results"], default=str))
+                else:
+                    zip_file.writestr("error.json", json.dumps(
+                        response_model, default=str))
+            yield stream.read()
+        finally:
+            shutil.rmtree(frame_dir, ignore_errors=True)
+
+
+def start_job(*args):
+    processing = EphemeralSTRDSFrameRenderer(*args)
+    processing.run()
+
+
+class EphemeralSTRDSFrameRenderer(EphemeralSTRDSRenderer):
+    """Render the raster map layers of a STRDS as frames in a single GRASS
+    GIS session
+    """
+
+    def __init__(self, *args):
+        EphemeralSTRDSRenderer.__init__(self, *args)
+
+    def _execute(self, skip_permission_check=True):
+        """Render the frames
+
+        Workflow:
+
+            1. A list of raster map layers and their start times is generated
+               from a t.rast.list call that can be constrained with time and
+               region settings, the frames are sampled from the list
+            2. The region is set to the cumulative region of the frames and
+               the user specific region settings once for all frames
+            3. The color table of the first frame is set as color table of
+               all frames with r.colors, the color tables are written to the
+               temporary mapset
+            4. A d.rast process is run for each frame concurrently
+            5. The frames are composed into an animated image or returned as
+               list
+
+        """
+
+        self._setup()
+
+        strds_name = self.map_name
+        options = self.rdc.user_data
+        self.required_mapsets.append(self.mapset_name)
+        frame_dir = options["frame_dir"]
+
+        g_region_query = self._setup_render_environment_and_region(
+            options=options, result_file=os.path.join(frame_dir, "frame.png"),
+            legacy=False)
+
+        t_rast_list = {
+            "id": "1",
+            "module": "t.rast.list",
+            "inputs": [
+                {"param": "input", "value": "%s@%s" % (strds_name, self.mapset_name)},
+                {"param": "columns", "value": "id,start_time"},
+                {"param": "separator", "value": "pipe"},
+                {"param": "where", "value": create_strds_where(options)}],
+            "flags": "u"}
+
+        pc = {"version": 1, "list": [t_rast_list]}
+        self.skip_region_check = True
+        process_list = self._create_temporary_grass_environment_and_process_list(
+            process_chain=pc, skip_permission_check=True)
+        self._execute_process_list(process_list)
+
+        maps = [line.split("|", 1) for line in
+                self._get_module_stdout(0).strip().splitlines() if line.strip()]
+        if not maps:
+            raise AsyncProcessError("No raster map layers found in STRDS <%s>"
+                                    % strds_name)
+        maps = sample_maps(maps, options["max_frames"])
+        map_ids = [entry[0] for entry in maps]
+
+        pc = {"version": 1, "list": [self._setup_strds_region(
+            ",".join(map_ids), g_region_query, options)]}
+        if len(map_ids) > 1:
+            pc["list"].append({
+                "id": "5",
+                "module": "r.colors",
+                "inputs": [{"param": "map", "value": ",".join(map_ids[1:])},
+                           {"param": "raster", "value": map_ids[0]}]})
+        process_list = self._validate_process_chain(
+            process_chain=pc, skip_permission_check=True)
+        self._execute_process_list(process_list)
+
+        pc = {"version": 1, "list": []}
+        for index, map_id in enumerate(map_ids):
+            pc["list"].append({
+                "id": "frame_%i" % (index + 1),
+                "module": "d.rast",
+                "inputs": [{"param": "map", "value": map_id}]})
+        process_list = self._validate_process_chain(
+            process_chain=pc, skip_permission_check=True)
+        frame_files = [os.path.join(frame_dir, get_frame_name(index))
+                       for index in range(len(map_ids))]
+        self._render_frames(process_list, frame_files, options)
+
+        if options["format"] == "zip":
+            self.module_results = [
+                {"frame": get_frame_name(index), "map": entry[0],
+                 "start_time": entry[1] if len(entry) > 1 else None}
+                for index, entry in enumerate(maps)]
+        else:
+            self.module_results = self._create_animation(frame_files, options)
+
+    def _render_frames(self, process_list, frame_files, options):
+        """Run the d.rast processes of the frames concurrently, up to the
+        process parallel limit of the user
+
+        Args:
+            process_list (list): The d.rast processes of the frames
+            frame_files (list): The PNG files of the frames
+            options (dict): The render options
+
+        Raises:
+            This method will raise an AsyncProcessError, AsyncProcessTimeLimit
+            or AsyncProcessTermination
+        """
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.process_parallel_limit) as executor:
+            try:
+                for process, frame_file in zip(process_list, frame_files):
+                    if len(running) >= self.process_parallel_limit:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    self._prepare_module_run(process)
+                    running.add(executor.submit(
+                        self._render_frame, process, frame_file, options))
+                for future in wait(running).done:
+                    future.result()
+            except BaseException:
+                self._kill_running_processes()
+                raise
+
+    def _render_frame(self, process, frame_file, options):
+        """Run the d.rast process of a frame in a worker thread
+
+        Args:
+            process: The d.rast process
+            frame_file (str): The PNG file of the frame
+            options (dict): The render options
+        """
+        # The PNG driver selects the file format by the file extension
+        temp_file = frame_file[:-len(".png")] + ".tmp.png"
+        env = os.environ.copy()
+        env.update({"GRASS_RENDER_IMMEDIATE": "png",
+                    "GRASS_RENDER_WIDTH": "%i" % int(options["width"]),
+                    "GRASS_RENDER_HEIGHT": "%i" % int(options["height"]),
+                    "GRASS_RENDER_TRANSPARENT": "TRUE",
+                    "GRASS_RENDER_TRUECOLOR": "TRUE",
+                    "GRASS_RENDER_FILE": temp_file,
+                    "GRASS_RENDER_FILE_READ": "TRUE"})
+        try:
+            self._run_executable(process, poll_time=0.05, env=env)
+            # The frame is renamed into place, since complete frames are
+            # streamed while the other frames are rendered
+            os.rename(temp_file, frame_file)
+        except BaseException:
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+            raise
+
+    def _create_animation(self, frame_files, options):
+        """Compose the frames into an animated image
+
+        Args:
+            frame_files (list): The PNG files of the frames
+            options (dict): The render options with format and frame duration
+
+        Raises:
+            AsyncProcessError if Pillow is not available
+
+        Returns:
+            str:
+            The path of the animated image
+        """
+        if Image is None:
+            raise AsyncProcessError("Pillow is required to create animated "
+                                    "GIF and WebP images")
+        result_file = os.path.join(options["frame_dir"],
+                                   "animation.%s" % options["format"])
+        images = [Image.open(frame_file) for frame_file in frame_files]
+        try:
+            save_options = {"save_all": True, "append_images": images[1:],
+                            "duration": options["frame_duration"], "loop": 0}
+            if options["format"] == "gif":
+                # Transparent areas do not show the previous frame
+                save_options["disposal"] = 2
+            images[0].save(result_file, format=options["format"].upper(),
+                           **save_options)
+        finally:
+            for image in images:
+                image.close()
+        return result_file
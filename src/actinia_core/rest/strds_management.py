@@ -32,7 +32,7 @@ from flask_restful import reqparse
 from flask_restful_swagger_2 import swagger
 from actinia_core.core.request_parser import where_parser
 from .persistent_processing import PersistentProcessing
-from .resource_base import ResourceBase
+from .resource_base import ResourceBase, get_metadata_reader
 from actinia_core.core.common.redis_interface import enqueue_job
 from actinia_core.core.common.exceptions import AsyncProcessError
 from actinia_core.models.response_models import ProcessingResponseModel, \
@@ -95,12 +95,26 @@ class SyncSTRDSListerResource(ResourceBase):
     def get(self, location_name, mapset_name):
         """Get a list of all STRDS that are located in a specific location/mapset.
         """
+        args = where_parser.parse_args()
+        # User defined where, order and columns options require t.list
+        if all(value is None for value in args.values()):
+            response = self.get_metadata_response(
+                lambda: get_metadata_reader().list_strds(
+                    self.get_mapset_path(location_name, mapset_name)),
+                process_chain={"1": {"module": "t.list",
+                                     "inputs": {"type": "strds",
+                                                "column": "name",
+                                                "where": "mapset='%s'"
+                                                         % mapset_name}}},
+                response_model_class=StringListProcessingResultResponseModel)
+            if response is not None:
+                return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name)
 
         if rdc:
-            args = where_parser.parse_args()
             rdc.set_user_data(args)
 
             enqueue_job(self.job_timeout, list_raster_mapsets, rdc)
@@ -158,7 +172,7 @@ class PersistentSTRDSLister(PersistentProcessing):
         self._execute_process_list(process_list)
 
         mapset_lists = []
-        mapsets = self.module_output_log[0]["stdout"].split()
+        mapsets = self._get_module_stdout(0).split()
 
         for mapset in mapsets:
             mapset_lists.append(mapset.strip())
@@ -226,6 +240,17 @@ class STRDSManagementResource(ResourceBase):
     def get(self, location_name, mapset_name, strds_name):
         """Get information about a STRDS that is located in a specific location/mapset.
         """
+        response = self.get_metadata_response(
+            lambda: self._read_strds_info(location_name, mapset_name, strds_name),
+            process_chain={"1": {"module": "t.info",
+                                 "inputs": {"type": "strds",
+                                            "input": strds_name},
+                                 "flags": "g"}},
+            response_model_class=STRDSInfoResponseModel,
+            message="Information gathering for STRDS <%s> successful" % strds_name)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -238,6 +263,14 @@ class STRDSManagementResource(ResourceBase):
 
         return make_response(jsonify(response_model), http_code)
 
+    def _read_strds_info(self, location_name, mapset_name, strds_name):
+        """Read the STRDS information from the temporal database
+        """
+        strds_info = get_metadata_reader().strds_info(
+            self.get_mapset_path(location_name, mapset_name), strds_name)
+        return STRDSInfoModel(**{key: value for key, value in strds_info.items()
+                                 if key in STRDSInfoModel.properties})
+
     @swagger.doc({
         'tags': ['STRDS Management'],
         'description': 'Delete a STRDS that is located in a specific location/mapset. '
@@ -398,7 +431,7 @@ class PersistentSTRDSInfo(PersistentProcessing):
 
         self._execute_process_list(process_list)
 
-        kv_list = self.module_output_log[0]["stdout"].split("\n")
+        kv_list = self._get_module_stdout(0).split("\n")
 
         strds = {}
 
@@ -495,7 +528,7 @@ class PersistentSTRDSCreator(PersistentProcessing):
         self._execute_process_list(pc_1)
 
         # check if STRDS exists
-        raster_list = self.module_output_log[0]["stdout"].split("\n")
+        raster_list = self._get_module_stdout(0).split("\n")
 
         if len(raster_list[0]) > 0:
             raise AsyncProcessError("STRDS <%s> exists." % self.map_name)
@@ -24,12 +24,10 @@
 """
 Raster map renderer
 """
-from flask import jsonify, make_response, Response
 from .ephemeral_processing import EphemeralProcessing
 from actinia_core.core.common.redis_interface import enqueue_job
 from .renderer_base import RendererBaseResource, EphemeralRendererBase
 import tempfile
-import os
 from flask_restful_swagger_2 import swagger
 from actinia_core.models.response_models import ProcessingErrorResponseModel
 
@@ -162,6 +160,12 @@ class SyncEphemeralSTRDSRendererResource(RendererBaseResource):
         if isinstance(options, dict) is False:
             return options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "strds", options, strds=[strds_name])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -172,15 +176,36 @@ class SyncEphemeralSTRDSRendererResource(RendererBaseResource):
         enqueue_job(self.job_timeout, start_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
+
+
+def create_strds_where(options):
+    """Create the where statement of t.rast.list that selects the raster
+    map layers of the time range and the extent of the render options
+
+    Args:
+        options (dict): The render options
+
+    Returns:
+        str:
+        The where statement
+    """
+    where_list = []
+
+    if "start_time" in options:
+        where_list.append("start_time >= \'%s\'" % options["start_time"])
+    if "end_time" in options:
+        where_list.append("end_time  <= \'%s\'" % options["end_time"])
+    if "n" in options:
+        where_list.append("south <= %f" % options["n"])
+    if "s" in options:
+        where_list.append("north >= %f" % options["s"])
+    if "e" in options:
+        where_list.append("west <= %f" % options["e"])
+    if "w" in options:
+        where_list.append("east >= %f" % options["w"])
+
+    return " AND ".join(where_list)
 
 
 def start_job(*args):
@@ -217,22 +242,7 @@ class EphemeralSTRDSRenderer(EphemeralRendererBase):
 
         g_region_query = self._setup_render_environment_and_region(
             options=options, result_file=result_file, legacy=False)
-        where_list = []
-
-        if "start_time" in options:
-            where_list.append("start_time >= \'%s\'" % options["start_time"])
-        if "end_time" in options:
-            where_list.append("end_time  <= \'%s\'" % options["end_time"])
-        if "n" in options:
-            where_list.append("south <= %f" % options["n"])
-        if "s" in options:
-            where_list.append("north >= %f" % options["s"])
-        if "e" in options:
-            where_list.append("west <= %f" % options["e"])
-        if "w" in options:
-            where_list.append("east >= %f" % options["w"])
-
-        where = " AND ".join(where_list)
+        where = create_strds_where(options)
 
         t_rast_list = {
             "id": "1",
@@ -253,8 +263,43 @@ class EphemeralSTRDSRenderer(EphemeralRendererBase):
             process_chain=pc, skip_permission_check=True)
         self._execute_process_list(process_chain)
 
-        map_list = self.module_output_log[0]["stdout"].strip()
+        map_list = self._get_module_stdout(0).strip()
+        g_region_adjust = self._setup_strds_region(map_list, g_region_query,
+                                                   options)
+
+        d_rast = {"id": "6",
+                  "module": "d.rast.multi",
+                  "inputs": [{"param": "map", "value": map_list}]}
 
+        pc = {
+            "version": 1,
+            "list": []
+        }
+        pc["list"].append(g_region_adjust)
+        pc["list"].append(d_rast)
+
+        process_list = self._validate_process_chain(
+            process_chain=pc, skip_permission_check=True)
+        self._execute_process_list(process_list)
+
+        self.module_results = result_file
+
+    def _setup_strds_region(self, map_list, g_region_query, options):
+        """Set the region to the cumulative region of the raster map layers
+        and the region settings of the options, and compute the resolution
+        that matches the image size
+
+        Args:
+            map_list (str): The comma separated raster map layers
+            g_region_query (dict): The g.region process chain entry of
+                                   _setup_render_environment_and_region()
+            options (dict): The render options
+
+        Returns:
+            dict:
+            The g.region process chain entry that sets the resolution
+
+        """
         g_region = {"id": "2",
                     "module": "g.region",
                     "inputs": [{"param": "raster", "value": map_list}],
@@ -275,7 +320,7 @@ class EphemeralSTRDSRenderer(EphemeralRendererBase):
         self._execute_process_list(process_list)
 
         # Compute the cell size for visualization
-        region_settings = self.module_output_log[2]["stdout"].strip()
+        region_settings = self._get_module_stdout(2).strip()
         param_list = region_settings.split()
         n = 0
         s = 0
@@ -302,20 +347,4 @@ class EphemeralSTRDSRenderer(EphemeralRendererBase):
                            "inputs": [{"param": "ewres", "value": "%f" % ewres},
                                       {"param": "nsres", "value": "%f" % nsres}],
                            "flags": "g"}
-
-        d_rast = {"id": "6",
-                  "module": "d.rast.multi",
-                  "inputs": [{"param": "map", "value": map_list}]}
-
-        pc = {
-            "version": 1,
-            "list": []
-        }
-        pc["list"].append(g_region_adjust)
-        pc["list"].append(d_rast)
-
-        process_list = self._validate_process_chain(
-            process_chain=pc, skip_permission_check=True)
-        self._execute_process_list(process_list)
-
-        self.module_results = result_file
+        return g_region_adjust
@@ -32,6 +32,7 @@ from flask import g, abort
 from actinia_core.core.common.config import global_config
 from actinia_core.core.common.app import auth
 from actinia_core.core.common.user import ActiniaUser
+from actinia_core.core.common.credential_cache import credential_cache
 from actinia_core.core.messages_logger import MessageLogger
 
 __license__ = "GPLv3"
@@ -50,6 +51,13 @@ def verify_password(username_or_token, password):
     This function is called by the
     @auth.login_required decorator.
 
+    Successful user name and password verifications are cached for
+    CREDENTIAL_CACHE_TTL seconds, see credential_cache.
+
+    The credentials of the user are read with a single database request
+    and stored as immutable snapshot in the user object g.user, that is
+    used by all decorators and resources of the request.
+
     Args:
         username_or_token (str): The username or an authentication token
         password (str): The optional user password, not required in case of token
@@ -58,6 +66,20 @@ def verify_password(username_or_token, password):
         bool: True if authorized or False if not
 
     """
+    # Recently verified user name and password, the password hash is part of
+    # the cache key so that passwords changed by other server processes are
+    # verified again
+    password_user = None
+    if password:
+        password_user = ActiniaUser(user_id=username_or_token)
+        # The user may have been deleted by another server process
+        if (password_user.load_credentials() is not None
+                and credential_cache.get(
+                    username_or_token, password,
+                    password_user.get_password_hash()) is True):
+            g.user = password_user
+            return True
+
     # first try to authenticate by token
     user = ActiniaUser.verify_auth_token(username_or_token)
 
@@ -65,10 +87,17 @@ def verify_password(username_or_token, password):
         user = ActiniaUser.verify_api_key(username_or_token)
 
     if not user:
-        # try to authenticate with username/password
-        user = ActiniaUser(user_id=username_or_token)
-        if not user.exists() or not user.verify_password(password):
+        # try to authenticate with username/password, the credentials
+        # were already read for the cache lookup
+        user = password_user
+        if user is None:
+            user = ActiniaUser(user_id=username_or_token)
+            user.load_credentials()
+        if (user.credentials is None
+                or not user.verify_password(password)):
             return False
+        credential_cache.put(username_or_token, password,
+                             user.get_password_hash())
     # Store the user globally
     g.user = user
     return True
@@ -89,6 +118,7 @@ def create_dummy_user(f):
         # Set a default user
         g.user = ActiniaUser(user_id=global_config.DEFAULT_USER,
                              user_group=global_config.DEFAULT_USER_GROUP)
+        g.user.load_credentials()
 
         return f(*args, **kwargs)
     return decorated_function
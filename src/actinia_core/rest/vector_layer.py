@@ -34,6 +34,7 @@ from actinia_core.models.response_models import \
     ProcessingResponseModel, ProcessingErrorResponseModel
 from actinia_core.core.common.exceptions import AsyncProcessError
 from .map_layer_base import MapLayerRegionResourceBase
+from .resource_base import get_metadata_reader
 from actinia_core.models.openapi.vector_layer import \
      VectorInfoResponseModel, VectorRegionCreationModel, \
      VectorAttributeModel, VectorInfoModel
@@ -98,6 +99,20 @@ class VectorLayerResource(MapLayerRegionResourceBase):
     def get(self, location_name, mapset_name, vector_name):
         """Get information about an existing vector map layer.
         """
+        map_id = vector_name + "@" + mapset_name
+        response = self.get_metadata_response(
+            lambda: self._read_vector_info(location_name, mapset_name,
+                                           vector_name),
+            process_chain={"1": {"module": "v.info", "inputs": {"map": map_id},
+                                 "flags": "gte"},
+                           "2": {"module": "v.info", "inputs": {"map": map_id},
+                                 "flags": "h"},
+                           "3": {"module": "v.info", "inputs": {"map": map_id},
+                                 "flags": "c"}},
+            response_model_class=VectorInfoResponseModel)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -111,6 +126,17 @@ class VectorLayerResource(MapLayerRegionResourceBase):
 
         return make_response(jsonify(response_model), http_code)
 
+    def _read_vector_info(self, location_name, mapset_name, vector_name):
+        """Read the vector map layer information from the mapset files
+        """
+        mapset_path = self.get_mapset_path(location_name, mapset_name)
+        permanent_path = self.get_mapset_path(location_name, "PERMANENT")
+        vector_info = get_metadata_reader().vector_info(
+            mapset_path, vector_name, permanent_path=permanent_path)
+        vector_info["Attributes"] = [VectorAttributeModel(**dt_dict) for dt_dict
+                                     in vector_info["Attributes"]]
+        return VectorInfoModel(**vector_info)
+
     @swagger.doc({
         'tags': ['Vector Management'],
         'description': 'Delete an existing vector map layer. '
@@ -281,7 +307,7 @@ class EphemeralVectorInfo(EphemeralProcessing):
             process_chain=pc, skip_permission_check=True)
         self._execute_process_list(process_list)
 
-        kv_list = self.module_output_log[0]["stdout"].split("\n")
+        kv_list = self._get_module_stdout(0).split("\n")
 
         vector_info = {}
         # Regular metadata
@@ -290,14 +316,14 @@ class EphemeralVectorInfo(EphemeralProcessing):
                 k, v = string.split("=", 1)
                 vector_info[k] = v
 
-        kv_list = self.module_output_log[1]["stdout"].split("\n")
+        kv_list = self._get_module_stdout(1).split("\n")
         # Command that created the vector
         for string in kv_list:
             if "COMMAND:" in string:
                 k, v = string.split(":", 1)
                 vector_info[k] = v
 
-        datatypes = self.module_output_log[2]["stdout"].split("\n")
+        datatypes = self._get_module_stdout(2).split("\n")
 
         # Datatype of the vector table
         attr_list = []
@@ -424,7 +450,7 @@ class PersistentVectorCreator(PersistentProcessing):
         self._execute_process_list(pc_1)
 
         # check if vector exists
-        raster_list = self.module_output_log[0]["stdout"].split("\n")
+        raster_list = self._get_module_stdout(0).split("\n")
 
         if len(raster_list[0]) > 0:
             raise AsyncProcessError("Vector layer <%s> exists." % vector_name)
@@ -27,9 +27,7 @@ Raster map renderer
 """
 
 import tempfile
-import os
 from flask_restful_swagger_2 import swagger
-from flask import jsonify, make_response, Response
 from .ephemeral_processing import EphemeralProcessing
 from actinia_core.core.common.redis_interface import enqueue_job
 from .renderer_base import RendererBaseResource, EphemeralRendererBase
@@ -148,6 +146,12 @@ class SyncEphemeralVectorRendererResource(RendererBaseResource):
         if isinstance(options, dict) is False:
             return options
 
+        cache_key = self.get_render_cache_key(
+            location_name, mapset_name, "vector", options, vectors=[vector_name])
+        response = self.get_cached_image_response(cache_key)
+        if response is not None:
+            return response
+
         rdc = self.preprocess(has_json=False, has_xml=False,
                               location_name=location_name,
                               mapset_name=mapset_name,
@@ -158,16 +162,7 @@ class SyncEphemeralVectorRendererResource(RendererBaseResource):
         enqueue_job(self.job_timeout, start_job, rdc)
 
         http_code, response_model = self.wait_until_finish(0.05)
-        if http_code == 200:
-            result_file = response_model["process_results"]
-            # Open the image file, read it and then delete it
-            if result_file:
-                if os.path.isfile(result_file):
-                    image = open(result_file, "rb").read()
-                    os.remove(result_file)
-                    return Response(image, mimetype='image/png')
-
-        return make_response(jsonify(response_model), http_code)
+        return self.get_render_response(http_code, response_model, cache_key)
 
 
 def start_job(*args):
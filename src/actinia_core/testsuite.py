@@ -142,22 +142,12 @@ class ActiniaTestCaseBase(unittest.TestCase):
             global_config.REDIS_QUEUE_SERVER_URL = "localhost"
             global_config.REDIS_QUEUE_SERVER_PORT = 6379
             global_config.NUMBER_OF_WORKERS = 3
-            # Create the job queue
-            # redis_interface.create_job_queues(
-            #     global_config.REDIS_QUEUE_SERVER_URL,
-            #     global_config.REDIS_QUEUE_SERVER_PORT,
-            #     global_config.NUMBER_OF_WORKERS)
 
         # If the custom_actinia_cfg variable is set, then the actinia config
         # file will be read to configure Redis queue
         if cls.server_test is False and cls.custom_actinia_cfg is not False:
             global_config.read(cls.custom_actinia_cfg)
 
-            # Create the job queue
-            # redis_interface.create_job_queues(global_config.REDIS_QUEUE_SERVER_URL,
-            #                                  global_config.REDIS_QUEUE_SERVER_PORT,
-            #                                  global_config.NUMBER_OF_WORKERS)
-
         # Start the redis interface
         redis_args = (global_config.REDIS_SERVER_URL, global_config.REDIS_SERVER_PORT)
         if global_config.REDIS_SERVER_PW and global_config.REDIS_SERVER_PW is not None:
@@ -165,8 +155,12 @@ class ActiniaTestCaseBase(unittest.TestCase):
 
         redis_interface.connect(*redis_args)
 
-        # Process queue
-        create_process_queue(config=global_config)
+        # Process queue, the redis job queue requires running actinia-worker
+        # processes
+        if global_config.QUEUE_TYPE == "redis":
+            redis_interface.create_job_queues(global_config)
+        else:
+            create_process_queue(config=global_config)
 
         # We create 4 user for all roles: guest, user, admin, root
         accessible_datasets = {"nc_spm_08": ["PERMANENT",
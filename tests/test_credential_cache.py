@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Cache of verified user credentials
+
+The user tests use fakeredis if it is installed, otherwise a local redis
+server is required.
+"""
+import time
+import unittest
+from unittest import mock
+from flask import Flask
+from passlib.apps import custom_app_context as pwd_context
+from actinia_core.core.common.credential_cache import CredentialCache, \
+    credential_cache
+from actinia_core.core.common.user import ActiniaUser
+from actinia_core.core.redis_user import redis_user_interface
+from actinia_core.rest.user_auth import verify_password
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class CredentialCacheTestCase(unittest.TestCase):
+    """
+    This class tests the expiration, the size limit and the invalidation of
+    cached credentials
+    """
+
+    def test_expiration(self):
+        cache = CredentialCache(ttl=0.1, max_size=10)
+        self.assertFalse(cache.get("user", "secret", "hash"))
+        cache.put("user", "secret", "hash")
+        self.assertTrue(cache.get("user", "secret", "hash"))
+        self.assertFalse(cache.get("user", "wrong", "hash"))
+        self.assertFalse(cache.get("other_user", "secret", "hash"))
+        time.sleep(0.15)
+        self.assertFalse(cache.get("user", "secret", "hash"))
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled(self):
+        cache = CredentialCache(ttl=0, max_size=10)
+        cache.put("user", "secret", "hash")
+        self.assertFalse(cache.get("user", "secret", "hash"))
+        # Empty passwords are never cached
+        cache = CredentialCache(ttl=10, max_size=10)
+        cache.put("user", "", "hash")
+        self.assertFalse(cache.get("user", "", "hash"))
+
+    def test_size_limit(self):
+        cache = CredentialCache(ttl=10, max_size=3)
+        for i in range(3):
+            cache.put("user_%i" % i, "secret", "hash")
+        # The least recently used entry is removed
+        self.assertTrue(cache.get("user_0", "secret", "hash"))
+        cache.put("user_3", "secret", "hash")
+        self.assertEqual(len(cache), 3)
+        self.assertFalse(cache.get("user_1", "secret", "hash"))
+        self.assertTrue(cache.get("user_0", "secret", "hash"))
+
+    def test_invalidate(self):
+        cache = CredentialCache(ttl=10, max_size=10)
+        cache.put("user", "secret", "hash")
+        cache.put("user", "old_secret", "hash")
+        cache.put("other_user", "secret", "hash")
+        cache.invalidate("user")
+        self.assertFalse(cache.get("user", "secret", "hash"))
+        self.assertFalse(cache.get("user", "old_secret", "hash"))
+        self.assertTrue(cache.get("other_user", "secret", "hash"))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+class VerifyPasswordCacheTestCase(unittest.TestCase):
+    """
+    This class tests the credential cache in the password verification
+    """
+    user_id = "credential_cache_user"
+    password = "credential_cache_password"
+
+    def setUp(self):
+        self.redis_server = redis_user_interface.redis_server
+        if fakeredis is not None:
+            redis_user_interface.redis_server = fakeredis.FakeStrictRedis()
+        elif self.redis_server is None:
+            redis_user_interface.connect()
+        credential_cache.invalidate()
+        ActiniaUser.create_user(self.user_id, "group", self.password)
+        self.app = Flask(__name__)
+
+    def tearDown(self):
+        ActiniaUser(self.user_id).delete()
+        credential_cache.invalidate()
+        redis_user_interface.redis_server = self.redis_server
+
+    def verify(self, password):
+        with self.app.test_request_context():
+            return verify_password(self.user_id, password)
+
+    def is_cached(self, password):
+        return credential_cache.get(self.user_id, password,
+                                    ActiniaUser(self.user_id).get_password_hash())
+
+    def test_invalidation(self):
+        self.assertTrue(self.verify(self.password))
+        self.assertFalse(self.verify("wrong password"))
+        self.assertTrue(self.is_cached(self.password))
+
+        # Changing the password removes the cached verification
+        user = ActiniaUser(self.user_id)
+        user.read_from_db()
+        user.hash_password("new password")
+        user.update()
+        self.assertFalse(self.is_cached(self.password))
+        self.assertFalse(self.verify(self.password))
+        self.assertTrue(self.verify("new password"))
+
+        # Deleting the user removes the cached verification
+        ActiniaUser(self.user_id).delete()
+        self.assertFalse(self.verify("new password"))
+
+    def test_password_changed_by_other_process(self):
+        self.assertTrue(self.verify(self.password))
+        self.assertEqual(len(credential_cache), 1)
+
+        # Another server process changes the password, only the credential
+        # cache of this process is invalidated
+        other_cache = CredentialCache(ttl=10, max_size=10)
+        with mock.patch("actinia_core.core.common.user.credential_cache",
+                        other_cache):
+            user = ActiniaUser(self.user_id)
+            user.read_from_db()
+            user.hash_password("new password")
+            user.update()
+        self.assertEqual(len(credential_cache), 1)
+
+        # The cached verification does not match the new password hash
+        self.assertFalse(self.verify(self.password))
+        self.assertTrue(self.verify("new password"))
+        self.assertTrue(self.is_cached("new password"))
+
+    def test_benchmark(self):
+        num = 3
+        credential_cache.invalidate()
+        start = time.time()
+        for i in range(num):
+            self.assertTrue(self.verify(self.password))
+            credential_cache.invalidate()
+        uncached = (time.time() - start) / num
+
+        self.assertTrue(self.verify(self.password))
+        start = time.time()
+        for i in range(num):
+            self.assertTrue(self.verify(self.password))
+        cached = (time.time() - start) / num
+
+        print("Authentication per request: %.2f ms without cache, %.3f ms "
+              "with cache (%s)" % (uncached * 1000, cached * 1000,
+                                   pwd_context.default_scheme()))
+        self.assertLess(cached, uncached)
+
+
+if __name__ == '__main__':
+    unittest.main()
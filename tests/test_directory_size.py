@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Incremental directory size tracking
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from actinia_core.core.directory_size import DirectorySizeTracker, \
+    get_directory_size, has_inotify
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def write_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def create_raster(mapset_path, name, size=100):
+    """Create the files of a raster map layer like GRASS does"""
+    write_file(os.path.join(mapset_path, "cell", name), size)
+    write_file(os.path.join(mapset_path, "cellhd", name), 20)
+    write_file(os.path.join(mapset_path, "cell_misc", name, "range"), 10)
+
+
+class DirectorySizeTrackerTestCase(unittest.TestCase):
+    """
+    This class tests that the tracked size is equal to the size of a full
+    directory walk after each change
+    """
+
+    def setUp(self):
+        self.mapset_path = tempfile.mkdtemp(prefix="mapset_")
+        write_file(os.path.join(self.mapset_path, "WIND"), 200)
+
+    def tearDown(self):
+        shutil.rmtree(self.mapset_path, ignore_errors=True)
+
+    def check_changes(self, tracker):
+        def check():
+            self.assertEqual(tracker.get_size(),
+                             get_directory_size(self.mapset_path))
+
+        check()
+        create_raster(self.mapset_path, "elevation")
+        check()
+        # Modify a file in place
+        with open(os.path.join(self.mapset_path, "cell", "elevation"), "ab") as f:
+            f.write(b"y" * 50)
+        check()
+        # Create, rename and remove vector map layer directories
+        write_file(os.path.join(self.mapset_path, "vector", "roads", "coor"), 300)
+        check()
+        os.rename(os.path.join(self.mapset_path, "vector", "roads"),
+                  os.path.join(self.mapset_path, "vector", "streets"))
+        write_file(os.path.join(self.mapset_path, "vector", "streets", "topo"), 40)
+        check()
+        shutil.rmtree(os.path.join(self.mapset_path, "vector"))
+        check()
+        os.remove(os.path.join(self.mapset_path, "cell", "elevation"))
+        check()
+        tracker.close()
+
+    @unittest.skipIf(has_inotify is False, "inotify is not available")
+    def test_inotify(self):
+        tracker = DirectorySizeTracker(self.mapset_path)
+        self.assertTrue(tracker.incremental)
+        self.check_changes(tracker)
+
+    def test_walk(self):
+        tracker = DirectorySizeTracker(self.mapset_path, use_inotify=False)
+        self.assertFalse(tracker.incremental)
+        self.check_changes(tracker)
+
+    def test_benchmark(self):
+        num_maps = 2000
+        for i in range(num_maps):
+            create_raster(self.mapset_path, "map_%i" % i)
+
+        steps = 20
+        trackers = [("walk", DirectorySizeTracker(self.mapset_path,
+                                                  use_inotify=False))]
+        if has_inotify is True:
+            trackers.append(("inotify", DirectorySizeTracker(self.mapset_path)))
+
+        for name, tracker in trackers:
+            start = time.time()
+            for step in range(steps):
+                # Each step creates a new raster map layer
+                create_raster(self.mapset_path, "%s_step_%i" % (name, step))
+                size = tracker.get_size()
+            step_time = (time.time() - start) / steps
+            self.assertEqual(size, get_directory_size(self.mapset_path))
+            print("Mapset size tracking %s with %i map layers: %.2f ms per step"
+                  % (name, num_maps, step_time * 1000))
+            tracker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
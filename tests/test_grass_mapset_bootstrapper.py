@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Native mapset creation compared with the GRASS GIS modules
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from actinia_core.core.common.config import global_config
+from actinia_core.core.grass_init import GrassInitError, GrassInitializer, \
+    GrassMapsetBootstrapper, format_region, read_region
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The DEFAULT_WIND file of the nc_spm_08 location and the WIND file that
+# g.mapset -c creates from it
+NC_DEFAULT_WIND = """proj:       99
+zone:       0
+north:      320000
+south:      10000
+east:       935000
+west:       120000
+cols:       1630
+rows:       620
+e-w resol:  500
+n-s resol:  500
+top:        1.000000000000000
+bottom:     0.000000000000000
+cols3:      1630
+rows3:      620
+depths:     1
+e-w resol3: 500
+n-s resol3: 500
+t-b resol:  1
+"""
+
+# A 2D region header and the adjusted WIND file that GRASS GIS writes
+REGION_2D = """proj: 1
+zone: 17
+north: 228500.0
+south: 215000
+east: 645000
+west: 630000
+e-w resol: 10.000
+n-s resol: 20
+"""
+
+NORMALIZED_REGION_2D = """proj:       1
+zone:       17
+north:      228500
+south:      215000
+east:       645000
+west:       630000
+cols:       1500
+rows:       675
+e-w resol:  10
+n-s resol:  20
+top:        1.000000000000000
+bottom:     0.000000000000000
+cols3:      1500
+rows3:      675
+depths:     1
+e-w resol3: 10
+n-s resol3: 20
+t-b resol:  1
+"""
+
+# A latitude-longitude region of the ECA&D location
+LL_REGION = """proj:       3
+zone:       0
+north:      75:30N
+south:      25:15N
+east:       75:30E
+west:       40:30W
+cols:       464
+rows:       201
+e-w resol:  0:15
+n-s resol:  0:15
+top:        1.000000000000000
+bottom:     0.000000000000000
+cols3:      464
+rows3:      201
+depths:     1
+e-w resol3: 0:15
+n-s resol3: 0:15
+t-b resol:  1
+"""
+
+DB_DATABASE = "$GISDBASE/$LOCATION_NAME/$MAPSET/vector/$MAP/sqlite.db"
+
+
+def has_grass():
+    return os.path.isfile(os.path.join(global_config.GRASS_GIS_BASE, "bin",
+                                       "g.mapset"))
+
+
+class GrassMapsetBootstrapperTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.gisdbase = tempfile.mkdtemp()
+        self.location_path = os.path.join(self.gisdbase, "nc_spm_08")
+        for mapset in ("PERMANENT", "user1", "landsat"):
+            os.makedirs(os.path.join(self.location_path, mapset))
+        with open(os.path.join(self.location_path, "PERMANENT",
+                               "DEFAULT_WIND"), "w") as f:
+            f.write(NC_DEFAULT_WIND)
+
+    def tearDown(self):
+        shutil.rmtree(self.gisdbase)
+
+    def read_file(self, mapset, name):
+        with open(os.path.join(self.location_path, mapset, name)) as f:
+            return f.read()
+
+    def test_region_format(self):
+        self.assertEqual(format_region(read_region(NC_DEFAULT_WIND)),
+                         NC_DEFAULT_WIND)
+        self.assertEqual(format_region(read_region(REGION_2D)),
+                         NORMALIZED_REGION_2D)
+        region = read_region(LL_REGION)
+        self.assertAlmostEqual(region["west"], -40.5)
+        self.assertAlmostEqual(region["ns_res"], 0.25)
+        self.assertEqual(format_region(region), LL_REGION)
+
+    def test_invalid_region(self):
+        self.assertRaises(GrassInitError, read_region, "proj: 99\n")
+        self.assertRaises(GrassInitError, read_region,
+                          REGION_2D.replace("215000", "238500"))
+        self.assertRaises(GrassInitError, read_region,
+                          REGION_2D.replace("10.000", "0"))
+
+    def test_create_mapset(self):
+        bootstrapper = GrassMapsetBootstrapper(self.gisdbase, "nc_spm_08",
+                                               "mapset_1")
+        bootstrapper.create_mapset()
+        bootstrapper.add_to_search_path(["landsat", "user1", "landsat"])
+        bootstrapper.set_db_connection("sqlite", DB_DATABASE)
+
+        self.assertEqual(self.read_file("mapset_1", "WIND"), NC_DEFAULT_WIND)
+        self.assertEqual(self.read_file("mapset_1", "SEARCH_PATH"),
+                         "mapset_1\nPERMANENT\nlandsat\nuser1\n")
+        self.assertEqual(self.read_file("mapset_1", "VAR"),
+                         "DB_DRIVER: sqlite\nDB_DATABASE: %s\n" % DB_DATABASE)
+
+        # An existing mapset is not modified
+        with open(os.path.join(self.location_path, "mapset_1", "WIND"), "w") as f:
+            f.write(REGION_2D)
+        bootstrapper.create_mapset()
+        self.assertEqual(self.read_file("mapset_1", "WIND"), REGION_2D)
+
+        self.assertRaises(GrassInitError, bootstrapper.add_to_search_path,
+                          ["missing"])
+
+    def test_update_settings(self):
+        os.makedirs(os.path.join(self.location_path, "mapset_1"))
+        with open(os.path.join(self.location_path, "mapset_1", "VAR"), "w") as f:
+            f.write("DB_DRIVER: dbf\nDB_SCHEMA: public\n")
+        with open(os.path.join(self.location_path, "mapset_1",
+                               "SEARCH_PATH"), "w") as f:
+            f.write("user1\nremoved\n")
+
+        bootstrapper = GrassMapsetBootstrapper(self.gisdbase, "nc_spm_08",
+                                               "mapset_1")
+        bootstrapper.add_to_search_path(["landsat"])
+        bootstrapper.set_db_connection("sqlite", DB_DATABASE)
+        self.assertEqual(self.read_file("mapset_1", "SEARCH_PATH"),
+                         "mapset_1\nuser1\nlandsat\n")
+        self.assertEqual(self.read_file("mapset_1", "VAR"),
+                         "DB_DRIVER: sqlite\nDB_SCHEMA: public\n"
+                         "DB_DATABASE: %s\n" % DB_DATABASE)
+
+    def test_missing_default_region(self):
+        os.remove(os.path.join(self.location_path, "PERMANENT", "DEFAULT_WIND"))
+        bootstrapper = GrassMapsetBootstrapper(self.gisdbase, "nc_spm_08",
+                                               "mapset_1")
+        self.assertRaises(GrassInitError, bootstrapper.create_mapset)
+        self.assertFalse(os.path.exists(os.path.join(self.location_path,
+                                                     "mapset_1")))
+
+    @unittest.skipIf(not has_grass(), "GRASS GIS is not installed")
+    def test_compare_with_modules(self):
+        """Create one mapset with the GRASS GIS modules and one natively and
+        compare the WIND, SEARCH_PATH and VAR files
+        """
+        for region in (REGION_2D, LL_REGION):
+            with open(os.path.join(self.location_path, "PERMANENT",
+                                   "DEFAULT_WIND"), "w") as f:
+                f.write(region)
+            with open(os.path.join(self.location_path, "PERMANENT",
+                                   "WIND"), "w") as f:
+                f.write(region)
+
+            ginit = GrassInitializer(self.gisdbase, global_config.GRASS_GIS_BASE,
+                                     "nc_spm_08", "PERMANENT",
+                                     config=global_config)
+            ginit.initialize()
+            start = time.time()
+            ginit.run_module("g.mapset", ["-c", "mapset=modules"])
+            ginit.run_module("g.mapsets", ["operation=add",
+                                           "mapset=landsat,user1"])
+            ginit.run_module("db.connect", ["driver=sqlite",
+                                            "database=%s" % DB_DATABASE])
+            module_time = time.time() - start
+            ginit.clean_up()
+
+            start = time.time()
+            bootstrapper = GrassMapsetBootstrapper(self.gisdbase, "nc_spm_08",
+                                                   "native")
+            bootstrapper.create_mapset()
+            bootstrapper.add_to_search_path(["landsat", "user1"])
+            bootstrapper.set_db_connection("sqlite", DB_DATABASE)
+            native_time = time.time() - start
+
+            print("GRASS GIS modules: %.3f ms, native: %.3f ms"
+                  % (module_time * 1000, native_time * 1000))
+            for name in ("WIND", "VAR"):
+                self.assertEqual(self.read_file("modules", name),
+                                 self.read_file("native", name))
+            self.assertEqual(self.read_file("modules", "SEARCH_PATH"),
+                             self.read_file("native", "SEARCH_PATH").replace(
+                                 "native", "modules"))
+            for mapset in ("modules", "native"):
+                shutil.rmtree(os.path.join(self.location_path, mapset))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Read-only access to the metadata of GRASS GIS mapsets
+"""
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+import unittest
+from actinia_core.core.common.exceptions import MetadataUnavailable
+from actinia_core.core.mapset_metadata import MapsetMetadataReader, is_legal_name
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+CELLHD = """proj:       99
+zone:       0
+north:      228500
+south:      215000
+east:       645000
+west:       630000
+cols:       1500
+rows:       1350
+e-w resol:  10
+n-s resol:  10
+format:     0
+compressed: 1
+"""
+
+HIST = """Mon Aug 16 12:00:00 2021
+elevation
+PERMANENT
+soeren
+raster
+generated by r.mapcalc
+source two
+elevation description
+first comment
+"""
+
+HEAD = """ORGANIZATION: NC OneMap
+DIGIT DATE:   2009
+DIGIT NAME:   helena
+MAP NAME:     Geology
+MAP DATE:     Sun Aug 16 12:00:00 2009
+MAP SCALE:    1
+OTHER INFO:
+PROJ:         99
+ZONE:         0
+MAP THRESH:   0.000000
+"""
+
+
+def write_file(path, content, mode="w"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode) as f:
+        f.write(content)
+
+
+def topo_header(with_z=0, counts=(6, 0, 10, 3, 3, 0, 0),
+                lines=(2, 3, 2, 3, 0, 0)):
+    """Create a little endian topo header of version 5.1"""
+    data = struct.pack("<5B", 5, 1, 5, 0, 0)
+    data += struct.pack("<iB", 142, with_z)
+    data += struct.pack("<6d", 228500.0, 215000.25, 645000.5, 630000.0, 0.0, 0.0)
+    data += struct.pack("<7i", *counts)
+    data += struct.pack("<6i", *lines)
+    return data + b"\0" * (142 - len(data))
+
+
+class MapsetMetadataTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.gisdbase = tempfile.mkdtemp()
+        self.location_path = os.path.join(self.gisdbase, "nc_spm_08")
+        self.permanent_path = os.path.join(self.location_path, "PERMANENT")
+        self.mapset_path = os.path.join(self.location_path, "user1")
+        for path in (self.permanent_path, self.mapset_path):
+            write_file(os.path.join(path, "WIND"), CELLHD)
+        write_file(os.path.join(self.permanent_path, "PROJ_INFO"),
+                   "name: Lambert Conformal Conic\nproj: lcc\n")
+        self.reader = MapsetMetadataReader(max_size=16)
+
+    def tearDown(self):
+        shutil.rmtree(self.gisdbase)
+
+    def create_raster(self, name, datatype="CELL"):
+        write_file(os.path.join(self.mapset_path, "cellhd", name), CELLHD)
+        write_file(os.path.join(self.mapset_path, "cell", name), "")
+        write_file(os.path.join(self.mapset_path, "cats", name),
+                   "# 12 categories\nElevation title \n\n0.00 0.00 0.00 0.00\n")
+        write_file(os.path.join(self.mapset_path, "hist", name), HIST)
+        misc_path = os.path.join(self.mapset_path, "cell_misc", name)
+        if datatype == "CELL":
+            write_file(os.path.join(misc_path, "range"), "-3 156\n")
+        else:
+            write_file(os.path.join(misc_path, "f_format"),
+                       "type: %s\nbyte_order: xdr\n"
+                       % ("double" if datatype == "DCELL" else "float"))
+            write_file(os.path.join(misc_path, "f_range"),
+                       struct.pack(">dd", 55.578792572021484, 156.32986450195312),
+                       mode="wb")
+        write_file(os.path.join(misc_path, "units"), "meters\n")
+
+    def create_vector(self, name):
+        vector_path = os.path.join(self.mapset_path, "vector", name)
+        write_file(os.path.join(vector_path, "head"), HEAD)
+        write_file(os.path.join(vector_path, "topo"), topo_header(), mode="wb")
+        write_file(os.path.join(vector_path, "hist"),
+                   "COMMAND: v.in.ogr input=geology.shp output=geology\n"
+                   "GISDBASE: /grassdata\n")
+        write_file(os.path.join(vector_path, "dbln"),
+                   "1/geology|geology|cat|$GISDBASE/$LOCATION_NAME/$MAPSET/"
+                   "sqlite/sqlite.db|sqlite\n")
+        database = os.path.join(self.mapset_path, "sqlite", "sqlite.db")
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+        connection = sqlite3.connect(database)
+        connection.execute("CREATE TABLE IF NOT EXISTS geology (cat integer, "
+                           "onemap_pro double precision, GEO_NAME "
+                           "varchar(10), SHAPE_area double)")
+        connection.commit()
+        connection.close()
+
+    def create_strds(self, names):
+        database = os.path.join(self.mapset_path, "tgis", "sqlite.db")
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+        connection = sqlite3.connect(database)
+        connection.execute("CREATE TABLE strds_base (id VARCHAR PRIMARY KEY, "
+                           "name VARCHAR, mapset VARCHAR, creator VARCHAR, "
+                           "temporal_type VARCHAR, creation_time TIMESTAMP, "
+                           "modification_time TIMESTAMP, semantic_type "
+                           "VARCHAR, revision SMALLINT)")
+        connection.execute("CREATE TABLE strds_absolute_time (id VARCHAR, "
+                           "start_time TIMESTAMP, end_time TIMESTAMP, "
+                           "granularity VARCHAR, map_time VARCHAR)")
+        connection.execute("CREATE TABLE strds_relative_time (id VARCHAR, "
+                           "start_time INTEGER, end_time INTEGER)")
+        connection.execute("CREATE TABLE strds_spatial_extent (id VARCHAR, "
+                           "north DOUBLE, south DOUBLE, east DOUBLE, "
+                           "west DOUBLE, top DOUBLE, bottom DOUBLE, proj "
+                           "VARCHAR)")
+        connection.execute("CREATE TABLE strds_metadata (id VARCHAR, "
+                           "raster_register VARCHAR, number_of_maps INTEGER, "
+                           "max_min DOUBLE, min_min DOUBLE, min_max DOUBLE, "
+                           "max_max DOUBLE, aggregation_type VARCHAR, "
+                           "title VARCHAR)")
+        connection.execute("CREATE VIEW strds_view_abs_time AS SELECT "
+                           "strds_base.id, name, mapset FROM strds_base, "
+                           "strds_absolute_time WHERE strds_base.id = "
+                           "strds_absolute_time.id")
+        connection.execute("CREATE VIEW strds_view_rel_time AS SELECT "
+                           "strds_base.id, name, mapset FROM strds_base, "
+                           "strds_relative_time WHERE strds_base.id = "
+                           "strds_relative_time.id")
+        for name in names:
+            strds_id = name + "@user1"
+            connection.execute(
+                "INSERT INTO strds_base VALUES (?, ?, 'user1', 'soeren', "
+                "'absolute', '2016-08-11 16:44:29.756411', "
+                "'2016-08-11 16:45:14.032432', 'mean', 1)", (strds_id, name))
+            connection.execute(
+                "INSERT INTO strds_absolute_time VALUES (?, "
+                "'1950-01-01 00:00:00', '2013-07-01 00:00:00', '1 month', "
+                "'interval')", (strds_id,))
+            connection.execute(
+                "INSERT INTO strds_spatial_extent VALUES (?, 75.5, 25.25, "
+                "75.5, -40.5, 0.0, 0.0, 'XY')", (strds_id,))
+            connection.execute(
+                "INSERT INTO strds_metadata VALUES (?, 'raster_map_register_1', "
+                "762, 168.9, 0.0, 3.2, 1076.9, NULL, 'title')", (strds_id,))
+        connection.commit()
+        connection.close()
+
+    def test_legal_name(self):
+        for name in ("elevation", "elevation.10m", "lsat7_2002_10", "a-b+c"):
+            self.assertTrue(is_legal_name(name), name)
+        for name in ("", ".", "..", ".hidden", "../elevation", "a/b", "a\\b",
+                     "a b", "elevation@PERMANENT", "a,b", "a=b", "h\u00f6he"):
+            self.assertFalse(is_legal_name(name), name)
+
+    def test_raster_info(self):
+        self.create_raster("elevation")
+        info = self.reader.raster_info(self.mapset_path, "elevation")
+        self.assertEqual(info["north"], "228500")
+        self.assertEqual(info["south"], "215000")
+        self.assertEqual(info["nsres"], "10")
+        self.assertEqual(info["ewres"], "10")
+        self.assertEqual(info["rows"], "1350")
+        self.assertEqual(info["cols"], "1500")
+        self.assertEqual(info["cells"], "2025000")
+        self.assertEqual(info["datatype"], "CELL")
+        self.assertEqual(info["ncats"], "12")
+        self.assertEqual(info["min"], "-3")
+        self.assertEqual(info["max"], "156")
+        self.assertEqual(info["map"], "elevation")
+        self.assertEqual(info["mapset"], "user1")
+        self.assertEqual(info["location"], "nc_spm_08")
+        self.assertEqual(info["database"], self.gisdbase)
+        self.assertEqual(info["title"], '"Elevation title"')
+        self.assertEqual(info["creator"], '"soeren"')
+        self.assertEqual(info["units"], '"meters"')
+        self.assertEqual(info["vdatum"], '"none"')
+        self.assertEqual(info["timestamp"], '"none"')
+        self.assertEqual(info["source1"], '"generated by r.mapcalc"')
+        self.assertEqual(info["description"], '"elevation description"')
+        self.assertEqual(info["comments"], '"first comment"')
+        self.assertNotIn("bandref", info)
+
+    def test_raster_info_floating_point(self):
+        self.create_raster("elev_fcell", datatype="FCELL")
+        self.create_raster("elev_dcell", datatype="DCELL")
+        info = self.reader.raster_info(self.mapset_path, "elev_fcell")
+        self.assertEqual(info["datatype"], "FCELL")
+        self.assertEqual(info["min"], "55.57879")
+        self.assertEqual(info["max"], "156.3299")
+        info = self.reader.raster_info(self.mapset_path, "elev_dcell")
+        self.assertEqual(info["datatype"], "DCELL")
+        self.assertEqual(info["min"], "55.5787925720215")
+
+    def test_raster_info_unavailable(self):
+        self.assertRaises(MetadataUnavailable, self.reader.raster_info,
+                          self.mapset_path, "missing")
+        self.create_raster("reclass")
+        write_file(os.path.join(self.mapset_path, "cellhd", "reclass"),
+                   "reclass\nname: elevation\nmapset: PERMANENT\n")
+        self.assertRaises(MetadataUnavailable, self.reader.raster_info,
+                          self.mapset_path, "reclass")
+        self.create_raster("linked")
+        write_file(os.path.join(self.mapset_path, "cell_misc", "linked",
+                                "gdal"), "file: /tmp/linked.tif\n")
+        self.assertRaises(MetadataUnavailable, self.reader.raster_info,
+                          self.mapset_path, "linked")
+
+    def test_raster_info_cache(self):
+        self.create_raster("elevation")
+        self.reader.raster_info(self.mapset_path, "elevation")
+
+        start = time.time()
+        for i in range(1000):
+            info = self.reader.raster_info(self.mapset_path, "elevation")
+        print("Cached raster info: %.3f ms per request" % (time.time() - start))
+        self.assertEqual(info["units"], '"meters"')
+
+        # The modification of a file invalidates the cached entry
+        write_file(os.path.join(self.mapset_path, "cell_misc", "elevation",
+                                "units"), "feet\n")
+        info = self.reader.raster_info(self.mapset_path, "elevation")
+        self.assertEqual(info["units"], '"feet"')
+        # Returned values are copies
+        info["units"] = "modified"
+        info = self.reader.raster_info(self.mapset_path, "elevation")
+        self.assertEqual(info["units"], '"feet"')
+
+    def test_list_maps(self):
+        self.create_raster("elevation")
+        self.create_raster("elev_fcell", datatype="FCELL")
+        self.create_raster("aspect")
+        self.create_vector("geology")
+        self.assertEqual(self.reader.list_maps(self.mapset_path, "raster"),
+                         ["aspect", "elev_fcell", "elevation"])
+        self.assertEqual(self.reader.list_maps(self.mapset_path, "raster",
+                                               pattern="elev*"),
+                         ["elev_fcell", "elevation"])
+        self.assertEqual(self.reader.list_maps(self.mapset_path, "vector"),
+                         ["geology"])
+        self.assertEqual(self.reader.list_maps(self.permanent_path, "vector"),
+                         [])
+        self.create_raster("slope")
+        self.assertEqual(self.reader.list_maps(self.mapset_path, "raster"),
+                         ["aspect", "elev_fcell", "elevation", "slope"])
+        self.assertRaises(MetadataUnavailable, self.reader.list_maps,
+                          self.mapset_path, "raster", pattern="{a,e}*")
+        self.assertRaises(MetadataUnavailable, self.reader.list_maps,
+                          self.mapset_path, "raster_3d")
+
+    def test_list_mapsets(self):
+        self.assertEqual(self.reader.list_mapsets(self.location_path),
+                         ["PERMANENT", "user1"])
+        os.mkdir(os.path.join(self.location_path, "invalid"))
+        self.assertRaises(MetadataUnavailable, self.reader.list_mapsets,
+                          self.location_path)
+
+    def test_vector_info(self):
+        self.create_vector("geology")
+        info = self.reader.vector_info(self.mapset_path, "geology",
+                                       permanent_path=self.permanent_path)
+        self.assertEqual(info["north"], "228500")
+        self.assertEqual(info["south"], "215000.25")
+        self.assertEqual(info["east"], "645000.5")
+        self.assertEqual(info["nodes"], "6")
+        self.assertEqual(info["points"], "2")
+        self.assertEqual(info["lines"], "3")
+        self.assertEqual(info["boundaries"], "2")
+        self.assertEqual(info["centroids"], "3")
+        self.assertEqual(info["areas"], "3")
+        self.assertEqual(info["islands"], "3")
+        self.assertEqual(info["primitives"], "10")
+        self.assertEqual(info["map3d"], "0")
+        self.assertNotIn("faces", info)
+        self.assertEqual(info["organization"], "NC OneMap")
+        self.assertEqual(info["creator"], "helena")
+        self.assertEqual(info["title"], "Geology")
+        self.assertEqual(info["scale"], "1:1")
+        self.assertEqual(info["comment"], "")
+        self.assertEqual(info["projection"], "Lambert Conformal Conic")
+        self.assertEqual(info["digitization_threshold"], "0.000000")
+        self.assertEqual(info["num_dblinks"], "1")
+        self.assertEqual(info["attribute_layer_name"], "geology")
+        self.assertEqual(info["attribute_database"],
+                         os.path.join(self.mapset_path, "sqlite", "sqlite.db"))
+        self.assertEqual(info["COMMAND"],
+                         " v.in.ogr input=geology.shp output=geology")
+        self.assertEqual(info["Attributes"],
+                         [{"type": "INTEGER", "column": "cat"},
+                          {"type": "DOUBLE PRECISION", "column": "onemap_pro"},
+                          {"type": "CHARACTER", "column": "GEO_NAME"},
+                          {"type": "DOUBLE PRECISION", "column": "SHAPE_area"}])
+
+    def test_vector_info_unavailable(self):
+        self.create_vector("geology")
+        os.remove(os.path.join(self.mapset_path, "vector", "geology", "topo"))
+        self.assertRaises(MetadataUnavailable, self.reader.vector_info,
+                          self.mapset_path, "geology", self.permanent_path)
+        self.create_vector("no_table")
+        os.remove(os.path.join(self.mapset_path, "vector", "no_table", "dbln"))
+        self.assertRaises(MetadataUnavailable, self.reader.vector_info,
+                          self.mapset_path, "no_table", self.permanent_path)
+
+    def test_strds(self):
+        self.assertEqual(self.reader.list_strds(self.mapset_path), [])
+        self.create_strds(["precipitation", "temperature"])
+        self.assertEqual(self.reader.list_strds(self.mapset_path),
+                         ["precipitation", "temperature"])
+        info = self.reader.strds_info(self.mapset_path, "precipitation")
+        self.assertEqual(info["id"], "precipitation@user1")
+        self.assertEqual(info["temporal_type"], "absolute")
+        self.assertEqual(info["creation_time"], "2016-08-11 16:44:29.756411")
+        self.assertEqual(info["start_time"], "1950-01-01 00:00:00")
+        self.assertEqual(info["granularity"], "1 month")
+        self.assertEqual(info["number_of_maps"], "762")
+        self.assertEqual(info["max_max"], "1076.9")
+        self.assertEqual(info["aggregation_type"], "None")
+        self.assertRaises(MetadataUnavailable, self.reader.strds_info,
+                          self.mapset_path, "missing")
+        write_file(os.path.join(self.mapset_path, "VAR"),
+                   "TGISDB_DRIVER: pg\nTGISDB_DATABASE: dbname=tgis\n")
+        self.assertRaises(MetadataUnavailable, self.reader.list_strds,
+                          self.mapset_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
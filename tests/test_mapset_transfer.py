@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Storage aware transfer of mapsets
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from actinia_core.core.mapset_transfer import MapsetTransfer, reflink_file
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# The tmpfs that is used as second filesystem
+TMPFS = "/dev/shm"
+
+
+def has_second_filesystem():
+    return os.path.isdir(TMPFS) and \
+        os.stat(TMPFS).st_dev != os.stat(tempfile.gettempdir()).st_dev
+
+
+def create_mapset(mapset_path, num_maps=3, size=1024):
+    """Create a mapset with raster maps, a vector map and a symbolic link"""
+    for element in ("cell", "cellhd", "fcell", "vector/roads"):
+        os.makedirs(os.path.join(mapset_path, element))
+    for i in range(num_maps):
+        for element in ("cell", "cellhd"):
+            with open(os.path.join(mapset_path, element, "map_%i" % i), "wb") as f:
+                f.write(os.urandom(size))
+    with open(os.path.join(mapset_path, "vector", "roads", "coor"), "wb") as f:
+        f.write(os.urandom(size))
+    with open(os.path.join(mapset_path, "VAR"), "w") as f:
+        f.write("DB_DRIVER: sqlite\n")
+    os.symlink("coor", os.path.join(mapset_path, "vector", "roads", "link"))
+
+
+def read_tree(path):
+    """Return the relative paths and the contents of the files of a tree"""
+    content = {}
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if os.path.islink(file_path):
+                content[os.path.relpath(file_path, path)] = os.readlink(file_path)
+            else:
+                with open(file_path, "rb") as f:
+                    content[os.path.relpath(file_path, path)] = f.read()
+    return content
+
+
+class MapsetTransferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.source = os.path.join(self.base, "source")
+        create_mapset(self.source)
+        self.expected = read_tree(self.source)
+        self.tmpfs_base = None
+        if has_second_filesystem():
+            self.tmpfs_base = tempfile.mkdtemp(dir=TMPFS)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+        if self.tmpfs_base is not None:
+            shutil.rmtree(self.tmpfs_base)
+
+    def test_move_rename(self):
+        transfer = MapsetTransfer()
+        target = os.path.join(self.base, "target")
+        transfer.move(self.source, target)
+        self.assertFalse(os.path.exists(self.source))
+        self.assertEqual(read_tree(target), self.expected)
+        self.assertEqual(transfer.statistics["renamed"], 1)
+        self.assertTrue(os.path.islink(os.path.join(target, "vector", "roads",
+                                                    "link")))
+        self.assertRaises(FileExistsError, transfer.move, target, target)
+
+    @unittest.skipIf(not has_second_filesystem(), "No second filesystem")
+    def test_move_cross_device(self):
+        progress = []
+        transfer = MapsetTransfer(progress_callback=lambda done, total:
+                                  progress.append((done, total)),
+                                  progress_interval=0)
+        target = os.path.join(self.tmpfs_base, "target")
+        transfer.move(self.source, target)
+        self.assertFalse(os.path.exists(self.source))
+        self.assertEqual(read_tree(target), self.expected)
+        self.assertEqual(transfer.statistics["renamed"], 0)
+        self.assertEqual(transfer.statistics["copied"]
+                         + transfer.statistics["reflinked"], 8)
+        total = 7 * 1024 + len("DB_DRIVER: sqlite\n")
+        self.assertEqual(progress[-1], (total, total))
+        self.assertEqual(len(progress), 9)
+
+    def test_link_replaces_files(self):
+        target = os.path.join(self.base, "target")
+        create_mapset(target, num_maps=5)
+        # A file of the target that is hardlinked with another mapset
+        shared = os.path.join(self.base, "shared_map")
+        os.link(os.path.join(target, "cell", "map_0"), shared)
+        with open(shared, "rb") as f:
+            shared_content = f.read()
+
+        transfer = MapsetTransfer()
+        transfer.link(os.path.join(self.source, "cell"),
+                      os.path.join(target, "cell"))
+        transfer.link(os.path.join(self.source, "VAR"),
+                      os.path.join(target, "VAR"))
+        self.assertEqual(transfer.statistics["linked"], 4)
+        self.assertEqual(os.stat(os.path.join(target, "cell", "map_0")).st_ino,
+                         os.stat(os.path.join(self.source, "cell", "map_0")).st_ino)
+        self.assertTrue(os.path.exists(os.path.join(target, "cell", "map_4")))
+        with open(shared, "rb") as f:
+            self.assertEqual(f.read(), shared_content)
+
+    def test_copy(self):
+        target = os.path.join(self.base, "target")
+        transfer = MapsetTransfer(num_threads=1, use_reflink=False)
+        transfer.copy(self.source, target)
+        self.assertEqual(read_tree(target), self.expected)
+        self.assertEqual(transfer.statistics["copied"], 8)
+        self.assertNotEqual(os.stat(os.path.join(target, "VAR")).st_ino,
+                            os.stat(os.path.join(self.source, "VAR")).st_ino)
+
+    @unittest.skipIf(not has_second_filesystem(), "No second filesystem")
+    def test_link_cross_device(self):
+        target = os.path.join(self.tmpfs_base, "target")
+        transfer = MapsetTransfer()
+        transfer.link(self.source, target)
+        self.assertEqual(read_tree(target), self.expected)
+        self.assertEqual(transfer.statistics["linked"], 0)
+
+    def test_benchmark(self):
+        """Compare the transfer strategies with cp -fr for a mapset of 64 MB"""
+        create_mapset(os.path.join(self.base, "large"), num_maps=32,
+                      size=1048576)
+        source = os.path.join(self.base, "large")
+        targets = [self.base]
+        if self.tmpfs_base is not None:
+            targets.append(self.tmpfs_base)
+
+        try:
+            reflink_file(os.path.join(self.source, "VAR"),
+                         os.path.join(self.base, "reflink"))
+            has_reflink = True
+        except OSError:
+            has_reflink = False
+
+        strategies = [("cp -fr", lambda s, t: subprocess.run(
+                          ["/bin/cp", "-fr", s, t], check=True)),
+                      ("copy 1 thread", MapsetTransfer(
+                          num_threads=1, use_reflink=False).copy),
+                      ("copy 4 threads", MapsetTransfer(
+                          num_threads=4, use_reflink=False).copy),
+                      ("link", MapsetTransfer(use_reflink=False).link)]
+        if has_reflink:
+            strategies.append(("reflink", MapsetTransfer().copy))
+
+        for base in targets:
+            for name, func in strategies:
+                target = os.path.join(base, "benchmark")
+                start = time.time()
+                func(source, target)
+                seconds = time.time() - start
+                self.assertEqual(len(os.listdir(os.path.join(target, "cell"))),
+                                 32)
+                print("%s to %s: %.1f MB/s" % (name, base, 64 / seconds))
+                shutil.rmtree(target)
+
+        start = time.time()
+        MapsetTransfer().move(source, os.path.join(self.base, "moved"))
+        print("rename: %.3f ms" % ((time.time() - start) * 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Render raster maps directly from the files of a mapset
+"""
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+import zlib
+import numpy as np
+from actinia_core.core.common.exceptions import RenderUnavailable
+from actinia_core.core.native_renderer import render_raster, render_rgb, \
+    render_shade
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+CELLHD = """proj:       99
+zone:       0
+north:      %(north)s
+south:      0
+east:       %(east)s
+west:       0
+cols:       %(cols)i
+rows:       %(rows)i
+e-w resol:  10
+n-s resol:  10
+format:     %(format)i
+compressed: %(compressed)i
+"""
+
+# Grey values from 0 to 255 for the values from 0 to 15, null is red
+GREY_COLORS = "% 0 15\nnv:255:0:0\n0:0 15:255\n"
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def write_raster(mapset_path, name, values, colors=GREY_COLORS,
+                 compressed=0, nbytes=4):
+    """Write a raster map in the GRASS GIS raster format, floating point
+    arrays are written as FCELL maps, integer arrays as CELL maps
+    """
+    rows, cols = values.shape
+    is_fp = values.dtype.kind == "f"
+    nulls = np.isnan(values) if is_fp else values == -1
+    if is_fp:
+        data_rows = [row.astype(">f4").tobytes() for row in values]
+    else:
+        # The sign is stored in the highest bit
+        magnitude = np.abs(values).astype(">u8").view(np.uint8).reshape(
+            rows, cols, 8)[:, :, 8 - nbytes:].copy()
+        magnitude[:, :, 0] |= np.where(values < 0, 0x80, 0).astype(np.uint8)
+        data_rows = [row.tobytes() for row in magnitude]
+    if compressed:
+        content = []
+        for row in data_rows:
+            if is_fp:
+                content.append(b"1" + zlib.compress(row))
+            else:
+                # Run length encoding of (count, value) pairs
+                pairs = b""
+                for i in range(0, len(row), nbytes):
+                    cell = row[i:i + nbytes]
+                    if pairs and pairs[-nbytes:] == cell:
+                        pairs = pairs[:-nbytes - 1] + bytes(
+                            [pairs[-nbytes - 1] + 1]) + cell
+                    else:
+                        pairs += bytes([1]) + cell
+                content.append(bytes([nbytes]) + pairs)
+        offset = 1 + (rows + 1) * 8
+        offsets = []
+        for row in content:
+            offsets.append(offset)
+            offset += len(row)
+        offsets.append(offset)
+        data = bytes([8]) + b"".join(struct.pack(">q", o) for o in offsets) + \
+            b"".join(content)
+    else:
+        data = b"".join(data_rows)
+    write_file(os.path.join(mapset_path, "cell", name), b"" if is_fp else data)
+    if is_fp:
+        write_file(os.path.join(mapset_path, "fcell", name), data)
+        write_file(os.path.join(mapset_path, "cell_misc", name, "f_format"),
+                   b"type: float\nbyte_order: xdr\n")
+    write_file(os.path.join(mapset_path, "cellhd", name), (CELLHD % {
+        "north": rows * 10, "east": cols * 10, "rows": rows, "cols": cols,
+        "format": -1 if is_fp else nbytes - 1,
+        "compressed": 2 if is_fp and compressed else compressed}).encode())
+    write_file(os.path.join(mapset_path, "cell_misc", name, "null"),
+               np.packbits(nulls, axis=1).tobytes())
+    if colors is not None:
+        write_file(os.path.join(mapset_path, "colr", name), colors.encode())
+
+
+def decode_png(image):
+    """Decode an RGBA PNG image without filters"""
+    width, height = struct.unpack(">II", image[16:24])
+    position = 8
+    data = b""
+    while position < len(image):
+        length, = struct.unpack(">I", image[position:position + 4])
+        if image[position + 4:position + 8] == b"IDAT":
+            data += image[position + 8:position + 8 + length]
+        position += 12 + length
+    rows = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(
+        height, width * 4 + 1)
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+class NativeRendererTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.mapset_path = os.path.join(self.temp_path, "location", "user1")
+        os.makedirs(self.mapset_path)
+        values = np.arange(16, dtype=np.float64).reshape(4, 4)
+        values[3, 3] = np.nan
+        self.values = values
+        write_raster(self.mapset_path, "fp", values)
+        write_raster(self.mapset_path, "fp_zlib", values, compressed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_raster(self):
+        image = decode_png(render_raster(self.mapset_path, "fp",
+                                         {"width": 4, "height": 4}))
+        grey = (np.arange(16) * 17).reshape(4, 4)
+        self.assertTrue(np.array_equal(image[:3, :, 0], grey[:3]))
+        self.assertTrue(np.array_equal(image[..., 3], np.full((4, 4), 255)))
+        # The null cell has the null color
+        self.assertEqual(image[3, 3].tolist(), [255, 0, 0, 255])
+        self.assertEqual(image[3, 2].tolist(), [238, 238, 238, 255])
+
+        # The compressed map results in the same image
+        self.assertEqual(
+            render_raster(self.mapset_path, "fp_zlib", {"width": 4,
+                                                        "height": 4}),
+            render_raster(self.mapset_path, "fp", {"width": 4, "height": 4}))
+
+    def test_region_and_aspect(self):
+        # The square region is centered in the wide image
+        image = decode_png(render_raster(self.mapset_path, "fp",
+                                         {"width": 16, "height": 4}))
+        self.assertTrue(np.all(image[:, :6, 3] == 0))
+        self.assertTrue(np.all(image[:, 10:, 3] == 0))
+        self.assertEqual(image[0, 6:10, 0].tolist(), [0, 17, 34, 51])
+
+        # The region is set to the extent of the options, cells outside of
+        # the raster map are null
+        image = decode_png(render_raster(
+            self.mapset_path, "fp", {"width": 3, "height": 2, "n": 40,
+                                     "s": 20, "e": 50, "w": 20}))
+        self.assertEqual(image[..., 0].tolist(), [[34, 51, 255], [102, 119,
+                                                                  255]])
+        self.assertEqual(image[0, 2].tolist(), [255, 0, 0, 255])
+
+    def test_integer_lookup(self):
+        values = np.array([[-3, 0, 3, 3], [-1, 300, 300, 1]], dtype=np.int64)
+        colors = "% -3 300\n-3:0:0:255 0:0:0:0\n0:0:0:0 300:255:255:0\n"
+        write_raster(self.mapset_path, "cell_rle", values, colors,
+                     compressed=1)
+        image = decode_png(render_raster(self.mapset_path, "cell_rle",
+                                         {"width": 4, "height": 2}))
+        self.assertEqual(image[0, 0].tolist(), [0, 0, 255, 255])
+        self.assertEqual(image[0, 1].tolist(), [0, 0, 0, 255])
+        self.assertEqual(image[0, 2].tolist(), [2, 2, 0, 255])
+        self.assertEqual(image[1, 1].tolist(), [255, 255, 0, 255])
+        # -1 is written as null
+        self.assertEqual(image[1, 0].tolist(), [255, 255, 255, 255])
+
+    def test_rgb_and_shade(self):
+        write_raster(self.mapset_path, "red", self.values,
+                     "% 0 15\n0:0:0:0 15:255:0:0\n")
+        write_raster(self.mapset_path, "zero", np.zeros((4, 4)))
+        image = decode_png(render_rgb(self.mapset_path, {
+            "red": "red@user1", "green": "zero@user1", "blue": "fp@user1",
+            "width": 4, "height": 4}))
+        self.assertEqual(image[0, 1].tolist(), [17, 0, 17, 255])
+        # The channels of null cells have the null colors of their maps
+        self.assertEqual(image[3, 3].tolist(), [255, 0, 0, 255])
+
+        image = decode_png(render_shade(self.mapset_path, {
+            "shade": "fp@user1", "color": "red@user1", "width": 4,
+            "height": 4}))
+        self.assertEqual(image[2, 3].tolist(), [187 * 187 // 255, 0, 0, 255])
+        # Null cells are transparent
+        self.assertEqual(image[3, 3].tolist(), [0, 0, 0, 0])
+
+    def test_unavailable(self):
+        write_file(os.path.join(self.mapset_path, "cellhd", "reclassed"),
+                   b"reclass\nname: fp\nmapset: user1\n")
+        write_raster(self.mapset_path, "no_colors", self.values, colors=None)
+        write_raster(self.mapset_path, "shifted", self.values,
+                     colors="% 0 15\nshift:2\n0:0 15:255\n")
+        write_raster(self.mapset_path, "small", np.zeros((2, 2)))
+        for name in ("reclassed", "no_colors", "shifted", "missing"):
+            self.assertRaises(RenderUnavailable, render_raster,
+                              self.mapset_path, name, {"width": 4,
+                                                       "height": 4})
+        self.assertRaises(RenderUnavailable, render_shade, self.mapset_path,
+                          {"shade": "small", "color": "fp", "width": 4,
+                           "height": 4})
+        # Large images are rendered by a job
+        self.assertRaises(RenderUnavailable, render_raster, self.mapset_path,
+                          "fp", {"width": 10000, "height": 10000})
+
+    def test_illegal_names(self):
+        # Map names are not joined with the mapset path if they leave the
+        # element directory
+        write_raster(os.path.join(self.temp_path, "location"), "outside",
+                     self.values)
+        for name in ("../outside", "fp@user1/..", "fp@..", ".fp", "fp/"):
+            self.assertRaises(RenderUnavailable, render_raster,
+                              self.mapset_path, name, {"width": 4,
+                                                       "height": 4})
+        self.assertRaises(RenderUnavailable, render_rgb, self.mapset_path, {
+            "red": "fp", "green": "fp", "blue": "../user1/fp", "width": 4,
+            "height": 4})
+
+    def test_benchmark(self):
+        """Render an image of a compressed and an uncompressed raster map
+        """
+        values = np.random.default_rng(0).random((1500, 2000)) * 15
+        write_raster(self.mapset_path, "large", values)
+        write_raster(self.mapset_path, "large_zlib", values, compressed=1)
+        options = {"width": 800, "height": 600}
+        num_renders = 20
+        for name in ("large", "large_zlib"):
+            start = time.time()
+            for i in range(num_renders):
+                render_raster(self.mapset_path, name, options)
+            renders = num_renders / (time.time() - start)
+            print("Rendered raster map <%s> with %.1f renders per second"
+                  % (name, renders))
+            self.assertGreater(renders, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
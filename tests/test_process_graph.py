@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Dependency graph and concurrent execution of process lists
+"""
+import shutil
+import tempfile
+import threading
+import time
+import types
+import unittest
+from actinia_core.core.common.exceptions import AsyncProcessError, \
+    AsyncProcessTermination
+from actinia_core.core.common.process_chain import ProcessChainConverter
+from actinia_core.core.common.process_graph import ProcessGraph, \
+    get_expression_access, get_names
+from actinia_core.core.common.process_object import Process
+from actinia_core.core.messages_logger import MessageLogger
+from actinia_core.core.termination_listener import TerminationListener
+from actinia_core.rest.ephemeral_processing import EphemeralProcessing
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+NDVI_CHAIN = {
+    "version": "1",
+    "list": [{"id": "region", "module": "g.region",
+              "inputs": [{"param": "raster", "value": "lsat7_2002_10@landsat"}]},
+             {"id": "ndvi_1", "module": "r.mapcalc",
+              "inputs": [{"param": "expression",
+                          "value": "ndvi_1 = float(lsat7_2002_40@landsat - "
+                                   "lsat7_2002_30@landsat)/float(lsat7_2002_40"
+                                   "@landsat + lsat7_2002_30@landsat)"}]},
+             {"id": "ndvi_2", "module": "r.mapcalc",
+              "inputs": [{"param": "expression",
+                          "value": "ndvi_2 = float(lsat5_1987_40@landsat - "
+                                   "lsat5_1987_30@landsat)/float(lsat5_1987_40"
+                                   "@landsat + lsat5_1987_30@landsat)"}]},
+             {"id": "colors_1", "module": "r.colors",
+              "inputs": [{"param": "map", "value": "ndvi_1"},
+                         {"param": "color", "value": "ndvi"}]},
+             {"id": "univar_1", "module": "r.univar",
+              "inputs": [{"param": "map", "value": "ndvi_1"}]},
+             {"id": "diff", "module": "r.mapcalc",
+              "inputs": [{"param": "expression",
+                          "value": "diff = ndvi_1 - ndvi_2"}]},
+             {"id": "buffer", "module": "r.buffer",
+              "inputs": [{"param": "input", "value": "roads@PERMANENT"},
+                         {"param": "distances", "value": "100,200"}],
+              "outputs": [{"param": "output", "value": "roads_buffer"}]}]}
+
+
+def process(executable, inputs, outputs, exec_type="grass"):
+    return Process(exec_type=exec_type, executable=executable,
+                   executable_params=[], inputs=inputs, outputs=outputs)
+
+
+class ProcessGraphTestCase(unittest.TestCase):
+
+    def test_names(self):
+        self.assertEqual(get_names("elevation@PERMANENT,slope"),
+                         {"elevation", "slope"})
+        self.assertEqual(get_names("/tmp/a.tif,/tmp/b.tif"),
+                         {"/tmp/a.tif", "/tmp/b.tif"})
+        self.assertEqual(get_names("100,200"), set())
+        self.assertEqual(get_expression_access("a = b * 2.5\nc = a >= b"),
+                         ({"b", "a"}, {"a", "c"}))
+        self.assertIsNone(get_expression_access("eval(x = 1)"))
+
+    def test_process_chain(self):
+        converter = ProcessChainConverter()
+        process_list = converter.process_chain_to_process_list(NDVI_CHAIN)
+        graph = ProcessGraph(process_list)
+        self.assertFalse(graph.is_sequential())
+        self.assertEqual(graph.barriers, [True] + [False] * 6)
+        # Maps of the map parameter are modified in place, like by r.colors
+        self.assertEqual(graph.dependencies,
+                         [set(), {0}, {0}, {0, 1}, {0, 1, 3}, {0, 1, 2, 3, 4},
+                          {0}])
+        self.assertEqual(sorted(graph.dependents[0]), [1, 2, 3, 4, 5, 6])
+
+    def test_barriers(self):
+        process_list = [process("r.slope.aspect", [("elevation", "elev")],
+                                [("slope", "slope")]),
+                        process("r.mask", [("raster", "slope")], []),
+                        process("r.univar", [("map", "elev")], []),
+                        Process(exec_type="exec", executable="/bin/cp",
+                                executable_params=["a", "b"]),
+                        process("r.mapcalc", [("expression", "MASK = 1")], []),
+                        process("t.rast.univar", [("input", "strds")], [])]
+        graph = ProcessGraph(process_list)
+        self.assertTrue(graph.is_sequential())
+        self.assertEqual(graph.barriers, [False, True, False, True, True, True])
+
+    def test_prefix_outputs(self):
+        # i.pca writes pca.1, pca.2, ... and r.mapcalc with a file may write
+        # any map
+        process_list = [process("i.pca", [("input", "b1,b2")],
+                                [("output", "pca")]),
+                        process("r.mapcalc", [("expression", "x = pca.1 * 2")],
+                                []),
+                        process("r.mapcalc", [("file", "/tmp/expr.txt")], []),
+                        process("r.mapcalc", [("expression", "y = b1 * 2")],
+                                [])]
+        graph = ProcessGraph(process_list)
+        self.assertEqual(graph.barriers, [True, False, True, False])
+        self.assertEqual(graph.dependencies, [set(), {0}, {0, 1}, {2}])
+
+    def test_stdin(self):
+        source = Process(exec_type="exec", executable="/bin/echo",
+                         executable_params=["1"], inputs=[], outputs=[])
+        other = process("r.info", [("map", "elev")], [])
+        target = Process(exec_type="exec", executable="/bin/cat",
+                         executable_params=[], inputs=[], outputs=[],
+                         stdin_source=source.get_stdout)
+        graph = ProcessGraph([source, other, target])
+        self.assertEqual(graph.dependencies, [set(), set(), {0}])
+
+        # A stdin source that is not in the list is a barrier
+        graph = ProcessGraph([other, target])
+        self.assertEqual(graph.barriers, [False, True])
+
+
+class ProcessGraphExecutionTestCase(unittest.TestCase):
+    """Run process lists of executables concurrently
+    """
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        processing = EphemeralProcessing.__new__(EphemeralProcessing)
+        processing.__dict__.update(
+            message_logger=MessageLogger(), process_parallel_limit=4,
+            termination_listener=TerminationListener(None, "resource_id"),
+            running_processes=set(), processes_killed=False,
+            process_lock=threading.Lock(),
+            temp_mapset_path=None, temp_file_path=self.temp_path,
+            progress_steps=0, progress={}, module_output_log=[],
+            module_output_dict={}, module_output_captures=[],
+            module_output_capture_dict={}, process_output_count=0,
+            process_log_head_size=1024, process_log_tail_size=1024,
+            process_output_timeout=60, mapset_size_tracking=False,
+            process_time_limit=60,
+            interim_result=types.SimpleNamespace(saving_interim_results=False))
+        self.processing = processing
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def sleep_process(self, seconds, name, reads=()):
+        return Process(exec_type="exec", executable="/bin/sleep",
+                       executable_params=[str(seconds)], id=name,
+                       inputs=[("input", entry) for entry in reads],
+                       outputs=[("output", name)])
+
+    def run_list(self, process_list):
+        start = time.time()
+        self.processing._execute_process_list(process_list)
+        return time.time() - start
+
+    def test_concurrent_execution(self):
+        process_list = [self.sleep_process(0.3, "a"),
+                        self.sleep_process(0.3, "b"),
+                        self.sleep_process(0.3, "c"),
+                        self.sleep_process(0.3, "d", reads=["a", "b"])]
+        run_time = self.run_list(process_list)
+        self.assertLess(run_time, 0.9)
+        self.assertGreater(run_time, 0.55)
+        self.assertEqual(self.processing.progress_steps, 4)
+        self.assertEqual(len(self.processing.module_output_log), 4)
+        self.assertEqual(self.processing.module_output_log[-1]["id"], "d")
+        self.assertEqual(self.processing.running_processes, set())
+
+    def test_process_log_order(self):
+        # The processes finish in the reverse order of the process list
+        process_list = [self.sleep_process(0.3, "a"),
+                        self.sleep_process(0.2, "b"),
+                        self.sleep_process(0.1, "c")]
+        self.run_list(process_list)
+        self.assertEqual([entry["id"] for entry in
+                          self.processing.module_output_log], ["a", "b", "c"])
+        self.assertEqual([capture[0] for capture in
+                          self.processing.module_output_captures],
+                         [process.stdout for process in process_list])
+        self.assertEqual(self.processing.running_processes, set())
+
+    def test_error(self):
+        failing = Process(exec_type="exec", executable="/bin/false",
+                          executable_params=[], id="false", inputs=[],
+                          outputs=[])
+        process_list = [self.sleep_process(5, "a"), failing,
+                        self.sleep_process(0.1, "b", reads=["a"])]
+        start = time.time()
+        self.assertRaises(AsyncProcessError, self.processing._execute_process_list,
+                          process_list)
+        # The running process was killed and the dependent process not started
+        self.assertLess(time.time() - start, 2)
+        self.assertNotIn("b", self.processing.module_output_dict)
+
+    def test_termination(self):
+        listener = self.processing.termination_listener
+        timer = threading.Timer(0.2, listener._terminate)
+        timer.start()
+        start = time.time()
+        self.assertRaises(AsyncProcessTermination,
+                          self.processing._execute_process_list,
+                          [self.sleep_process(5, "a"), self.sleep_process(5, "b")])
+        self.assertLess(time.time() - start, 2)
+        timer.join()
+
+    def test_benchmark(self):
+        """Compare the sequential and the concurrent execution of 8 independent
+        processes
+        """
+        process_list = [self.sleep_process(0.1, "map_%i" % i) for i in range(8)]
+        self.processing.process_parallel_limit = 1
+        sequential_time = self.run_list(process_list)
+        self.processing.process_parallel_limit = 4
+        parallel_time = self.run_list(process_list)
+        print("8 independent processes, sequential: %.3f s, 4 concurrent: "
+              "%.3f s" % (sequential_time, parallel_time))
+        self.assertLess(parallel_time, sequential_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Streaming capture of the stdout and stderr output of processes
+"""
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from actinia_core.core.common.exceptions import AsyncProcessError
+from actinia_core.core.common.process_object import Process
+from actinia_core.core.messages_logger import MessageLogger
+from actinia_core.core.process_output import OutputCapture
+from actinia_core.core.storage_interface_filesystem import \
+    ResourceStorageFilesystem
+from actinia_core.core.termination_listener import TerminationListener
+from actinia_core.rest.ephemeral_processing import EphemeralProcessing
+from actinia_core.rest.ephemeral_processing_with_export import \
+    EphemeralProcessingWithExport
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# Prints the lines "key_<i>=<i>" to stdout and "error" to stderr
+PRINT_LINES = ("import sys\n"
+               "for i in range(int(sys.argv[1])):\n"
+               "    print('key_%i=%i' % (i, i))\n"
+               "sys.stderr.write('error')\n")
+# Prints the lines and fails
+PRINT_LINES_AND_FAIL = PRINT_LINES + "sys.exit(1)\n"
+
+
+class OutputCaptureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.temp_path, "stdout.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_small_output(self):
+        capture = OutputCapture(self.spill_path, head_size=10, tail_size=10)
+        capture.write(b"0123456789")
+        capture.write(b"abcdefghij")
+        self.assertFalse(capture.truncated)
+        self.assertEqual(capture.get_log(), "0123456789abcdefghij")
+        self.assertEqual(capture.read(), "0123456789abcdefghij")
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_large_output(self):
+        capture = OutputCapture(self.spill_path, head_size=10, tail_size=5)
+        for i in range(10):
+            capture.write(b"%i" % i * 3)
+        self.assertTrue(capture.truncated)
+        self.assertEqual(capture.size, 30)
+        self.assertEqual(capture.get_log(),
+                         "0001112223\n[... 15 bytes truncated ...]\n88999")
+        capture.spill_file.close()
+        self.assertEqual(capture.read(),
+                         "".join(str(i) * 3 for i in range(10)))
+        capture.remove()
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_pipe(self):
+        capture = OutputCapture(self.spill_path, head_size=100, tail_size=100)
+        proc = subprocess.Popen([sys.executable, "-c", PRINT_LINES, "1000"],
+                                stdout=subprocess.PIPE)
+        capture.start(proc.stdout)
+        proc.wait()
+        self.assertTrue(capture.join())
+        self.assertTrue(capture.truncated)
+        lines = capture.read().split("\n")
+        self.assertEqual(len(lines), 1001)
+        self.assertEqual(lines[-2], "key_999=999")
+        self.assertTrue(capture.get_log().startswith("key_0=0\n"))
+        self.assertTrue(capture.get_log().endswith("key_999=999\n"))
+
+
+class RunExecutableTestCase(unittest.TestCase):
+    """Run executables with the streaming capture of EphemeralProcessing
+    """
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        processing = EphemeralProcessing.__new__(EphemeralProcessing)
+        processing.__dict__.update(
+            message_logger=MessageLogger(), process_parallel_limit=1,
+            termination_listener=TerminationListener(None, "resource_id"),
+            running_processes=set(), processes_killed=False,
+            process_lock=threading.Lock(),
+            temp_mapset_path=None, temp_file_path=self.temp_path,
+            progress_steps=0, progress={}, module_output_log=[],
+            module_output_dict={}, module_output_captures=[],
+            module_output_capture_dict={}, process_output_count=0,
+            process_log_head_size=1024, process_log_tail_size=1024,
+            process_output_timeout=60, mapset_size_tracking=False,
+            process_time_limit=60, module_results={},
+            interim_result=types.SimpleNamespace(saving_interim_results=False))
+        # Status updates of long running processes are not stored
+        processing._send_resource_update = lambda message: None
+        self.processing = processing
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def print_process(self, num_lines, id="lines"):
+        return Process(exec_type="exec", executable=sys.executable,
+                       executable_params=["-c", PRINT_LINES, str(num_lines)],
+                       id=id, inputs=[], outputs=[])
+
+    def test_truncated_log(self):
+        self.processing.output_parser_list = [
+            {"lines": {"id": "stats", "format": "kv", "delimiter": "="}}]
+        self.processing._execute_process_list([self.print_process(10000)])
+        plm = self.processing.module_output_log[0]
+        self.assertEqual(plm["stderr"], ["error"])
+        self.assertIn("bytes truncated", plm["stdout"])
+        self.assertLess(len(plm["stdout"]), 2100)
+        self.assertTrue(plm["stdout_truncated"])
+        self.assertNotIn("stderr_truncated", plm)
+        self.assertEqual(self.processing._get_module_stdout(0).count("\n"),
+                         10000)
+        self.assertEqual(sorted(os.listdir(self.temp_path)),
+                         ["lines_1_stdout.txt"])
+
+        # The stdout parser reads the full output
+        self.processing._parse_module_outputs()
+        stats = self.processing.module_results["stats"]
+        self.assertEqual(len(stats), 10000)
+        self.assertEqual(stats["key_9999"], "9999")
+
+    def test_small_output(self):
+        self.processing._execute_process_list([self.print_process(3)])
+        plm = self.processing.module_output_log[0]
+        self.assertEqual(plm["stdout"], "key_0=0\nkey_1=1\nkey_2=2\n")
+        self.assertNotIn("stdout_truncated", plm)
+        self.assertEqual(os.listdir(self.temp_path), [])
+
+    def test_failed_process_export(self):
+        """The full output of a failed process is stored as resource, all
+        other resources are removed
+        """
+        processing = EphemeralProcessingWithExport.__new__(
+            EphemeralProcessingWithExport)
+        processing.__dict__.update(self.processing.__dict__)
+        resource_dir = os.path.join(self.temp_path, "resources")
+        os.makedirs(resource_dir)
+        storage_interface = ResourceStorageFilesystem(
+            "user", "resource_id",
+            types.SimpleNamespace(GRASS_RESOURCE_DIR=resource_dir),
+            resource_url_base="http://localhost/__None__")
+        storage_interface.setup()
+        with open(os.path.join(storage_interface.resource_export_path,
+                               "result.tif"), "w") as f:
+            f.write("result")
+        processing.__dict__.update(storage_interface=storage_interface,
+                                   resource_url_list=[])
+        processing._cleanup = lambda: None
+
+        failing = Process(exec_type="exec", executable=sys.executable,
+                          executable_params=["-c", PRINT_LINES_AND_FAIL,
+                                             "10000"],
+                          id="failing", inputs=[], outputs=[])
+        self.assertRaises(AsyncProcessError,
+                          processing._execute_process_list, [failing])
+        processing.run_state = {"error": "Error while running executable"}
+        processing._final_cleanup()
+
+        plm = processing.module_output_log[0]
+        self.assertEqual(plm["return_code"], 1)
+        self.assertEqual(plm["stdout_url"],
+                         "http://localhost/failing_1_stdout.txt")
+        self.assertEqual(os.listdir(storage_interface.resource_export_path),
+                         ["failing_1_stdout.txt"])
+        with open(os.path.join(storage_interface.resource_export_path,
+                               "failing_1_stdout.txt")) as f:
+            self.assertEqual(f.read().count("\n"), 10000)
+
+    def test_benchmark(self):
+        """Peak memory of the capture of a large output, compared with the
+        size of the output
+        """
+        num_lines = 500000
+        start = time.time()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.processing._execute_process_list([self.print_process(num_lines)])
+        run_time = time.time() - start
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak
+        size = os.path.getsize(os.path.join(self.temp_path,
+                                            "lines_1_stdout.txt"))
+        print("Captured %.1f MB of stdout in %.3f s, log size %i bytes, "
+              "peak memory growth %.1f MB" % (
+                  size / 1e6, run_time,
+                  len(self.processing.module_output_log[0]["stdout"]),
+                  growth / 1e3))
+        self.assertLess(growth * 1024, size)
+
+
+if __name__ == '__main__':
+    unittest.main()
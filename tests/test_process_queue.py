@@ -28,6 +28,7 @@ import unittest
 import time
 import datetime
 from copy import deepcopy
+from multiprocessing import Queue
 from actinia_core.core.common.process_queue import create_process_queue,\
     enqueue_job, stop_process_queue
 from actinia_core.core.resource_data_container import ResourceDataContainer
@@ -62,6 +63,14 @@ def job_long_run(rdc):
         time.sleep(3)
 
 
+# The queue that receives the dispatch latency of the benchmark jobs
+dispatch_latency_queue = Queue()
+
+
+def job_dispatch_latency(rdc):
+    dispatch_latency_queue.put((rdc.api_info, time.time() - rdc.orig_time))
+
+
 class ProcessQueueTestCase(unittest.TestCase):
     """
     This class tests the api logging interface
@@ -84,6 +93,7 @@ class ProcessQueueTestCase(unittest.TestCase):
                                          user_group="user_group",
                                          user_credentials={"user_credentials":None},
                                          resource_id="resource_id",
+                                         iteration=None,
                                          status_url="status_url",
                                          api_info="api_info",
                                          resource_url_base="resource_url_base",
@@ -177,6 +187,34 @@ class ProcessQueueTestCase(unittest.TestCase):
         stop_process_queue()
         # return
 
+    def test_dispatch_latency_benchmark(self):
+        """Benchmark the dispatch latency and the throughput of the queue manager
+        with many tiny jobs
+        """
+        create_process_queue(config=global_config, use_logger=False)
+
+        num_jobs = 50
+        start_time = time.time()
+        for i in range(num_jobs):
+            args = deepcopy(self.rdc)
+            args.api_info = i
+            args.orig_time = time.time()
+            enqueue_job(30, job_dispatch_latency, args)
+
+        latencies = []
+        for i in range(num_jobs):
+            api_info, latency = dispatch_latency_queue.get(timeout=30)
+            latencies.append(latency)
+        run_time = time.time() - start_time
+
+        latencies.sort()
+        print("Dispatched %i jobs in %f seconds: %f jobs/s" %
+              (num_jobs, run_time, num_jobs / run_time))
+        print("Dispatch latency median: %f seconds, max: %f seconds" %
+              (latencies[num_jobs // 2], latencies[-1]))
+
+        self.assertEqual(len(latencies), num_jobs)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: process queue scheduling policies
+
+The wait time endpoint test requires the redis server of the test
+environment, it is skipped if the server is not reachable.
+"""
+import unittest
+import redis
+from actinia_core.core.common.config import global_config
+from actinia_core.core.common.process_scheduler import \
+    FifoSchedulingPolicy, FairShareSchedulingPolicy, QueueWaitTimeStatistics, \
+    is_interactive_request
+try:
+    from .test_resource_base import ActiniaResourceTestCaseBase, URL_PREFIX
+except:
+    from test_resource_base import ActiniaResourceTestCaseBase, URL_PREFIX
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def is_redis_available():
+    """Check if the redis server of the test environment is reachable"""
+    try:
+        return redis.StrictRedis(host=global_config.REDIS_SERVER_URL,
+                                 port=global_config.REDIS_SERVER_PORT,
+                                 password=global_config.REDIS_SERVER_PW,
+                                 socket_connect_timeout=1).ping()
+    except redis.exceptions.RedisError:
+        return False
+
+
+class DummyEnqueuedProcess(object):
+
+    def __init__(self, number, user_id, user_role="user", interactive=False):
+        self.number = number
+        self.user_id = user_id
+        self.user_role = user_role
+        self.interactive = interactive
+        self.init_time = float(number)
+
+    def __repr__(self):
+        return "%s:%i" % (self.user_id, self.number)
+
+
+def pop_all(policy):
+    procs = []
+    while len(policy) > 0:
+        procs.append(policy.pop())
+    return procs
+
+
+class ProcessSchedulerTestCase(unittest.TestCase):
+    """
+    This class tests the scheduling policies of the process queue
+    """
+
+    def test_interactive_request(self):
+        self.assertTrue(is_interactive_request({"method": "GET",
+                                                "endpoint": "rasterlayerresource"}))
+        self.assertTrue(is_interactive_request(
+            {"method": "POST", "endpoint": "syncephemeralprocessingresource"}))
+        self.assertFalse(is_interactive_request({"method": "POST",
+                                                 "endpoint": "asyncephemeralresource"}))
+        self.assertFalse(is_interactive_request(None))
+
+    def test_fifo(self):
+        policy = FifoSchedulingPolicy(interactive_priority=False)
+        for i in range(5):
+            policy.add(DummyEnqueuedProcess(i, "user_a" if i < 4 else "user_b"))
+
+        numbers = [p.number for p in pop_all(policy)]
+        print(numbers)
+        self.assertEqual(numbers, [0, 1, 2, 3, 4])
+        self.assertRaises(IndexError, policy.pop)
+
+    def test_interactive_priority(self):
+        policy = FifoSchedulingPolicy(interactive_priority=True)
+        policy.add(DummyEnqueuedProcess(0, "user_a"))
+        policy.add(DummyEnqueuedProcess(1, "user_a"))
+        policy.add(DummyEnqueuedProcess(2, "user_b", interactive=True))
+
+        numbers = [p.number for p in pop_all(policy)]
+        print(numbers)
+        self.assertEqual(numbers, [2, 0, 1])
+
+    def test_round_robin(self):
+        policy = FairShareSchedulingPolicy(interactive_priority=False)
+        # A burst of user_a is followed by two processes of user_b
+        for i in range(6):
+            policy.add(DummyEnqueuedProcess(i, "user_a"))
+        policy.add(DummyEnqueuedProcess(6, "user_b"))
+        policy.add(DummyEnqueuedProcess(7, "user_b"))
+
+        procs = pop_all(policy)
+        print(procs)
+        self.assertEqual([p.user_id for p in procs[:4]],
+                         ["user_a", "user_b", "user_a", "user_b"])
+        self.assertEqual([p.number for p in procs if p.user_id == "user_a"],
+                         [0, 1, 2, 3, 4, 5])
+
+    def test_fair_share_weights(self):
+        policy = FairShareSchedulingPolicy(interactive_priority=False,
+                                           weights={"admin": 2, "user": 1})
+        for i in range(12):
+            policy.add(DummyEnqueuedProcess(i, "user_a", user_role="user"))
+            policy.add(DummyEnqueuedProcess(i, "admin_a", user_role="admin"))
+
+        procs = pop_all(policy)[:9]
+        print(procs)
+        # The admin gets twice the share of the user
+        self.assertEqual(len([p for p in procs if p.user_id == "admin_a"]), 6)
+        self.assertEqual(len([p for p in procs if p.user_id == "user_a"]), 3)
+
+    def test_fair_share_new_user(self):
+        policy = FairShareSchedulingPolicy(interactive_priority=False)
+        for i in range(4):
+            policy.add(DummyEnqueuedProcess(i, "user_a"))
+        for i in range(3):
+            policy.pop()
+        # user_b starts to submit processes while user_a is still waiting,
+        # it must not get credit for the time it was idle
+        policy.add(DummyEnqueuedProcess(10, "user_b"))
+        policy.add(DummyEnqueuedProcess(11, "user_b"))
+
+        procs = pop_all(policy)
+        print(procs)
+        self.assertEqual([p.number for p in procs], [3, 10, 11])
+
+    def test_remove(self):
+        policy = FairShareSchedulingPolicy(interactive_priority=True)
+        procs = [DummyEnqueuedProcess(0, "user_a"),
+                 DummyEnqueuedProcess(1, "user_b", interactive=True),
+                 DummyEnqueuedProcess(2, "user_b")]
+        for proc in procs:
+            policy.add(proc)
+        self.assertEqual(len(policy), 3)
+
+        for proc in policy:
+            if proc.user_id == "user_b":
+                policy.remove(proc)
+
+        self.assertEqual(len(policy), 1)
+        self.assertEqual(policy.pop().number, 0)
+
+    def test_wait_time_statistics(self):
+        statistics = QueueWaitTimeStatistics(max_samples=50)
+        for i in range(101):
+            statistics.add("user_a", float(i))
+        self.assertTrue(statistics.changed)
+
+        percentiles = statistics.percentiles("user_a")
+        print(percentiles)
+        self.assertEqual(percentiles["count"], 101)
+        self.assertEqual(percentiles["samples"], 50)
+        self.assertEqual(percentiles["max"], 100.0)
+        self.assertEqual(percentiles["p50"], 75.0)
+        self.assertIsNone(statistics.percentiles("user_b"))
+        self.assertEqual(list(statistics.all_percentiles().keys()), ["user_a"])
+
+
+@unittest.skipIf(is_redis_available() is False,
+                 "The redis server is not reachable")
+class ProcessQueueWaitTimeTestCase(ActiniaResourceTestCaseBase):
+    """
+    This class tests the wait time statistics endpoint
+    """
+
+    def test_wait_times_user(self):
+        rv = self.server.get(URL_PREFIX + '/process_queue/wait_times',
+                             headers=self.user_auth_header)
+        print(rv.data)
+        self.assertEqual(rv.status_code, 200,
+                         "HTML status code is wrong %i" % rv.status_code)
+        self.assertEqual(rv.mimetype, "application/json",
+                         "Wrong mimetype %s" % rv.mimetype)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Blocking wait for child process exit
+"""
+import subprocess
+import time
+import unittest
+from actinia_core.core.common import process_wait
+from actinia_core.core.common.process_wait import ProcessExitWaiter
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class ProcessExitWaiterTestCase(unittest.TestCase):
+    """
+    This class tests the blocking wait for the exit of child processes
+    """
+
+    def run_processes(self, num, wait_func):
+        start = time.time()
+        for i in range(num):
+            proc = subprocess.Popen(["true"])
+            wait_func(proc)
+            self.assertEqual(proc.returncode, 0)
+        return (time.time() - start) / num
+
+    def check_waiter(self):
+        proc = subprocess.Popen(["sleep", "0.3"])
+        with ProcessExitWaiter(proc) as waiter:
+            start = time.time()
+            self.assertFalse(waiter.wait(0.05))
+            self.assertGreaterEqual(time.time() - start, 0.04)
+            self.assertTrue(waiter.wait(5))
+            self.assertLess(time.time() - start, 1)
+        self.assertEqual(proc.returncode, 0)
+
+        # A process that exited before waiting
+        proc = subprocess.Popen(["true"])
+        proc.wait()
+        with ProcessExitWaiter(proc) as waiter:
+            self.assertTrue(waiter.wait(5))
+
+    def test_waiter(self):
+        self.check_waiter()
+
+    def test_fallback(self):
+        has_pidfd = process_wait.has_pidfd
+        process_wait.has_pidfd = False
+        try:
+            self.check_waiter()
+        finally:
+            process_wait.has_pidfd = has_pidfd
+
+    def test_overhead(self):
+        def poll(proc, poll_time=0.05):
+            while proc.poll() is None:
+                time.sleep(poll_time)
+
+        def block(proc):
+            with ProcessExitWaiter(proc) as waiter:
+                while waiter.wait(5) is False:
+                    pass
+
+        poll_time = self.run_processes(20, poll)
+        block_time = self.run_processes(20, block)
+        print("Time per process: sleep polling %.1f ms, blocking wait %.1f ms "
+              "(pidfd %s)" % (poll_time * 1000, block_time * 1000,
+                              process_wait.has_pidfd))
+        self.assertLess(block_time, poll_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: XYZ tile grids and tile rendering
+
+The render lock tests use fakeredis if it is installed, otherwise a local
+redis server is required.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import uuid
+from flask import Flask
+from actinia_core.core.common.process_object import Process
+from actinia_core.core.grass_init import read_region
+from actinia_core.core.messages_logger import MessageLogger
+from actinia_core.core.render_cache import RenderCache
+from actinia_core.core.resources_logger import ResourceLogger
+from actinia_core.core.termination_listener import TerminationListener
+from actinia_core.core.tile_grid import TileGrid, create_tile_grid, \
+    create_tile_region, get_tile_options, WEB_MERCATOR_EXTENT
+from actinia_core.rest import renderer_base
+from actinia_core.rest.raster_tiles import EphemeralRasterTileRenderer, \
+    SyncEphemeralRasterTileResource
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+DEFAULT_WIND = """proj:       99
+zone:       0
+north:      320000
+south:      10000
+west:       120000
+east:       935000
+cols:       815
+rows:       310
+e-w resol:  1000
+n-s resol:  1000
+top:        1
+bottom:     0
+cols3:      815
+rows3:      310
+depths:     1
+e-w resol3: 1000
+n-s resol3: 1000
+t-b resol:  1
+"""
+
+# Writes the WIND_OVERRIDE region into the render file, like d.rast renders
+# the region into the PNG file
+RENDER_TILE = ("import os, time\n"
+               "time.sleep(0.1)\n"
+               "with open(os.environ['GRASS_RENDER_FILE'], 'w') as f:\n"
+               "    f.write(os.environ['WIND_OVERRIDE'])\n")
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TileGridTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.location_path = os.path.join(self.temp_path, "location")
+        write_file(os.path.join(self.location_path, "PERMANENT",
+                                "DEFAULT_WIND"), DEFAULT_WIND)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_web_mercator(self):
+        write_file(os.path.join(self.location_path, "PERMANENT", "PROJ_EPSG"),
+                   "epsg: 3857\n")
+        grid = create_tile_grid(self.location_path)
+        self.assertEqual(grid.name, "GoogleMapsCompatible")
+        self.assertEqual(grid.get_tile_bounds(0, 0, 0), {
+            "n": WEB_MERCATOR_EXTENT, "s": -WEB_MERCATOR_EXTENT,
+            "e": WEB_MERCATOR_EXTENT, "w": -WEB_MERCATOR_EXTENT})
+        bounds = grid.get_tile_bounds(1, 1, 0)
+        self.assertEqual((bounds["s"], bounds["w"]), (0.0, 0.0))
+        self.assertTrue(grid.is_valid(2, 3, 3))
+        self.assertFalse(grid.is_valid(2, 4, 0))
+        self.assertFalse(grid.is_valid(-1, 0, 0))
+
+    def test_latlong(self):
+        write_file(os.path.join(self.location_path, "PERMANENT", "PROJ_INFO"),
+                   "name: Lat/Lon\nproj: ll\ndatum: wgs84\n")
+        grid = create_tile_grid(self.location_path)
+        self.assertEqual(grid.name, "WorldCRS84Quad")
+        self.assertEqual(grid.get_matrix_size(0), (2, 1))
+        self.assertEqual(grid.get_tile_bounds(0, 1, 0),
+                         {"n": 90.0, "s": -90.0, "e": 180.0, "w": 0.0})
+        self.assertEqual(grid.get_tiles(1, 10.0, -10.0, 10.0, -10.0),
+                         [[1, 1, 0], [1, 2, 0], [1, 1, 1], [1, 2, 1]])
+
+    def test_default_region(self):
+        grid = create_tile_grid(self.location_path)
+        self.assertEqual(grid.name, "DefaultRegion")
+        self.assertEqual(grid.to_dict(), {
+            "name": "DefaultRegion", "west": 120000.0, "north": 320000.0,
+            "size": 815000.0, "matrix_width": 1, "matrix_height": 1})
+        self.assertEqual(len(grid.get_tiles(3, 320000, 10000, 935000, 120000)),
+                         8 * 4)
+        metatile = grid.get_metatile(3, 5, 2)
+        self.assertEqual(metatile[0], [3, 5, 2])
+        self.assertEqual(sorted(metatile), [[3, x, y] for x in range(4, 8)
+                                            for y in range(0, 4)])
+        self.assertEqual(grid.get_metatile(0, 0, 0), [[0, 0, 0]])
+
+        region = read_region(create_tile_region(
+            read_region(DEFAULT_WIND), grid.get_tile_bounds(1, 1, 1)))
+        self.assertEqual((region["rows"], region["cols"]), (256, 256))
+        self.assertEqual((region["north"], region["west"]), (-87500.0, 527500.0))
+        self.assertAlmostEqual(region["ns_res"], 407500.0 / 256)
+
+
+class TileRendererTestCase(unittest.TestCase):
+    """Render tiles with a stand-in executable for d.rast
+    """
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        mapset_path = os.path.join(self.temp_path, "mapset")
+        write_file(os.path.join(mapset_path, "WIND"), DEFAULT_WIND)
+        renderer = EphemeralRasterTileRenderer.__new__(
+            EphemeralRasterTileRenderer)
+        renderer.__dict__.update(
+            message_logger=MessageLogger(), process_parallel_limit=4,
+            termination_listener=TerminationListener(None, "resource_id"),
+            running_processes=set(), processes_killed=False,
+            process_lock=threading.Lock(), process_count=0, last_module=None,
+            temp_mapset_path=mapset_path, temp_file_path=self.temp_path,
+            progress_steps=0, progress={}, module_output_log=[],
+            module_output_dict={}, module_output_captures=[],
+            module_output_capture_dict={}, process_output_count=0,
+            process_log_head_size=1024, process_log_tail_size=1024,
+            process_output_timeout=60, mapset_size_tracking=False,
+            process_time_limit=60, tile_files={},
+            interim_result=types.SimpleNamespace(saving_interim_results=False))
+        renderer._send_resource_update = lambda message: None
+        self.renderer = renderer
+        self.grid = TileGrid("DefaultRegion", 120000.0, 320000.0, 815000.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+        self.remove_tile_files()
+
+    def remove_tile_files(self):
+        for result_file in self.renderer.tile_files.values():
+            if os.path.isfile(result_file):
+                os.remove(result_file)
+        self.renderer.tile_files = {}
+
+    def render(self, tiles, process_parallel_limit):
+        self.renderer.process_parallel_limit = process_parallel_limit
+        self.remove_tile_files()
+        process_list = [Process(exec_type="exec", executable=sys.executable,
+                                executable_params=["-c", RENDER_TILE],
+                                id="tile_%i_%i_%i" % tuple(tile))
+                        for tile in tiles]
+        start = time.time()
+        self.renderer._render_tiles(self.grid, tiles, process_list)
+        return time.time() - start
+
+    def test_render_tiles(self):
+        tiles = self.grid.get_metatile(2, 1, 1)
+        self.render(tiles, 4)
+        self.assertEqual(sorted(self.renderer.tile_files),
+                         sorted("%i/%i/%i" % tuple(tile) for tile in tiles))
+        for tile_id, result_file in self.renderer.tile_files.items():
+            with open(result_file) as f:
+                self.assertEqual(f.read(), "actinia_tile_" + tile_id.replace(
+                    "/", "_"))
+            # The tile files are only accessible by the owner
+            self.assertEqual(os.stat(result_file).st_mode & 0o077, 0)
+        # The regions of the tiles are removed
+        self.assertEqual(os.listdir(os.path.join(
+            self.renderer.temp_mapset_path, "windows")), [])
+
+    def test_benchmark(self):
+        """Render a metatile with one process at a time and concurrently
+        """
+        tiles = self.grid.get_metatile(3, 0, 0)
+        sequential = self.render(tiles, 1)
+        concurrent = self.render(tiles, 4)
+        print("Rendered %i tiles in %.3f s sequentially and %.3f s "
+              "concurrently" % (len(tiles), sequential, concurrent))
+        self.assertLess(concurrent, sequential)
+
+
+class TileRenderLockTestCase(unittest.TestCase):
+    """Concurrent requests of the tiles of a metatile start a single job
+    """
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.mapset_path = os.path.join(self.temp_path, "location", "mapset")
+        os.makedirs(self.mapset_path)
+        self.render_cache = RenderCache(os.path.join(self.temp_path, "cache"),
+                                        max_size=1024 * 1024)
+        renderer_base._render_cache = self.render_cache
+        self.server = None
+        if fakeredis is not None:
+            self.server = fakeredis.FakeServer()
+        self.grid = TileGrid("DefaultRegion", 120000.0, 320000.0, 815000.0)
+        self.app = Flask(__name__)
+        self.jobs = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        renderer_base._render_cache = None
+        shutil.rmtree(self.temp_path)
+
+    def create_resource(self):
+        resource_logger = ResourceLogger(host="localhost", port=6379)
+        if self.server is not None:
+            resource_logger.db.redis_server = fakeredis.FakeStrictRedis(
+                server=self.server)
+        resource = SyncEphemeralRasterTileResource.__new__(
+            SyncEphemeralRasterTileResource)
+        resource.__dict__.update(
+            resource_logger=resource_logger,
+            resource_id="resource_id-%s" % uuid.uuid4(),
+            user_credentials={"permissions": {"process_time_limit": 10}})
+        resource.get_tile_grid = lambda location_name, mapset_name: (
+            self.mapset_path, self.grid)
+        resource._render_tiles = self.render_tiles
+        return resource
+
+    def render_tiles(self, location_name, mapset_name, raster_name, grid,
+                     tile, tiles, cache_keys):
+        """Simulate the job that renders the tiles into the render cache"""
+        with self.lock:
+            self.jobs.append(tiles)
+        time.sleep(0.2)
+        for key in cache_keys.values():
+            self.render_cache.put_image(key, b"png")
+        return SyncEphemeralRasterTileResource.create_image_response(
+            b"png", cache_keys["%i/%i/%i" % tuple(tile)])
+
+    def request_tile(self, tile, responses):
+        with self.app.test_request_context():
+            response = self.create_resource().get(
+                "location", "mapset", "elevation", *tile)
+            with self.lock:
+                responses.append(response.status_code)
+
+    def test_metatile_lock(self):
+        metatile = self.grid.get_metatile(2, 1, 1)
+        responses = []
+        threads = [threading.Thread(target=self.request_tile,
+                                    args=(tile, responses))
+                   for tile in metatile]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # A single job rendered all tiles of the metatile
+        self.assertEqual(len(self.jobs), 1)
+        self.assertEqual(sorted(self.jobs[0]), sorted(metatile))
+        self.assertEqual(responses, [200] * len(metatile))
+
+    def test_render_lock(self):
+        resource_logger = self.create_resource().resource_logger
+        self.assertTrue(resource_logger.lock_render("render_key", "job", 10))
+        self.assertFalse(resource_logger.lock_render("render_key", "other",
+                                                     10))
+        # Only the job that set the mark removes it
+        resource_logger.unlock_render("render_key", "other")
+        self.assertFalse(resource_logger.wait_for_render("render_key", 0.1))
+        resource_logger.unlock_render("render_key", "job")
+        self.assertTrue(resource_logger.wait_for_render("render_key", 0.1))
+
+    def test_failed_job(self):
+        """A waiting request renders its own tile if the job of the metatile
+        did not cache it
+        """
+        metatile = self.grid.get_metatile(2, 1, 1)
+        render_key = renderer_base.get_render_cache().create_key(
+            self.mapset_path, "tile", get_tile_options(self.grid,
+                                                       *min(metatile)),
+            rasters=["elevation"])
+        resource_logger = self.create_resource().resource_logger
+        self.assertTrue(resource_logger.lock_render(render_key, "job", 10))
+        timer = threading.Timer(0.2, resource_logger.unlock_render,
+                                (render_key, "job"))
+        timer.start()
+        responses = []
+        self.request_tile(metatile[0], responses)
+        timer.join()
+        self.assertEqual(self.jobs, [[metatile[0]]])
+        self.assertEqual(responses, [200])
+
+
+if __name__ == '__main__':
+    unittest.main()
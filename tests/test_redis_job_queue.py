@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Redis stream job queue and worker
+
+The tests use fakeredis if it is installed, otherwise a local redis server
+with stream support (redis >= 6.2) is required.
+"""
+import unittest
+import time
+import datetime
+import pickle
+from multiprocessing import Queue
+from actinia_core.core.common.config import Configuration
+from actinia_core.core.common.redis_queue_worker import RedisQueueWorker
+from actinia_core.core.redis_job_queue import RedisJobQueueInterface
+from actinia_core.core.resource_data_container import ResourceDataContainer
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+# The queue that receives the api info of the finished jobs
+finished_jobs_queue = Queue()
+
+
+def job_finished(rdc):
+    finished_jobs_queue.put(rdc.api_info)
+
+
+def job_sleep(rdc):
+    time.sleep(2)
+    finished_jobs_queue.put(rdc.api_info)
+
+
+class DummyResourceLogger(object):
+
+    def __init__(self):
+        self.documents = []
+
+    def get(self, user_id, resource_id, iteration=None):
+        return None
+
+    def commit(self, user_id, resource_id, iteration, document, expiration=None):
+        self.documents.append(document)
+
+
+class RedisJobQueueTestCase(unittest.TestCase):
+    """
+    This class tests the redis stream job queue and the queue worker
+    """
+    stream_name = "test_job_queue"
+
+    def setUp(self):
+        while not finished_jobs_queue.empty():
+            finished_jobs_queue.get()
+        if fakeredis is not None:
+            self.server = fakeredis.FakeServer()
+        self.job_queue = self.create_job_queue()
+        self.job_queue.delete()
+        self.job_queue.create_group()
+
+        self.config = Configuration()
+        self.config.NUMBER_OF_WORKERS = 2
+        self.config.REDIS_QUEUE_VISIBILITY_TIMEOUT = 0.2
+        self.config.REDIS_QUEUE_MAX_DELIVERIES = 2
+
+        self.rdc = ResourceDataContainer(grass_data_base="grass_data_base",
+                                         grass_user_data_base="grass_user_data_base",
+                                         grass_base_dir="grass_base_dir",
+                                         request_data={"request_data": None},
+                                         user_id="user_id",
+                                         user_group="user_group",
+                                         user_credentials={"user_role": "user"},
+                                         resource_id="resource_id",
+                                         iteration=None,
+                                         status_url="status_url",
+                                         api_info="api_info",
+                                         resource_url_base="resource_url_base",
+                                         orig_time=time.time(),
+                                         orig_datetime=datetime.datetime.now(),
+                                         config=self.config,
+                                         location_name="location_name",
+                                         mapset_name="mapset_name",
+                                         map_name="map_name")
+
+    def tearDown(self):
+        self.job_queue.delete()
+
+    def create_job_queue(self):
+        job_queue = RedisJobQueueInterface(stream_name=self.stream_name)
+        if fakeredis is not None:
+            job_queue.redis_server = fakeredis.FakeStrictRedis(server=self.server)
+        else:
+            job_queue.connect()
+        return job_queue
+
+    def create_worker(self, name, number_of_workers=None):
+        return RedisQueueWorker(config=self.config,
+                                consumer_name=name,
+                                number_of_workers=number_of_workers,
+                                job_queue=self.create_job_queue(),
+                                resource_logger=DummyResourceLogger(),
+                                poll_interval=0)
+
+    def enqueue(self, api_info, func=job_finished, timeout=15):
+        self.rdc.api_info = api_info
+        return self.job_queue.enqueue(timeout, func, self.rdc)
+
+    def wait_for_jobs(self, worker, number, timeout=10):
+        finished = []
+        start = time.time()
+        while len(finished) < number and time.time() - start < timeout:
+            worker.run_once()
+            while not finished_jobs_queue.empty():
+                finished.append(finished_jobs_queue.get())
+            time.sleep(0.01)
+        return finished
+
+    def test_enqueue_read_ack(self):
+        message_id = self.enqueue("job_1")
+        self.assertEqual(self.job_queue.length(), 1)
+
+        messages = self.job_queue.read("worker_1", count=10)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][0], message_id)
+        func, timeout, args = pickle.loads(messages[0][1][b"job"])
+        self.assertEqual(func, job_finished)
+        self.assertEqual(args[0].api_info, "job_1")
+
+        # The job is pending until it is acknowledged
+        self.assertEqual(self.job_queue.pending_count(), 1)
+        self.assertEqual(self.job_queue.read("worker_2", count=10), [])
+        self.assertTrue(self.job_queue.ack(message_id))
+        self.assertEqual(self.job_queue.pending_count(), 0)
+        self.assertEqual(self.job_queue.length(), 0)
+
+    def test_single_delivery(self):
+        for i in range(10):
+            self.enqueue("job_%i" % i)
+
+        jobs_1 = self.job_queue.read("worker_1", count=4)
+        jobs_2 = self.job_queue.read("worker_2", count=10)
+        ids_1 = set(message_id for message_id, fields in jobs_1)
+        ids_2 = set(message_id for message_id, fields in jobs_2)
+        print(len(ids_1), len(ids_2))
+        self.assertEqual(len(ids_1), 4)
+        self.assertEqual(len(ids_2), 6)
+        self.assertEqual(len(ids_1 & ids_2), 0)
+
+    def test_reclaim_and_touch(self):
+        message_id = self.enqueue("job_1")
+        self.job_queue.read("dead_worker", count=1)
+
+        # The job is not reclaimed before the visibility timeout
+        self.assertEqual(self.job_queue.reclaim("worker_1", 10, count=1), [])
+
+        time.sleep(0.1)
+        # Refreshing the idle time prevents a reclaim
+        self.assertEqual(self.job_queue.touch("dead_worker", [message_id]),
+                         [message_id])
+        self.assertEqual(self.job_queue.reclaim("worker_1", 0.05, count=1), [])
+
+        time.sleep(0.1)
+        messages = self.job_queue.reclaim("worker_1", 0.05, count=1)
+        print(messages)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][0], message_id)
+        self.assertEqual(messages[0][2], 2)
+
+    def test_worker(self):
+        worker = self.create_worker("worker_1")
+        for i in range(5):
+            self.enqueue("job_%i" % i)
+
+        finished = self.wait_for_jobs(worker, 5)
+        worker.drain()
+        print(finished)
+        self.assertEqual(sorted(finished), ["job_%i" % i for i in range(5)])
+        self.assertEqual(self.job_queue.pending_count(), 0)
+        self.assertEqual(self.job_queue.length(), 0)
+
+    def test_worker_limit(self):
+        worker = self.create_worker("worker_1", number_of_workers=1)
+        self.enqueue("job_1", func=job_sleep)
+        self.enqueue("job_2", func=job_sleep)
+
+        worker.run_once()
+        worker.run_once()
+        # Only a single job is running on this node, the second job
+        # stays in the queue for other nodes
+        self.assertEqual(len(worker.running_jobs), 1)
+        other_worker = self.create_worker("worker_2", number_of_workers=1)
+        other_worker.run_once()
+        self.assertEqual(len(other_worker.running_jobs), 1)
+
+        worker.drain()
+        other_worker.drain()
+        self.assertEqual(self.job_queue.length(), 0)
+
+    def test_worker_reclaims_jobs_of_dead_worker(self):
+        self.enqueue("job_1")
+        # A worker received the job and died without acknowledging it
+        self.job_queue.read("dead_worker", count=1)
+
+        time.sleep(0.3)
+        worker = self.create_worker("worker_1")
+        finished = self.wait_for_jobs(worker, 1)
+        worker.drain()
+        self.assertEqual(finished, ["job_1"])
+        self.assertEqual(self.job_queue.pending_count(), 0)
+
+    def test_dead_letter(self):
+        self.enqueue("job_1")
+        self.job_queue.read("dead_worker_1", count=1)
+        time.sleep(0.3)
+        self.job_queue.reclaim("dead_worker_2", 0.2, count=1)
+        time.sleep(0.3)
+
+        # The third delivery exceeds REDIS_QUEUE_MAX_DELIVERIES
+        worker = self.create_worker("worker_1")
+        worker.run_once()
+        self.assertEqual(len(worker.running_jobs), 0)
+        self.assertEqual(self.job_queue.length(), 0)
+        self.assertEqual(self.job_queue.redis_server.xlen(
+            self.job_queue.dead_letter_stream_name), 1)
+
+    def test_waiting_timeout(self):
+        self.enqueue("job_1", timeout=0)
+        time.sleep(0.1)
+
+        worker = self.create_worker("worker_1")
+        worker.run_once()
+        self.assertEqual(len(worker.running_jobs), 0)
+        self.assertEqual(self.job_queue.length(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
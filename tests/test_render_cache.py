@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Content addressed cache of rendered PNG images
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from flask import Flask
+from actinia_core.core.render_cache import RenderCache
+from actinia_core.rest import renderer_base
+from actinia_core.rest.renderer_base import RendererBaseResource
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+OPTIONS = {"width": 800, "height": 600, "n": 228500.0}
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class RenderCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.mapset_path = os.path.join(self.temp_path, "location", "user1")
+        for element in ("cellhd", "fcell", "colr"):
+            write_file(os.path.join(self.mapset_path, element, "elevation"),
+                       element)
+        write_file(os.path.join(self.mapset_path, "cell_misc", "elevation",
+                                "f_range"), "55.5 156.3")
+        write_file(os.path.join(self.mapset_path, "vector", "roads", "coor"),
+                   "coor")
+        self.cache = RenderCache(os.path.join(self.temp_path, "cache"),
+                                 max_size=1000)
+        self.image = os.path.join(self.temp_path, "image.png")
+        write_file(self.image, "x" * 300)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_key(self):
+        key = self.cache.create_key(self.mapset_path, "raster", OPTIONS,
+                                    rasters=["elevation"])
+        self.assertEqual(key, self.cache.create_key(
+            self.mapset_path, "raster", dict(OPTIONS),
+            rasters=["elevation@user1"]))
+        self.assertNotEqual(key, self.cache.create_key(
+            self.mapset_path, "legend", OPTIONS, rasters=["elevation"]))
+        self.assertNotEqual(key, self.cache.create_key(
+            self.mapset_path, "raster", dict(OPTIONS, width=801),
+            rasters=["elevation"]))
+
+        # A new color table changes the key
+        write_file(os.path.join(self.mapset_path, "colr", "elevation"),
+                   "new color table")
+        self.assertNotEqual(key, self.cache.create_key(
+            self.mapset_path, "raster", OPTIONS, rasters=["elevation"]))
+
+        # Vector maps and space time raster datasets
+        self.assertIsNotNone(self.cache.create_key(
+            self.mapset_path, "vector", OPTIONS, vectors=["roads"]))
+        self.assertIsNotNone(self.cache.create_key(
+            self.mapset_path, "strds", OPTIONS, strds=["temperature"]))
+
+    def test_not_cacheable(self):
+        write_file(os.path.join(self.mapset_path, "cellhd", "reclassed"),
+                   "reclass\nname: elevation\nmapset: user1\n")
+        write_file(os.path.join(self.mapset_path, "cell_misc", "linked",
+                                "gdal"), "file: /tmp/linked.tif")
+        write_file(os.path.join(self.mapset_path, "vector", "ogr", "frmt"),
+                   "format: ogr")
+        self.assertIsNone(self.cache.create_key(
+            self.mapset_path, "raster", OPTIONS, rasters=["reclassed"]))
+        self.assertIsNone(self.cache.create_key(
+            self.mapset_path, "rgb", OPTIONS,
+            rasters=["elevation", "linked", "elevation"]))
+        self.assertIsNone(self.cache.create_key(
+            self.mapset_path, "vector", OPTIONS, vectors=["ogr"]))
+        # Images of maps with illegal names are not cached
+        for name in ("../user1/elevation", "elevation@..", ".elevation"):
+            self.assertIsNone(self.cache.create_key(
+                self.mapset_path, "raster", OPTIONS, rasters=[name]))
+        self.assertIsNone(self.cache.create_key(
+            self.mapset_path, "vector", OPTIONS, vectors=["roads@user1/.."]))
+
+    def test_lru_and_invalidation(self):
+        keys = [self.cache.create_key(self.mapset_path, "raster",
+                                      dict(OPTIONS, width=i),
+                                      rasters=["elevation"])
+                for i in range(4)]
+        for key in keys[:3]:
+            self.assertIsNone(self.cache.get(key))
+            self.assertTrue(self.cache.put(key, self.image))
+            time.sleep(0.01)
+        self.assertTrue(os.path.isfile(self.image))
+        # The first image is used, the second is the least recently used
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertTrue(self.cache.put(keys[3], self.image))
+        self.assertEqual(self.cache.get_size(), 900)
+        self.assertIsNone(self.cache.get(keys[1]))
+        for key in (keys[0], keys[2], keys[3]):
+            with open(self.cache.get(key)) as f:
+                self.assertEqual(f.read(), "x" * 300)
+
+        self.cache.invalidate_mapset(self.mapset_path + "/")
+        self.assertEqual(self.cache.get_size(), 0)
+        self.assertIsNone(self.cache.get(keys[0]))
+
+    def test_eviction_scans(self):
+        """The cache directory is only scanned after a share of the maximum
+        size was written or if the maximum size is exceeded
+        """
+        cache = RenderCache(os.path.join(self.temp_path, "scan_cache"),
+                            max_size=100 * 1000)
+        list_entries = cache._list_entries
+        scans = []
+        cache._list_entries = lambda: scans.append(1) or list_entries()
+        keys = [cache.create_key(self.mapset_path, "raster",
+                                 dict(OPTIONS, width=i), rasters=["elevation"])
+                for i in range(400)]
+        for key in keys[:300]:
+            self.assertTrue(cache.put_image(key, b"x" * 100))
+        # The first image and each 6250 bytes scan the cache
+        self.assertEqual(len(scans), 5)
+        self.assertEqual(cache.size, 30000)
+
+        # The images above the maximum size evict the least recently used
+        # images down to 90000 bytes
+        for key in keys[300:]:
+            self.assertTrue(cache.put_image(key, b"x" * 1000))
+        self.assertLessEqual(cache.get_size(), 100 * 1000)
+        self.assertEqual(cache.size, cache.get_size())
+        self.assertLess(len(scans), 40)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[-1]))
+
+    def test_image_response(self):
+        resource = RendererBaseResource.__new__(RendererBaseResource)
+        renderer_base._render_cache = self.cache
+        try:
+            key = self.cache.create_key(self.mapset_path, "raster", OPTIONS,
+                                        rasters=["elevation"])
+            app = Flask(__name__)
+            with app.test_request_context():
+                self.assertIsNone(resource.get_cached_image_response(key))
+                response = resource.get_render_response(
+                    200, {"process_results": self.image}, key)
+                self.assertEqual(response.get_data(), b"x" * 300)
+                self.assertEqual(response.get_etag(), (key, False))
+                self.assertFalse(os.path.exists(self.image))
+                response = resource.get_cached_image_response(key)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_data(), b"x" * 300)
+            with app.test_request_context(headers={"If-None-Match": '"%s"' % key}):
+                response = resource.get_cached_image_response(key)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.get_data(), b"")
+        finally:
+            renderer_base._render_cache = None
+
+    def test_benchmark(self):
+        """The time to create the key of a raster map and read its cached
+        image
+        """
+        key = self.cache.create_key(self.mapset_path, "raster", OPTIONS,
+                                    rasters=["elevation"])
+        self.cache.put(key, self.image)
+        num_requests = 1000
+        start = time.time()
+        for i in range(num_requests):
+            key = self.cache.create_key(self.mapset_path, "raster", OPTIONS,
+                                        rasters=["elevation"])
+            with open(self.cache.get(key), "rb") as f:
+                f.read()
+        run_time = (time.time() - start) / num_requests
+        print("Cache hit of a rendered raster image in %.3f ms"
+              % (run_time * 1000))
+        self.assertLess(run_time, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
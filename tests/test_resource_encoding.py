@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Compact resource entry encoding
+
+The resource logger tests use fakeredis if it is installed, otherwise a local
+redis server is required.
+"""
+import unittest
+import pickle
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from actinia_core.core.common.config import Configuration
+from actinia_core.core.common.process_queue import EnqueuedProcess
+from actinia_core.core.resources_logger import ResourceLogger
+from actinia_core.core.resource_encoding import ResourceEncoder, has_msgpack, \
+    has_zstd
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def create_response_model(status="running", num_steps=50):
+    process_log = [{"executable": "r.mapcalc",
+                    "parameter": ["expression=elev_%i = elevation * 2" % i],
+                    "stdout": "",
+                    "stderr": ["0..3..6..9..12..15..18..21..24..27..30..33..36"
+                               "..39..42..45..48..51..54..57..60..63..66..69"
+                               "..72..75..78..81..84..87..90..93..96..99..100"],
+                    "return_code": 0,
+                    "run_time": 0.1} for i in range(num_steps)]
+    process_chain_list = [{"list": [{"id": "mapcalc_%i" % i,
+                                     "module": "r.mapcalc",
+                                     "inputs": [{"param": "expression",
+                                                 "value": "elev_%i = elevation * 2"
+                                                          % i}]}
+                                    for i in range(num_steps)]}]
+    return {"accept_datetime": "2021-05-24 22:37:21.607255",
+            "accept_timestamp": 1621888641.607252,
+            "api_info": {"endpoint": "asyncephemeralresource",
+                         "method": "POST",
+                         "path": "/api/v1/locations/nc_spm_08/processing_async",
+                         "request_url": "http://localhost/api/v1/locations/"
+                                        "nc_spm_08/processing_async"},
+            "datetime": "2021-05-24 22:37:23.105672",
+            "http_code": 200,
+            "message": "Running executable r.mapcalc",
+            "process_chain_list": process_chain_list,
+            "process_log": process_log,
+            "process_results": {"stats": [1, 2, 3]},
+            "progress": {"num_of_steps": num_steps, "step": num_steps // 2},
+            "resource_id": "resource_id-%s" % str(uuid.uuid4()),
+            "status": status,
+            "time_delta": 1.4984300136566162,
+            "timestamp": 1621888643.1056721,
+            "urls": {"resources": [], "status": "http://localhost/status"},
+            "user_id": "encoding_user"}
+
+
+class ResourceEncodingTestCase(unittest.TestCase):
+    """
+    This class tests the encoding of resource entries
+    """
+
+    def check_roundtrip(self, encoder):
+        response_model = create_response_model()
+        head, body = encoder.encode_document(200, response_model)
+        self.assertTrue(ResourceEncoder.is_encoded(head))
+
+        http_code, head_model = ResourceEncoder.decode_head(head)
+        self.assertEqual(http_code, 200)
+        self.assertEqual(head_model["status"], "running")
+        self.assertEqual(head_model["progress"]["step"], 25)
+        self.assertNotIn("process_log", head_model)
+
+        http_code, full_model = ResourceEncoder.decode_document(head, body)
+        self.assertEqual(full_model, response_model)
+
+        pickled = pickle.dumps([200, response_model])
+        print("%s %s: head %i bytes, body %i bytes, pickle %i bytes"
+              % (encoder.encoding, encoder.compression, len(head), len(body),
+                 len(pickled)))
+        self.assertLess(len(head), len(pickled) / 4)
+        return head, body
+
+    def test_json(self):
+        self.check_roundtrip(ResourceEncoder(encoding="json"))
+
+    @unittest.skipIf(has_msgpack is False, "msgpack is not installed")
+    def test_msgpack(self):
+        self.check_roundtrip(ResourceEncoder(encoding="msgpack"))
+
+    @unittest.skipIf(has_zstd is False, "zstandard is not installed")
+    def test_zstd(self):
+        uncompressed = self.check_roundtrip(ResourceEncoder(encoding="json"))
+        compressed = self.check_roundtrip(ResourceEncoder(encoding="json",
+                                                          compression="zstd"))
+        self.assertLess(len(compressed[1]), len(uncompressed[1]))
+
+    def test_legacy_pickle(self):
+        response_model = create_response_model()
+        pickled = pickle.dumps([200, response_model])
+        self.assertFalse(ResourceEncoder.is_encoded(pickled))
+        http_code, decoded_model = ResourceEncoder.decode_document(pickled)
+        self.assertEqual(http_code, 200)
+        self.assertEqual(decoded_model, response_model)
+
+    def test_unknown_version(self):
+        encoder = ResourceEncoder()
+        data = bytearray(encoder.encode({"status": "running"}))
+        data[4] = 255
+        self.assertRaises(ValueError, ResourceEncoder.decode, bytes(data))
+        self.assertRaises(ValueError, ResourceEncoder, encoding="xml")
+
+
+class ResourceLoggerEncodingTestCase(unittest.TestCase):
+    """
+    This class tests the storage of encoded resource entries in the resource
+    logger
+    """
+    user_id = "encoding_user"
+
+    def setUp(self):
+        config = Configuration()
+        config.REDIS_RESOURCE_COMPRESSION = "zstd"
+        self.log = ResourceLogger(host="localhost", port=6379, config=config)
+        if fakeredis is not None:
+            self.log.db.redis_server = fakeredis.FakeStrictRedis()
+        self.resource_id = str(uuid.uuid4())
+
+    def tearDown(self):
+        for key in self.log.db.redis_server.keys("*%s*" % self.user_id):
+            self.log.db.redis_server.delete(key)
+
+    def test_commit_and_get(self):
+        response_model = create_response_model()
+        self.assertTrue(self.log.commit(self.user_id, self.resource_id, 1,
+                                        pickle.dumps([200, response_model])))
+
+        http_code, stored_model = pickle.loads(
+            self.log.get(self.user_id, self.resource_id, 1))
+        self.assertEqual(stored_model, response_model)
+
+        http_code, status_model = self.log.get_status(self.user_id,
+                                                      self.resource_id, 1)
+        self.assertEqual(status_model["status"], "running")
+        self.assertNotIn("process_log", status_model)
+
+        # A committed document without large fields removes the old body
+        del response_model["process_log"]
+        self.log.commit(self.user_id, self.resource_id, 1,
+                        pickle.dumps([200, response_model]))
+        http_code, stored_model = pickle.loads(
+            self.log.get(self.user_id, self.resource_id, 1))
+        self.assertEqual(stored_model, response_model)
+
+        self.assertTrue(self.log.delete(self.user_id, self.resource_id, 1))
+        self.assertIsNone(self.log.get(self.user_id, self.resource_id, 1))
+
+    def test_commit_and_get_document(self):
+        response_model = create_response_model()
+        self.assertTrue(self.log.commit_document(self.user_id, self.resource_id,
+                                                 1, 200, response_model))
+        self.assertEqual(self.log.get_document(self.user_id, self.resource_id, 1),
+                         [200, response_model])
+        self.assertEqual(pickle.loads(self.log.get(self.user_id,
+                                                   self.resource_id, 1)),
+                         [200, response_model])
+        self.assertIsNone(self.log.get_document(self.user_id, "missing", 1))
+
+    def test_document_types(self):
+        # The stored documents contain only builtin types
+        accept_datetime = datetime(2021, 5, 24, 22, 37, 21)
+        response_model = create_response_model()
+        response_model["accept_datetime"] = accept_datetime
+        response_model["process_results"] = {"bbox": (1, 2, 3, 4),
+                                             "raw": b"raw"}
+        self.log.commit(self.user_id, self.resource_id, 1,
+                        pickle.dumps([200, response_model]))
+
+        http_code, stored_model = self.log.get_document(self.user_id,
+                                                        self.resource_id, 1)
+        self.assertEqual(stored_model["accept_datetime"], str(accept_datetime))
+        self.assertEqual(stored_model["process_results"],
+                         {"bbox": [1, 2, 3, 4], "raw": "raw"})
+
+    def test_check_exit(self):
+        # A process that exited with an error code sets the status of the
+        # running resource to error
+        response_model = create_response_model()
+        self.log.commit_document(self.user_id, self.resource_id, 1, 200,
+                                 response_model)
+        rdc = SimpleNamespace(config=Configuration(),
+                              resource_id=self.resource_id, iteration=1,
+                              user_id=self.user_id, api_info=None,
+                              user_credentials=None)
+        enqproc = EnqueuedProcess(func=None, timeout=10,
+                                  resource_logger=self.log, args=(rdc,))
+        enqproc.process = SimpleNamespace(exitcode=1)
+        enqproc.check_exit()
+
+        http_code, stored_model = self.log.get_document(self.user_id,
+                                                        self.resource_id, 1)
+        self.assertEqual(stored_model["status"], "error")
+        self.assertIn("exit code 1", stored_model["message"])
+        self.assertEqual(stored_model["process_log"],
+                         response_model["process_log"])
+
+    def test_legacy_entry(self):
+        response_model = create_response_model(status="finished")
+        db_resource_id = "%s/%s" % (self.user_id, self.resource_id)
+        self.log.db.redis_server.set(self.log.db.resource_id_prefix + db_resource_id,
+                                     pickle.dumps([200, response_model]))
+
+        http_code, stored_model = pickle.loads(
+            self.log.get(self.user_id, self.resource_id, 1))
+        self.assertEqual(stored_model, response_model)
+        http_code, status_model = self.log.get_status(self.user_id,
+                                                      self.resource_id, 1)
+        self.assertEqual(status_model["status"], "finished")
+        resources = self.log.get_user_resources(self.user_id)
+        self.assertEqual(resources, [response_model])
+
+    def test_user_resources(self):
+        for i, status in enumerate(["running", "finished", "finished", "error"]):
+            self.log.commit(self.user_id, "%s_%i" % (self.resource_id, i), 1,
+                            pickle.dumps([200, create_response_model(status)]))
+
+        resources = self.log.get_user_resources(self.user_id)
+        self.assertEqual(len(resources), 4)
+        self.assertIn("process_log", resources[0])
+
+        resources = self.log.get_user_resources(self.user_id, status="finished")
+        self.assertEqual([entry["status"] for entry in resources],
+                         ["finished", "finished"])
+
+        resources = self.log.get_user_resources(self.user_id, num=3,
+                                                with_body=False)
+        self.assertEqual(len(resources), 3)
+        self.assertNotIn("process_log", resources[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
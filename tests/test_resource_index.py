@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Indexed resource lists
+
+The resource logger tests use fakeredis if it is installed, otherwise a local
+redis server is required.
+"""
+import unittest
+import pickle
+import time
+import uuid
+from actinia_core.core.common.config import Configuration
+from actinia_core.core.resources_logger import ResourceLogger
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def create_response_model(user_id, resource_id, status, accept_timestamp):
+    return {"accept_timestamp": accept_timestamp,
+            "http_code": 200,
+            "message": "Resource is %s" % status,
+            "process_log": [{"executable": "r.info", "return_code": 0}],
+            "resource_id": resource_id,
+            "status": status,
+            "timestamp": accept_timestamp,
+            "user_id": user_id}
+
+
+class ResourceIndexTestCase(unittest.TestCase):
+    """
+    This class tests the resource lists that are read from the sorted set
+    indexes
+    """
+    user_id = "index_user"
+    other_user_id = "other_index_user"
+
+    def setUp(self):
+        self.log = ResourceLogger(host="localhost", port=6379,
+                                  config=Configuration())
+        if fakeredis is not None:
+            self.log.db.redis_server = fakeredis.FakeStrictRedis()
+        self.prefix = str(uuid.uuid4())
+
+    def tearDown(self):
+        for key in self.log.db.redis_server.keys("*index_user*"):
+            self.log.db.redis_server.delete(key)
+        for resource_id in self.log.db.redis_server.zrange(
+                self.log.db.resource_index, 0, -1):
+            if resource_id.decode().startswith("index_user/"):
+                self.log.db.redis_server.zrem(self.log.db.resource_index,
+                                              resource_id)
+
+    def commit(self, user_id, number, status, accept_timestamp=None):
+        resource_id = "resource_id-%s-%03i" % (self.prefix, number)
+        if accept_timestamp is None:
+            accept_timestamp = 1000.0 + number
+        self.log.commit(user_id, resource_id, 1, pickle.dumps(
+            [200, create_response_model(user_id, resource_id, status,
+                                        accept_timestamp)]))
+        return resource_id
+
+    def test_latest_first_and_status(self):
+        ids = [self.commit(self.user_id, i, "accepted") for i in range(6)]
+        self.commit(self.other_user_id, 6, "accepted")
+        # Status changes move the resources between the status indexes
+        self.commit(self.user_id, 1, "running")
+        self.commit(self.user_id, 2, "finished")
+        self.commit(self.user_id, 4, "finished")
+
+        resources, cursor = self.log.list_resources(self.user_id)
+        self.assertEqual([entry["resource_id"] for entry in resources],
+                         list(reversed(ids)))
+        self.assertIsNone(cursor)
+
+        resources, cursor = self.log.list_resources(self.user_id,
+                                                    status="finished")
+        self.assertEqual([entry["resource_id"] for entry in resources],
+                         [ids[4], ids[2]])
+        resources, cursor = self.log.list_resources(self.user_id,
+                                                    status="accepted")
+        self.assertEqual([entry["resource_id"] for entry in resources],
+                         [ids[5], ids[3], ids[0]])
+
+        resources = self.log.get_all_resources(status="running")
+        self.assertIn(ids[1], [entry["resource_id"] for entry in resources])
+
+    def test_cursor(self):
+        # Equal accept time stamps must not skip or repeat resources
+        ids = [self.commit(self.user_id, i, "finished", 1000.0 + i // 3)
+               for i in range(10)]
+        listed = []
+        cursor = None
+        while True:
+            resources, cursor = self.log.list_resources(
+                self.user_id, num=4, cursor=cursor, with_body=False,
+                batch_size=2)
+            listed.extend(entry["resource_id"] for entry in resources)
+            self.assertNotIn("process_log", resources[0] if resources else {})
+            if cursor is None:
+                break
+        print(listed)
+        self.assertEqual(sorted(listed), sorted(ids))
+        self.assertEqual(len(listed), len(set(listed)))
+
+        self.assertRaises(ValueError, self.log.list_resources, self.user_id,
+                          cursor="invalid")
+
+    def test_exact_pages(self):
+        # The last page is full, no cursor of an empty page is returned
+        ids = [self.commit(self.user_id, i, "finished") for i in range(8)]
+        resources, cursor = self.log.list_resources(self.user_id, num=4,
+                                                    with_body=False)
+        self.assertEqual([entry["resource_id"] for entry in resources],
+                         list(reversed(ids[4:])))
+        self.assertIsNotNone(cursor)
+        resources, cursor = self.log.list_resources(self.user_id, num=4,
+                                                    cursor=cursor,
+                                                    with_body=False)
+        self.assertEqual([entry["resource_id"] for entry in resources],
+                         list(reversed(ids[:4])))
+        self.assertIsNone(cursor)
+        resources, cursor = self.log.list_resources(self.user_id, num=0)
+        self.assertEqual((resources, cursor), ([], None))
+
+    def test_commit_update(self):
+        # Updates of an indexed resource are committed successfully
+        resource_id = "resource_id-%s-000" % self.prefix
+        for status in ("accepted", "running", "running", "error"):
+            self.assertTrue(self.log.commit(
+                self.user_id, resource_id, 1, pickle.dumps(
+                    [200, create_response_model(self.user_id, resource_id,
+                                                status, 1000.0)])))
+
+    def test_expired_and_deleted(self):
+        ids = [self.commit(self.user_id, i, "finished") for i in range(3)]
+        self.log.delete(self.user_id, ids[0])
+        # Expired resource entries are removed while reading the index
+        self.log.db.redis_server.delete(
+            self.log.db.resource_id_prefix + "%s/%s" % (self.user_id, ids[1]))
+
+        resources, cursor = self.log.list_resources(self.user_id)
+        self.assertEqual([entry["resource_id"] for entry in resources], [ids[2]])
+        index_key = self.log.db.get_index_key(self.user_id)
+        self.assertEqual(self.log.db.redis_server.zcard(index_key), 1)
+        index_key = self.log.db.get_index_key(self.user_id, "finished")
+        self.assertEqual(self.log.db.redis_server.zcard(index_key), 1)
+
+    def test_build_index(self):
+        # Resource entries that were created before the indexes existed
+        resource_id = "resource_id-%s" % self.prefix
+        entry = create_response_model(self.user_id, resource_id, "error",
+                                      time.time())
+        self.log.db.redis_server.set(
+            self.log.db.resource_id_prefix + "%s/%s" % (self.user_id,
+                                                        resource_id),
+            pickle.dumps([200, entry]))
+
+        resources, cursor = self.log.list_resources(self.user_id,
+                                                    status="error")
+        self.assertEqual(resources, [entry])
+        self.assertTrue(self.log.db.is_index_built(self.user_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
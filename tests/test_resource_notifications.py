@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Push based notification of final resource states
+
+The tests use fakeredis if it is installed, otherwise a local redis server
+is required.
+"""
+import unittest
+import pickle
+import statistics
+import threading
+import time
+import uuid
+from actinia_core.core.resources_logger import ResourceLogger
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class CountingResourceLogger(ResourceLogger):
+    """Resource logger that counts the reads of resource entries"""
+
+    def __init__(self, server=None):
+        ResourceLogger.__init__(self, host="localhost", port=6379)
+        if server is not None:
+            self.db.redis_server = fakeredis.FakeStrictRedis(server=server)
+        self.reads = 0
+        self.subscriptions = 0
+        self.lock = threading.Lock()
+        db_get = self.db.get
+        db_subscribe_finished = self.db.subscribe_finished
+
+        def get(resource_id):
+            with self.lock:
+                self.reads += 1
+            return db_get(resource_id)
+
+        def subscribe_finished(resource_id):
+            with self.lock:
+                self.subscriptions += 1
+            return db_subscribe_finished(resource_id)
+
+        self.db.get = get
+        self.db.subscribe_finished = subscribe_finished
+
+
+class ResourceNotificationTestCase(unittest.TestCase):
+    """
+    This class tests the waiting for final resource states and benchmarks
+    the notification against the polling mode
+    """
+    user_id = "notification_user"
+
+    def setUp(self):
+        self.server = None
+        if fakeredis is not None:
+            self.server = fakeredis.FakeServer()
+        self.worker_logger = CountingResourceLogger(self.server)
+        self.waiter_logger = CountingResourceLogger(self.server)
+
+    def commit(self, resource_id, status):
+        document = pickle.dumps([200, {"status": status,
+                                       "resource_id": resource_id}])
+        self.worker_logger.commit(user_id=self.user_id,
+                                  resource_id=resource_id,
+                                  iteration=1,
+                                  document=document,
+                                  expiration=60)
+
+    def test_wait_finished(self):
+        resource_id = str(uuid.uuid4())
+        self.commit(resource_id, "finished")
+        response_data = self.waiter_logger.wait_for_final_state(
+            self.user_id, resource_id, 1)
+        http_code, response_model = pickle.loads(response_data)
+        self.assertEqual(response_model["status"], "finished")
+
+    def test_wait_missing_resource(self):
+        for use_notifications in (True, False):
+            response_data = self.waiter_logger.wait_for_final_state(
+                self.user_id, str(uuid.uuid4()), 1,
+                use_notifications=use_notifications)
+            self.assertIsNone(response_data)
+
+    def test_wait_notification_timeout(self):
+        # The notification is lost, the resource is read again after the
+        # notification timeout
+        resource_id = str(uuid.uuid4())
+        self.commit(resource_id, "running")
+        db_resource_id = "%s/%s" % (self.user_id, resource_id)
+        document = pickle.dumps([200, {"status": "error"}])
+
+        def set_without_notification():
+            time.sleep(0.1)
+            self.worker_logger.db.set(db_resource_id, document, 60)
+
+        thread = threading.Thread(target=set_without_notification)
+        thread.start()
+        response_data = self.waiter_logger.wait_for_final_state(
+            self.user_id, resource_id, 1, notification_timeout=0.3)
+        thread.join()
+        http_code, response_model = pickle.loads(response_data)
+        self.assertEqual(response_model["status"], "error")
+
+    def run_benchmark(self, use_notifications, num_requests=30):
+        """Run concurrent waiting requests, each job finishes after a
+        random time and the latency between the final commit and the
+        response is measured
+        """
+        self.waiter_logger.reads = 0
+        self.waiter_logger.subscriptions = 0
+        resource_ids = [str(uuid.uuid4()) for i in range(num_requests)]
+        finish_times = dict()
+        latencies = []
+        lock = threading.Lock()
+
+        for resource_id in resource_ids:
+            self.commit(resource_id, "running")
+
+        def wait(resource_id):
+            response_data = self.waiter_logger.wait_for_final_state(
+                self.user_id, resource_id, 1, poll_time=0.05,
+                use_notifications=use_notifications)
+            response_time = time.time()
+            http_code, response_model = pickle.loads(response_data)
+            self.assertEqual(response_model["status"], "finished")
+            with lock:
+                latencies.append(response_time - finish_times[resource_id])
+
+        threads = [threading.Thread(target=wait, args=(resource_id,))
+                   for resource_id in resource_ids]
+        for thread in threads:
+            thread.start()
+        # Give the waiting requests time to subscribe or start polling
+        time.sleep(0.1)
+        for i, resource_id in enumerate(resource_ids):
+            time.sleep(0.01 * (i % 5))
+            finish_times[resource_id] = time.time()
+            self.commit(resource_id, "finished")
+        for thread in threads:
+            thread.join()
+
+        return (statistics.median(latencies), max(latencies),
+                self.waiter_logger.reads, self.waiter_logger.subscriptions)
+
+    def test_benchmark_notification_vs_polling(self):
+        num_requests = 30
+        results = dict()
+        for mode, use_notifications in (("polling", False),
+                                        ("notification", True)):
+            results[mode] = self.run_benchmark(use_notifications,
+                                               num_requests=num_requests)
+            median, maximum, reads, subscriptions = results[mode]
+            print("%s: %i requests, median latency %.4fs, max latency %.4fs, "
+                  "%i reads, %i subscriptions" % (mode, num_requests, median,
+                                                  maximum, reads, subscriptions))
+
+        # Each notified request reads its resource a single time
+        self.assertEqual(results["notification"][2], num_requests)
+        self.assertLess(results["notification"][2], results["polling"][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Background publisher of resource status updates
+"""
+import unittest
+import time
+from actinia_core.core.resource_status_publisher import ResourceStatusPublisher
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class ResourceStatusPublisherTestCase(unittest.TestCase):
+    """
+    This class tests the coalescing and rate limiting of status updates
+    """
+
+    def setUp(self):
+        self.commits = []
+        self.posts = []
+        self.commit_delay = 0.0
+        self.webhook_delay = 0.0
+
+    def commit(self, document):
+        time.sleep(self.commit_delay)
+        self.commits.append(document)
+
+    def post(self, document, type):
+        time.sleep(self.webhook_delay)
+        self.posts.append((document, type))
+
+    def test_coalescing(self):
+        publisher = ResourceStatusPublisher(self.commit, max_rate=10)
+        start = time.time()
+        for step in range(10000):
+            publisher.publish({"status": "running", "step": step})
+        publish_time = time.time() - start
+        publisher.publish({"status": "finished"}, final=True)
+        publisher.close()
+
+        print("Published 10000 updates in %.3f s, committed %i documents"
+              % (publish_time, len(self.commits)))
+        self.assertLess(len(self.commits), 100)
+        # The final state is committed last, the latest update was replaced
+        self.assertEqual(self.commits[-1], {"status": "finished"})
+        steps = [document["step"] for document in self.commits[:-1]]
+        self.assertEqual(steps, sorted(steps))
+
+    def test_lazy_documents(self):
+        created = []
+
+        def factory(step):
+            def create_document():
+                created.append(step)
+                return {"status": "running", "step": step}
+            return create_document
+
+        publisher = ResourceStatusPublisher(self.commit, max_rate=1)
+        for step in range(100):
+            publisher.publish(factory(step))
+        publisher.flush()
+        publisher.close()
+        # Replaced updates are never created
+        self.assertLess(len(created), 5)
+        self.assertEqual(self.commits[-1]["step"], 99)
+
+    def test_final_is_flushed(self):
+        publisher = ResourceStatusPublisher(self.commit, webhook_func=self.post,
+                                            max_rate=0.1)
+        publisher.publish({"status": "running"})
+        publisher.publish({"status": "running", "step": 1})
+        # The final state does not wait for the rate limit
+        start = time.time()
+        publisher.publish({"status": "error"}, final=True)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(self.commits[-1], {"status": "error"})
+        self.assertEqual(self.posts[-1], ({"status": "error"}, "finished"))
+        # Updates after the final state are ignored
+        publisher.publish({"status": "running", "step": 2})
+        publisher.close()
+        self.assertEqual(self.commits[-1], {"status": "error"})
+
+    def test_webhook_does_not_block(self):
+        self.webhook_delay = 0.5
+        publisher = ResourceStatusPublisher(self.commit, webhook_func=self.post,
+                                            max_rate=0)
+        start = time.time()
+        for step in range(10):
+            publisher.publish({"status": "running", "step": step})
+        self.assertLess(time.time() - start, 0.5)
+        publisher.publish({"status": "finished"}, final=True)
+        publisher.close()
+        self.assertEqual(self.posts[-1], ({"status": "finished"}, "finished"))
+        self.assertTrue(all(type == "update" for document, type in self.posts[:-1]))
+
+    def test_commit_errors(self):
+        def failing_commit(document):
+            raise Exception("Redis is down")
+
+        publisher = ResourceStatusPublisher(failing_commit)
+        publisher.publish({"status": "running"})
+        publisher.publish({"status": "finished"}, final=True)
+        publisher.close()
+        self.assertFalse(publisher.database_sender.thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Send files with range and conditional requests
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from email.parser import BytesParser
+from flask import Flask
+from werkzeug.http import http_date
+from werkzeug.wsgi import FileWrapper
+from actinia_core.rest.resource_streamer import create_file_response
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class SendfileWrapper(FileWrapper):
+    """A file wrapper that records the file position when the server would
+    start to send the file
+    """
+    positions = []
+
+    def __init__(self, file, buffer_size=8192):
+        SendfileWrapper.positions.append(file.tell())
+        super().__init__(file, buffer_size)
+
+
+class ResourceStreamerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_path, "result.tif")
+        self.content = bytes(range(256)) * 40
+        with open(self.file_path, "wb") as f:
+            f.write(self.content)
+        self.app = Flask(__name__)
+        self.app.add_url_rule(
+            "/<file_name>", "file",
+            lambda file_name: create_file_response(
+                os.path.join(self.temp_path, file_name)))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def get(self, **headers):
+        return self.client.get("/result.tif", headers=headers)
+
+    def test_complete_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.content)
+        self.assertEqual(response.headers["Content-Length"],
+                         str(len(self.content)))
+        self.assertEqual(response.headers["Content-Type"], "image/tiff")
+        self.assertEqual(response.headers["Accept-Ranges"], "bytes")
+        self.assertEqual(response.headers["Content-Disposition"],
+                         "attachment; filename=result.tif")
+        self.assertIsNotNone(response.headers.get("ETag"))
+        self.assertIsNotNone(response.headers.get("Last-Modified"))
+
+    def test_single_range(self):
+        response = self.get(Range="bytes=100-299")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[100:300])
+        self.assertEqual(response.headers["Content-Range"],
+                         "bytes 100-299/10240")
+        self.assertEqual(response.headers["Content-Length"], "200")
+
+        # Suffix and open ranges, the end is limited to the file size
+        self.assertEqual(self.get(Range="bytes=-10").data, self.content[-10:])
+        self.assertEqual(self.get(Range="bytes=10000-").data,
+                         self.content[10000:])
+        self.assertEqual(self.get(Range="bytes=10000-20000").data,
+                         self.content[10000:])
+
+    def test_multiple_ranges(self):
+        response = self.get(Range="bytes=0-9,100-199,-5")
+        self.assertEqual(response.status_code, 206)
+        content_type = response.headers["Content-Type"]
+        self.assertTrue(content_type.startswith("multipart/byteranges"))
+        self.assertEqual(int(response.headers["Content-Length"]),
+                         len(response.data))
+        message = BytesParser().parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" +
+            response.data)
+        parts = message.get_payload()
+        self.assertEqual([part["Content-Range"] for part in parts],
+                         ["bytes 0-9/10240", "bytes 100-199/10240",
+                          "bytes 10235-10239/10240"])
+        self.assertEqual(parts[1].get_payload(decode=True),
+                         self.content[100:200])
+        self.assertEqual(parts[2].get_payload(decode=True),
+                         self.content[-5:])
+
+    def test_unsatisfiable_and_invalid_ranges(self):
+        response = self.get(Range="bytes=20000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["Content-Range"], "bytes */10240")
+        # Invalid ranges are ignored
+        for byte_range in ("bytes=10-5", "items=0-5", "bytes=0-x"):
+            response = self.get(Range=byte_range)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, self.content)
+
+    def test_conditional_requests(self):
+        etag = self.get().headers["ETag"]
+        last_modified = self.get().headers["Last-Modified"]
+        response = self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.get(**{"If-Modified-Since": last_modified})
+                         .status_code, 304)
+        # The ETag has priority over the modification time
+        self.assertEqual(self.get(**{"If-None-Match": '"other"',
+                                     "If-Modified-Since": last_modified})
+                         .status_code, 200)
+        self.assertEqual(self.get(**{"If-Modified-Since": http_date(0)})
+                         .status_code, 200)
+        self.assertEqual(self.get(**{"If-Match": '"other"'}).status_code, 412)
+        self.assertEqual(self.get(**{"If-Match": etag}).status_code, 200)
+
+        # A modified file changes the ETag
+        with open(self.file_path, "ab") as f:
+            f.write(b"new")
+        self.assertNotEqual(self.get().headers["ETag"], etag)
+        self.assertEqual(self.get(**{"If-None-Match": etag}).status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get().headers["ETag"]
+        response = self.get(Range="bytes=0-9", **{"If-Range": etag})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[:10])
+        # The complete file is sent if the file has changed
+        response = self.get(Range="bytes=0-9", **{"If-Range": '"other"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.content)
+
+    def test_file_wrapper(self):
+        """The file is passed to the file wrapper of the WSGI server at the
+        start position of the range
+        """
+        SendfileWrapper.positions = []
+        with self.app.test_request_context(
+                "/", headers={"Range": "bytes=1000-1999"},
+                environ_overrides={"wsgi.file_wrapper": SendfileWrapper}):
+            response = create_file_response(self.file_path)
+            self.assertIsInstance(response.response, SendfileWrapper)
+            self.assertEqual(SendfileWrapper.positions, [1000])
+            self.assertEqual(response.headers["Content-Length"], "1000")
+            response.close()
+        self.assertTrue(response.response.file.closed)
+
+    def test_benchmark(self):
+        """Measure the throughput of the complete file and the overhead of
+        range and conditional requests
+        """
+        file_path = os.path.join(self.temp_path, "large.tif")
+        size = 256 * 1024 * 1024
+        with open(file_path, "wb") as f:
+            f.truncate(size)
+        start = time.time()
+        response = self.client.get("/large.tif")
+        received = sum(len(data) for data in response.response)
+        response.close()
+        run_time = time.time() - start
+        self.assertEqual(received, size)
+
+        etag = self.get().headers["ETag"]
+        num_requests = 500
+        results = []
+        for headers in ({"Range": "bytes=4096-8191"},
+                        {"Range": "bytes=0-99,4096-8191,-100"},
+                        {"If-None-Match": etag}):
+            start = time.time()
+            for i in range(num_requests):
+                self.get(**headers)
+            results.append((time.time() - start) / num_requests * 1000)
+        print("Sent %i MiB with %.0f MiB/s, %.3f ms per single range, "
+              "%.3f ms per multiple ranges and %.3f ms per 304 request" % (
+                  size // 2 ** 20, size / 2 ** 20 / run_time, *results))
+        self.assertLess(max(results), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Parser of the stdout output of processes
+"""
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import unittest
+from actinia_core.core.common.exceptions import AsyncProcessError
+from actinia_core.core.process_output import OutputCapture
+from actinia_core.core.stdout_parser import parse_stdout
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def legacy_parse(stdout, format, delimiter):
+    """The row parser of the previous implementation"""
+    rows = stdout.strip().split("\n")
+    if "table" in format:
+        result = []
+        for row in rows:
+            row = row.strip()
+            values = row.split(delimiter)
+            value_list = []
+            for value in values:
+                value_list.append(value.strip())
+            result.append(value_list)
+    elif "list" in format:
+        result = []
+        for row in rows:
+            value = row.strip()
+            result.append(value)
+    elif "kv" in format:
+        result = dict()
+        for row in rows:
+            row = row.strip()
+            key, value = row.split(delimiter, 1)
+            result[key.strip()] = value.strip()
+    return result
+
+
+def r_stats_output(num_rows):
+    """Create the output of r.stats -acn"""
+    return "".join("%i|%i|%.6f|%i\n" % (i, i % 7, i * 0.25, i * 3)
+                   for i in range(num_rows))
+
+
+class StdoutParserTestCase(unittest.TestCase):
+
+    def test_legacy_results(self):
+        outputs = ["\n  1|a | 2.5\n\n3| b|*\n \n", "", "x", "1|2\r\n3|4\r\n",
+                   "\n\nrow 1\n\n\nrow 2\n\n"]
+        for stdout in outputs:
+            for format in ("table", "list"):
+                self.assertEqual(parse_stdout(stdout, format, "|"),
+                                 legacy_parse(stdout, format, "|"))
+        stdout = "\nn=10\nmean = 2.5\n name=a=b\n\n"
+        self.assertEqual(parse_stdout(stdout, "kv", "="),
+                         legacy_parse(stdout, "kv", "="))
+        self.assertRaises(AsyncProcessError, parse_stdout, "a\nb=1", "kv", "=")
+        self.assertRaises(AsyncProcessError, parse_stdout, "a", "csv", ",")
+
+    def test_json(self):
+        self.assertEqual(parse_stdout("a=1\nb=2\n", "json", "="),
+                         {"a": "1", "b": "2"})
+        self.assertEqual(parse_stdout('{"a": [1, 2]}', "json", "="),
+                         {"a": [1, 2]})
+        self.assertEqual(parse_stdout("text", "json", "="), "text")
+
+    def test_columnar(self):
+        stdout = "1|0.5|a|*\n2|1e3|b|1\n3|*|c|2|extra\n"
+        result = parse_stdout(stdout, "table", "|", columnar=True)
+        self.assertEqual(result, {
+            "num_rows": 3, "types": ["int", "float", "str", "int", "str"],
+            "columns": [[1, 2, 3], [0.5, 1000.0, None], ["a", "b", "c"],
+                        [None, 1, 2], ["", "", "extra"]]})
+
+        result = parse_stdout("1\n2\nnan\n", "list", "|", columnar=True)
+        self.assertEqual(result, {"num_rows": 3, "type": "str",
+                                  "values": ["1", "2", "nan"]})
+        result = parse_stdout("1\n2\n\n3\n", "list", "|", columnar=True)
+        self.assertEqual(result, {"num_rows": 4, "type": "int",
+                                  "values": [1, 2, None, 3]})
+        result = parse_stdout("n=10\nmean=2.5\nname=elev\nmax=inf", "kv", "=",
+                              columnar=True)
+        self.assertEqual(result, {"n": 10, "mean": 2.5, "name": "elev",
+                                  "max": "inf"})
+
+    def test_spilled_output(self):
+        temp_path = tempfile.mkdtemp()
+        try:
+            capture = OutputCapture(os.path.join(temp_path, "stdout.txt"),
+                                    head_size=100, tail_size=100)
+            stdout = r_stats_output(1000)
+            capture.write(stdout.encode())
+            capture.spill_file.close()
+            self.assertTrue(capture.truncated)
+            self.assertEqual(parse_stdout(capture, "table", "|"),
+                             legacy_parse(stdout, "table", "|"))
+            result = parse_stdout(capture, "table", "|", columnar=True)
+            self.assertEqual(result["types"], ["int", "int", "float", "int"])
+            self.assertEqual(result["columns"][3][-1], 2997)
+        finally:
+            shutil.rmtree(temp_path)
+
+    def test_benchmark(self):
+        """Compare the parser with the previous implementation for the spilled
+        table output of r.stats with 500000 rows
+        """
+        num_rows = 500000
+        temp_path = tempfile.mkdtemp()
+        capture = OutputCapture(os.path.join(temp_path, "stdout.txt"),
+                                head_size=1024, tail_size=1024)
+        capture.write(r_stats_output(num_rows).encode())
+        capture.spill_file.close()
+
+        parsers = [
+            ("previous parser",
+             lambda: legacy_parse(capture.read(), "table", "|")),
+            ("row parser", lambda: parse_stdout(capture, "table", "|")),
+            ("columnar parser",
+             lambda: parse_stdout(capture, "table", "|", columnar=True))]
+        results = []
+        try:
+            for name, func in parsers:
+                gc.collect()
+                start = time.time()
+                result = func()
+                run_time = time.time() - start
+                del result
+                gc.collect()
+                tracemalloc.start()
+                result = func()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results.append((name, result, run_time, peak))
+                del result
+        finally:
+            shutil.rmtree(temp_path)
+
+        print("Table with %i rows: %s" % (num_rows, ", ".join(
+            "%s %.3f s %.1f MB" % (name, run_time, peak / 1e6)
+            for name, result, run_time, peak in results)))
+        self.assertEqual(results[1][1], results[0][1])
+        self.assertEqual(results[2][1]["num_rows"], num_rows)
+        self.assertEqual(results[2][1]["types"], ["int", "int", "float", "int"])
+        self.assertLess(results[2][3], results[0][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
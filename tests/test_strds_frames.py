@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+
+"""
+Tests: Render the raster map layers of a STRDS as animation frames
+"""
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import zipfile
+from PIL import Image
+from actinia_core.core.common.process_object import Process
+from actinia_core.core.messages_logger import MessageLogger
+from actinia_core.core.termination_listener import TerminationListener
+from actinia_core.rest.strds_frame_renderer import \
+    EphemeralSTRDSFrameRenderer, SyncEphemeralSTRDSFrameRendererResource, \
+    get_frame_name, sample_maps
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+# Renders a frame like d.rast into the file of GRASS_RENDER_FILE
+RENDER_FRAME = ("import os, sys, time\n"
+                "from PIL import Image\n"
+                "time.sleep(0.1)\n"
+                "Image.new('RGBA', (int(os.environ['GRASS_RENDER_WIDTH']),"
+                " int(os.environ['GRASS_RENDER_HEIGHT'])),"
+                " (int(sys.argv[1]), 0, 0, 255)).save("
+                "os.environ['GRASS_RENDER_FILE'])\n")
+
+
+def write_frame(frame_dir, index):
+    with open(os.path.join(frame_dir, get_frame_name(index)), "wb") as f:
+        f.write(b"png %i" % index)
+
+
+class FrameSamplingTestCase(unittest.TestCase):
+
+    def test_sample_maps(self):
+        maps = list(range(10))
+        self.assertEqual(sample_maps(maps, 20), maps)
+        self.assertEqual(sample_maps(maps, 4), [0, 3, 6, 9])
+        self.assertEqual(sample_maps(maps, 2), [0, 9])
+        self.assertEqual(sample_maps(maps, 1), [0])
+
+
+class FrameStreamTestCase(unittest.TestCase):
+    """Stream the frames of a job, the job is simulated by a thread that
+    writes the frames
+    """
+
+    def setUp(self):
+        self.frame_dir = tempfile.mkdtemp()
+        self.finished = False
+        self.response = (200, {"process_results": [
+            {"frame": get_frame_name(i), "map": "map_%i" % i}
+            for i in range(5)]})
+        resource = SyncEphemeralSTRDSFrameRendererResource.__new__(
+            SyncEphemeralSTRDSFrameRendererResource)
+        resource._is_job_finished = lambda: self.finished
+        resource.wait_until_finish = lambda poll_time: self.response
+        self.resource = resource
+
+    def tearDown(self):
+        shutil.rmtree(self.frame_dir, ignore_errors=True)
+
+    def run_job(self, num_frames, delay=0.05):
+        for index in range(num_frames):
+            time.sleep(delay)
+            write_frame(self.frame_dir, index)
+        self.finished = True
+
+    def test_stream(self):
+        job = threading.Thread(target=self.run_job, args=(5,))
+        job.start()
+        start = time.time()
+        chunks = []
+        for chunk in self.resource._stream_frames(self.frame_dir):
+            chunks.append((time.time() - start, chunk))
+        job.join()
+        # The first frame is sent before the job finished
+        self.assertLess(chunks[0][0], chunks[-1][0] - 0.1)
+        zip_file = zipfile.ZipFile(io.BytesIO(b"".join(
+            chunk for t, chunk in chunks)))
+        self.assertEqual(zip_file.namelist(), [get_frame_name(i) for i in
+                                               range(5)] + ["frames.json"])
+        self.assertEqual(zip_file.read(get_frame_name(3)), b"png 3")
+        self.assertEqual(json.loads(zip_file.read("frames.json"))[4]["map"],
+                         "map_4")
+        self.assertFalse(os.path.exists(self.frame_dir))
+
+    def test_error(self):
+        self.response = (400, {"status": "error", "message": "d.rast failed"})
+        job = threading.Thread(target=self.run_job, args=(2,))
+        job.start()
+        data = b"".join(self.resource._stream_frames(self.frame_dir))
+        job.join()
+        zip_file = zipfile.ZipFile(io.BytesIO(data))
+        self.assertEqual(zip_file.namelist(), [get_frame_name(0),
+                                               get_frame_name(1), "error.json"])
+        self.assertEqual(json.loads(zip_file.read("error.json"))["message"],
+                         "d.rast failed")
+
+
+class FrameRendererTestCase(unittest.TestCase):
+    """Render frames with a stand-in executable for d.rast
+    """
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.frame_dir = os.path.join(self.temp_path, "frames")
+        os.makedirs(self.frame_dir)
+        renderer = EphemeralSTRDSFrameRenderer.__new__(
+            EphemeralSTRDSFrameRenderer)
+        renderer.__dict__.update(
+            message_logger=MessageLogger(), process_parallel_limit=4,
+            termination_listener=TerminationListener(None, "resource_id"),
+            running_processes=set(), processes_killed=False,
+            process_lock=threading.Lock(), process_count=0, last_module=None,
+            temp_mapset_path=self.temp_path, temp_file_path=self.temp_path,
+            progress_steps=0, progress={}, module_output_log=[],
+            module_output_dict={}, module_output_captures=[],
+            module_output_capture_dict={}, process_output_count=0,
+            process_log_head_size=1024, process_log_tail_size=1024,
+            process_output_timeout=60, mapset_size_tracking=False,
+            process_time_limit=60,
+            interim_result=types.SimpleNamespace(saving_interim_results=False))
+        renderer._send_resource_update = lambda message: None
+        self.renderer = renderer
+        self.options = {"width": 40, "height": 30, "frame_dir": self.frame_dir,
+                        "frame_duration": 100}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def render(self, num_frames, process_parallel_limit):
+        self.renderer.process_parallel_limit = process_parallel_limit
+        process_list = [Process(exec_type="exec", executable=sys.executable,
+                                executable_params=["-c", RENDER_FRAME,
+                                                   str(index * 50)],
+                                id="frame_%i" % (index + 1))
+                        for index in range(num_frames)]
+        frame_files = [os.path.join(self.frame_dir, get_frame_name(index))
+                       for index in range(num_frames)]
+        start = time.time()
+        self.renderer._render_frames(process_list, frame_files, self.options)
+        return time.time() - start, frame_files
+
+    def test_render_frames(self):
+        run_time, frame_files = self.render(4, 4)
+        self.assertEqual(sorted(os.listdir(self.frame_dir)),
+                         [get_frame_name(index) for index in range(4)])
+        with Image.open(frame_files[2]) as image:
+            self.assertEqual(image.size, (40, 30))
+            self.assertEqual(image.getpixel((0, 0)), (100, 0, 0, 255))
+
+        for image_format in ("gif", "webp"):
+            result_file = self.renderer._create_animation(
+                frame_files, dict(self.options, format=image_format))
+            with Image.open(result_file) as image:
+                self.assertEqual(image.format, image_format.upper())
+                self.assertEqual(image.n_frames, 4)
+
+    def test_benchmark(self):
+        """Render the frames with one process at a time and concurrently
+        """
+        num_frames = 12
+        sequential, frame_files = self.render(num_frames, 1)
+        concurrent, frame_files = self.render(num_frames, 4)
+        print("Rendered %i frames in %.3f s sequentially and %.3f s "
+              "concurrently" % (num_frames, sequential, concurrent))
+        self.assertLess(concurrent, sequential)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Cache of prepared temporary GRASS GIS database skeletons
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from actinia_core.core.grass_init import GrassMapsetBootstrapper
+from actinia_core.core.temp_database_cache import TempDatabaseSkeleton, \
+    TempDatabaseSkeletonCache
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+WIND = """proj:       99
+zone:       0
+north:      228500
+south:      215000
+east:       645000
+west:       630000
+cols:       1500
+rows:       1350
+e-w resol:  10
+n-s resol:  10
+"""
+
+NORMALIZED_WIND = """proj:       99
+zone:       0
+north:      228500
+south:      215000
+east:       645000
+west:       630000
+cols:       1500
+rows:       1350
+e-w resol:  10
+n-s resol:  10
+top:        1.000000000000000
+bottom:     0.000000000000000
+cols3:      1500
+rows3:      1350
+depths:     1
+e-w resol3: 10
+n-s resol3: 10
+t-b resol:  1
+"""
+
+CREDENTIALS = {"user_role": "user",
+               "permissions": {"accessible_datasets": {
+                   "nc_spm_08": ["PERMANENT", "user1"]}}}
+
+
+class TempDatabaseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.location_path = os.path.join(self.base, "global", "nc_spm_08")
+        self.user_location_path = os.path.join(self.base, "user", "nc_spm_08")
+        for mapset in ("PERMANENT", "user1"):
+            os.makedirs(os.path.join(self.location_path, mapset))
+            with open(os.path.join(self.location_path, mapset, "WIND"), "w") as f:
+                f.write(WIND)
+        os.makedirs(self.user_location_path)
+        with open(os.path.join(self.location_path, "PERMANENT",
+                               "DEFAULT_WIND"), "w") as f:
+            f.write(WIND)
+        self.temp_base = os.path.join(self.base, "temp")
+        os.mkdir(self.temp_base)
+        self.num_listings = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def create_skeleton(self):
+        """Create a skeleton of all mapsets like _create_temp_database"""
+        self.num_listings += 1
+        mapsets_to_link = [(os.path.join(self.location_path, mapset), mapset)
+                           for mapset in sorted(os.listdir(self.location_path))]
+        return TempDatabaseSkeleton(mapsets_to_link,
+                                    [self.location_path, self.user_location_path])
+
+    def get_skeleton(self, cache):
+        key = cache.create_key([self.location_path, self.user_location_path],
+                               [], CREDENTIALS)
+        return cache.get(key, self.create_skeleton)
+
+    def test_create_mapset(self):
+        skeleton = self.create_skeleton()
+        temp_location_path = os.path.join(self.temp_base, "nc_spm_08")
+        skeleton.link_mapsets(temp_location_path)
+        self.assertEqual(sorted(os.listdir(temp_location_path)),
+                         ["PERMANENT", "user1"])
+        self.assertTrue(os.path.islink(os.path.join(temp_location_path, "user1")))
+
+        self.assertEqual(skeleton.default_region, NORMALIZED_WIND)
+        bootstrapper = GrassMapsetBootstrapper(self.temp_base, "nc_spm_08",
+                                               "mapset_1")
+        bootstrapper.create_mapset(default_region=skeleton.default_region)
+        bootstrapper.add_to_search_path(["user1"])
+        mapset_path = os.path.join(temp_location_path, "mapset_1")
+        with open(os.path.join(mapset_path, "WIND")) as f:
+            self.assertEqual(f.read(), NORMALIZED_WIND)
+        with open(os.path.join(mapset_path, "SEARCH_PATH")) as f:
+            self.assertEqual(f.read(), "mapset_1\nPERMANENT\nuser1\n")
+
+    def test_missing_default_wind(self):
+        os.remove(os.path.join(self.location_path, "PERMANENT", "DEFAULT_WIND"))
+        self.assertIsNone(self.create_skeleton().default_region)
+
+    def test_cache_invalidation(self):
+        cache = TempDatabaseSkeletonCache()
+        skeleton = self.get_skeleton(cache)
+        self.assertIs(self.get_skeleton(cache), skeleton)
+        self.assertEqual(self.num_listings, 1)
+
+        # Creating a mapset changes the location directory
+        time.sleep(0.01)
+        os.mkdir(os.path.join(self.location_path, "user2"))
+        skeleton = self.get_skeleton(cache)
+        self.assertEqual(self.num_listings, 2)
+        self.assertIn("user2", [mapset for path, mapset in skeleton.mapsets_to_link])
+
+        # A new default region
+        time.sleep(0.01)
+        with open(os.path.join(self.location_path, "PERMANENT",
+                               "DEFAULT_WIND"), "w") as f:
+            f.write(WIND.replace("228500", "228600"))
+        skeleton = self.get_skeleton(cache)
+        self.assertEqual(self.num_listings, 3)
+        self.assertIn("228600", skeleton.default_region)
+
+        # Explicit invalidation
+        cache.invalidate(self.location_path)
+        self.get_skeleton(cache)
+        self.assertEqual(self.num_listings, 4)
+
+        # Other permissions use other skeletons
+        key = cache.create_key([self.location_path, self.user_location_path],
+                               [], {"user_role": "admin", "permissions": {}})
+        cache.get(key, self.create_skeleton)
+        self.assertEqual(self.num_listings, 5)
+        self.assertEqual(len(cache.skeletons), 2)
+
+    def test_benchmark(self):
+        """Compare the creation of a temporary database from a cached skeleton
+        with the startup of the three GRASS GIS modules
+        """
+        cache = TempDatabaseSkeletonCache()
+        runs = 50
+        start = time.time()
+        for i in range(runs):
+            temp_location_path = os.path.join(self.temp_base, "db_%i" % i)
+            skeleton = self.get_skeleton(cache)
+            skeleton.link_mapsets(temp_location_path)
+            bootstrapper = GrassMapsetBootstrapper(self.temp_base, "db_%i" % i,
+                                                   "mapset_%i" % i)
+            bootstrapper.create_mapset(default_region=skeleton.default_region)
+            bootstrapper.add_to_search_path(["user1"])
+            bootstrapper.set_db_connection("sqlite", "sqlite.db")
+        skeleton_time = (time.time() - start) / runs
+
+        # Lower bound of g.mapset, g.mapsets and db.connect: three process
+        # starts without any GRASS GIS initialization
+        start = time.time()
+        for i in range(runs):
+            for module in range(3):
+                subprocess.run(["true"])
+        module_time = (time.time() - start) / runs
+
+        print("Temporary database from skeleton: %.3f ms, three process "
+              "starts: %.3f ms" % (skeleton_time * 1000, module_time * 1000))
+        self.assertEqual(self.num_listings, 1)
+        self.assertLess(skeleton_time, module_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
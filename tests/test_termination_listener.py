@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Termination listener
+
+The resource logger tests use fakeredis if it is installed, otherwise a local
+redis server is required.
+"""
+import subprocess
+import time
+import unittest
+import uuid
+from actinia_core.core.common.config import Configuration
+from actinia_core.core.resources_logger import ResourceLogger
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+class TerminationListenerTestCase(unittest.TestCase):
+    """
+    This class tests the delivery of termination requests to running jobs
+    """
+    user_id = "termination_user"
+
+    def setUp(self):
+        self.worker_log = ResourceLogger(host="localhost", port=6379,
+                                         config=Configuration())
+        self.api_log = ResourceLogger(host="localhost", port=6379,
+                                      config=Configuration())
+        if fakeredis is not None:
+            server = fakeredis.FakeServer()
+            self.worker_log.db.redis_server = fakeredis.FakeStrictRedis(
+                server=server)
+            self.api_log.db.redis_server = fakeredis.FakeStrictRedis(
+                server=server)
+        self.resource_id = "resource_id-%s" % str(uuid.uuid4())
+        self.listener = None
+
+    def tearDown(self):
+        if self.listener is not None:
+            self.listener.stop()
+        self.api_log.delete_termination(self.user_id, self.resource_id)
+
+    def test_kill_latency(self):
+        latencies = []
+        for i in range(5):
+            self.listener = self.worker_log.create_termination_listener(
+                self.user_id, self.resource_id)
+            self.assertFalse(self.listener.is_terminated())
+            proc = subprocess.Popen(["sleep", "30"])
+            self.listener.set_process(proc)
+            start = time.time()
+            self.api_log.commit_termination(self.user_id, self.resource_id)
+            proc.wait(timeout=10)
+            latencies.append(time.time() - start)
+            self.assertTrue(self.listener.is_terminated())
+            self.assertNotEqual(proc.returncode, 0)
+            self.listener.stop()
+            self.api_log.delete_termination(self.user_id, self.resource_id)
+
+        latencies.sort()
+        print("Kill latency: median %.1f ms, max %.1f ms"
+              % (latencies[2] * 1000, latencies[-1] * 1000))
+        self.assertLess(latencies[2], 0.5)
+
+    def test_termination_before_start(self):
+        # Termination requests that were committed before the job started
+        self.api_log.commit_termination(self.user_id, self.resource_id)
+        self.listener = self.worker_log.create_termination_listener(
+            self.user_id, self.resource_id)
+        self.assertTrue(self.listener.is_terminated())
+
+        # A process registered after the termination is killed immediately
+        proc = subprocess.Popen(["sleep", "30"])
+        self.listener.set_process(proc)
+        proc.wait(timeout=10)
+        self.assertNotEqual(proc.returncode, 0)
+
+    def test_other_resource(self):
+        self.listener = self.worker_log.create_termination_listener(
+            self.user_id, self.resource_id)
+        self.api_log.commit_termination(self.user_id, "resource_id-other")
+        time.sleep(0.2)
+        self.assertFalse(self.listener.is_terminated())
+        self.api_log.delete_termination(self.user_id, "resource_id-other")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Request scoped credential snapshot
+
+The Redis commands of a request are counted with fakeredis, the tests are
+skipped if fakeredis is not installed.
+"""
+import unittest
+from flask import Flask, g
+from actinia_core.core.common.credential_cache import credential_cache
+from actinia_core.core.common.user import ActiniaUser
+from actinia_core.core.redis_user import redis_user_interface
+from actinia_core.rest.user_auth import verify_password, \
+    check_user_permissions, very_admin_role
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+if fakeredis is not None:
+    class CountingRedis(fakeredis.FakeStrictRedis):
+        """Fake Redis server that counts the executed commands"""
+
+        def __init__(self, *args, **kwargs):
+            fakeredis.FakeStrictRedis.__init__(self, *args, **kwargs)
+            self.commands = []
+
+        def execute_command(self, *args, **options):
+            self.commands.append(args[0])
+            return fakeredis.FakeStrictRedis.execute_command(
+                self, *args, **options)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required to count commands")
+class UserCredentialSnapshotTestCase(unittest.TestCase):
+    """
+    This class tests that a request reads the user credentials with a single
+    Redis command
+    """
+    user_id = "credential_snapshot_user"
+    password = "credential_snapshot_password"
+
+    def setUp(self):
+        self.redis_server = redis_user_interface.redis_server
+        redis_user_interface.redis_server = CountingRedis()
+        credential_cache.invalidate()
+        ActiniaUser.create_user(self.user_id, "group", self.password,
+                                user_role="admin")
+        self.app = Flask(__name__)
+
+    def tearDown(self):
+        ActiniaUser(self.user_id).delete()
+        credential_cache.invalidate()
+        redis_user_interface.redis_server = self.redis_server
+
+    @staticmethod
+    @very_admin_role
+    @check_user_permissions
+    def resource(location_name):
+        """Access the user like the decorators and ResourceBase do"""
+        user = g.user
+        return (user.get_id(), user.get_group(), user.get_role(),
+                user.has_superadmin_role(), user.get_credentials(),
+                user.get_accessible_datasets(), user.get_cell_limit())
+
+    def request(self, username_or_token, password=None):
+        """Run a request and return the number of Redis commands"""
+        commands = redis_user_interface.redis_server.commands
+        del commands[:]
+        with self.app.test_request_context():
+            self.assertTrue(verify_password(username_or_token, password))
+            result = self.resource(location_name="nc_spm_08")
+        self.assertEqual(result[0], self.user_id)
+        self.assertEqual(result[1], "group")
+        self.assertEqual(result[2], "admin")
+        self.assertFalse(result[3])
+        self.assertEqual(result[4]["user_role"], "admin")
+        return list(commands)
+
+    def test_password_request(self):
+        commands = self.request(self.user_id, self.password)
+        print("Redis commands of a password request: %s" % commands)
+        self.assertEqual(commands, ["HGETALL"])
+
+        # Verification from the credential cache
+        commands = self.request(self.user_id, self.password)
+        self.assertEqual(commands, ["HGETALL"])
+
+    def test_token_requests(self):
+        user = ActiniaUser(self.user_id)
+        api_key = user.generate_api_key().decode()
+        token = user.generate_auth_token().decode()
+        self.assertEqual(self.request(api_key), ["HGETALL"])
+        self.assertEqual(self.request(token), ["HGETALL"])
+
+    def test_deleted_user(self):
+        self.assertTrue(self.request(self.user_id, self.password))
+        ActiniaUser(self.user_id).delete()
+        # The cached verification must not authorize a deleted user
+        with self.app.test_request_context():
+            self.assertFalse(verify_password(self.user_id, self.password))
+
+    def test_immutable(self):
+        user = ActiniaUser(self.user_id)
+        credentials = user.load_credentials()
+        with self.assertRaises(AttributeError):
+            credentials.user_role = "superadmin"
+        permissions = credentials.permissions
+        permissions["cell_limit"] = -1
+        self.assertNotEqual(user.get_cell_limit(), -1)
+        user.get_credentials()["permissions"]["cell_limit"] = -1
+        self.assertNotEqual(user.get_cell_limit(), -1)
+
+    def test_update(self):
+        user = ActiniaUser(self.user_id)
+        user.read_from_db()
+        self.assertEqual(user.get_role(), "admin")
+        user.set_role("user")
+        user.update()
+        # The update drops the snapshot of the user object
+        self.assertEqual(user.get_role(), "user")
+        self.assertIsNone(ActiniaUser("unknown_user").load_credentials())
+
+
+if __name__ == '__main__':
+    unittest.main()
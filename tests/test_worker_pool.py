@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#######
+# actinia-core - an open source REST API for scalable, distributed, high
+# performance processing of geographical data that uses GRASS GIS for
+# computational tasks. For details, see https://actinia.mundialis.de/
+#
+# Copyright (c) 2021 mundialis GmbH & Co. KG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#######
+
+"""
+Tests: Pool of pre-forked worker processes
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from multiprocessing import Process
+from multiprocessing.connection import wait
+from actinia_core.core.common.worker_pool import WorkerPool, get_worker_state
+
+__license__ = "GPLv3"
+__author__ = "mundialis"
+__copyright__ = "Copyright 2021, mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis"
+
+
+def write_state(path):
+    """Write the pid and the test environment variable of the worker"""
+    with open(path, "w") as f:
+        f.write("%i %s" % (os.getpid(), os.environ.get("WORKER_POOL_TEST")))
+    os.environ["WORKER_POOL_TEST"] = "modified"
+    os.chdir(tempfile.gettempdir())
+
+
+def fail(code):
+    if code is None:
+        raise Exception("Job failed")
+    sys.exit(code)
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+def setup_job():
+    """A job with an expensive setup like the redis connections of the
+    resource logger
+    """
+    get_worker_state("connection", lambda: time.sleep(0.05) or object())
+
+
+class WorkerPoolTestCase(unittest.TestCase):
+    """
+    This class tests the job execution, the worker reuse and the worker
+    replacement of the worker pool
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "state")
+        self.pool = WorkerPool(size=1, max_jobs=3)
+        self.pool.start()
+
+    def tearDown(self):
+        self.pool.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rmdir(self.tmpdir)
+
+    def run_job(self, target, args=()):
+        proc = self.pool.create_process(target=target, args=args)
+        proc.start()
+        wait([proc.sentinel], 10)
+        self.assertFalse(proc.is_alive())
+        return proc.exitcode
+
+    def read_state(self):
+        self.assertEqual(self.run_job(write_state, (self.path,)), 0)
+        with open(self.path) as f:
+            pid, value = f.read().split()
+        return int(pid), value
+
+    def test_reuse_and_recycle(self):
+        cwd = os.getcwd()
+        pids = [self.read_state() for i in range(4)]
+        # The worker is reused and its environment is restored after each job
+        self.assertEqual(pids[0][0], pids[1][0])
+        self.assertEqual(pids[1][0], pids[2][0])
+        for pid, value in pids:
+            self.assertEqual(value, "None")
+        # The worker is replaced after three jobs
+        self.assertNotEqual(pids[2][0], pids[3][0])
+        self.assertEqual(os.getcwd(), cwd)
+
+    def test_exitcode(self):
+        pid, value = self.read_state()
+        self.assertEqual(self.run_job(fail, (3,)), 3)
+        self.assertEqual(self.run_job(fail, (None,)), 1)
+        # Failed jobs replace the worker
+        self.assertNotEqual(self.read_state()[0], pid)
+
+    def test_terminate(self):
+        pid, value = self.read_state()
+        proc = self.pool.create_process(target=sleep, args=(10,))
+        proc.start()
+        self.assertTrue(proc.is_alive())
+        start = time.time()
+        proc.terminate()
+        self.assertFalse(proc.is_alive())
+        self.assertNotEqual(proc.exitcode, 0)
+        self.assertLess(time.time() - start, 5)
+        # The terminated worker is replaced
+        self.assertNotEqual(self.read_state()[0], pid)
+
+    def test_benchmark(self):
+        num = 20
+        self.pool.max_jobs = None
+        start = time.time()
+        for i in range(num):
+            proc = Process(target=setup_job)
+            proc.start()
+            proc.join()
+        fresh = (time.time() - start) / num
+
+        self.run_job(setup_job)
+        start = time.time()
+        for i in range(num):
+            self.assertEqual(self.run_job(setup_job), 0)
+        pooled = (time.time() - start) / num
+
+        print("Job latency: %.2f ms with new processes, %.2f ms with the "
+              "worker pool" % (fresh * 1000, pooled * 1000))
+        self.assertLess(pooled, fresh)
+
+
+if __name__ == '__main__':
+    unittest.main()